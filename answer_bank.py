@@ -0,0 +1,139 @@
+# -------------------------------
+# Curated Answer Bank
+# -------------------------------
+# Tier 1 of the Q&A router: a small bank of curated answers (one per tool,
+# tension theme, educational panel, ...) indexed by key terms. A question is
+# scored against every entry with an IDF-weighted coverage confidence:
+#
+#   confidence = Σ idf(term) · match(term, entry) / Σ idf(term)
+#
+# over the question's content terms, where match is 1 for a key term (title
+# or alias), 0.5 for a term that only appears in the answer body, else 0.
+# Terms the bank has never seen carry the highest IDF, so off-topic detail in
+# a question pulls confidence down and sends it to the model (tier 2).
+#
+# Lookups are pure Python over a few dozen entries (well under 1 ms); route()
+# keeps per-page hit/escalation counts for stats().
+import re
+import math
+import time
+import threading
+from collections import namedtuple
+
+from similarity import tokenize
+
+DEFAULT_THRESHOLD = 0.6
+KEY_MATCH = 1.0
+BODY_MATCH = 0.5
+
+# Question scaffolding that says nothing about the topic
+FILLER = set(tokenize("""
+tell explain explained describe description mean means meaning define definition give example examples
+please know understand help info information talk show say walk through thing things detail details
+"""))
+
+POSSESSIVE_RE = re.compile(r"['’]s\b")
+
+Match = namedtuple("Match", "entry_id title answer confidence")
+Answer = namedtuple("Answer", "text source entry_id confidence elapsed_ms")
+
+
+class AnswerBank:
+    def __init__(self, threshold=DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.entries = {}    # entry_id -> (title, answer, pages)
+        self.keys = {}       # entry_id -> set of key terms
+        self.bodies = {}     # entry_id -> set of body terms
+        self.postings = {}   # term -> set of entry_ids (key or body)
+        self.lock = threading.Lock()
+        self.counts = {}     # page -> {"local": n, "model": n}
+        self.local_ms = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entry_id, title, answer, aliases=(), pages=None):
+        # pages: page keys ("p1", "p4", ...) the entry may answer on; None = every page
+        keys = self._terms(title)
+        for alias in aliases:
+            keys |= self._terms(alias)
+        body = self._terms(answer) - keys
+        self.entries[entry_id] = (title, answer, set(pages) if pages else None)
+        self.keys[entry_id] = keys
+        self.bodies[entry_id] = body
+        for term in keys | body:
+            self.postings.setdefault(term, set()).add(entry_id)
+
+    def _terms(self, text):
+        return set(tokenize(POSSESSIVE_RE.sub("", str(text or "")))) - FILLER
+
+    def _idf(self, term):
+        return math.log(1 + (len(self.entries) + 1) / (len(self.postings.get(term, ())) + 0.5))
+
+    # ✅ Tier 1 lookup
+    def lookup(self, question, page=None):
+        # Best entry for the question (any confidence), or None if nothing overlaps
+        terms = self._terms(question)
+        if not terms:
+            return None
+        weights = {term: self._idf(term) for term in terms}
+        total = sum(weights.values())
+        candidates = set()
+        for term in terms:
+            candidates |= self.postings.get(term, set())
+
+        best = None
+        for entry_id in candidates:
+            title, answer, pages = self.entries[entry_id]
+            if page is not None and pages is not None and page not in pages:
+                continue
+            keys, body = self.keys[entry_id], self.bodies[entry_id]
+            score = sum(w * (KEY_MATCH if t in keys else BODY_MATCH if t in body else 0.0)
+                        for t, w in weights.items())
+            key_hits = len(terms & keys)
+            rank = (score, key_hits)
+            if key_hits and (best is None or rank > best[0]):
+                best = (rank, Match(entry_id, title, answer, score / total))
+        return best[1] if best else None
+
+    # ✅ Router
+    def route(self, question, page, escalate, threshold=None):
+        # Answer locally above the threshold, otherwise call escalate(question),
+        # which returns the answer text or an Answer of its own
+        threshold = self.threshold if threshold is None else threshold
+        start = time.perf_counter()
+        match = self.lookup(question, page)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        local = match is not None and match.confidence >= threshold
+        with self.lock:
+            counts = self.counts.setdefault(page, {"local": 0, "model": 0})
+            counts["local" if local else "model"] += 1
+            if local:
+                self.local_ms.append(elapsed_ms)
+                del self.local_ms[:-1000]
+        if local:
+            return Answer(match.answer, "bank", match.entry_id, match.confidence, elapsed_ms)
+        confidence = match.confidence if match else 0.0
+        start = time.perf_counter()
+        text = escalate(question)
+        if isinstance(text, Answer):
+            return text   # escalate answered through another tier (e.g. the semantic cache)
+        return Answer(text, "model", None, confidence, (time.perf_counter() - start) * 1000)
+
+    # ✅ Reporting
+    def stats(self):
+        with self.lock:
+            pages = {}
+            for page, counts in self.counts.items():
+                asked = counts["local"] + counts["model"]
+                pages[page] = dict(counts, asked=asked, hit_rate=counts["local"] / asked if asked else 0.0)
+            local = sum(c["local"] for c in self.counts.values())
+            asked = local + sum(c["model"] for c in self.counts.values())
+            samples = sorted(self.local_ms)
+        return {
+            "pages": pages,
+            "asked": asked,
+            "hit_rate": local / asked if asked else 0.0,
+            "local_ms_p50": samples[len(samples) // 2] if samples else 0.0,
+            "local_ms_max": samples[-1] if samples else 0.0,
+        }
@@ -2,53 +2,244 @@
 # Imports
 # -------------------------------
 import os
+import sys
+import atexit
+import random
+import functools
+import contextlib
 import pandas as pd
 import streamlit as st
 import plotly.express as px
-from openai import OpenAI
+from openai import OpenAI, APIError, BadRequestError
 from googleapiclient.discovery import build
 import json
-from fpdf import FPDF
 import time
 import stripe 
 import streamlit.components.v1 as components
+from entitlements import is_premium, checkout_url
+from similarity import SimilarityIndex
+from work_store import WorkStore
+from write_behind import BufferedWorkStore, WriteBehind
+from pdf_export import export_sections
+from chat_history import ChatHistory
+from answer_bank import AnswerBank, Answer
+from semantic_cache import SemanticCache
+from template_library import TemplateLibrary
+from review_cache import ReviewCache, ReviewWarmer, load_popular_roles
+from prefetch import PrefetchStats, SpeculativePrefetcher
+from rich_context import RichContextBuilder, TruncatedReply
+from bulk_insights import BulkAnalyzer, number_comments, pack
+from content_packs import ContentLibrary
+from model_policy import MODEL_POLICY_RECORD, ModelPolicy, load_overrides
+from circuit_breaker import CircuitBreaker, CircuitOpenError, guard
+from state_store import SessionSync, make_store
+from session_memory import MemorySweeper, SessionMemory
+from metrics import (REGISTRY, BYTES_BUCKETS, ActiveSessions, Family, Timed, meter_completions, stats_families,
+                     start_in_background as start_metrics_server)
+from profiler import DETERMINISTIC, SAMPLE, RerunProfiler, profiling_active
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+RERUN_STARTED = time.perf_counter()
 
 stripe.api_key = os.getenv("STRIPE_SECRET_KEY")  # Set your Stripe secret key in environment variables
 
+# ----------------------------
+# 📈 Metrics
+# ----------------------------
+# ✅ Reruns, fragments, AI calls, storage and PDF rendering are timed in-process
+#    (metrics.py); component stats (caches, circuit breaker, prefetch) are read
+#    at scrape time. With METRICS_PORT set, each process serves them at
+#    http://<host>:METRICS_PORT/metrics, apart from the Streamlit port.
+METRICS_PORT = os.getenv("METRICS_PORT")
+
+RERUN_SECONDS = REGISTRY.histogram("rerun_seconds", "Full script reruns, by page", ["page"])
+FRAGMENT_SECONDS = REGISTRY.histogram("fragment_seconds", "Fragment runs, on their own or within a rerun", ["fragment"])
+AI_SECONDS = REGISTRY.histogram("ai_completion_seconds", "Model API calls by call site and outcome", ["site", "outcome"])
+AI_TOKENS = REGISTRY.counter("ai_tokens_total", "Model API tokens by call site", ["site", "kind"])
+STORE_SECONDS = REGISTRY.histogram("store_op_seconds", "State store and repository operations", ["store", "op"])
+PDF_SECONDS = REGISTRY.histogram("pdf_render_seconds", "Page 6 PDF generation")
+PDF_BYTES = REGISTRY.histogram("pdf_bytes", "Size of generated PDFs", buckets=BYTES_BUCKETS)
+
+def export_stats(name, stats, help):
+    # Publish a component's stats()/snapshot() dict on every scrape
+    REGISTRY.register_collector(name, lambda: stats_families(name, stats(), help))
+    return stats
+
+@st.cache_resource(show_spinner=False)
+def get_active_sessions():
+    sessions = ActiveSessions(window=float(os.getenv("METRICS_SESSION_WINDOW", "300")))
+    REGISTRY.register_collector("active_sessions", lambda: [
+        Family("active_sessions", "gauge", "Sessions that reran in the last METRICS_SESSION_WINDOW seconds",
+               [({}, sessions.count())])
+    ])
+    return sessions
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_endpoint():
+    if not METRICS_PORT:
+        return None
+    try:
+        return start_metrics_server(port=int(METRICS_PORT))[0]
+    except OSError as e:
+        print(f"⚠️ Metrics endpoint not started on port {METRICS_PORT}: {e}", file=sys.stderr)
+        return None
+
+# ----------------------------
+# ⏱ Rerun Profiling
+# ----------------------------
+# ✅ Admins (ADMIN_USERS) add ?profile=1 to the URL, or ?profile=deterministic
+#    for cProfile call counts, to profile the next rerun or fragment run of
+#    the current page. The flame graph and top functions are saved under
+#    PROFILE_DIR/<page>/ (profiler.py). PROFILE_SAMPLE_RATE=0.01 profiles 1%
+#    of all reruns in sample mode.
+ADMIN_USERS = {user.strip() for user in os.getenv("ADMIN_USERS", "").split(",") if user.strip()}
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+PROFILE_TOP_N = int(os.getenv("PROFILE_TOP_N", "20"))
+PROFILES = REGISTRY.counter("profiles_total", "Profiled reruns and fragment runs", ["page", "trigger"])
+
+def is_admin(user):
+    return user in ADMIN_USERS
+
+def profile_request():
+    # (mode, trigger) when this run should be profiled, else None
+    if profiling_active():
+        return None   # already inside a profiled rerun
+    requested = st.query_params.get("profile")
+    if requested and is_admin(user_id):
+        return (DETERMINISTIC if requested == DETERMINISTIC else SAMPLE), "admin"
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return SAMPLE, "sampled"
+    return None
+
+@contextlib.contextmanager
+def profiled(page, name):
+    request = profile_request()
+    if request is None:
+        yield
+        return
+    mode, trigger = request
+    profiler = RerunProfiler(name, mode, PROFILE_INTERVAL_MS / 1000)
+    try:
+        with profiler:
+            yield
+    finally:
+        paths = profiler.save(PROFILE_DIR, page, PROFILE_TOP_N)
+        PROFILES.labels(page, trigger).inc()
+        if trigger == "admin":
+            del st.query_params["profile"]   # one run per request
+            st.session_state["last_profile"] = (profiler.report(10), paths)
+
+def timed_fragment(fn):
+    # st.fragment that also records each run in FRAGMENT_SECONDS and can be profiled
+    child = FRAGMENT_SECONDS.labels(fn.__name__)
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        track_session()   # fragment runs skip the top of the script
+        with child.time(), profiled(selected_page.split(":")[0], fn.__name__):
+            return fn(*args, **kwargs)
+    return st.fragment(run)
+
+def render_last_profile():
+    if not is_admin(user_id) or "last_profile" not in st.session_state:
+        return
+    report, paths = st.session_state["last_profile"]
+    with st.sidebar.expander("⏱ Last profile"):
+        st.code(report, language=None)
+        st.caption(f"Flame graph: `{paths['svg']}`")
+
 # ----------------------------
 # Persistent Prompt Tracking
 # ----------------------------
+# ✅ Counters live in the shared state store (state_store.py), so every app
+#    worker sees the same count and increments are atomic. prompt_usage.json
+#    is the old single-process file; a user's count is imported from it once.
 PROMPT_FILE = "prompt_usage.json"
 
-def load_prompt_usage():
-    if os.path.exists(PROMPT_FILE):
-        with open(PROMPT_FILE, "r") as f:
-            return json.load(f)
-    return {}
+@st.cache_resource(show_spinner=False)
+def get_state_store():
+    return Timed(make_store(), STORE_SECONDS, "state", ["get_json", "get_many_json", "put_json", "get_int", "incr", "incr_many", "delete"])
+
+def stored_prompt_count(user):
+    store = get_state_store()
+    count = store.get_int(f"usage:{user}")
+    if count is None:
+        legacy = 0
+        if os.path.exists(PROMPT_FILE):
+            with open(PROMPT_FILE, "r") as f:
+                legacy = json.load(f).get(user, {}).get("count", 0)
+        count = store.incr(f"usage:{user}", legacy)
+    return count
+
+def load_prompt_count(user):
+    # The stored count plus this process's increments the write-behind worker has not applied yet
+    return get_write_behind().read_int(f"usage:{user}", lambda key: stored_prompt_count(user))
+
+def record_prompt_use(user):
+    # Acknowledged in memory (and the journal); the state store is updated in the next batch
+    get_write_behind().submit("incr", f"usage:{user}", amount=1)
+    return usage[user]["count"] + 1
 
-def save_prompt_usage(data):
-    with open(PROMPT_FILE, "w") as f:
-        json.dump(data, f)
+# ----------------------------
+# ✍️ Write-Behind Buffer
+# ----------------------------
+# ✅ Usage increments and repository saves are queued and acknowledged in
+#    memory, then applied by a background worker in batches (write_behind.py):
+#    increments are summed per counter and land in one store round trip
+#    (incr_many) per batch. A local
+#    journal replays anything not yet applied after a restart, and reads
+#    (load_prompt_count, the Page 6 file list and downloads) include queued
+#    writes. WRITE_BEHIND=0 writes synchronously in the script thread.
+REPOSITORY_DIR = "repository"
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "1") == "1"
+WRITE_BEHIND_JOURNAL = os.getenv("WRITE_BEHIND_JOURNAL", os.path.join(REPOSITORY_DIR, "write_behind.jsonl"))
+WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "100"))
+WRITE_BEHIND_MAX_DELAY = float(os.getenv("WRITE_BEHIND_MAX_DELAY", "0.5"))   # seconds
+
+@st.cache_resource(show_spinner=False)
+def get_repository():
+    # The repository itself; pages save through get_work_store()
+    return Timed(WorkStore(REPOSITORY_DIR), STORE_SECONDS, "repository", ["save", "list", "read_text", "open_stream"])
+
+@st.cache_resource(show_spinner=False)
+def get_write_behind():
+    state, repository = get_state_store(), get_repository()
+
+    def apply_increments(ops):
+        totals = {}
+        for op in ops:
+            totals[op["key"]] = totals.get(op["key"], 0) + op["amount"]
+        values = state.incr_many(totals)   # ✅ one round trip per batch
+        return [values[op["key"]] for op in ops]
+
+    def apply_saves(ops):
+        return [repository.save(op["key"], op["sections"], meta=op["meta"], exact=True)["name"] for op in ops]
+
+    os.makedirs(os.path.dirname(WRITE_BEHIND_JOURNAL) or ".", exist_ok=True)
+    buffer = WriteBehind({"incr": apply_increments, "save": apply_saves}, WRITE_BEHIND_JOURNAL,
+                         max_batch=WRITE_BEHIND_MAX_BATCH, max_delay=WRITE_BEHIND_MAX_DELAY,
+                         per_op=["save"], synchronous=not WRITE_BEHIND).start()
+    atexit.register(buffer.stop)
+    export_stats("write_behind", buffer.stats, "Write-behind queue for usage and saves (WriteBehind.stats())")
+    return buffer
 # ----------------------------
 # Premium Upgrade Helper
 # ----------------------------
+# Premium is granted by the Stripe webhook receiver (entitlements.py) once
+# checkout completes; the app only reads the cached entitlement, which
+# picks up the receiver's write within ENTITLEMENT_VERSION_POLL seconds.
 def upgrade_to_premium():
-    usage[user_id]["premium"] = True
-    save_prompt_usage(usage)
-    st.success("✅ Premium activated! Unlimited prompts and repository access.")
-    
+    try:
+        st.link_button("💳 Continue to secure checkout", create_checkout_session())
+    except stripe.StripeError as e:
+        st.error(f"❌ Could not start checkout: {e}")
+
 def create_checkout_session():
-    session = stripe.checkout.Session.create(
-        payment_method_types=['card'],
-        mode='subscription',
-        line_items=[{
-            'price': 'price_12345',  # Replace with your Stripe Price ID
-            'quantity': 1,
-        }],
-        success_url='https://yourapp.com/success?session_id={CHECKOUT_SESSION_ID}',
-        cancel_url='https://yourapp.com/cancel',
-    )
-    return session.url
+    # Memoized per user for the checkout session's validity window
+    return checkout_url(user_id)
 
 # -------------------------------
 # Page Config
@@ -57,7 +248,7 @@ st.set_page_config(page_title="Five-Tool App", layout="wide")
 
 # ✅ Add helper function here
 def check_prompt_limit():
-    if not usage[user_id]["premium"] and usage[user_id]["count"] >= MAX_PROMPTS:
+    if not is_premium(user_id) and usage[user_id]["count"] >= MAX_PROMPTS:
         st.warning("🚫 You have reached your free limit of 5 prompts this month. Upgrade to premium for unlimited access.")
         if st.button("Upgrade to Premium ($9.99/month)"):
             upgrade_to_premium()
@@ -74,19 +265,68 @@ if "show_repository" not in st.session_state:
 if "prompt_count" not in st.session_state:
     st.session_state.prompt_count = 0
 
+start_metrics_endpoint()
+if get_script_run_ctx() is not None:
+    get_active_sessions().touch(get_script_run_ctx().session_id)
+
 MAX_PROMPTS = 5  # Free tier limit
 # ----------------------------
 # Persistent User Tracking
 # ----------------------------
-user_id = "demo_user@example.com"  # Replace with actual login email later
-usage = load_prompt_usage()
-if user_id not in usage:
-    usage[user_id] = {"count": 0, "month": "2025-11", "premium": False}
+DEMO_USER = "demo_user@example.com"
+user_id = DEMO_USER  # Replace with actual login email later
+usage = {user_id: {"count": load_prompt_count(user_id), "month": "2025-11"}}
 
 # -------------------------------
 # OpenAI Client Setup
 # -------------------------------
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))  # ✅ Use environment variable
+# ✅ OPENAI_BASE_URL points the client at any OpenAI-compatible server,
+#    e.g. the local stub: python stub_openai_server.py --port 8001
+# ✅ Every completion goes through one circuit breaker shared by all sessions:
+#    when the API is failing or slow, AI buttons fail fast and pages fall back
+#    to cached or rule-based output instead of blocking reruns on the timeout.
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "45"))   # seconds per request (SDK default is 600)
+
+@st.cache_resource(show_spinner=False)
+def get_circuit_breaker():
+    breaker = CircuitBreaker(
+        name="The AI service",
+        failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+        slow_call_ms=float(os.getenv("BREAKER_SLOW_CALL_MS", "20000")),
+        open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+        ignore=(BadRequestError,),
+    )
+    export_stats("circuit_breaker", breaker.snapshot, "Model API circuit breaker (snapshot())")
+    return breaker
+
+client = guard(OpenAI(
+    api_key=os.getenv("OPENAI_API_KEY"),  # ✅ Use environment variable
+    base_url=os.getenv("OPENAI_BASE_URL") or None,
+    timeout=OPENAI_TIMEOUT,
+), get_circuit_breaker())
+
+def ai_client(site):
+    # The shared client, with latency and tokens recorded under `site`
+    return meter_completions(client, site, AI_SECONDS, AI_TOKENS)
+
+# ✅ Model and max_tokens per request come from the adaptive policy
+#    (model_policy.py): each call site's max_tokens is only the ceiling, the
+#    budget is fitted to the completions observed there, and short questions
+#    with short answers go to the cheaper tier. MODEL_POLICY=fixed restores
+#    the hard-coded values; MODEL_POLICY_FILE holds per-site overrides.
+@st.cache_resource(show_spinner=False)
+def get_model_policy():
+    overrides = load_overrides()
+    overrides.setdefault("record_path", MODEL_POLICY_RECORD)
+    policy = ModelPolicy(**overrides)
+    export_stats("model_policy", policy.stats, "Adaptive model / max_tokens policy (ModelPolicy.stats())")
+    return policy
+
+def ai_complete(site, messages, max_tokens, adaptive=True, **kwargs):
+    # chat.completions.create with the policy's model and budget; an answer the
+    # tighter budget cut short is continued up to the site's own max_tokens
+    return get_model_policy().complete(ai_client(site).chat.completions.create, site, messages, max_tokens,
+                                       adaptive, **kwargs)
 
 # -------------------------------
 # API Keys
@@ -135,59 +375,592 @@ def map_videos_to_tools(videos):
             mapping["Power"] = video["url"]
     return mapping
     
-def generate_rich_context(scores, tools, notes, context_label="General Context"):
-    prompt = f"""
-    You are an organizational psychologist using the Five-Tool Employee Framework.
-    Interpret the following profile:
-    
-    Context: {context_label}
-    Tools: {', '.join(tools)}
-    Scores: {scores}
-    Notes: {notes}
-    
-    Instructions:
-    - Begin with a **Behavioral Summary** that ties together patterns across tools.
-    - For each tool, provide:
-      • Expression at this score (how it shows up day-to-day)
-      • Under-pressure risk (how it distorts under stress)
-      • Calibration/Training (specific interventions to sustain impact)
-    - Explicitly weave in the framework’s tension themes:
-      • Motion vs. Processing
-      • Drive vs. Humility
-      • Systems vs. Flexibility
-      • Consistency vs. Innovation
-      • Clarity vs. Performance
-    - End with a **Leadership Readiness Signal** and **Next 90-Day Interventions**.
-    - Tone: psychologically rich, diagnostic, and grounded in the model. Avoid generic corporate phrasing.
-    """
-
+# ✅ Rich context is generated as structured sections (rich_context.py); only
+#    tools whose score band changed, plus the profile-level sections, are
+#    regenerated when the sliders move.
+ANALYST_SYSTEM = "You are an organizational psychologist analyzing employees with the Five-Tool Employee Framework."
+
+def complete_structured(prompt, schema, max_tokens, site="rich_context", system=ANALYST_SYSTEM):
+    # (text, total tokens); raises on API errors. Safe to call off the script thread.
+    return complete_structured_reply(prompt, schema, max_tokens, site, system)[:2]
+
+def complete_structured_reply(prompt, schema, max_tokens, site="rich_context", system=ANALYST_SYSTEM):
+    # (text, total tokens, finish_reason), for callers that handle a reply cut off at max_tokens
+    # Budgets here are sized per section / comment by the caller, so only the model comes from the policy
+    response = ai_complete(
+        site,
+        [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt},
+        ],
+        max_tokens,
+        adaptive=False,
+        temperature=0.7,
+        response_format={"type": "json_schema", "json_schema": {"name": site, "strict": True, "schema": schema}},
+    )
+    usage_info = getattr(response, "usage", None)
+    choice = response.choices[0]
+    return choice.message.content, getattr(usage_info, "total_tokens", 0) or 0, choice.finish_reason
+
+@st.cache_resource(show_spinner=False)
+def get_rich_context_builder():
+    builder = RichContextBuilder(complete_structured_reply)
+    export_stats("rich_context", builder.stats, "Rich-context section generation (RichContextBuilder.stats())")
+    return builder
+
+def complete_rich_context(scores, tools, notes, context_label="General Context", scale=10, builder=None):
+    bands = [score_band(score, scale) for score in scores]
+    return (builder or get_rich_context_builder()).generate(list(scores), list(tools), bands, notes, context_label)
+
+def generate_rich_context(scores, tools, notes, context_label="General Context", scale=10):
+    prefetched = take_prefetched_rich_context(scores, tools, notes, context_label)
+    if prefetched is not None:
+        return prefetched
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an organizational psychologist analyzing employees with the Five-Tool Employee Framework."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.7,
-            max_tokens=900,
-        )
-        return response.choices[0].message.content
+        return complete_rich_context(scores, tools, notes, context_label, scale)[0]
+    except CircuitOpenError:
+        return rule_based_rich_context(scores, tools, scale)
+    except TruncatedReply:
+        return rule_based_rich_context(scores, tools, scale, notice=AI_INCOMPLETE_NOTICE)
     except Exception as e:
         st.error(f"❌ Error generating rich context: {e}")
         return "Error generating analysis."
 
-def sanitize_text(text):
-    if not text:
-        return ""
-    # Replace em-dash and other problematic Unicode with safe equivalents
-    return (
-        str(text)
-        .replace("—", "-")   # em dash → hyphen
-        .replace("–", "-")   # en dash → hyphen
-        .replace("“", "\"")  # left double quote → "
-        .replace("”", "\"")  # right double quote → "
-        .replace("’", "'")   # apostrophe → '
+AI_UNAVAILABLE_NOTICE = ("_⚠️ The AI service is unavailable right now, so this comes from the framework's "
+                         "rule-based interpretations. Try again in a minute for the full AI analysis._")
+AI_INCOMPLETE_NOTICE = ("_⚠️ The AI analysis came back incomplete, so this comes from the framework's "
+                        "rule-based interpretations. Generate again for the full AI analysis._")
+
+def rule_based_rich_context(scores, tools, scale=10, notice=AI_UNAVAILABLE_NOTICE):
+    # Degraded-mode stand-in for the rich-context analysis, built from the band tables
+    bands = [score_band(score, scale) for score in scores]
+    lines = [notice, ""]
+    for tool, score, band in zip(tools, scores, bands):
+        lines.append(f"- **{tool}:** Score {score}/{scale} ({BAND_STATUS[band]}) → {BAND_IMPLICATIONS[band]}")
+    strengths = [tool for tool, band in zip(tools, bands) if band == "high"]
+    gaps = [tool for tool, band in zip(tools, bands) if band == "low"]
+    lines.append("")
+    lines.append(f"**Lead with:** {', '.join(strengths) if strengths else 'no tool is in the high band yet'}")
+    lines.append(f"**Develop first:** {', '.join(gaps) if gaps else 'no tool is in the low band'}")
+    return "\n".join(lines)
+
+# -------------------------------
+# ⚡ Speculative Rich-Context Prefetch (opt-in)
+# -------------------------------
+# With SPECULATIVE_PREFETCH=1 users can turn on "Prepare analysis while I
+# adjust" in the sidebar: once sliders and notes have been still for
+# SPECULATIVE_DEBOUNCE seconds the analysis starts in the background, so
+# Generate returns immediately when the inputs haven't changed since.
+SPECULATIVE_PREFETCH = os.getenv("SPECULATIVE_PREFETCH", "0") == "1"
+SPECULATIVE_DEBOUNCE = float(os.getenv("SPECULATIVE_DEBOUNCE", "1.5"))
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_stats():
+    stats = PrefetchStats()
+    export_stats("prefetch", stats.snapshot, "Speculative rich-context prefetch (PrefetchStats)")
+    return stats
+
+def rich_context_key(scores, tools, notes, context_label):
+    return (tuple(scores), tuple(tools), notes, context_label)
+
+def get_prefetcher():
+    if not (SPECULATIVE_PREFETCH and st.session_state.get("speculative_prefetch")):
+        return None
+    if "rich_prefetcher" not in st.session_state:
+        builder = get_rich_context_builder()
+        st.session_state.rich_prefetcher = SpeculativePrefetcher(
+            lambda *args: complete_rich_context(*args, builder=builder),
+            debounce=SPECULATIVE_DEBOUNCE, stats=get_prefetch_stats()
+        )
+    return st.session_state.rich_prefetcher
+
+def speculate_rich_context(scores, tools, notes, context_label, scale=10):
+    prefetcher = get_prefetcher()
+    if prefetcher is not None:
+        prefetcher.observe(rich_context_key(scores, tools, notes, context_label),
+                           list(scores), list(tools), notes, context_label, scale)
+
+def take_prefetched_rich_context(scores, tools, notes, context_label):
+    prefetcher = get_prefetcher()
+    if prefetcher is None:
+        return None
+    return prefetcher.take(rich_context_key(scores, tools, notes, context_label))
+
+# -------------------------------
+# Score Interpretation Tables
+# -------------------------------
+# Page 1 scores on 1–10 (≤3 / ≤6 / 7+), Pages 4 & 5 on 1–5 (≤2 / ≤4 / 5)
+BAND_CUTOFFS = {10: (3, 6), 5: (2, 4)}
+
+def score_band(score, scale=10):
+    low, mid = BAND_CUTOFFS[scale]
+    if score <= low:
+        return "low"
+    elif score <= mid:
+        return "mid"
+    return "high"
+
+BAND_STATUS = {
+    "low": "Needs Development",
+    "mid": "Effective",
+    "high": "Exceptional",
+}
+
+BAND_IMPLICATIONS = {
+    "low": "High risk under pressure; requires focused coaching and support.",
+    "mid": "Functional but lacks consistency for high-stakes leadership.",
+    "high": "Strong leadership trait; leverage as a core strength.",
+}
+
+PROFILE_TOOLS = [
+    "Technical Competence",
+    "Problem-Solving Ability",
+    "Adaptability & Continuous Learning",
+    "Communication & Leadership",
+    "Strategic Decision-Making"
+]
+
+# ✅ Detailed interpretation based on the book, keyed by (tool, band)
+LOW_BAND_DETAILS = {
+    "Technical Competence": [
+        "Misses execution rhythm; avoids ambiguity; may disengage under pressure.",
+        "Risk: Reliability gaps erode trust and team cadence.",
+        "Development: Structured technical training and accountability systems.",
+    ],
+    "Problem-Solving Ability": [
+        "Reactive firefighting; freezes or blames others when overwhelmed.",
+        "Risk: Creates chaos instead of solutions.",
+        "Development: Build analytical discipline and scenario planning.",
+    ],
+    "Adaptability & Continuous Learning": [
+        "Resistant to change; lacks proactive learning habits.",
+        "Risk: Falls behind in dynamic environments.",
+        "Development: Micro-learning and resilience coaching.",
+    ],
+    "Communication & Leadership": [
+        "Communication lacks clarity; influence minimal.",
+        "Risk: Team misalignment and low morale.",
+        "Development: Authentic leadership coaching and feedback loops.",
+    ],
+    "Strategic Decision-Making": [
+        "Decisions lack foresight; may chase optics over substance.",
+        "Risk: High chance of costly missteps under pressure.",
+        "Development: Train in strategic frameworks and risk analysis.",
+    ],
+}
+
+MID_BAND_DETAILS = [
+    "Strength: Handles routine tasks and moderate complexity.",
+    "Growth Area: Needs calibration for high-pressure scenarios.",
+    "Development Path: Reinforce rhythm and foresight through structured coaching.",
+]
+
+HIGH_BAND_DETAILS = [
+    "Strength: Demonstrates mastery under pressure; inspires confidence.",
+    "Watch Out: Overuse can drift into dysfunction (e.g., dominance, rigidity).",
+    "Development Path: Maintain humility and balance; leverage as a leadership strength.",
+]
+
+BAND_REALITY = {
+    "low": "Needs Development.",
+    "mid": "Effective but inconsistent.",
+    "high": "Exceptional.",
+}
+
+def _interpretation_block(reality, details):
+    lines = [f"- **Behavioral Reality:** {reality}"]
+    lines += [f"    - {line}" for line in details]
+    return "\n".join(lines)
+
+TOOL_INTERPRETATIONS = {}
+for _tool in PROFILE_TOOLS:
+    TOOL_INTERPRETATIONS[(_tool, "low")] = _interpretation_block(BAND_REALITY["low"], LOW_BAND_DETAILS[_tool])
+    TOOL_INTERPRETATIONS[(_tool, "mid")] = _interpretation_block(BAND_REALITY["mid"], MID_BAND_DETAILS)
+    TOOL_INTERPRETATIONS[(_tool, "high")] = _interpretation_block(BAND_REALITY["high"], HIGH_BAND_DETAILS)
+
+@st.cache_data(show_spinner=False)
+def render_profile_markdown(tools, scores):
+    # One markdown string for the whole profile; memoized on the score vector
+    sections = []
+    for tool, score in zip(tools, scores):
+        band = score_band(score, scale=10)
+        sections.append(f"**{tool} (Score: {score}/10)**\n\n{TOOL_INTERPRETATIONS[(tool, band)]}\n\n---\n")
+    return "\n".join(sections) + "\n"
+
+# -------------------------------
+# 🗂 Saved Work Storage
+# -------------------------------
+
+def collect_work_sections():
+    # (title, text) pairs in the order the saved document has always used
+    state = st.session_state
+    return [
+        ("Page 1 Notes", str(state.get("saved_notes", ""))),
+        ("Page 1 Scores", str(state.get("saved_scores", ""))),
+        ("Page 1 Review", str(state.get("saved_review", ""))),
+        ("Page 1 Rich Context", str(state.get("saved_rich_text", ""))),
+        ("Page 3 Notes", str(state.get("saved_notes_p3", ""))),
+        ("Page 3 AI Insights", str(state.get("saved_rich_text_p3", ""))),
+        ("Page 4 Notes", str(state.get("saved_notes_p4", ""))),
+        ("Page 4 Scores", str(state.get("saved_scores_p4", ""))),
+        ("Page 4 Rich Context", str(state.get("saved_rich_text_p4", ""))),
+        ("Page 5 Notes", str(state.get("saved_notes_p5", ""))),
+        ("Page 5 Scores", str(state.get("saved_scores_p5", ""))),
+        ("Page 5 Rich Context", str(state.get("saved_rich_text_p5", ""))),
+    ]
+
+@st.cache_resource(show_spinner=False)
+def get_work_store():
+    # Saves are queued on the write-behind buffer; queued records list and download like saved ones
+    return BufferedWorkStore(get_repository(), get_write_behind())
+
+# -------------------------------
+# 💬 Chat History
+# -------------------------------
+CHAT_MAX_TURNS = int(os.getenv("CHAT_MAX_TURNS", "50"))  # older turns are dropped
+CHAT_PAGE_SIZE = 5
+# Keyed on user_id: while every visitor is the shared demo user, persisting
+# would hand one visitor's conversation to the next, so it stays off
+CHAT_PERSIST = os.getenv("CHAT_HISTORY_PERSIST", "0") == "1" and user_id != DEMO_USER
+
+def get_chat_history():
+    if "chat_history" not in st.session_state:
+        saved = get_state_store().get_json(f"chat:{user_id}") if CHAT_PERSIST else None
+        st.session_state.chat_history = ChatHistory.from_dict(saved, max_turns=CHAT_MAX_TURNS)
+        st.session_state.chat_visible = CHAT_PAGE_SIZE
+    return st.session_state.chat_history
+
+def save_chat_history(history):
+    if CHAT_PERSIST:
+        get_state_store().put_json(f"chat:{user_id}", history.to_dict())
+
+def show_older_chat():
+    st.session_state.chat_visible = st.session_state.get("chat_visible", CHAT_PAGE_SIZE) + CHAT_PAGE_SIZE
+
+def render_chat_history(history):
+    # Only the newest turns are rendered, as a single markdown block
+    turns, hidden = history.page(st.session_state.get("chat_visible", CHAT_PAGE_SIZE))
+    if not turns:
+        return
+    st.markdown("### 💬 Conversation History")
+    if hidden:
+        st.button(f"⬆️ Load older ({hidden} more)", key="chat_load_older", on_click=show_older_chat)
+    st.markdown("\n\n---\n\n".join(f"**You:** {q}\n\n**AI:** {a}" for q, a in turns) + "\n\n---")
+
+# -------------------------------
+# 🔄 Session State Persistence
+# -------------------------------
+# ✅ Opt-in (SESSION_STATE_PERSIST=1): each page's working state is kept in the
+#    shared state store, so a rerun served by another worker, or a new tab,
+#    picks up where the user left off. A page's group is loaded the first time
+#    the page renders in a session and written back only when it changes.
+#    Figures are not stored; they are redrawn from the saved scores.
+#    Like CHAT_PERSIST it is keyed on user_id, so it is ignored while user_id
+#    is the shared demo user.
+SESSION_PERSIST = os.getenv("SESSION_STATE_PERSIST", "0") == "1" and user_id != DEMO_USER
+
+SESSION_GROUPS = {
+    "p1": ["saved_notes", "saved_scores", "saved_review", "saved_rich_text"],
+    "p3": ["saved_notes_p3", "saved_scores_p3", "saved_review_p3", "saved_rich_text_p3", "saved_fig_p3",
+           "ai_insights_p3"],
+    "p4": ["saved_notes_p4", "saved_scores_p4", "saved_rich_text_p4",
+           "analysis_p4", "rich_text_p4", "scores_p4", "notes_p4"],
+    "p5": ["saved_notes_p5", "saved_scores_p5", "saved_rich_text_p5", "rich_text_p5", "scores_p5", "notes_p5"],
+}
+
+# Figure key -> (group, scores key, radar axes, title), matching the charts each page draws
+SESSION_FIGURES = {
+    "saved_fig": ("p1", "saved_scores", PROFILE_TOOLS, "5-Tool Employee Radar Chart"),
+    "fig_p4": ("p4", "scores_p4", ["Speed", "Power", "Fielding", "Hitting for Average", "Arm Strength"],
+               "Behavioral Tool Scoring Radar"),
+    "saved_fig_p4": ("p4", "saved_scores_p4", ["Speed", "Power", "Fielding", "Hitting for Average", "Arm Strength"],
+                     "Behavioral Tool Scoring Radar"),
+    "fig_p5": ("p5", "scores_p5", ["Speed", "Power", "Fielding", "Hitting", "Arm Strength"],
+               "Toxicity Profile Radar Chart"),
+    "saved_fig_p5": ("p5", "saved_scores_p5", ["Speed", "Power", "Fielding", "Hitting", "Arm Strength"],
+                     "Toxicity Profile Radar Chart"),
+}
+
+def rebuild_session_figures(state, group, keys=None):
+    for fig_key, (fig_group, scores_key, theta, title) in SESSION_FIGURES.items():
+        scores = state.get(scores_key)
+        if fig_group == group and (keys is None or fig_key in keys) and fig_key not in state and isinstance(scores, list) and len(scores) == len(theta):
+            fig = px.line_polar(r=scores, theta=theta, line_close=True, title=title)
+            fig.update_traces(fill='toself')
+            state[fig_key] = fig
+
+def session_sync():
+    return SessionSync(get_state_store(), user_id, SESSION_GROUPS, rebuild=rebuild_session_figures)
+
+def hydrate_session_state(*groups):
+    # Called at the top of each page: loads only that page's groups, once per session
+    if SESSION_PERSIST:
+        session_sync().hydrate(st.session_state, list(groups) or None)
+
+def persist_session_state():
+    # Called after a page or fragment run; writes groups whose values changed
+    if SESSION_PERSIST:
+        session_sync().sync(st.session_state)
+
+# -------------------------------
+# 🧠 Session Memory
+# -------------------------------
+# ✅ A background sweep (session_memory.py) estimates each session's memory by
+#    session_state key. Sessions idle for SESSION_IDLE_SECONDS lose their heavy
+#    values: long text and chat history are spilled to the state store, figures
+#    are dropped. Both come back at the start of the session's next run.
+SESSION_IDLE_SECONDS = float(os.getenv("SESSION_IDLE_SECONDS", "900"))
+SESSION_SWEEP_INTERVAL = float(os.getenv("SESSION_SWEEP_INTERVAL", "60"))
+
+SPILL_KEYS = ["saved_rich_text", "saved_rich_text_p3", "saved_rich_text_p4", "saved_rich_text_p5", "rich_text_p4",
+              "rich_text_p5", "analysis_p4", "ai_insights_p3", "bulk_insights_p3", "chat_history",
+              SessionSync.BOOKKEEPING]
+DROP_KEYS = list(SESSION_FIGURES) + ["last_profile"]   # rebuilt from scores / regenerated on demand
+
+def session_alive(session_id):
+    return not Runtime.exists() or Runtime.instance().is_active_session(session_id)
+
+@st.cache_resource(show_spinner=False)
+def get_session_memory():
+    memory = SessionMemory(
+        get_state_store(), idle_seconds=SESSION_IDLE_SECONDS, spill_keys=SPILL_KEYS, drop_keys=DROP_KEYS,
+        codecs={"chat_history": (lambda history: history.to_dict(),
+                                 lambda saved: ChatHistory.from_dict(saved, max_turns=CHAT_MAX_TURNS))},
+        rebuild=lambda state, keys: [rebuild_session_figures(state, group, keys) for group in SESSION_GROUPS],
+        alive=session_alive,
     )
+    MemorySweeper(memory, SESSION_SWEEP_INTERVAL).start()
+    export_stats("session_memory", memory.stats, "Session memory accounting and idle eviction (SessionMemory.stats())")
+    return memory
+
+# Streamlit versions whose ScriptRunContext.session_state (a thread-safe
+# SafeSessionState) the sweeper thread may read and evict from
+SESSION_STATE_MAJOR_VERSIONS = {1}
+SESSION_STATE_METHODS = ("filtered_state", "__contains__", "__getitem__", "__delitem__")
+
+def sweepable_session_state(ctx):
+    # The session's state as the sweeper thread can use it; st.session_state only resolves on the
+    # script thread. None on a Streamlit whose context doesn't look like the one this was written for
+    state = getattr(ctx, "session_state", None)
+    if int(st.__version__.split(".")[0]) not in SESSION_STATE_MAJOR_VERSIONS:
+        return None
+    if state is None or not all(hasattr(type(state), name) for name in SESSION_STATE_METHODS):
+        return None
+    return state
+
+def track_session():
+    # Marks the session active and restores anything evicted while it was idle
+    ctx = get_script_run_ctx()
+    state = sweepable_session_state(ctx) if ctx is not None else None
+    if state is None:
+        return
+    memory = get_session_memory()
+    memory.touch(ctx.session_id, state, user_id)
+    memory.restore(ctx.session_id, st.session_state)
+
+def render_session_memory():
+    if not is_admin(user_id):
+        return
+    memory = get_session_memory()
+    with st.sidebar.expander("🧠 Session memory"):
+        rows = memory.report(top=10)
+        stats = memory.stats()
+        st.caption(f"{stats['sessions']} sessions, {stats['evictions']} evictions, "
+                   f"{(stats['spilled_bytes'] + stats['dropped_bytes']) / 1e6:.1f} MB freed")
+        st.dataframe(pd.DataFrame([{
+            "session": row["session"][:8], "user": row["user"], "idle (s)": round(row["idle_s"]),
+            "KB": round(row["bytes"] / 1024), "evicted": row["evicted"],
+            "largest keys": ", ".join(f"{key} ({size // 1024} KB)" for key, size in row["top_keys"]),
+        } for row in rows]), hide_index=True)
+
+track_session()
+
+# -------------------------------
+# 📚 Framework Content Packs
+# -------------------------------
+# ✅ The framework text, tables, panels and rubric on Pages 2-5 are versioned
+#    JSON files in data/content/ (content_packs.py), compiled once per process
+#    into DataFrames, pre-rendered HTML and retrieval sections. Edited files
+#    are picked up within CONTENT_CHECK_SECONDS without a restart.
+@st.cache_resource(show_spinner=False)
+def get_content():
+    library = ContentLibrary()
+    export_stats("content_packs", library.stats, "Framework content packs (ContentLibrary.stats())")
+    return library
+
+# -------------------------------
+# 🧭 Answer Bank (tier 1 Q&A)
+# -------------------------------
+# Curated answers are served locally when a question clearly matches one of
+# them; everything else on Pages 4 & 5 still goes to the model.
+ANSWER_BANK_THRESHOLD = float(os.getenv("ANSWER_BANK_THRESHOLD", "0.6"))
+
+# ✅ Tool answers (Page 1 keyword answers), keyed by tool with the aliases that select them
+FRAMEWORK_ANSWERS = {
+    "Hitting for Average": (["Technical Competence", "hitting"], """**Hitting for Average → Technical Competence**
+This tool represents a professional’s ability to perform job-specific duties effectively and consistently.
+- **Why It Matters:** Without strong technical fundamentals, everything else suffers.
+- **Behavioral Insight:** High scores indicate rhythm and repeatability under pressure; low scores often signal avoidance of ambiguity or over-reliance on routine.
+- **Development Path:** Build structured training plans, reinforce accountability, and encourage precision under stress."""),
+    "Fielding": (["Problem-Solving Ability", "problem solver"], """**Fielding → Problem-Solving Ability**
+A great fielder anticipates and adjusts—just like a skilled problem solver who diagnoses inefficiencies early.
+- **Why It Matters:** Prevents chaos and costly errors.
+- **Behavioral Insight:** High scores show foresight and composure; low scores reveal rigidity or blame-shifting.
+- **Development Path:** Scenario planning and root-cause analysis training."""),
+    "Speed": (["Adaptability & Continuous Learning", "adapt", "agility"], """**Speed → Adaptability & Continuous Learning**
+Speed in business means agility and learning under pressure.
+- **Why It Matters:** Keeps employees relevant in fast-changing environments.
+- **Behavioral Insight:** High scores reflect emotional agility and proactive learning; low scores suggest resistance to change.
+- **Development Path:** Micro-learning programs and resilience coaching."""),
+    "Arm Strength": (["Communication & Leadership", "arm", "communicate"], """**Arm Strength → Communication & Leadership**
+Communication drives clarity and influence across teams.
+- **Why It Matters:** Aligns stakeholders and builds trust.
+- **Behavioral Insight:** High scores show authentic leadership; low scores risk optics-driven behavior or dominance.
+- **Development Path:** Coaching on clarity, empathy, and feedback loops."""),
+    "Power": (["Strategic Decision-Making", "strategy", "decisions"], """**Power → Strategic Decision-Making**
+Power is about foresight and decisive action.
+- **Why It Matters:** Shapes long-term success and prevents costly missteps.
+- **Behavioral Insight:** High scores indicate confidence with humility; low scores reveal impulsiveness or short-term thinking.
+- **Development Path:** Strategic frameworks and risk analysis training."""),
+}
+
+GENERAL_FRAMEWORK_ANSWER = """The 5 Tool Employee Framework evaluates five core skills:
+- Technical Competence
+- Problem-Solving Ability
+- Adaptability & Continuous Learning
+- Communication & Leadership
+- Strategic Decision-Making
+
+Ask about any tool for a detailed explanation."""
+
+# ✅ Page 4 calibration tensions and panels and Page 5 concepts come from these packs' sections
+BANK_PACKS = ["p4_calibration", "p5_toxicity"]
+
+def get_answer_bank():
+    # Rebuilt when one of BANK_PACKS is reloaded
+    return build_answer_bank(get_content().digest(BANK_PACKS))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def build_answer_bank(digest):
+    bank = AnswerBank(threshold=ANSWER_BANK_THRESHOLD)
+    for tool, (aliases, answer) in FRAMEWORK_ANSWERS.items():
+        bank.add(f"tool:{tool}", tool, answer, aliases=aliases)
+    for section in get_content().sections(BANK_PACKS):
+        bank.add(section.id, section.title, section.text, aliases=section.aliases, pages=section.pages)
+    export_stats("answer_bank", bank.stats, "Answer bank hit rates (AnswerBank.stats())")
+    return bank
+
+def render_routed_answer(answer):
+    st.markdown(answer.text)
+    if answer.source == "bank":
+        st.caption(f"⚡ Answered from the framework guide in {answer.elapsed_ms:.1f} ms "
+                   f"(confidence {answer.confidence:.2f}). Ask something more specific for a tailored AI answer.")
+    elif answer.source == "cache":
+        st.caption(f"♻️ Reused the answer to a similar question (“{answer.entry_id}”, similarity "
+                   f"{answer.confidence:.2f}) in {answer.elapsed_ms:.1f} ms. Rephrase with more detail for a fresh answer.")
+
+# -------------------------------
+# Semantic Question Cache
+# -------------------------------
+# Questions that went to the model are cached by meaning, so a rewording of an
+# earlier question ("explain 360 feedback" / "what's 360-degree feedback?")
+# reuses its answer. Thresholds are cosine similarities, per page: Page 2's
+# research-level deep dives need a closer match than the Page 4/5 Q&A boxes.
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "10000"))   # questions per page
+SEMANTIC_CACHE_THRESHOLDS = {"p2": 0.85, "p4": 0.8, "p5": 0.8}
+
+@st.cache_resource(show_spinner=False)
+def get_semantic_cache():
+    cache = SemanticCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLDS)
+    export_stats("semantic_cache", cache.stats, "Semantic question cache (SemanticCache.stats())")
+    return cache
+
+AI_OUTAGE_NOTICE = "_⚠️ The AI service is unavailable right now; this is the closest saved answer._"
+AI_UNAVAILABLE = "⚠️ The AI service is unavailable right now. Please try again in a minute."
+DEGRADED_CACHE_THRESHOLD = 0.5   # while the model circuit is open, a looser match beats no answer
+
+def cached_escalation(page, escalate):
+    # Second tier for AnswerBank.route: semantic cache, then the model
+    def ask(question):
+        try:
+            return get_semantic_cache().route(question, page, escalate)
+        except (CircuitOpenError, APIError):
+            # Open circuit or a failed model call: fall back instead of raising into the page
+            return degraded_answer(question, page)
+    return ask
+
+def degraded_answer(question, page):
+    # Closest cached or curated answer while the model is unavailable
+    hit = get_semantic_cache().lookup(question, page, threshold=DEGRADED_CACHE_THRESHOLD)
+    if hit is not None:
+        return Answer(f"{AI_OUTAGE_NOTICE}\n\n{hit.answer}", "cache", hit.question, hit.similarity, 0.0)
+    match = get_answer_bank().lookup(question, page)
+    if match is not None:
+        return Answer(f"{AI_OUTAGE_NOTICE}\n\n{match.answer}", "bank", match.entry_id, match.confidence, 0.0)
+    return Answer(f"{AI_UNAVAILABLE} No saved answer is close enough to this question yet.", "unavailable", None, 0.0, 0.0)
+
+# -------------------------------
+# 🔎 Similar Employees Index
+# -------------------------------
+SIMILARITY_INDEX_FILE = os.path.join(REPOSITORY_DIR, "similarity_index.jsonl")
+
+# Page 1 lists the professional names in this order; Pages 4/5 use Speed, Power, Fielding, Hitting, Arm
+CANONICAL_TOOLS = ["Hitting for Average", "Fielding", "Speed", "Arm Strength", "Power"]
+PAGE_TOOL_ORDER = {"p1": [0, 1, 2, 3, 4], "p4": [3, 2, 0, 4, 1], "p5": [3, 2, 0, 4, 1]}
+PAGE_SCALE = {"p1": 10, "p4": 5, "p5": 5}
+PAGE_LABELS = {"p1": "Page 1", "p3": "Page 3", "p4": "Page 4", "p5": "Page 5"}
+
+# Session keys holding each page's saved work: (notes, scores, rich text)
+SAVED_KEYS = {
+    "p1": ("saved_notes", "saved_scores", "saved_rich_text"),
+    "p3": ("saved_notes_p3", None, "saved_rich_text_p3"),
+    "p4": ("saved_notes_p4", "saved_scores_p4", "saved_rich_text_p4"),
+    "p5": ("saved_notes_p5", "saved_scores_p5", "saved_rich_text_p5"),
+}
+
+def canonical_vector(scores, page):
+    # Reorder to CANONICAL_TOOLS and scale to 0–1 so 1–10 and 1–5 scores compare
+    if not scores or page not in PAGE_TOOL_ORDER:
+        return None
+    top = PAGE_SCALE[page]
+    return [(scores[i] - 1) / (top - 1) for i in PAGE_TOOL_ORDER[page]]
+
+@st.cache_resource(show_spinner=False)
+def get_similarity_index():
+    return SimilarityIndex.load(SIMILARITY_INDEX_FILE)
+
+def index_saved_work(work_id):
+    index = get_similarity_index()
+    for page, (notes_key, scores_key, rich_key) in SAVED_KEYS.items():
+        notes = str(st.session_state.get(notes_key) or "")
+        scores = st.session_state.get(scores_key) if scores_key else None
+        rich_text = str(st.session_state.get(rich_key) or "")
+        if not notes.strip() and not scores:
+            continue
+        # Notes count twice so they outweigh the longer, more generic AI text
+        index.add(
+            f"{work_id}#{page}",
+            vector=canonical_vector(scores, page),
+            text=f"{notes}\n{notes}\n{rich_text}",
+            meta={"work": work_id, "page": PAGE_LABELS[page], "notes": notes[:200], "scores": scores},
+        )
+
+def render_similar_employees(query_text, vector=None, key="similar"):
+    if st.button("🔎 Find Similar Employees", key=f"{key}_button"):
+        if not query_text.strip() and vector is None:
+            st.warning("Add notes or scores to search with.")
+            return
+        start = time.perf_counter()
+        matches = get_similarity_index().query(text=query_text, vector=vector, k=5)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if not matches:
+            st.info("No similar saved assessments yet. Saved work is indexed automatically.")
+            return
+        lines = [f"**{len(matches)} closest saved assessments** _({elapsed_ms:.1f} ms)_", ""]
+        for entry_id, score, meta in matches:
+            scores = f" — scores {meta['scores']}" if meta.get("scores") else ""
+            lines.append(f"- **{meta['work']}** ({meta['page']}, match {score:.0%}){scores}: {meta['notes']}")
+        st.markdown("\n".join(lines))
 
 # -------------------------------
 # Subscription Logic
@@ -203,15 +976,28 @@ def unlock_page(page, price):
     st.warning(f"This page requires a subscription: {price}")
     st.button("Unlock Now")
 
-# -------------------------------
-# 🔍 OpenAI Setup
-client = OpenAI()
-
 # -------------------------------
 # 🧠 Template Discovery Module
 # -------------------------------
+@st.cache_resource(show_spinner=False)
+def get_template_library():
+    return TemplateLibrary.load()
+
+def render_role_templates(library, role):
+    family = library.family(role)
+    st.markdown(f"### 🧰 {role.title} — {role.family}")
+    st.markdown("#### 💬 Review Phrases\n" + "\n".join(f"- {phrase}" for phrase in family["phrases"]))
+    st.markdown("#### 🌐 Templates and Examples\n" + "\n".join(
+        [f"- [{label}]({url})" for label, url in library.templates]
+        + [f"- [Occupational Outlook: {role.family}]({family['outlook']})"]
+    ))
+    st.markdown("#### 📚 More Phrase Libraries\n" + "\n".join(
+        f"- [{label}]({url})" for label, url in library.phrase_libraries
+    ))
+
 def render_template_discovery():
     st.title("🧠 Behavioral Intelligence App — Template Discovery")
+    library = get_template_library()
 
     role_query = st.text_input(
         "Ask me anything about job reviews, templates, or phrases",
@@ -236,74 +1022,172 @@ def render_template_discovery():
             """)
             return
 
+        # ✅ Role lookup: exact, contained or typo-tolerant match, plus autocomplete
+        start = time.perf_counter()
+        match, score = library.match(role_query)
+        suggestions = library.suggest(role_query)
+        if match is not None:
+            suggestions = [match] + [r for r in suggestions if r != match]
+        elif not suggestions:
+            fuzzy, fuzzy_score = library.fuzzy(role_query)
+            suggestions = [fuzzy] if fuzzy is not None and fuzzy_score >= 0.6 else []
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        if suggestions:
+            titles = [r.title for r in suggestions]
+            picked = st.selectbox("Matching roles", titles, index=0)
+            st.caption(f"{len(library):,} roles searched in {elapsed_ms:.1f} ms")
+            role = suggestions[titles.index(picked)]
+            render_role_templates(library, role)
+            render_job_review_section(role.title)
+            return
+
         # ✅ Conversational fallback for vague help requests
         if "help" in role or "phrases" in role or "statements" in role:
             st.markdown("### 💬 Helpful Job Review Phrases & Comments")
-            st.markdown("- [Status.net: Job Knowledge Phrases](https://status.net/articles/job-knowledge-performance-review-phrases-paragraphs-examples/)")
-            st.markdown("- [BuddiesHR: 75 Review Phrases](https://blog.buddieshr.com/75-effective-performance-review-phrases-examples/)")
-            st.markdown("- [Engage & Manage: 120 Review Comments](https://engageandmanage.com/blog/performance-review-example-phrases-comments/)")
+            st.markdown("\n".join(f"- [{label}]({url})" for label, url in library.phrase_libraries))
             return
 
-        # ✅ Role-specific or general template links
+        # ✅ Unknown role: general templates, and an AI-written review on request
         st.markdown("### 🌐 General Review Templates and Examples")
-        st.markdown("- [Native Teams: 30 Role-Based Review Examples](https://nativeteams.com/blog/performance-review-examples)")
-        st.markdown("- [BetterUp: 53 Performance Review Examples](https://www.betterup.com/blog/performance-review-examples)")
-        st.markdown("- [Indeed: Review Template Library](https://www.indeed.com/career-advice/career-development/performance-review-template)")
+        st.markdown("\n".join(f"- [{label}]({url})" for label, url in library.templates))
+        st.info(f"**{role_query}** isn't in the template library yet.")
+        render_job_review_section(role_query)
+
 # -------------------------------
 # 🎬 Gritty Job Review Generator
 # -------------------------------
-def generate_job_review(role, notes=None):
-    st.info(f"🔍 Generating realistic job review for: **{role}**")
-
-    # Build the prompt inside the function
-    prompt = f"""
+# ✅ Generic reviews are cached per normalized role and pre-generated for
+#    popular roles by a background worker; only user notes reach the model.
+REVIEW_WARMUP = os.getenv("REVIEW_WARMUP", "1" if os.getenv("OPENAI_API_KEY") else "0") == "1"
+JOB_REVIEW_SYSTEM = "You are a workplace analyst writing realistic job reviews for professionals."
+JOB_REVIEW_SECTIONS = ["Job Summary", "Key Responsibilities", "Required Skills and Tools",
+                       "Compensation and Schedule", "Pros and Cons", "Interview Tips", "Career Path"]
+OUTLINE_LINE_CHARS = 160   # per section of the cached review quoted in the notes prompt
+
+def job_review_prompt(role):
+    sections = "\n    ".join(f"- {section}" for section in JOB_REVIEW_SECTIONS)
+    return f"""
     Write a realistic, role-specific job review for the position: {role}.
     Use a clear, professional tone with practical insights. Include:
 
-    - Job Summary
-    - Key Responsibilities
-    - Required Skills and Tools
-    - Compensation and Schedule
-    - Pros and Cons
-    - Interview Tips
-    - Career Path
+    {sections}
 
     Avoid generic corporate language. Make it useful for someone considering this job.
     """
 
-    if notes:
-        prompt += f"\n\nIncorporate these user-provided notes into the review:\n{notes}"
+def review_outline(review):
+    # Each section heading of a generated review with its first line, clipped;
+    # the first lines of the review when no heading is recognised
+    lines = [line.strip() for line in review.splitlines() if line.strip()]
+    headings = [i for i, line in enumerate(lines)
+                if any(section.lower() in line.lower() for section in JOB_REVIEW_SECTIONS) and len(line) < 60]
+    if not headings:
+        return "\n".join(line[:OUTLINE_LINE_CHARS] for line in lines[:len(JOB_REVIEW_SECTIONS)])
+    outline = []
+    for i in headings:
+        outline.append(lines[i].strip("#*: "))
+        if i + 1 < len(lines) and i + 1 not in headings:
+            outline.append(f"  {lines[i + 1][:OUTLINE_LINE_CHARS]}")
+    return "\n".join(outline)
+
+def job_review_notes_prompt(role, review, notes):
+    # The cached review goes in as an outline (headings and first lines, <=300
+    # prompt tokens instead of ~800 for the full text); the 350-token answer
+    # is an addendum to it, not a second review
+    return f"""
+    This general job review for the position {role} already exists (outline):
+
+    {review_outline(review)}
+
+    Write only a short addendum explaining what these user-provided notes change
+    in it: which responsibilities, pros and cons, or interview tips differ, and why.
+    Refer to its sections by name and do not repeat what is unchanged.
+
+    Notes:
+    {notes}
+    """
+
+def complete_job_review(prompt, max_tokens=800, site="job_review"):
+    response = ai_complete(
+        site,
+        [
+            {"role": "system", "content": JOB_REVIEW_SYSTEM},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens,
+        temperature=0.7
+    )
+    return response.choices[0].message.content
+
+@st.cache_resource(show_spinner=False)
+def get_review_cache():
+    cache = ReviewCache()
+    export_stats("review_cache", cache.stats, "Pre-generated job reviews (ReviewCache.stats())")
+    if REVIEW_WARMUP:
+        ReviewWarmer(cache, lambda role: complete_job_review(job_review_prompt(role)), load_popular_roles()).start()
+    return cache
+
+get_review_cache()  # opens the cache and starts the warm-up worker once per process
+
+def generate_job_review(role, notes=None):
+    cache = get_review_cache()
+    cached = cache.get(role)
+    if cached and not notes:
+        st.markdown("### 🧾 Realistic Job Review")
+        st.caption(f"⚡ Pre-generated review for {cached['role']} — no prompt used.")
+        st.write(cached["review"])
+        return
+
+    st.info(f"🔍 Generating realistic job review for: **{role}**")
+    if cached:
+        # Incremental: reuse the cached review, only the notes addendum is generated
+        prompt, max_tokens = job_review_notes_prompt(role, cached["review"], notes), 350
+    else:
+        prompt, max_tokens = job_review_prompt(role), 800
+        if notes:
+            prompt += f"\n\nIncorporate these user-provided notes into the review:\n{notes}"
+
+    if get_circuit_breaker().is_open():
+        st.warning(AI_UNAVAILABLE)
+        return
 
     # Check prompt limit  
-    if not usage[user_id]["premium"] and usage[user_id]["count"] >= MAX_PROMPTS:
+    if not is_premium(user_id) and usage[user_id]["count"] >= MAX_PROMPTS:
         st.warning("🚫 You have reached your free limit of 5 prompts this month. Upgrade to premium for unlimited access.")
         if st.button("Upgrade to Premium ($9.99/month)"):
             upgrade_to_premium()
     else:
         # After generating AI response:
-        usage[user_id]["count"] += 1
-        save_prompt_usage(usage)
+        usage[user_id]["count"] = record_prompt_use(user_id)
         try:
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a workplace analyst writing realistic job reviews for professionals."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=800
-            )
+            review_text = complete_job_review(prompt, max_tokens, "job_review_notes" if cached else "job_review")
             st.session_state.prompt_count += 1
-            review_text = response.choices[0].message.content
+            if cached:
+                review_text = f"{cached['review']}\n\n### 📝 What Your Notes Change\n\n{review_text}"
+            elif not notes:
+                cache.put(role, review_text)
             st.markdown("### 🧾 Realistic Job Review")
             st.write(review_text)
 
         except Exception as e:
             st.error(f"❌ Error generating review: {e}")
+
+def render_job_review_section(role):
+    notes = st.text_area("Notes to tailor the review (optional)", key="review_notes").strip()
+    if notes:
+        if st.button("Tailor Review to My Notes"):
+            generate_job_review(role, notes)
+    elif role in get_review_cache():
+        generate_job_review(role)
+    elif st.button("Generate a Realistic Job Review"):
+        generate_job_review(role)
+
 # -------------------------------
 # ✅ Module 1 Wrapper
 # -------------------------------
 def render_module_1():
+    hydrate_session_state("p1")
     # ✅ Title and Intro
     st.title("The 5 Tool Employee Framework")
     st.markdown("### _Introduction into the 5 Tool Employee Framework_")
@@ -337,433 +1221,318 @@ def render_module_1():
 
     st.markdown("---")
 
-    # ✅ Chatbox Section
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    st.subheader("🤖 Ask AI About the Framework")
-    if "chat_history" not in st.session_state:
-        st.session_state.chat_history = []
-
-    user_question = st.text_input("Ask a question (e.g., 'Tell me more about hitting for average', 'Explain adaptability')")
-
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Send Question"):
-        if user_question.strip():
-            # ✅ Rich descriptive answers based on question keywords
-            q_lower = user_question.lower()
-            if "hitting" in q_lower or "technical" in q_lower:
-                ai_answer = """
-                **Hitting for Average → Technical Competence**
-                This tool represents a professional’s ability to perform job-specific duties effectively and consistently.
-                - **Why It Matters:** Without strong technical fundamentals, everything else suffers.
-                - **Behavioral Insight:** High scores indicate rhythm and repeatability under pressure; low scores often signal avoidance of ambiguity or over-reliance on routine.
-                - **Development Path:** Build structured training plans, reinforce accountability, and encourage precision under stress.
-                """
-            elif "fielding" in q_lower or "problem" in q_lower:
-                ai_answer = """
-                **Fielding → Problem-Solving Ability**
-                A great fielder anticipates and adjusts—just like a skilled problem solver who diagnoses inefficiencies early.
-                - **Why It Matters:** Prevents chaos and costly errors.
-                - **Behavioral Insight:** High scores show foresight and composure; low scores reveal rigidity or blame-shifting.
-                - **Development Path:** Scenario planning and root-cause analysis training.
-                """
-            elif "speed" in q_lower or "adaptability" in q_lower:
-                ai_answer = """
-                **Speed → Adaptability & Continuous Learning**
-                Speed in business means agility and learning under pressure.
-                - **Why It Matters:** Keeps employees relevant in fast-changing environments.
-                - **Behavioral Insight:** High scores reflect emotional agility and proactive learning; low scores suggest resistance to change.
-                - **Development Path:** Micro-learning programs and resilience coaching.
-                """
-            elif "arm" in q_lower or "communication" in q_lower:
-                ai_answer = """
-                **Arm Strength → Communication & Leadership**
-                Communication drives clarity and influence across teams.
-                - **Why It Matters:** Aligns stakeholders and builds trust.
-                - **Behavioral Insight:** High scores show authentic leadership; low scores risk optics-driven behavior or dominance.
-                - **Development Path:** Coaching on clarity, empathy, and feedback loops.
-                """
-            elif "power" in q_lower or "strategic" in q_lower:
-                ai_answer = """
-                **Power → Strategic Decision-Making**
-                Power is about foresight and decisive action.
-                - **Why It Matters:** Shapes long-term success and prevents costly missteps.
-                - **Behavioral Insight:** High scores indicate confidence with humility; low scores reveal impulsiveness or short-term thinking.
-                - **Development Path:** Strategic frameworks and risk analysis training.
-                """
+    # ✅ Chat and profile builder rerun independently of each other and the page
+    @timed_fragment
+    def framework_chat():
+        # ✅ Chatbox Section
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        st.subheader("🤖 Ask AI About the Framework")
+        history = get_chat_history()
+
+        user_question = st.text_input("Ask a question (e.g., 'Tell me more about hitting for average', 'Explain adaptability')")
+
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Send Question"):
+            if user_question.strip():
+                # ✅ Rich descriptive answers from the answer bank; Page 1 never calls the model
+                match = get_answer_bank().lookup(user_question, page="p1")
+                ai_answer = match.answer if match else GENERAL_FRAMEWORK_ANSWER
+                history.append(user_question, ai_answer.strip())
+                save_chat_history(history)
             else:
-                ai_answer = """
-                The 5 Tool Employee Framework evaluates five core skills:
-                - Technical Competence
-                - Problem-Solving Ability
-                - Adaptability & Continuous Learning
-                - Communication & Leadership
-                - Strategic Decision-Making
-                Ask about any tool for a detailed explanation.
-                """
-            st.session_state.chat_history.append((user_question, ai_answer.strip()))
-        else:
-            st.warning("Please enter a question before sending.")
+                st.warning("Please enter a question before sending.")
 
-    if st.session_state.chat_history:
-        st.markdown("### 💬 Conversation History")
-        for q, a in st.session_state.chat_history:
-            st.markdown(f"**You:** {q}")
-            st.markdown(f"**AI:** {a}")
-            st.markdown("---")
+        render_chat_history(history)
+
+        # ✅ Clear History Button
+        if st.button("Clear History"):
+            history.clear()
+            save_chat_history(history)
+            st.session_state.chat_visible = CHAT_PAGE_SIZE
+            st.rerun(scope="fragment")
+
+    framework_chat()
 
     st.markdown("---")
 
-    # ✅ Notes and Sliders Section
-    st.subheader("🛠 Create Your Own 5 Tool Employee")
-    notes_input = st.text_area("Enter notes about your ideal employee or evaluation criteria", placeholder="e.g., strong leadership, adaptable, great communicator")
-
-    st.subheader("Rate the Employee on Each Tool (1–10)")
-    TOOLS = [
-        "Technical Competence",
-        "Problem-Solving Ability",
-        "Adaptability & Continuous Learning",
-        "Communication & Leadership",
-        "Strategic Decision-Making"
-    ]
-    scores = [st.slider(tool, 1, 10, 5) for tool in TOOLS]
+    @timed_fragment
+    def profile_builder():
+        # ✅ Notes and Sliders Section
+        st.subheader("🛠 Create Your Own 5 Tool Employee")
+        notes_input = st.text_area("Enter notes about your ideal employee or evaluation criteria", placeholder="e.g., strong leadership, adaptable, great communicator")
+
+        st.subheader("Rate the Employee on Each Tool (1–10)")
+        TOOLS = PROFILE_TOOLS
+        scores = [st.slider(tool, 1, 10, 5) for tool in TOOLS]
 
-    # ✅ Generate Profile Button
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Generate 5 Tool Employee"):
         if notes_input.strip():
-            st.markdown("### 🧠 Your Custom 5 Tool Employee Profile")
-
-            for tool, score in zip(TOOLS, scores):
-                st.markdown(f"**{tool} (Score: {score}/10)**")
-
-                # ✅ Detailed interpretation based on your book
-                if score <= 3:
-                    st.write("- **Behavioral Reality:** Needs Development.")
-                    if tool == "Technical Competence":
-                        st.write("  • Misses execution rhythm; avoids ambiguity; may disengage under pressure.")
-                        st.write("  • Risk: Reliability gaps erode trust and team cadence.")
-                        st.write("  • Development: Structured technical training and accountability systems.")
-                    elif tool == "Problem-Solving Ability":
-                        st.write("  • Reactive firefighting; freezes or blames others when overwhelmed.")
-                        st.write("  • Risk: Creates chaos instead of solutions.")
-                        st.write("  • Development: Build analytical discipline and scenario planning.")
-                    elif tool == "Adaptability & Continuous Learning":
-                        st.write("  • Resistant to change; lacks proactive learning habits.")
-                        st.write("  • Risk: Falls behind in dynamic environments.")
-                        st.write("  • Development: Micro-learning and resilience coaching.")
-                    elif tool == "Communication & Leadership":
-                        st.write("  • Communication lacks clarity; influence minimal.")
-                        st.write("  • Risk: Team misalignment and low morale.")
-                        st.write("  • Development: Authentic leadership coaching and feedback loops.")
-                    elif tool == "Strategic Decision-Making":
-                        st.write("  • Decisions lack foresight; may chase optics over substance.")
-                        st.write("  • Risk: High chance of costly missteps under pressure.")
-                        st.write("  • Development: Train in strategic frameworks and risk analysis.")
-                elif score <= 6:
-                    st.write("- **Behavioral Reality:** Effective but inconsistent.")
-                    st.write("  • Strength: Handles routine tasks and moderate complexity.")
-                    st.write("  • Growth Area: Needs calibration for high-pressure scenarios.")
-                    st.write("  • Development Path: Reinforce rhythm and foresight through structured coaching.")
-                else:
-                    st.write("- **Behavioral Reality:** Exceptional.")
-                    st.write("  • Strength: Demonstrates mastery under pressure; inspires confidence.")
-                    st.write("  • Watch Out: Overuse can drift into dysfunction (e.g., dominance, rigidity).")
-                    st.write("  • Development Path: Maintain humility and balance; leverage as a leadership strength.")
+            speculate_rich_context(scores, TOOLS, notes_input, "Page 1: Profile Generation")
+
+        # ✅ Generate Profile Button
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Generate 5 Tool Employee"):
+            if notes_input.strip():
+                st.markdown("### 🧠 Your Custom 5 Tool Employee Profile")
+
+                # ✅ Whole profile + notes rendered as one markdown block
+                profile_md = render_profile_markdown(tuple(TOOLS), tuple(scores))
+                st.markdown(profile_md + "**Notes:**\n\n" + notes_input)
+
+                # ✅ Radar Chart Visualization
+                st.subheader("📊 5-Tool Employee Profile Radar")
+                fig = px.line_polar(r=scores, theta=TOOLS, line_close=True, title="5-Tool Employee Radar Chart")
+                fig.update_traces(fill='toself')
+                st.plotly_chart(fig)
+                rich_text = generate_rich_context(scores, TOOLS, notes_input, context_label="Page 1: Profile Generation")
+                st.markdown("### 🔍 Rich Context Analysis")
+                st.markdown(rich_text)
+                st.session_state["saved_notes"] = notes_input
+                st.session_state["saved_scores"] = scores
+                st.session_state["saved_review"] = "Your 5-Tool Employee Profile"
+                st.session_state["saved_rich_text"] = rich_text
+                st.session_state["saved_fig"] = fig
+            else:
+                st.warning("Please add notes before generating the profile.")
 
-                st.markdown("---")
+        # ✅ After generating the profile and radar chart
+        if st.button("Save to Repository"):
+            st.session_state["saved_notes"] = notes_input if "notes_input" in locals() else st.session_state.get("saved_notes", "")
+            st.session_state["saved_scores"] = scores if "scores" in locals() else st.session_state.get("saved_scores", "")
+            st.session_state["saved_review"] = "Your 5-Tool Employee Profile"
+            st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
 
-            # ✅ Notes Section
-            st.markdown("**Notes:**")
-            st.write(notes_input)
+        persist_session_state()
 
-            # ✅ Radar Chart Visualization
-            st.subheader("📊 5-Tool Employee Profile Radar")
-            fig = px.line_polar(r=scores, theta=TOOLS, line_close=True, title="5-Tool Employee Radar Chart")
-            fig.update_traces(fill='toself')
-            st.plotly_chart(fig)
-            rich_text = generate_rich_context(scores, TOOLS, notes_input, context_label="Page 1: Profile Generation")
-            st.markdown("### 🔍 Rich Context Analysis")
-            st.markdown(rich_text)
-            st.session_state["saved_notes"] = notes_input
-            st.session_state["saved_scores"] = scores
-            st.session_state["saved_review"] = "Your 5-Tool Employee Profile"
-            st.session_state["saved_rich_text"] = rich_text
-            st.session_state["saved_fig"] = fig
-        else:
-            st.warning("Please add notes before generating the profile.")
+    profile_builder()
 
-    # ✅ Clear History Button
-    if st.button("Clear History"):
-        st.session_state.chat_history = []
-        st.experimental_rerun()
-    # ✅ After generating the profile and radar chart
-    if st.button("Save to Repository"):
-        st.session_state["saved_notes"] = notes_input if "notes_input" in locals() else st.session_state.get("saved_notes", "")
-        st.session_state["saved_scores"] = scores if "scores" in locals() else st.session_state.get("saved_scores", "")
-        st.session_state["saved_review"] = "Your 5-Tool Employee Profile"
-        st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
-        
 def render_module_2():
     import streamlit as st
 
     st.title("Advanced Deep Research — The 5 Tool Employee Framework")
 
-    # ✅ Display full PDF content in a scrollable section
-    pdf_content = """
-    _The Deep-Research 5-Tool Employee Framework_
-    A behavioral operating system for high-performance environments. Designed to evaluate not just output, but behavior under pressure, natural tendencies, and the psychodynamic tensions that determine real-world effectiveness.
-
-    Each tool includes:
-    - Natural Gift: Innate tendencies that fuel the behavior
-    - High-Functioning Expression: What excellence looks like
-    - Dysfunction Signals: How strengths derail under pressure
-    - Behavioral Insights: How to calibrate for sustained impact
-    - Where It Shows Up: Cross-industry applications and archetypes
-
-    #### Speed — Cognitive & Behavioral Agility
-    Natural Gift: Pattern recognition, emotional agility, perceptual timing
-    High-Functioning Expression:
-    - Adjusts mid-motion with grace and clarity
-    - Communicates with precise cadence—knowing when to pause, pivot, or push
-    - Integrates feedback without spiraling or flinching
-    - Creates momentum without overcomplication
-    Dysfunction Signals:
-    - Reacts impulsively to maintain control or optics
-    - Mistakes urgency for depth
-    - Avoids structure, defaults to charisma
-    - Performs rather than processes under pressure
-    Behavioral Insight: Psychoal agility is the governor here—not raw reaction speed. Sustainable performance depends on metabolizing tension, not just masking it.
-    Where It Shows Up:
-    - Change management
-    - Customer-facing adaptation
-    - Executive communication in volatile contexts
-    - Individual Contributors managing high-volume ambiguity
-
-    #### Power — Ownership, Initiative & Decisiveness
-    Natural Gift: Inner drive, conviction, will to close
-    High-Functioning Expression:
-    - Owns the mission from start to finish—no deflection
-    - Pushes progress without waiting for consensus
-    - Makes high-impact decisions that others align behind
-    - Brings heat without burning bridges
-    Dysfunction Signals:
-    - Bulldozes collaboration for speed
-    - Hides behind motion to deflect reflection
-    - Overuses authority or energy to silence dissent
-    - Equates charisma with clarity
-    Behavioral Insight: Unchecked Power erodes trust. Under stress, ego and volume increase—but clarity and alignment disappear. Humility is the ultimate limiter.
-    Where It Shows Up:
-    - Founders and team leads
-    - Accountable closers and operators
-    - High-pressure roles with final-call authority
-
-    #### Fielding — Strategic Foresight & System Protection
-    Natural Gift: Systems awareness, anticipatory thinking, stability
-    High-Functioning Expression:
-    - Spots second- and third-order consequences early
-    - Builds guardrails for scalable decision-making
-    - Operates upstream of risk, not downstream of damage
-    - Stays composed when uncertainty spikes
-    Dysfunction Signals:
-    - Becomes overly risk-averse or defensive
-    - Resists new data or shifts in environment
-    - Defaults to rigid safeguards that halt innovation
-    - Blames others when overwhelmed
-    Behavioral Insight: Fielding reveals emotional maturity through discipline—not reaction. Pressure doesn't break systems. People do, when foresight is missing.
-    Where It Shows Up:
-    - Compliance, audit, legal, ops
-    - Strategic planning, QA, IT architecture
-    - Team stabilizers and culture protectors
-
-    #### Hitting for Average — Reliability, Rhythm & Repeatability
-    Natural Gift: Execution discipline, operational precision, resilience
-    High-Functioning Expression:
-    - Delivers under pressure—quietly and predictably
-    - Builds trust through consistency, not theatrics
-    - Anchors workflows and norms others depend on
-    - Focuses on base hits, not glory swings
-    Dysfunction Signals:
-    - Hides in routine to avoid ambiguity
-    - Resents lack of recognition in flashy cultures
-    - Over-indexes on habit and under-indexes on strategy
-    - Performs tasks mechanically, loses intent
-    Behavioral Insight: Culture often underrates the glue. But rhythm beats reaction, and trust beats tension. Recognition must find the quiet storm.
-    Where It Shows Up:
-    - Ops, customer success, fulfillment
-    - Risk-sensitive execution roles
-    - Individual Contributors who prevent chaos and catch the slack
-
-    #### Arm Strength — Communication Reach & Influence
-    Natural Gift: Expressive clarity, emotional connection, presence
-    High-Functioning Expression:
-    - Pitch it
-    - Distills vision into language that moves people
-    - Connects across functions and hierarchies effortlessly
-    - Builds buy-in without overreaching
-    - Communicates emotionally and intellectually
-    Dysfunction Signals:
-    - Charms without delivering substance
-    - Dominates conversations, silences opposition
-    - Uses messaging to mask misalignment
-    - Prioritizes performance over truth
-    Behavioral Insight: Influence that isn’t anchored in clarity becomes theater. Real communication reaches not just ears—but identity and belonging.
-    Where It Shows Up:
-    - Sales, enablement, leadership
-    - Cross-functional translators
-    - Cultural brokers and stakeholder wranglers
-    """
+    # ✅ Display full PDF content in a scrollable section (pre-rendered from data/content/p2_deep_research.json)
+    content = get_content().get("p2_deep_research")
+    pdf_content = content.text["framework"]
+    st.markdown(content.html["framework"], unsafe_allow_html=True)
+
+    # ✅ Q&A reruns on its own without re-rendering the framework text
+    @timed_fragment
+    def deep_dive_qa():
+        # ✅ Question input
+        question = st.text_input("Ask a question about the framework:")
+
+        # ✅ Dive Further button
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Dive Further"):
+            if question.strip():
+                try:
+                    hidden_context = content.text["hidden_context"]
+
+                    system_prompt = f"""
+                    You are an advanced HR and leadership research assistant. Use the following framework and concepts to answer deeply:
+                    Framework:
+                    {pdf_content}
+                    Hidden Concepts:
+                    {hidden_context}
+                    Provide:
+                    - A research-level explanation
+                    - Practical implications
+                    - References to leadership theories where relevant
+                    """
+
+                    def dive_further(question):
+                        response = ai_complete(
+                            "p2_dive_further",
+                            [
+                                {"role": "system", "content": question}, 
+                                {"role": "user", "content": question}
+                            ],
+                            1000,
+                            temperature=0.7
+                        )
+                        st.session_state.prompt_count += 1 
+                        return response.choices[0].message.content
+
+                    answer = cached_escalation("p2", dive_further)(question)
+                    st.markdown("### 🔍 Deep Dive Answer")
+                    render_routed_answer(answer)
+
+                except Exception as e:
+                    st.error(f"❌ Error generating AI response: {e}")
+            else:
+                st.warning("Please enter a question before diving further.")
 
-    # ✅ Scrollable container for PDF content
-    st.markdown(
-        f"<div style='height:500px; overflow-y:auto; border:1px solid #ccc; padding:10px;'>{pdf_content}</div>",
-        unsafe_allow_html=True
-    )
+    deep_dive_qa()
 
-    # ✅ Question input
-    question = st.text_input("Ask a question about the framework:")
-
-    # ✅ Dive Further button
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Dive Further"):
-        if question.strip():
-            try:
-                hidden_context = """
-                Advanced Leadership Concepts:
-                - Emotional Intelligence
-                - Appreciative Inquiry
-                - Maturana & Varela – Tree of Life
-                - Invisible, Shared, Authentic, Servant, Toxic Leadership
-                - Transactional & Transformational Leadership
-                - Social Cognitive Theory (Bandura)
-                - Psychoal Capital (Luthans, Avolio, Youssef)
-                - Ilya Prigogine
-                - Drucker’s work (The Effective Executive)
-                - Capra & Autopoiesis
-                - Balanced Scorecard (Kaplan & Norton)
-                - Deming’s Quality Circles
-                - Cameron & Quinn (Competing Values Framework, OCAI)
-                - Related leadership literature
-                """
-
-                system_prompt = f"""
-                You are an advanced HR and leadership research assistant. Use the following framework and concepts to answer deeply:
-                Framework:
-                {pdf_content}
-                Hidden Concepts:
-                {hidden_context}
-                Provide:
-                - A research-level explanation
-                - Practical implications
-                - References to leadership theories where relevant
-                """
-
-                response = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": question}, 
-                        {"role": "user", "content": question}
-                    ],
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-                st.session_state.prompt_count += 1 
-                ai_answer = response.choices[0].message.content
-                st.markdown("### 🔍 Deep Dive Answer")
-                st.markdown(ai_answer)
-
-            except Exception as e:
-                st.error(f"❌ Error generating AI response: {e}")
-        else:
-            st.warning("Please enter a question before diving further.")
     # ✅ After generating the profile and radar chart
     if st.button("Save to Repository"):
         st.session_state["saved_notes"] = notes_input if "notes_input" in locals() else st.session_state.get("saved_notes", "")
         st.session_state["saved_scores"] = scores if "scores" in locals() else st.session_state.get("saved_scores", "")
         st.session_state["saved_review"] = "Your 5-Tool Employee Profile"
         st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
+# -------------------------------
+# 📋 Bulk Pressure-Grid Analysis (Page 3)
+# -------------------------------
+# ✅ Premium users paste or upload many comments at once. They are packed
+#    into a few structured requests (bulk_insights.py) instead of one call per
+#    comment, run BULK_CONCURRENCY at a time; only comments whose answer
+#    failed validation are retried. Each result is saved as its own record.
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "4"))
+BULK_PROMPT_BUDGET = int(os.getenv("BULK_PROMPT_BUDGET", "3000"))   # estimated prompt tokens per request
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "25"))             # comments per request
+PRESSURE_SYSTEM = "You are an organizational psychologist analyzing behavior under pressure."
+
+@st.cache_resource(show_spinner=False)
+def get_bulk_analyzer():
+    analyzer = BulkAnalyzer(functools.partial(complete_structured, site="p3_bulk", system=PRESSURE_SYSTEM),
+                            concurrency=BULK_CONCURRENCY, prompt_budget=BULK_PROMPT_BUDGET, max_items=BULK_MAX_ITEMS)
+    export_stats("bulk_insights", analyzer.stats, "Packed Page 3 bulk analysis (BulkAnalyzer.stats())")
+    return analyzer
+
+def read_bulk_comments(pasted, upload):
+    # [(id, comment)] from pasted lines plus an uploaded .txt (one per line) or .csv ("comment", optional "id")
+    comments = pasted.splitlines()
+    ids = [""] * len(comments)
+    if upload is not None:
+        if upload.name.lower().endswith(".csv"):
+            df = pd.read_csv(upload, dtype=str).fillna("")
+            comments += df["comment" if "comment" in df.columns else df.columns[0]].tolist()
+            ids += df["id"].tolist() if "id" in df.columns else [""] * len(df)
+        else:
+            lines = upload.getvalue().decode("utf-8", errors="replace").splitlines()
+            comments += lines
+            ids += [""] * len(lines)
+    return number_comments(comments, ids)
+
+def save_bulk_insights(rows):
+    # One repository record per comment, indexed for "Who Else Behaved Like This?"
+    store, index = get_work_store(), get_similarity_index()
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    names = []
+    for row in rows:
+        slug = "".join(c if c.isalnum() or c in "-_" else "-" for c in row["id"])
+        insight = f"**{row['tool']} — {row['state']}:** {row['insight']}"
+        manifest = store.save(f"saved_work_{user_id}_{timestamp}_p3_{slug}.txt",
+                              [("Page 3 Notes", row["comment"]), ("Page 3 Review", "Behavior Under Pressure Grid"),
+                               ("Page 3 AI Insights", insight)],
+                              meta={"user_id": user_id, "source": "p3_bulk", "comment_id": row["id"]})
+        index.add(f"{manifest['name']}#p3", text=f"{row['comment']}\n{row['comment']}\n{insight}",
+                  meta={"work": manifest["name"], "page": PAGE_LABELS["p3"], "notes": row["comment"][:200],
+                        "scores": None})
+        names.append(manifest["name"])
+    return names
+
+def render_bulk_insights():
+    st.subheader("📋 Bulk Analysis")
+    pasted = st.text_area("Paste comments, one per line", key="bulk_comments_p3", height=150)
+    upload = st.file_uploader("…or upload a .txt (one comment per line) or .csv (comment, optional id column)",
+                              type=["txt", "csv"], key="bulk_upload_p3")
+    items = read_bulk_comments(pasted, upload)
+    if items:
+        st.caption(f"{len(items)} comments → {len(pack(items, BULK_PROMPT_BUDGET, BULK_MAX_ITEMS))} packed requests")
+    if st.button("Analyze All Comments", key="bulk_analyze_p3"):
+        if not items:
+            st.warning("Please add comments before generating insights.")
+        else:
+            progress = st.progress(0.0, text="Analyzing comments…")
+            outcome = get_bulk_analyzer().run(items, on_progress=lambda done, total: progress.progress(
+                done / total, text=f"{done}/{total} comments analyzed"))
+            progress.empty()
+            st.session_state.prompt_count += 1
+            st.session_state["bulk_insights_p3"] = outcome
+
+    outcome = st.session_state.get("bulk_insights_p3")
+    if not outcome:
+        return
+    st.caption(f"{len(outcome['results'])} insights from {outcome['calls']} requests "
+               f"({outcome['tokens']} tokens) in {outcome['seconds']:.1f}s")
+    if outcome["failed"]:
+        if "AI service unavailable" in outcome["failed"].values():
+            st.warning(AI_UNAVAILABLE)
+        st.warning(f"{len(outcome['failed'])} comments could not be analyzed: " +
+                   "; ".join(f"{item_id} ({reason})" for item_id, reason in list(outcome["failed"].items())[:5]))
+    df = pd.DataFrame(outcome["results"], columns=["id", "tool", "state", "insight", "comment", "attempts"])
+    st.dataframe(df, hide_index=True)
+    st.download_button("Download CSV", df.to_csv(index=False), file_name="pressure_insights.csv", mime="text/csv",
+                       key="bulk_csv_p3")
+    if st.button("Save Each to Repository", key="bulk_save_p3"):
+        names = save_bulk_insights(outcome["results"])
+        st.success(f"✅ Saved {len(names)} records! Go to Page 6 (Repository) to download or organize.")
+
 def render_module_3():
+    hydrate_session_state("p3")
     st.title("Behavior Under Pressure")
     st.markdown("### What is the Behavior Under Pressure Grid? An evaluation tool for the behavior that leaders, both current, and potentially, showcase when under stress or pressure")
-    st.markdown("""
-    This grid shows how behavioral tools manifest in two states:
-    - **Intentional Use:** Calm, focused, deliberate behavior.
-    - **Under Duress:** How traits distort under stress.
+    content = get_content().get("p3_pressure_grid")
+    st.markdown(content.text["intro"])
+
+    # ✅ Hide index completely (the table is built once per pack version)
+    st.dataframe(content.arrow["Behavior Under Pressure Grid"], hide_index=True)  # Works in latest Streamlit versions
+
+    # ✅ Comments, insights and saving rerun without rebuilding the grid
+    @timed_fragment
+    def pressure_insights():
+        # ✅ Add comments input
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        user_comments = st.text_area("Add your comments or observations", placeholder="e.g., This candidate freezes under pressure but excels in planning.")
+
+
+        # ✅ Generate AI insights
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Generate Insights"):
+            if user_comments.strip():
+                st.subheader("🔍 AI Insights Based on Your Comments")
+                try:
+                    response = ai_complete(
+                        "p3_insights",
+                        [
+                            {"role": "system", "content": "You are an organizational psychologist analyzing behavior under pressure."},
+                            {"role": "user", "content": f"Analyze this comment in context of the Behavior Under Pressure Grid: {user_comments}"}
+                        ],
+                        400,
+                        temperature=0.7
+                    )
+                except CircuitOpenError:
+                    st.warning(AI_UNAVAILABLE)
+                except Exception as e:
+                    st.error(f"❌ Error generating AI insights: {e}")
+                else:
+                    st.session_state.prompt_count += 1
+                    ai_insights = response.choices[0].message.content  # ✅ Capture AI output
+                    st.session_state["ai_insights_p3"] = ai_insights   # ✅ Store in session state
+                    st.write(ai_insights)
+            else:
+                st.warning("Please add comments before generating insights.")
     
-    Use this tool for leadership diagnostics, hiring decisions, and team development.
-    """)
+        # ✅ Similar past assessments (premium repository search)
+        if is_premium(user_id):
+            st.subheader("🔎 Who Else Behaved Like This?")
+            render_similar_employees(user_comments, key="similar_p3")
 
-    # ✅ Create DataFrame
-    data = {
-        "Tool": ["Power", "Speed", "Fielding", "Hitting Avg.", "Arm Strength"],
-        "Intentional Use": [
-            "Drives results, owns outcomes",
-            "Reflects, adjusts, integrates",
-            "Foresees risks, protects systems",
-            "Delivers consistently and reliably",
-            "Aligns and influences with clarity"
-        ],
-        "Under Duress": [
-            "Overreaches, avoids feedback",
-            "Reacts, deflects, performs for show",
-            "Freezes, rigidifies, blocks learning",
-            "Checks out, avoids stretch or change",
-            "Charms without clarity, dominates without connection"
-        ]
-    }
+        # ✅ Save to Repository
+        if st.button("Save to Repository"):
+            st.session_state["saved_notes_p3"] = user_comments
+            st.session_state["saved_scores_p3"] = None
+            st.session_state["saved_review_p3"] = "Behavior Under Pressure Grid"
+            st.session_state["saved_rich_text_p3"] = st.session_state.get("ai_insights_p3", "")  # ✅ Include AI insights
+            st.session_state["saved_fig_p3"] = None
+            st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
+
+        # ✅ Bulk mode (premium): many comments per request
+        if is_premium(user_id):
+            render_bulk_insights()
+
+        persist_session_state()
+
+    pressure_insights()
 
-    df = pd.DataFrame(data)
-
-    # ✅ Hide index completely
-    st.dataframe(df, hide_index=True)  # Works in latest Streamlit versions
-
-    # ✅ Add comments input
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    user_comments = st.text_area("Add your comments or observations", placeholder="e.g., This candidate freezes under pressure but excels in planning.")
-
-
-    # ✅ Generate AI insights
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Generate Insights"):
-        if user_comments.strip():
-            st.subheader("🔍 AI Insights Based on Your Comments")
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are an organizational psychologist analyzing behavior under pressure."},
-                    {"role": "user", "content": f"Analyze this comment in context of the Behavior Under Pressure Grid: {user_comments}"}
-                ],
-                temperature=0.7,
-                max_tokens=400
-            )
-            st.session_state.prompt_count += 1
-            ai_insights = response.choices[0].message.content  # ✅ Capture AI output
-            st.session_state["ai_insights_p3"] = ai_insights   # ✅ Store in session state
-            st.write(ai_insights)
-        else:
-            st.warning("Please add comments before generating insights.")
-    
-    # ✅ Save to Repository
-    if st.button("Save to Repository"):
-        st.session_state["saved_notes_p3"] = user_comments
-        st.session_state["saved_scores_p3"] = None
-        st.session_state["saved_review_p3"] = "Behavior Under Pressure Grid"
-        st.session_state["saved_rich_text_p3"] = st.session_state.get("ai_insights_p3", "")  # ✅ Include AI insights
-        st.session_state["saved_fig_p3"] = None
-        st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
 
   
 def render_module_4():
     import plotly.express as px
+    hydrate_session_state("p4")
 
     TOOLS = ["Speed", "Power", "Fielding", "Hitting for Average", "Arm Strength"]
-    educational_panels = {
-        "Urgency vs Foresight": "Speed without foresight creates reactive chaos. Leaders must balance urgency with strategic anticipation.",
-        "Leadership Eligibility Filter": "Evaluates readiness for management roles using 5-Tool scoring and behavioral calibration.",
-        "Messaging to Mask Misalignment": "How narrative optics hide behavioral misalignment and erode trust.",
-        "Risk-Sensitive Execution Roles": "Roles requiring precision under pressure demand foresight, agility, and clarity.",
-        "Hidden Elements": "Anticipation, discipline, and preparation operate behind the scenes to prevent behavioral drift."
-    }
-
     def interpret_score(total_score):
         if total_score >= 21:
             return "Leadership-Ready", "Promote to management. Provide light coaching on minor gaps to polish leadership skills."
@@ -781,15 +1550,9 @@ def render_module_4():
         analysis += f"**Recommended Action:** {action}\n\n"
         analysis += "#### Tool-by-Tool Analysis:\n"
         for tool, score in zip(TOOLS, scores):
-            if score <= 2:
-                status = "Needs Development"
-                implication = "High risk under pressure; requires focused coaching and support."
-            elif score <= 4:
-                status = "Effective"
-                implication = "Functional but lacks consistency for high-stakes leadership."
-            else:
-                status = "Exceptional"
-                implication = "Strong leadership trait; leverage as a core strength."
+            band = score_band(score, scale=5)
+            status = BAND_STATUS[band]
+            implication = BAND_IMPLICATIONS[band]
             analysis += f"- **{tool}:** Score {score} ({status}) → {implication}\n"
         analysis += "\n#### Employee Notes:\n"
         analysis += f"{notes if notes else 'No additional notes provided.'}\n\n"
@@ -798,140 +1561,100 @@ def render_module_4():
     # ✅ UI
     st.title("🧠 Behavioral Calibration & Leadership Readiness")
 
-    # Framework selection
-    framework = st.selectbox("Select Framework", [
-        "Behavioral Calibration Grid",
-        "Leadership Eligibility Filter",
-        "SME Pitfall Table",
-        "Risk-Sensitive Execution Roles",
-        "Messaging to Mask Misalignment"
-    ])
+    # Framework selection (one table per framework in data/content/p4_calibration.json)
+    content = get_content().get("p4_calibration")
+    framework = st.selectbox("Select Framework", list(content.tables))
 
     # ✅ Display framework tables
-    if framework == "Behavioral Calibration Grid":
-        st.write("### Behavioral Calibration Grid")
-        st.table([
-            ["Tool", "High Expression", "Under Pressure Behavior", "Tension Theme"],
-            ["Speed", "Adaptive, intentional", "Performative, reactive", "Motion vs. Processing"],
-            ["Power", "Accountable, decisive", "Ego-driven, controlling", "Drive vs. Humility"],
-            ["Fielding", "Preventive, disciplined", "Rigid, overwhelmed", "Systems vs. Flexibility"],
-            ["Hitting for Avg.", "Reliable, resilient", "Passive, resentful", "Consistency vs. Innovation"],
-            ["Arm Strength", "Authentic, connective", "Theatrical, dominating", "Clarity vs. Performance"]
-        ])
-    elif framework == "Leadership Eligibility Filter":
-        st.write("### Leadership Eligibility Filter")
-        st.table([
-            ["Domain", "Behavioral Signal", "Eligibility Indicator"],
-            ["Fielding", "Responds with situational precision under ambiguity", "✅ Can manage tension without emotional leakage"],
-            ["Arm Strength", "Communicates clearly across hierarchy and function", "✅ Delivers signal—not noise—to any audience"],
-            ["Speed", "Adapts quickly without skipping strategic foresight", "✅ Demonstrates urgency with calibration"],
-            ["Power", "Holds conviction without overpowering or rigid framing", "✅ Anchored, not authoritarian"],
-            ["Hitting for Average", "Maintains team rhythm, trust, and consistency", "✅ Cultural glue; reduces friction organically"]
-        ])
-    elif framework == "SME Pitfall Table":
-        st.write("### SME Pitfall Table")
-        st.table([
-            ["Trait as SME", "Problem When Promoted", "Behavioral Impact"],
-            ["Execution Excellence", "Over-indexes on personal output", "Micromanagement, resistance to delegation"],
-            ["Deep Knowledge", "Weaponizes expertise to dominate", "Dismissiveness, lack of collaborative fluency"],
-            ["Busy Bee Mentality", "Equates busyness with impact", "Activity ≠ strategy, reactive leadership"],
-            ["Low Emotional Calibration", "Talks down, corrects instead of connects", "Erosion of trust, psychoal safety drain"]
-        ])
-    elif framework == "Risk-Sensitive Execution Roles":
-        st.write("### Risk-Sensitive Execution Roles")
-        st.table([
-            ["Trait", "Description"],
-            ["Decision Load", "Frequent choices, each with layered impact"],
-            ["Pressure Tolerance", "Working amid tension without emotional leakage"],
-            ["Cost Awareness", "Knowing when speed amplifies risk vs when it mitigates it"],
-            ["Target Clarity", "Acting with precision even in ambiguous or shifting conditions"],
-            ["Behavioral Calibration", "Adapting communication and behavior based on changing risk signals"]
-        ])
-    elif framework == "Messaging to Mask Misalignment":
-        st.write("### Messaging to Mask Misalignment")
-        st.table([
-            ["Tactic", "Impact"],
-            ["Framing Over Function", "Creates illusion of unity while systems burn out"],
-            ["Overuse of Abstract Values", "Signals alignment without behavioral sync"],
-            ["Narrative Smoothing", "Hides disagreement or conflicting KPIs"],
-            ["Visual Optics vs Operational Truth", "Curates optics while reality erodes"],
-            ["Intentional Ambiguity", "Postpones reckoning, masks misalignment"]
-        ])
+    st.write(f"### {framework}")
+    st.table(content.arrow[framework])
 
     # ✅ Educational Panels
     st.subheader("Educational Panels")
-    for title, content in educational_panels.items():
+    for title, text in content.panels["Educational Panels"]:
         with st.expander(title):
-            st.write(content)
-
-    # ✅ Original AI Q&A Box
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    st.subheader("Ask AI About the Framework")
-    user_question = st.text_area("Ask a question (e.g., 'Tell me more about this')")
-    if st.button("Send Question"):
-        if user_question.strip():
-            response = client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": (
-                        "You are an expert on the 5-Tool Employee Framework. "
-                        "Always include a link to our YouTube channel: https://www.youtube.com/@5toolemployeeframework "
-                    )},
-                    {"role": "user", "content": user_question} 
-                ],
-                temperature=0.7,
-                max_tokens=700
-            )
-            st.session_state.prompt_count += 1  
-            st.markdown("### AI Answer")
-            st.write(response.choices[0].message.content)
+            st.write(text)
+
+    # ✅ Q&A and scoring rerun independently of each other and the framework tables
+    def ask_model(question):
+        response = ai_complete(
+            "p4_question",
+            [
+                {"role": "system", "content": (
+                    "You are an expert on the 5-Tool Employee Framework. "
+                    "Always include a link to our YouTube channel: https://www.youtube.com/@5toolemployeeframework "
+                )},
+                {"role": "user", "content": question} 
+            ],
+            700,
+            temperature=0.7
+        )
+        st.session_state.prompt_count += 1  
+        return response.choices[0].message.content
 
-        else:
-            st.warning("Please enter a question before sending.")
+    @timed_fragment
+    def calibration_qa():
+        # ✅ Original AI Q&A Box
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        st.subheader("Ask AI About the Framework")
+        user_question = st.text_area("Ask a question (e.g., 'Tell me more about this')")
+        if st.button("Send Question"):
+            if user_question.strip():
+                answer = get_answer_bank().route(user_question, "p4", cached_escalation("p4", ask_model))
+                st.markdown("### AI Answer")
+                render_routed_answer(answer)
+
+            else:
+                st.warning("Please enter a question before sending.")
 
-    # ✅ Radar Scoring Section
-    st.subheader("Score the Employee on Each Tool (1-5)")
-    scores = [st.slider(tool, 1, 5, 3) for tool in TOOLS]
-    employee_notes = st.text_area("Enter notes about the employee")
+    calibration_qa()
+
+    @timed_fragment
+    def calibration_scoring():
+        # ✅ Radar Scoring Section
+        st.subheader("Score the Employee on Each Tool (1-5)")
+        scores = [st.slider(tool, 1, 5, 3) for tool in TOOLS]
+        employee_notes = st.text_area("Enter notes about the employee")
+        speculate_rich_context(scores, TOOLS, employee_notes, "Page 4: Calibration", scale=5)
     
-    # Generate Scoring
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Generate Scoring"):
-        analysis = generate_analysis(scores, employee_notes, framework)
-        fig = px.line_polar(r=scores, theta=TOOLS, line_close=True, title="Behavioral Tool Scoring Radar")
-        fig.update_traces(fill='toself')
-        rich_text = generate_rich_context(scores, TOOLS, employee_notes, context_label="Page 4: Calibration")
+        # Generate Scoring
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Generate Scoring"):
+            analysis = generate_analysis(scores, employee_notes, framework)
+            fig = px.line_polar(r=scores, theta=TOOLS, line_close=True, title="Behavioral Tool Scoring Radar")
+            fig.update_traces(fill='toself')
+            rich_text = generate_rich_context(scores, TOOLS, employee_notes, context_label="Page 4: Calibration", scale=5)
     
-        # ✅ Store results in session state
-        st.session_state["analysis_p4"] = analysis
-        st.session_state["fig_p4"] = fig
-        st.session_state["rich_text_p4"] = rich_text
-        st.session_state["scores_p4"] = scores
-        st.session_state["notes_p4"] = employee_notes
+            # ✅ Store results in session state
+            st.session_state["analysis_p4"] = analysis
+            st.session_state["fig_p4"] = fig
+            st.session_state["rich_text_p4"] = rich_text
+            st.session_state["scores_p4"] = scores
+            st.session_state["notes_p4"] = employee_notes
     
-    # ✅ Display results if they exist
-    if "analysis_p4" in st.session_state:
-        st.markdown(st.session_state["analysis_p4"])
-        st.plotly_chart(st.session_state["fig_p4"])
-        st.markdown("### 🔍 Rich Context Analysis")
-        st.markdown(st.session_state["rich_text_p4"])
+        # ✅ Display results if they exist
+        if "analysis_p4" in st.session_state:
+            st.markdown(st.session_state["analysis_p4"])
+            st.plotly_chart(st.session_state["fig_p4"])
+            st.markdown("### 🔍 Rich Context Analysis")
+            st.markdown(st.session_state["rich_text_p4"])
     
-        # ✅ Save to Repository button stays visible
-        if st.button("Save to Repository"):
-            st.session_state["saved_notes_p4"] = st.session_state["notes_p4"]
-            st.session_state["saved_scores_p4"] = st.session_state["scores_p4"]
-            st.session_state["saved_rich_text_p4"] = st.session_state["rich_text_p4"]
-            st.session_state["saved_fig_p4"] = st.session_state["fig_p4"]
-            st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
+            # ✅ Save to Repository button stays visible
+            if st.button("Save to Repository"):
+                st.session_state["saved_notes_p4"] = st.session_state["notes_p4"]
+                st.session_state["saved_scores_p4"] = st.session_state["scores_p4"]
+                st.session_state["saved_rich_text_p4"] = st.session_state["rich_text_p4"]
+                st.session_state["saved_fig_p4"] = st.session_state["fig_p4"]
+                st.success("✅ Work saved! Go to Page 6 (Repository) to download or organize.")
+
+        persist_session_state()
+
+    calibration_scoring()
 
 def render_module_5():
     import streamlit as st
     import plotly.express as px
-    from openai import OpenAI
-    import os
-
-    # Initialize OpenAI client
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    hydrate_session_state("p5")
 
     # --- Helper: AI response for general questions ---
     def get_ai_response(question):
@@ -942,14 +1665,14 @@ def render_module_5():
         **Detail:** Key insights and why it matters.
         **Practical Tips:** Actionable steps for real-world application.
         """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        response = ai_complete(
+            "p5_question",
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": question}
             ],
-            temperature=0.7,
-            max_tokens=700
+            700,
+            temperature=0.7
         )
         st.session_state.prompt_count += 1 
         return response.choices[0].message.content
@@ -967,14 +1690,14 @@ def render_module_5():
         **Contextual Insight:** Explain toxicity risk based on notes.
         **Recommendation:** Suggest actions considering both score and notes.
         """
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
+        response = ai_complete(
+            "p5_contextual_insight",
+            [
                 {"role": "system", "content": "You are an expert in leadership assessment and organizational culture."},
                 {"role": "user", "content": contextual_prompt} # ✅ prompt exists here
             ],
-            temperature=0.7,
-            max_tokens=500
+            500,
+            temperature=0.7
         )
         st.session_state.prompt_count += 1  
         return response.choices[0].message.content
@@ -982,110 +1705,119 @@ def render_module_5():
     # --- UI Layout ---
     st.title("☢️ Toxicity in the Workplace")
 
-    # Educational Expanders
-    with st.expander("Padilla’s Toxic Triangle"):
-        st.write("Destructive Leaders, Susceptible Followers, and Conducive Environments create toxic conditions.")
-    with st.expander("Hogan’s Dark Side Derailers"):
-        st.write("Traits like Arrogance, Volatility, and Manipulativeness can derail leadership effectiveness.")
-    with st.expander("Machiavellianism & Dark Triad"):
-        st.write("Machiavellianism, Narcissism, and Psychopathy are key indicators of toxic tendencies.")
-    with st.expander("Behavioral Drift & 360-Degree Feedback"):
-        st.write("Behavioral drift occurs when employees gradually deviate from norms; 360-degree feedback helps detect early signs.")
+    # Educational Expanders and the rubric (data/content/p5_toxicity.json)
+    content = get_content().get("p5_toxicity")
+    for title, text in content.panels["Toxicity Concepts"]:
+        with st.expander(title):
+            st.write(text)
 
     # Detailed Rubric Table
     st.subheader("Toxicity Rubric")
-    st.markdown("""
-    <table style='width:100%; border:1px solid black; font-size:14px;'>
-    <tr><th>Tool</th><th>Low Risk (3-4)</th><th>Moderate Risk (2)</th><th>High Risk (1)</th><th>Toxicity Triggers</th></tr>
-    <tr><td>Speed</td><td>Adapts quickly; integrates feedback without ego.</td><td>Slow to adapt; reacts impulsively.</td><td>Freezes or disengages; ignores feedback.</td><td>Erratic decisions under pressure; volatility derailer.</td></tr>
-    <tr><td>Power</td><td>Owns outcomes; decisive and humble.</td><td>Hesitates; deflects blame occasionally.</td><td>Blames others; manipulates responsibility.</td><td>Arrogance derailer; shirking accountability.</td></tr>
-    <tr><td>Fielding</td><td>Anticipates risks; builds robust systems.</td><td>Misses risks; rigid under stress.</td><td>Ignores risks; fosters chaos.</td><td>Unchecked risk-taking; overconfidence derailer.</td></tr>
-    <tr><td>Hitting for Average</td><td>Delivers consistently; builds trust.</td><td>Inconsistent; skips documentation.</td><td>Silent quitting; erodes trust.</td><td>Detachment derailer; cultural drift.</td></tr>
-    <tr><td>Arm Strength</td><td>Communicates clearly; inspires buy-in.</td><td>Dominates or charms without substance.</td><td>Manipulative; dismisses feedback.</td><td>Divisive communication; manipulativeness derailer.</td></tr>
-    </table>
-    """, unsafe_allow_html=True)
-
-    # AI Chat
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    st.subheader("AI Chat: Ask about Toxic Leadership or Feedback")
-    ai_question = st.text_area("Ask a question (e.g., Tell me more about 360-degree feedback)")
-
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Get AI Response"):
-        st.markdown(get_ai_response(ai_question))
-
-    # Scoring Sliders
-    st.subheader("Rate the Employee on Each Dimension")
-    speed = st.slider("Speed", 1, 5, 3)
-    power = st.slider("Power", 1, 5, 3)
-    fielding = st.slider("Fielding", 1, 5, 3)
-    hitting = st.slider("Hitting for Average", 1, 5, 3)
-    arm_strength = st.slider("Arm Strength", 1, 5, 3)
-
-    notes = st.text_area("Additional Notes")
-
-    # Generate Profile
-    check_prompt_limit()  # Call this BEFORE any AI logic
-    if st.button("Generate Profile"):
-        total_score = speed + power + fielding + hitting + arm_strength
-        if total_score >= 15:
-            risk_level = "Low Risk"
-            action_plan = "Retain and support; encourage continued engagement."
-        elif 10 <= total_score < 15:
-            risk_level = "Moderate Risk"
-            action_plan = "Provide coaching and monitor closely for improvement."
-        else:
-            risk_level = "High Risk"
-            action_plan = "Immediate intervention required; consider reassignment or exit strategy."
+    st.markdown(content.html["Toxicity Rubric"], unsafe_allow_html=True)
+
+    # ✅ Chat and scoring rerun independently of each other and the rubric
+    @timed_fragment
+    def toxicity_chat():
+        # AI Chat
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        st.subheader("AI Chat: Ask about Toxic Leadership or Feedback")
+        ai_question = st.text_area("Ask a question (e.g., Tell me more about 360-degree feedback)")
+
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Get AI Response"):
+            render_routed_answer(get_answer_bank().route(ai_question, "p5", cached_escalation("p5", get_ai_response)))
+
+    toxicity_chat()
+
+    @timed_fragment
+    def toxicity_scoring():
+        # Scoring Sliders
+        st.subheader("Rate the Employee on Each Dimension")
+        speed = st.slider("Speed", 1, 5, 3)
+        power = st.slider("Power", 1, 5, 3)
+        fielding = st.slider("Fielding", 1, 5, 3)
+        hitting = st.slider("Hitting for Average", 1, 5, 3)
+        arm_strength = st.slider("Arm Strength", 1, 5, 3)
+
+        notes = st.text_area("Additional Notes")
+        speculate_rich_context([speed, power, fielding, hitting, arm_strength],
+                               ["Speed", "Power", "Fielding", "Hitting", "Arm Strength"], notes, "Page 5: Toxicity Profile",
+                               scale=5)
+
+        # Generate Profile
+        check_prompt_limit()  # Call this BEFORE any AI logic
+        if st.button("Generate Profile"):
+            total_score = speed + power + fielding + hitting + arm_strength
+            if total_score >= 15:
+                risk_level = "Low Risk"
+                action_plan = "Retain and support; encourage continued engagement."
+            elif 10 <= total_score < 15:
+                risk_level = "Moderate Risk"
+                action_plan = "Provide coaching and monitor closely for improvement."
+            else:
+                risk_level = "High Risk"
+                action_plan = "Immediate intervention required; consider reassignment or exit strategy."
     
-        st.write(f"**Total Score:** {total_score}")
-        st.write(f"**Risk Level:** {risk_level}")
-        st.write(f"**Action Plan:** {action_plan}")
+            st.write(f"**Total Score:** {total_score}")
+            st.write(f"**Risk Level:** {risk_level}")
+            st.write(f"**Action Plan:** {action_plan}")
     
-        # Radar Chart
-        categories = ["Speed", "Power", "Fielding", "Hitting", "Arm Strength"]
-        scores = [speed, power, fielding, hitting, arm_strength]
-        fig = px.line_polar(r=scores, theta=categories, line_close=True)
-        fig.update_traces(fill='toself')
-        fig.update_layout(title="Toxicity Profile Radar Chart")
-        st.plotly_chart(fig)
+            # Radar Chart
+            categories = ["Speed", "Power", "Fielding", "Hitting", "Arm Strength"]
+            scores = [speed, power, fielding, hitting, arm_strength]
+            fig = px.line_polar(r=scores, theta=categories, line_close=True)
+            fig.update_traces(fill='toself')
+            fig.update_layout(title="Toxicity Profile Radar Chart")
+            st.plotly_chart(fig)
     
-        rich_text = generate_rich_context(scores, categories, notes, context_label="Page 5: Toxicity Profile")
-        st.markdown("### 🔍 Rich Context Analysis")
-        st.markdown(rich_text)
+            rich_text = generate_rich_context(scores, categories, notes, context_label="Page 5: Toxicity Profile", scale=5)
+            st.markdown("### 🔍 Rich Context Analysis")
+            st.markdown(rich_text)
     
-        # Contextual Insight
-        if notes.strip():
-            st.subheader("What's really going on and can it create a toxic culture:")
-            st.markdown(get_contextual_insight(notes, total_score, risk_level))
+            # Contextual Insight
+            if notes.strip():
+                st.subheader("What's really going on and can it create a toxic culture:")
+                try:
+                    st.markdown(get_contextual_insight(notes, total_score, risk_level))
+                except CircuitOpenError:
+                    st.warning(AI_UNAVAILABLE)
+                except Exception as e:
+                    st.error(f"❌ Error generating contextual insight: {e}")
     
-        # ✅ Store generated data in session state
-        st.session_state["notes_p5"] = notes
-        st.session_state["scores_p5"] = scores
-        st.session_state["rich_text_p5"] = rich_text
-        st.session_state["fig_p5"] = fig
+            # ✅ Store generated data in session state
+            st.session_state["notes_p5"] = notes
+            st.session_state["scores_p5"] = scores
+            st.session_state["rich_text_p5"] = rich_text
+            st.session_state["fig_p5"] = fig
     
-    # ✅ Show Save button only if profile was generated
-    if "scores_p5" in st.session_state:
-        if st.button("Save to Repository"):
-            st.session_state["saved_notes_p5"] = st.session_state["notes_p5"]
-            st.session_state["saved_scores_p5"] = st.session_state["scores_p5"]
-            st.session_state["saved_rich_text_p5"] = st.session_state["rich_text_p5"]
-            st.session_state["saved_fig_p5"] = st.session_state["fig_p5"]
-            st.success("✅ Page 5 work saved! Go to Page 6 (Repository) to download or organize.")
+        # ✅ Show Save button only if profile was generated
+        if "scores_p5" in st.session_state:
+            if st.button("Save to Repository"):
+                st.session_state["saved_notes_p5"] = st.session_state["notes_p5"]
+                st.session_state["saved_scores_p5"] = st.session_state["scores_p5"]
+                st.session_state["saved_rich_text_p5"] = st.session_state["rich_text_p5"]
+                st.session_state["saved_fig_p5"] = st.session_state["fig_p5"]
+                st.success("✅ Page 5 work saved! Go to Page 6 (Repository) to download or organize.")
+
+        persist_session_state()
+
+    toxicity_scoring()
 
 def render_module_6():
+    hydrate_session_state()
     st.title("📂 Repository")
 
-    if not st.session_state.get("premium", False):
+    if not is_premium(user_id):
         st.warning("This feature requires premium ($9.99/month). Upgrade below:")
 
         # THIS IS THE ONLY WAY THAT ACTUALLY WORKS IN STREAMLIT
-        stripe_html = """
+        # ✅ client-reference-id lets the webhook map the payment back to this user
+        stripe_html = f"""
         <script async src="https://js.stripe.com/v3/buy-button.js"></script>
         <stripe-buy-button
             buy-button-id="buy_btn_1SX7yLEDUxoFlt7iIJTwRMZn"
             publishable-key="pk_live_51MGvtWEDUxoFlt7ihZ2UnGmbqju4DpL3ITvbSEgLy9wtj278PDW81l6ApHQ1YyUKzXLkQf3poEdJm3tNIvD796L800y7i6g7i9"
+            client-reference-id="{user_id}"
         >
         </stripe-buy-button>
         """
@@ -1162,81 +1894,62 @@ def render_module_6():
         # -------------------------------
         # Save Work block
         # -------------------------------
-        repo_dir = "repository"
-        os.makedirs(repo_dir, exist_ok=True)
-        
+        store = get_work_store()
+
         if st.button("Save Work", key="save_button"):      
-            repo_dir = "repository"
-            os.makedirs(repo_dir, exist_ok=True)
             timestamp = time.strftime("%Y%m%d_%H%M%S")
             file_name = f"saved_work_{user_id}_{timestamp}.txt"
-            file_path = os.path.join(repo_dir, file_name)
-            with open(file_path, "w") as f:
-                # Page 1
-                f.write("Page 1 Notes:\n" + str(st.session_state.get("saved_notes", "")) + "\n\n")
-                f.write("Page 1 Scores:\n" + str(st.session_state.get("saved_scores", "")) + "\n\n")
-                f.write("Page 1 Review:\n" + str(st.session_state.get("saved_review", "")) + "\n\n")
-                f.write("Page 1 Rich Context:\n" + str(st.session_state.get("saved_rich_text", "")) + "\n\n")
-            
-                # Page 3
-                f.write("Page 3 Notes:\n" + str(st.session_state.get("saved_notes_p3", "")) + "\n\n")
-                f.write("Page 3 AI Insights:\n" + str(st.session_state.get("saved_rich_text_p3", "")) + "\n\n")
-            
-                # Page 4
-                f.write("Page 4 Notes:\n" + str(st.session_state.get("saved_notes_p4", "")) + "\n\n")
-                f.write("Page 4 Scores:\n" + str(st.session_state.get("saved_scores_p4", "")) + "\n\n")
-                f.write("Page 4 Rich Context:\n" + str(st.session_state.get("saved_rich_text_p4", "")) + "\n\n")
-            
-                # Page 5
-                f.write("Page 5 Notes:\n" + str(st.session_state.get("saved_notes_p5", "")) + "\n\n")
-                f.write("Page 5 Scores:\n" + str(st.session_state.get("saved_scores_p5", "")) + "\n\n")
-                f.write("Page 5 Rich Context:\n" + str(st.session_state.get("saved_rich_text_p5", "")) + "\n\n")
-
-        
+            # ✅ Only sections that changed since earlier saves are written to disk
+            manifest = store.save(file_name, collect_work_sections(), meta={"user_id": user_id})
+            file_name = manifest["name"]
+            index_saved_work(file_name)
             st.success(f"✅ Work saved as {file_name}")
+
+        # ✅ Saves the write-behind worker gave up on (kept in its dead-letter file)
+        for failed in store.failed(user_id):
+            st.error(f"❌ {failed['name']} could not be written to the repository after {failed['attempts']} "
+                     f"attempts ({failed['error']}). Save your work again.")
+
+        # -------------------------------
+        # Find Similar Employees
+        # -------------------------------
+        st.markdown("### 🔎 Find Similar Employees")
+        similar_query = st.text_input("Describe the behavior to look for", placeholder="e.g., froze under pressure, dominates meetings")
+        compare_page = st.selectbox("Compare score profile from", ["None", "Page 1", "Page 4", "Page 5"])
+        compare_key = {"Page 1": "p1", "Page 4": "p4", "Page 5": "p5"}.get(compare_page)
+        compare_vector = None
+        if compare_key:
+            compare_vector = canonical_vector(st.session_state.get(SAVED_KEYS[compare_key][1]), compare_key)
+        render_similar_employees(similar_query, vector=compare_vector, key="similar_p6")
         
         # Show repository contents
         st.markdown("### 📂 Repository Files")
-        for fname in os.listdir(repo_dir):
-            with open(os.path.join(repo_dir, fname), "rb") as f:
-                st.download_button(f"Download {fname}", f, file_name=fname, key=f"download_{fname}")
+        repo_files = store.list()
+        for fname in repo_files:
+            # ✅ Reassembled and streamed only when the button is clicked
+            st.download_button(f"Download {fname}", lambda fname=fname: store.open_stream(fname),
+                               file_name=fname, mime="text/plain", key=f"download_{fname}")
         
         # -------------------------------
         # Select file for PDF generation
         # -------------------------------
-        repo_files = os.listdir(repo_dir)
         selected_file = st.selectbox("Select a file to generate PDF", repo_files)
         
-        file_content = ""
-        if selected_file:
-            with open(os.path.join(repo_dir, selected_file), "r") as f:
-                file_content = f.read()
-        
         # -------------------------------
         # Generate PDF block
         # -------------------------------
         if st.button("Generate PDF", key="pdf_button"):
-            from fpdf import FPDF
-            pdf = FPDF(orientation="L")  # Landscape for better width
-            pdf.add_page()
-            pdf.set_font("Arial", size=12)
-            pdf.multi_cell(270, 10, txt=sanitize_text(
-                file_content +
-                "\n\nPage 3 Notes:\n" + str(st.session_state.get("saved_notes_p3", "")) +
-                "\n\nPage 3 AI Insights:\n" + str(st.session_state.get("saved_rich_text_p3", "")) +
-                "\n\nPage 4 Notes:\n" + str(st.session_state.get("saved_notes_p4", "")) +
-                "\n\nPage 4 Scores:\n" + str(st.session_state.get("saved_scores_p4", "")) +
-                "\n\nPage 4 Rich Context:\n" + str(st.session_state.get("saved_rich_text_p4", "")) +
-                "\n\nPage 5 Notes:\n" + str(st.session_state.get("saved_notes_p5", "")) +
-                "\n\nPage 5 Scores:\n" + str(st.session_state.get("saved_scores_p5", "")) +
-                "\n\nPage 5 Rich Context:\n" + str(st.session_state.get("saved_rich_text_p5", ""))
-            ))
-
-        
-            # Use the selected file's content
-            pdf.multi_cell(270, 10, txt=sanitize_text(file_content))
-        
-            pdf.output("selected_work.pdf")
+            pdf_started = time.perf_counter()
+            # ✅ Laid out section by section from the saved record, then this
+            #    session's Page 3–5 work; Unicode text is kept (pdf_export.py)
+            def pdf_sections():
+                if selected_file:
+                    yield from store.iter_sections(selected_file)
+                yield from collect_work_sections()[4:]
+            pages, size = export_sections("selected_work.pdf", pdf_sections(), title=selected_file or "Current Work")
+            PDF_SECONDS.observe(time.perf_counter() - pdf_started)
+            PDF_BYTES.observe(size)
+            st.caption(f"{pages} pages, {size / 1024:.0f} KB")
             with open("selected_work.pdf", "rb") as f:
                 st.download_button("Download PDF", f, file_name="selected_work.pdf", key="pdf_download")
 
@@ -1251,20 +1964,43 @@ PAGES = [
     "Page 4: Behavioral Calibration Grid",
     "Page 5: Toxicity in the Workplace",
     "Page 6: Repository",
+    "Page 7: Job Review Templates",
 ]
 
 selected_page = st.sidebar.selectbox("Choose a page", PAGES)
 
+if SPECULATIVE_PREFETCH:
+    st.sidebar.toggle("⚡ Prepare analysis while I adjust", key="speculative_prefetch",
+                      help="Starts the rich-context analysis in the background once sliders and notes stop changing.")
+    prefetch_stats = get_prefetch_stats().snapshot()
+    if prefetch_stats["hits"] + prefetch_stats["misses"]:
+        st.sidebar.caption(f"Prefetch hit ratio {prefetch_stats['hit_ratio']:.0%} · "
+                           f"wasted tokens {prefetch_stats['wasted_tokens']:,}")
+
+breaker_state = get_circuit_breaker().snapshot()
+if breaker_state["state"] != "closed":
+    st.sidebar.warning(f"⚠️ AI service degraded ({breaker_state['state'].replace('_', '-')}): answers come from "
+                       f"saved and rule-based content for now.")
+
 # ✅ Page rendering logic (unchanged for now)
-if selected_page == "Page 1: The 5 Tool Employee Framework":
-    render_module_1()
-elif selected_page == "Page 2: The 5 Tool Employee Framework: Deep Research Version":
-    render_module_2()
-elif selected_page == "Page 3: Behavior Under Pressure Grid":
-    render_module_3()
-elif selected_page == "Page 4: Behavioral Calibration Grid":
-    render_module_4()
-elif selected_page == "Page 5: Toxicity in the Workplace":
-    render_module_5()
-elif selected_page == "Page 6: Repository":
-    render_module_6()
+with profiled(selected_page.split(":")[0], "rerun"):
+    if selected_page == "Page 1: The 5 Tool Employee Framework":
+        render_module_1()
+    elif selected_page == "Page 2: The 5 Tool Employee Framework: Deep Research Version":
+        render_module_2()
+    elif selected_page == "Page 3: Behavior Under Pressure Grid":
+        render_module_3()
+    elif selected_page == "Page 4: Behavioral Calibration Grid":
+        render_module_4()
+    elif selected_page == "Page 5: Toxicity in the Workplace":
+        render_module_5()
+    elif selected_page == "Page 6: Repository":
+        render_module_6()
+    elif selected_page == "Page 7: Job Review Templates":
+        render_template_discovery()
+
+render_last_profile()
+render_session_memory()
+
+persist_session_state()
+RERUN_SECONDS.labels(selected_page.split(":")[0]).observe(time.perf_counter() - RERUN_STARTED)
@@ -0,0 +1,71 @@
+# -------------------------------
+# Answer Router Benchmark
+# -------------------------------
+# Replays a mix of generic and specific questions through the Page 1, 4 and 5
+# Q&A boxes (AppTest + local fakes) and reports, per page:
+#   - hit rate: questions answered from the curated answer bank
+#   - model calls made (escalations)
+#   - median rerun latency for bank answers vs escalated answers
+#
+#   python benchmarks/bench_answer_bank.py
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import fakes  # noqa: E402
+from bench_reruns import PAGE_1, PAGE_4, PAGE_5, open_page, button  # noqa: E402
+
+QUESTIONS = {
+    PAGE_1: ("Send Question", [
+        "Tell me more about hitting for average", "Explain adaptability", "What is fielding?",
+        "How does communication fit in?", "Explain strategic decision-making", "What is this framework?",
+    ]),
+    PAGE_4: ("Send Question", [
+        "Tell me more about urgency vs foresight", "Explain motion vs processing", "What are hidden elements?",
+        "What is the leadership eligibility filter?", "Explain drive vs humility", "Tell me about arm strength",
+        "How should I coach a manager who scores 2 on Power but 5 on Speed before a reorg?",
+        "Draft talking points for promoting a reliable closer who is dismissive in retros",
+    ]),
+    PAGE_5: ("Get AI Response", [
+        "Tell me more about 360-degree feedback", "What is the dark triad?", "Explain Padilla's toxic triangle",
+        "What are Hogan's dark side derailers?",
+        "How do I handle a narcissistic VP who undermines my team in meetings?",
+        "Write a script for confronting a peer who takes credit for my work",
+    ]),
+}
+
+
+def ask(at, question, label):
+    box = at.text_area[0] if len(at.text_area) else at.text_input[0]
+    box.input(question)
+    before = fakes.CALLS["openai"]
+    start = time.perf_counter()
+    button(at, label).click().run()
+    elapsed = (time.perf_counter() - start) * 1000
+    escalated = fakes.CALLS["openai"] > before
+    return elapsed, escalated
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tiered answer router")
+    parser.parse_args(argv)
+    fakes.install()
+
+    print(f"{'page':<40} {'asked':>5} {'hit rate':>9} {'model calls':>12} {'bank ms':>8} {'model ms':>9}")
+    for page, (label, questions) in QUESTIONS.items():
+        at = open_page(page)
+        bank_ms, model_ms = [], []
+        for question in questions:
+            elapsed, escalated = ask(at, question, label)
+            (model_ms if escalated else bank_ms).append(elapsed)
+        hit_rate = len(bank_ms) / len(questions)
+        median = lambda xs: f"{statistics.median(xs):.1f}" if xs else "-"  # noqa: E731
+        print(f"{page:<40} {len(questions):>5} {hit_rate:>8.0%} {len(model_ms):>12} "
+              f"{median(bank_ms):>8} {median(model_ms):>9}")
+
+
+if __name__ == "__main__":
+    main()
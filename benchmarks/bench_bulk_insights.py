@@ -0,0 +1,119 @@
+# -------------------------------
+# Bulk Page 3 Analysis Benchmark
+# -------------------------------
+# Runs --comments observation comments through the in-process stub server
+# (stub_openai_server.py) two ways and compares calls, tokens and wall time
+# per comment:
+#   - one request per comment, Page 3's single-comment prompt (max_tokens 400)
+#   - bulk_insights.BulkAnalyzer: comments packed under the prompt budget into
+#     structured-output requests keyed by comment id, run concurrently
+#
+# --drop-rate removes that share of entries from each packed reply, to show
+# that only the missing comments are retried (the successful ones are never
+# resent).
+#
+#   python benchmarks/bench_bulk_insights.py --comments 200
+#   python benchmarks/bench_bulk_insights.py --comments 200 --drop-rate 0.1 --ttft 0.3
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+
+from openai import OpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import stub_openai_server  # noqa: E402
+from bulk_insights import SINGLE_TOKENS, BulkAnalyzer, number_comments  # noqa: E402
+
+MODEL = "gpt-4o-mini"
+SYSTEM = "You are an organizational psychologist analyzing behavior under pressure."
+PHRASES = ["froze when the deadline moved", "took over the client call", "kept the release on track",
+           "deflected questions about the outage", "rallied the team after the reorg", "skipped the retro again",
+           "flagged the vendor risk early", "pushed the plan through without feedback"]
+
+
+def comments(count, seed=0):
+    rng = random.Random(seed)
+    return [f"In the {rng.choice(['Q2', 'Q3', 'launch', 'audit'])} push, she {rng.choice(PHRASES)} and "
+            f"{rng.choice(PHRASES)}; the team noticed it {rng.randint(2, 9)} times." for _ in range(count)]
+
+
+def single(client, items):
+    # Page 3 as it was: one request per comment
+    tokens = prompt_tokens = 0
+    for _, comment in items:
+        response = client.chat.completions.create(
+            model=MODEL, max_tokens=SINGLE_TOKENS,
+            messages=[{"role": "system", "content": SYSTEM},
+                      {"role": "user",
+                       "content": f"Analyze this comment in context of the Behavior Under Pressure Grid: {comment}"}])
+        tokens += response.usage.total_tokens
+        prompt_tokens += response.usage.prompt_tokens
+    return {"calls": len(items), "tokens": tokens, "prompt_tokens": prompt_tokens}
+
+
+def structured(client, drop_rate, rng, usage):
+    def complete(prompt, schema, max_tokens):
+        response = client.chat.completions.create(
+            model=MODEL, max_tokens=max_tokens,
+            messages=[{"role": "system", "content": SYSTEM}, {"role": "user", "content": prompt}],
+            response_format={"type": "json_schema",
+                             "json_schema": {"name": "p3_bulk", "strict": True, "schema": schema}})
+        usage["prompt_tokens"] += response.usage.prompt_tokens
+        text = response.choices[0].message.content
+        if drop_rate:
+            reply = json.loads(text)
+            reply["insights"] = [entry for entry in reply["insights"] if rng.random() >= drop_rate]
+            text = json.dumps(reply)
+        return text, response.usage.total_tokens
+    return complete
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare one-comment requests with packed bulk requests")
+    parser.add_argument("--comments", type=int, default=200)
+    parser.add_argument("--ttft", type=float, default=0.05, help="stub seconds before the first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="stub generation speed (0 = instant)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="share of packed entries to drop from replies")
+    parser.add_argument("--skip-single", action="store_true")
+    args = parser.parse_args(argv)
+
+    config = stub_openai_server.StubConfig(ttft=args.ttft, tokens_per_sec=args.tokens_per_sec)
+    server, base_url = stub_openai_server.start_in_background(config)
+    try:
+        client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+        items = number_comments(comments(args.comments))
+        rows = []
+        if not args.skip_single:
+            start = time.perf_counter()
+            outcome = single(client, items)
+            rows.append(("one per comment", outcome["calls"], outcome["prompt_tokens"], outcome["tokens"],
+                         time.perf_counter() - start, len(items)))
+
+        usage = {"prompt_tokens": 0}
+        analyzer = BulkAnalyzer(structured(client, args.drop_rate, random.Random(1), usage),
+                                concurrency=args.concurrency)
+        outcome = analyzer.run(items)
+        rows.append(("packed", outcome["calls"], usage["prompt_tokens"], outcome["tokens"], outcome["seconds"],
+                     len(outcome["results"])))
+
+        print(f"{len(items)} comments, stub ttft {args.ttft}s, concurrency {args.concurrency}, "
+              f"drop rate {args.drop_rate:.0%}")
+        print(f"{'mode':<16} {'calls':>6} {'calls/c':>8} {'prompt/c':>9} {'tokens/c':>9} {'seconds':>8} {'answered':>9}")
+        for mode, calls, prompt_tokens, tokens, seconds, answered in rows:
+            print(f"{mode:<16} {calls:>6} {calls / len(items):>8.3f} {prompt_tokens / len(items):>9.1f} "
+                  f"{tokens / len(items):>9.1f} {seconds:>8.2f} {answered:>9}")
+        sizes = Counter(outcome["batches"])
+        print("Packed batch sizes: " + ", ".join(f"{size}×{n}" for size, n in sorted(sizes.items(), reverse=True)))
+        retried = sum(1 for result in outcome["results"] if result["attempts"] > 1)
+        print(f"Answered on a retry: {retried}; failed: {len(outcome['failed'])}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
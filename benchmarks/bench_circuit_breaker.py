@@ -0,0 +1,126 @@
+# -------------------------------
+# Circuit Breaker Outage Benchmark
+# -------------------------------
+# Simulates sessions pressing AI buttons against a fake model API that is
+# healthy, then down (every call hangs until the client timeout, or errors
+# fast with --mode error), then healthy again, with and without the breaker.
+# Reports, per phase:
+#   - how long users wait per click (p50 / p99) and total blocked time
+#   - calls that actually reached the API
+#   - how long after the API recovers until clicks succeed again
+#
+# Times are scaled down (1s timeout instead of 45s) so a run takes ~30s.
+#
+#   python benchmarks/bench_circuit_breaker.py --sessions 20 --mode hang
+import os
+import sys
+import time
+import random
+import argparse
+import threading
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from circuit_breaker import CircuitBreaker, CircuitOpenError  # noqa: E402
+
+
+class FakeAPI:
+    def __init__(self, latency, timeout, mode):
+        self.latency = latency
+        self.timeout = timeout
+        self.mode = mode
+        self.down = False
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def create(self):
+        with self.lock:
+            self.calls += 1
+        if not self.down:
+            time.sleep(self.latency)
+            return "ok"
+        if self.mode == "hang":
+            time.sleep(self.timeout)
+            raise TimeoutError("request timed out")
+        time.sleep(0.01)
+        raise ConnectionError("503 service unavailable")
+
+
+def run(use_breaker, args):
+    api = FakeAPI(args.latency, args.timeout, args.mode)
+    breaker = CircuitBreaker(slow_call_ms=args.timeout * 500, open_seconds=args.open_seconds)
+    call = (lambda: breaker.call(api.create)) if use_breaker else api.create
+    phases = [("healthy", args.phase), ("outage", args.phase * 2), ("recovered", args.phase)]
+    results = {name: [] for name, _ in phases}   # (wait, ok, finished at)
+    state = {"phase": "healthy", "api_calls": {}}
+    recovered_at = []
+    stop = threading.Event()
+
+    def session(seed):
+        rng = random.Random(seed)
+        while not stop.is_set():
+            phase = state["phase"]
+            start = time.perf_counter()
+            try:
+                call()
+                ok = True
+            except CircuitOpenError:
+                ok = False
+            except Exception:
+                ok = False
+            results[phase].append((time.perf_counter() - start, ok, time.perf_counter()))
+            stop.wait(rng.uniform(0.5, 1.5) * args.think)
+
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        for i in range(args.sessions):
+            pool.submit(session, i)
+        for name, seconds in phases:
+            state["phase"] = name
+            before = api.calls
+            api.down = name == "outage"
+            if name == "recovered":
+                recovered_at.append(time.perf_counter())
+            time.sleep(seconds)
+            state["api_calls"][name] = api.calls - before
+        stop.set()
+
+    report = {}
+    for name, _ in phases:
+        waits = [wait for wait, _, _ in results[name]] or [0.0]
+        report[name] = {
+            "clicks": len(results[name]),
+            "p50": statistics.median(waits),
+            "p99": sorted(waits)[int(0.99 * (len(waits) - 1))],
+            "blocked": sum(waits),
+            "api_calls": state["api_calls"][name],
+        }
+    first_ok = [done for _, ok, done in results["recovered"] if ok]
+    report["recovered"]["recovery"] = (min(first_ok) - recovered_at[0]) if first_ok else float("inf")
+    return report, breaker.snapshot()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the model-API circuit breaker during an outage")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--mode", choices=["hang", "error"], default="hang")
+    parser.add_argument("--latency", type=float, default=0.1, help="healthy call latency (s)")
+    parser.add_argument("--timeout", type=float, default=1.0, help="client timeout while the API hangs (s)")
+    parser.add_argument("--open-seconds", type=float, default=1.0)
+    parser.add_argument("--phase", type=float, default=4.0, help="seconds per phase (outage lasts twice as long)")
+    parser.add_argument("--think", type=float, default=0.3, help="mean pause between a session's clicks (s)")
+    args = parser.parse_args(argv)
+
+    print(f"{'':<16} {'phase':<10} {'clicks':>6} {'p50 wait':>9} {'p99 wait':>9} {'blocked s':>9} {'API calls':>9}")
+    for use_breaker in (False, True):
+        report, snapshot = run(use_breaker, args)
+        label = "with breaker" if use_breaker else "no breaker"
+        for phase, row in report.items():
+            print(f"{label:<16} {phase:<10} {row['clicks']:>6} {row['p50'] * 1000:>7.0f}ms {row['p99'] * 1000:>7.0f}ms "
+                  f"{row['blocked']:>9.1f} {row['api_calls']:>9}")
+        print(f"{label:<16} first success {report['recovered']['recovery']:.2f}s after recovery"
+              + (f"; opened {snapshot['opened']}x, rejected {snapshot['rejected']} calls" if use_breaker else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# -------------------------------
+# Framework Content Packs Benchmark
+# -------------------------------
+# Measures content_packs.ContentLibrary and what the packs save per rerun:
+#   - cold load + compile time per pack, and get() cost on the hot path
+#     (within CONTENT_CHECK_SECONDS) and when it stats the file
+#   - hot reload: time from a file edit to the recompiled pack being served
+#   - rerun cost of the content sections of Pages 2-5 (AppTest, --reruns
+#     reruns each, less the cost of rerunning an empty script): the old way,
+#     with the text, dicts and lists written as Python literals and converted
+#     on every rerun, against prebuilt packs
+#
+#   python benchmarks/bench_content_packs.py --reruns 50
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+import pandas as pd
+from streamlit import dataframe_util
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+from content_packs import CONTENT_DIR, ContentLibrary  # noqa: E402
+
+SCROLL = "height:500px; overflow-y:auto; border:1px solid #ccc; padding:10px;"
+
+
+def legacy_script(library):
+    # Pages 2-5 content as app.py rendered it before the packs: literals rebuilt on every rerun
+    p2, p3, p4, p5 = (library.get(name) for name in
+                      ["p2_deep_research", "p3_pressure_grid", "p4_calibration", "p5_toxicity"])
+    grid = p3.tables["Behavior Under Pressure Grid"]
+    tables = {name: [list(df.columns)] + df.values.tolist() for name, df in p4.tables.items()}
+    return f'''
+import pandas as pd
+import streamlit as st
+pdf_content = {p2.text["framework"]!r}
+st.markdown(f"<div style='{SCROLL}'>{{pdf_content}}</div>", unsafe_allow_html=True)
+st.markdown({p3.text["intro"]!r})
+data = {grid.to_dict(orient="list")!r}
+st.dataframe(pd.DataFrame(data), hide_index=True)
+tables = {tables!r}
+framework = st.selectbox("Select Framework", list(tables))
+st.table(tables[framework])
+for title, content in {dict(p4.panels["Educational Panels"])!r}.items():
+    with st.expander(title):
+        st.write(content)
+for title, content in {dict(p5.panels["Toxicity Concepts"])!r}.items():
+    with st.expander(title):
+        st.write(content)
+st.markdown({p5.html["Toxicity Rubric"]!r}, unsafe_allow_html=True)
+'''
+
+
+PACKS_SCRIPT = f'''
+import sys
+import streamlit as st
+sys.path.insert(0, {ROOT!r})
+from content_packs import ContentLibrary
+
+@st.cache_resource
+def get_content():
+    return ContentLibrary()
+
+p2 = get_content().get("p2_deep_research")
+st.markdown(p2.html["framework"], unsafe_allow_html=True)
+p3 = get_content().get("p3_pressure_grid")
+st.markdown(p3.text["intro"])
+st.dataframe(p3.arrow["Behavior Under Pressure Grid"], hide_index=True)
+p4 = get_content().get("p4_calibration")
+framework = st.selectbox("Select Framework", list(p4.tables))
+st.table(p4.arrow[framework])
+for title, text in p4.panels["Educational Panels"]:
+    with st.expander(title):
+        st.write(text)
+p5 = get_content().get("p5_toxicity")
+for title, text in p5.panels["Toxicity Concepts"]:
+    with st.expander(title):
+        st.write(text)
+st.markdown(p5.html["Toxicity Rubric"], unsafe_allow_html=True)
+'''
+
+
+def rerun_ms(scripts, reruns):
+    # Median rerun ms per script; reruns alternate between the scripts so drift hits them alike
+    apps = [AppTest.from_string(script, default_timeout=30) for script in scripts]
+    times = [[] for _ in apps]
+    for at in apps:
+        at.run()
+        assert not at.exception, at.exception
+    for _ in range(reruns):
+        for at, samples in zip(apps, times):
+            start = time.perf_counter()
+            at.run()
+            samples.append((time.perf_counter() - start) * 1000)
+    return [statistics.median(samples) for samples in times]
+
+
+def table_work_us(library):
+    # What st.dataframe/st.table serialize per rerun on Pages 3 and 4: literal -> DataFrame -> Arrow vs prebuilt Arrow
+    grid = library.get("p3_pressure_grid").tables["Behavior Under Pressure Grid"].to_dict(orient="list")
+    df = library.get("p4_calibration").tables["Behavioral Calibration Grid"]
+    rows = [list(df.columns)] + df.values.tolist()
+    arrow = [library.get("p3_pressure_grid").arrow["Behavior Under Pressure Grid"],
+             library.get("p4_calibration").arrow["Behavioral Calibration Grid"]]
+    legacy = per_call_us(lambda: (dataframe_util.convert_pandas_df_to_arrow_bytes(pd.DataFrame(grid)),
+                                  dataframe_util.convert_anything_to_arrow_bytes(rows)), calls=500)
+    packs = per_call_us(lambda: [dataframe_util.convert_arrow_table_to_arrow_bytes(t) for t in arrow], calls=500)
+    return legacy, packs
+
+
+def per_call_us(fn, calls=20000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark framework content packs")
+    parser.add_argument("--reruns", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        directory = shutil.copytree(CONTENT_DIR, os.path.join(workdir, "content"))
+        library = ContentLibrary(directory, check_interval=2.0)
+        print(f"{'pack':<20} {'version':>8} {'KB':>5} {'compile ms':>11} {'sections':>9}")
+        for name in library.names():
+            start = time.perf_counter()
+            pack = library.get(name)
+            elapsed = (time.perf_counter() - start) * 1000
+            print(f"{name:<20} {pack.version:>8} {os.path.getsize(library.path(name)) / 1024:>5.1f} "
+                  f"{elapsed:>11.2f} {len(pack.sections):>9}")
+
+        hot = per_call_us(lambda: library.get("p4_calibration"))
+        checking = ContentLibrary(directory, check_interval=0)
+        checking.get("p4_calibration")
+        stat = per_call_us(lambda: checking.get("p4_calibration"), calls=5000)
+        print(f"\nget(): {hot:.2f} µs within the check interval, {stat:.2f} µs when it stats the file")
+
+        path = checking.path("p4_calibration")
+        data = json.load(open(path))
+        data["version"] = "bench"
+        with open(path, "w") as f:
+            json.dump(data, f)
+        start = time.perf_counter()
+        pack = checking.get("p4_calibration")
+        print(f"Hot reload after an edit: {(time.perf_counter() - start) * 1000:.2f} ms "
+              f"(served version {pack.version!r}, reloads {checking.stats()['reloads']})")
+
+        legacy, packs = table_work_us(library)
+        print(f"\nTable serialization per rerun (Pages 3 + 4): literals {legacy:.0f} µs, packs {packs:.0f} µs")
+        empty, legacy, packs = rerun_ms(["import streamlit as st", legacy_script(library), PACKS_SCRIPT], args.reruns)
+        print(f"Pages 2-5 content sections, median of {args.reruns} reruns above an empty script "
+              f"({empty:.1f} ms): literals {legacy - empty:.2f} ms, packs {packs - empty:.2f} ms "
+              f"({(1 - (packs - empty) / (legacy - empty)) * 100:.0f}% less)")
+
+if __name__ == "__main__":
+    main()
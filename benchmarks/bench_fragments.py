@@ -0,0 +1,85 @@
+# -------------------------------
+# Fragment Rerun Benchmark
+# -------------------------------
+# Measures chat/Q&A and scoring interactions two ways against one running
+# app.py (local stub model, websocket sessions from load_test.py):
+#   - fragment: the browser reruns only the @st.fragment holding the widget
+#   - full:     the same interaction as a whole-page rerun (pre-fragment app)
+# and reports median rerun latency and bytes sent to the browser.
+#
+#   python benchmarks/bench_fragments.py --repeat 10
+import os
+import sys
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from load_test import Session, start_app  # noqa: E402
+from bench_reruns import PAGE_1, PAGE_2, PAGE_4, PAGE_5  # noqa: E402
+import stub_openai_server  # noqa: E402
+
+# (name, page, text widget label prefix, text, button label)
+CASES = [
+    ("Page 1 Ask AI", PAGE_1, "Ask a question (e.g., 'Tell me", "Tell me more about hitting", "Send Question"),
+    ("Page 2 Dive Further", PAGE_2, "Ask a question about the framework", "Explain Power", "Dive Further"),
+    ("Page 4 Send Question", PAGE_4, "Ask a question (e.g., 'Tell me more about this')", "What is 360 feedback?", "Send Question"),
+    ("Page 4 Generate Scoring", PAGE_4, "Enter notes about the employee", "Reliable closer", "Generate Scoring"),
+    ("Page 5 AI Chat", PAGE_5, "Ask a question (e.g., Tell me more", "Tell me more about 360-degree feedback", "Get AI Response"),
+    ("Page 5 Generate Profile", PAGE_5, "Additional Notes", "Dominates peers", "Generate Profile"),
+]
+
+
+async def measure(app_url, case, full, repeat):
+    name, page, text_label, text, button = case
+    latencies, sizes = [], []
+    samples = []
+    session = Session(app_url, 1, lambda step, ms, error: samples.append((step, ms, error)), timeout=120)
+    session.full_reruns = full
+    await session.connect()
+    try:
+        await session.rerun("load")
+        await session.goto(page)
+        await session.type_text(text_label, text)
+        for _ in range(repeat):
+            before = len(samples)
+            await session.click(button)
+            step, ms, error = samples[before]
+            if error:
+                raise RuntimeError(f"{name}: {error}")
+            latencies.append(ms)
+            sizes.append(session.received)
+    finally:
+        await session.close()
+    return statistics.median(latencies), statistics.median(sizes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fragment vs full-page rerun benchmark")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8598)
+    parser.add_argument("--ttft", type=float, default=0.0, help="stub model latency; 0 isolates script cost")
+    args = parser.parse_args(argv)
+
+    stub, base_url = stub_openai_server.start_in_background(
+        stub_openai_server.StubConfig(ttft=args.ttft, tokens_per_sec=0, default_tokens=150))
+    with tempfile.TemporaryDirectory() as workdir:
+        process, app_url = start_app(args.port, base_url, workdir)
+        try:
+            print(f"{'interaction':<26} {'full ms':>8} {'frag ms':>8} {'saved':>7} {'full KB':>8} {'frag KB':>8}")
+            for case in CASES:
+                full_ms, full_bytes = asyncio.run(measure(app_url, case, True, args.repeat))
+                frag_ms, frag_bytes = asyncio.run(measure(app_url, case, False, args.repeat))
+                saved = 1 - frag_ms / full_ms if full_ms else 0.0
+                print(f"{case[0]:<26} {full_ms:>8.1f} {frag_ms:>8.1f} {saved:>7.0%} "
+                      f"{full_bytes / 1024:>8.1f} {frag_bytes / 1024:>8.1f}")
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+            stub.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+# -------------------------------
+# Metrics Overhead Benchmark
+# -------------------------------
+# What the metrics in app.py cost on the hot path, and what a scrape costs:
+#   1. per-operation cost of each kind of recording app.py does (labelled
+#      histogram observe, timed fragment, Timed store proxy, metered
+#      completion) against the same call without it
+#   2. instrumentation cost per rerun, compared with the rerun medians in
+#      benchmarks/baselines/reruns.json
+#   3. rendering and scraping /metrics for a registry populated like a busy
+#      process, and observe() throughput while it is being scraped
+#
+#   python benchmarks/bench_metrics.py --ops 200000
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+import statistics
+import urllib.request
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from metrics import Registry, Timed, meter_completions, stats_families, start_in_background  # noqa: E402
+from semantic_cache import SemanticCache  # noqa: E402
+from circuit_breaker import CircuitBreaker  # noqa: E402
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "reruns.json")
+PAGES = [f"Page {i}" for i in range(1, 8)]
+FRAGMENTS = ["framework_chat", "profile_builder", "deep_research", "pressure_insights", "calibration_qa",
+             "calibration_scoring", "toxicity_chat", "toxicity_scoring"]
+SITES = ["rich_context", "job_review", "p2_dive_further", "p3_insights", "p4_question", "p5_question",
+         "p5_contextual_insight"]
+
+# Recordings on a typical rerun: the rerun itself, two fragments, two store
+# reads (usage count, session hydrate) and the active-session touch
+PER_RERUN = {"observe": 3, "timed store call": 2, "session touch": 1}
+
+
+def per_op_ns(fn, ops):
+    start = time.perf_counter_ns()
+    for _ in range(ops):
+        fn()
+    return (time.perf_counter_ns() - start) / ops
+
+
+class FakeStore:
+    def get_int(self, key):
+        return 3
+
+
+def fake_client():
+    response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=300), choices=[])
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=lambda **kwargs: response)))
+
+
+def hot_path(ops):
+    registry = Registry(prefix="bench_")
+    rerun = registry.histogram("rerun_seconds", "", ["page"])
+    store_seconds = registry.histogram("store_op_seconds", "", ["store", "op"])
+    ai_seconds = registry.histogram("ai_completion_seconds", "", ["site", "outcome"])
+    ai_tokens = registry.counter("ai_tokens_total", "", ["site", "kind"])
+    child = rerun.labels("Page 4")
+    store, timed = FakeStore(), Timed(FakeStore(), store_seconds, "state", ["get_int"])
+    client = fake_client()
+    sessions = {}
+
+    def timed_block():
+        with child.time():
+            pass
+
+    rows = [
+        ("histogram.labels().observe()", lambda: rerun.labels("Page 4").observe(0.2), lambda: None),
+        ("with child.time(): (fragment)", timed_block, lambda: None),
+        ("Timed store call", lambda: timed.get_int("usage:u"), lambda: store.get_int("usage:u")),
+        ("session touch", lambda: sessions.__setitem__("s1", time.monotonic()), lambda: None),
+        ("metered completion", lambda: meter_completions(client, "p4_question", ai_seconds, ai_tokens)
+         .chat.completions.create(model="m"), lambda: client.chat.completions.create(model="m")),
+    ]
+    print(f"{'operation':<32} {'instrumented':>13} {'bare':>9} {'overhead':>9}")
+    overhead = {}
+    for name, instrumented, bare in rows:
+        with_ns, bare_ns = per_op_ns(instrumented, ops), per_op_ns(bare, ops)
+        overhead[name] = with_ns - bare_ns
+        print(f"{name:<32} {with_ns:>10.0f} ns {bare_ns:>6.0f} ns {with_ns - bare_ns:>6.0f} ns")
+    return overhead
+
+
+def per_rerun(overhead):
+    cost_us = (PER_RERUN["observe"] * overhead["histogram.labels().observe()"]
+               + PER_RERUN["timed store call"] * overhead["Timed store call"]
+               + PER_RERUN["session touch"] * overhead["session touch"]) / 1000
+    print(f"\nInstrumentation per rerun: ~{cost_us:.1f} µs")
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, "r") as f:
+            baseline = json.load(f)
+        for name, row in baseline.items():
+            print(f"  {name:<20} median {row['latency_ms_median']:>7.1f} ms -> overhead "
+                  f"{cost_us / 10 / row['latency_ms_median']:.4f}%")
+
+
+def busy_registry():
+    registry = Registry(prefix="bench_")
+    rerun = registry.histogram("rerun_seconds", "", ["page"])
+    fragments = registry.histogram("fragment_seconds", "", ["fragment"])
+    ai_seconds = registry.histogram("ai_completion_seconds", "", ["site", "outcome"])
+    ai_tokens = registry.counter("ai_tokens_total", "", ["site", "kind"])
+    store_seconds = registry.histogram("store_op_seconds", "", ["store", "op"])
+    for i in range(1000):
+        rerun.labels(PAGES[i % len(PAGES)]).observe(0.05 + i % 7 * 0.1)
+        fragments.labels(FRAGMENTS[i % len(FRAGMENTS)]).observe(0.01 * (i % 11))
+        for outcome in ("ok", "APITimeoutError", "CircuitOpenError"):
+            ai_seconds.labels(SITES[i % len(SITES)], outcome).observe(i % 13)
+        ai_tokens.labels(SITES[i % len(SITES)], "prompt").inc(200)
+        ai_tokens.labels(SITES[i % len(SITES)], "completion").inc(400)
+        for store, op in (("state", "get_int"), ("state", "incr"), ("state", "get_many_json"),
+                          ("state", "put_json"), ("repository", "save"), ("repository", "list")):
+            store_seconds.labels(store, op).observe(0.001 * (i % 5))
+    cache = SemanticCache(capacity=1000)
+    for page in ("p2", "p4", "p5"):
+        for i in range(50):
+            cache.put(f"question {i} about {page}", page, "answer")
+            cache.lookup(f"question {i + 25} about {page}", page)
+    breaker = CircuitBreaker()
+    registry.register_collector("semantic_cache", lambda: stats_families("semantic_cache", cache.stats(), ""))
+    registry.register_collector("circuit_breaker", lambda: stats_families("circuit_breaker", breaker.snapshot(), ""))
+    return registry, rerun.labels("Page 4")
+
+
+def scrape(scrapes):
+    registry, child = busy_registry()
+    samples = []
+    for _ in range(scrapes):
+        start = time.perf_counter()
+        text = registry.render()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(f"\nRender: {len(text.splitlines())} lines, {len(text) / 1000:.0f} KB, "
+          f"median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
+
+    server, url = start_in_background(registry, host="127.0.0.1")
+    try:
+        samples = []
+        for _ in range(scrapes):
+            start = time.perf_counter()
+            urllib.request.urlopen(url).read()
+            samples.append((time.perf_counter() - start) * 1000)
+        print(f"HTTP scrape: median {statistics.median(samples):.2f} ms, max {max(samples):.2f} ms")
+
+        # observe() throughput with and without a scraper hammering the endpoint
+        def throughput(seconds=1.0):
+            count, end = 0, time.perf_counter() + seconds
+            while time.perf_counter() < end:
+                for _ in range(1000):
+                    child.observe(0.1)
+                count += 1000
+            return count / seconds
+
+        quiet = throughput()
+        stop = threading.Event()
+
+        def scraper():
+            while not stop.is_set():
+                urllib.request.urlopen(url).read()
+        thread = threading.Thread(target=scraper, daemon=True)
+        thread.start()
+        busy = throughput()
+        stop.set()
+        thread.join()
+        print(f"observe() throughput: {quiet / 1e6:.2f} M/s idle, {busy / 1e6:.2f} M/s while scraped continuously")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the overhead of app metrics")
+    parser.add_argument("--ops", type=int, default=200000, help="iterations per hot-path operation")
+    parser.add_argument("--scrapes", type=int, default=50)
+    args = parser.parse_args(argv)
+    per_rerun(hot_path(args.ops))
+    scrape(args.scrapes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# -------------------------------
+# PDF Export Benchmark
+# -------------------------------
+# Saves a large work record (sections of AI-style rich text with Unicode
+# punctuation, bullets and emoji) to a WorkStore, then exports it with
+# pdf_export.PdfBuilder at several sizes up to --pages pages, reporting
+# pages/sec and peak traced memory. Peak memory should grow with the page
+# count only by the size of the finished pages, not with the input text.
+#
+# The old Page 6 path (sanitized text in one multi_cell) is timed on a
+# smaller export (--legacy-pages) for comparison; it is quadratic in
+# paragraph length and much slower.
+#
+#   python benchmarks/bench_pdf_export.py --pages 500
+#   PDF_FONT=/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf python benchmarks/bench_pdf_export.py
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from pdf_export import PdfBuilder, export_sections, find_font  # noqa: E402
+from work_store import WorkStore  # noqa: E402
+
+RICH_TEXT = """### Speed — Adaptability
+**Speed:** Strong leadership trait — leverage it as a core strength under pressure… ✅
+- Moves “fast” on ambiguous work; re-prioritises within the sprint’s first day
+- Coaching cue: slow down on hand-offs → fewer re-opened tickets
+**Power:** Drives results in Zürich and São Paulo teams; 25% over target 🔍
+""" + "Moderate trait; develop with structured coaching, clear expectations and regular feedback. " * 12
+PAGES_PER_SECTION = 0.5   # measured: two sections of RICH_TEXT fill about one landscape page
+
+
+def save_record(store, pages):
+    sections = [(f"Page {i % 5 + 1} Rich Context ({i + 1})", RICH_TEXT) for i in range(int(pages / PAGES_PER_SECTION))]
+    return store.save("bench_work.txt", sections)["name"]
+
+
+def legacy_export(path, text):
+    # app.py before: five .replace passes and one multi_cell for the whole document
+    text = (text.replace("—", "-").replace("–", "-").replace("“", "\"").replace("”", "\"").replace("’", "'"))
+    text = text.encode("latin-1", "replace").decode("latin-1")   # it raised on anything else
+    pdf = FPDF(orientation="L")
+    pdf.add_page()
+    pdf.set_font("helvetica", size=12)
+    pdf.multi_cell(270, 10, text=text)
+    pdf.output(path)
+    return pdf.page_no()
+
+
+def measure(fn):
+    # Timed and traced in separate runs; tracemalloc slows the export down several times
+    start = time.perf_counter()
+    pages = fn()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pages, seconds, peak
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the streaming PDF export")
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--legacy-pages", type=int, default=20, help="size of the old-path export (0 to skip)")
+    parser.add_argument("--font", default=None, help="TTF to embed (default: PDF_FONT or a system DejaVu)")
+    args = parser.parse_args(argv)
+
+    font = find_font(args.font)
+    print(f"Font: {font or 'core helvetica (no TTF found; set PDF_FONT)'}")
+    with tempfile.TemporaryDirectory() as workdir:
+        store = WorkStore(os.path.join(workdir, "repository"))
+        out = os.path.join(workdir, "export.pdf")
+        PdfBuilder(font).output()   # warm the font and width caches, as a running app would be
+
+        print(f"{'target':>7} {'pages':>6} {'seconds':>8} {'pages/s':>8} {'peak MB':>8} {'KB/page':>8} {'PDF KB':>7}")
+        for target in sorted({max(args.pages // 10, 1), args.pages // 2, args.pages} - {0}):
+            name = save_record(store, target)
+            pages, seconds, peak = measure(
+                lambda: export_sections(out, store.iter_sections(name), title=name, font_path=font)[0])
+            print(f"{target:>7} {pages:>6} {seconds:>8.2f} {pages / seconds:>8.0f} {peak / 1e6:>8.1f} "
+                  f"{peak / pages / 1024:>8.1f} {os.path.getsize(out) / 1024:>7.0f}")
+
+        if args.legacy_pages:
+            name = save_record(store, args.legacy_pages)
+            pages, seconds, peak = measure(lambda: legacy_export(out, store.read_text(name)))
+            print(f"\nOld multi_cell path, {pages} pages: {seconds:.2f} s, {pages / seconds:.1f} pages/s, "
+                  f"peak {peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
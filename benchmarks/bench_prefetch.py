@@ -0,0 +1,84 @@
+# -------------------------------
+# Speculative Prefetch Benchmark
+# -------------------------------
+# Replays synthetic "adjust sliders, pause, click Generate" sessions against
+# SpeculativePrefetcher with a fake completion of fixed latency and reports,
+# per debounce window:
+#   - hit ratio (Generate answered by the prefetch)
+#   - wasted tokens (prefetches cancelled or never used) vs used tokens
+#   - median wait after clicking Generate, vs the no-prefetch baseline
+#
+#   python benchmarks/bench_prefetch.py --sessions 40 --latency 1.0
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from prefetch import PrefetchStats, SpeculativePrefetcher  # noqa: E402
+
+TOKENS_PER_CALL = 1100   # ~200 prompt + ~900 completion tokens for generate_rich_context
+
+
+def make_compute(latency):
+    def compute(scores):
+        time.sleep(latency)
+        return f"analysis for {scores}", TOKENS_PER_CALL
+    return compute
+
+
+def session(seed, prefetcher, think_scale):
+    # Returns the wait after clicking Generate
+    rng = random.Random(seed)
+    scores = [5] * 5
+    for _ in range(rng.randint(3, 10)):
+        scores[rng.randrange(5)] = rng.randint(1, 10)
+        prefetcher.observe(tuple(scores), tuple(scores))
+        # Short drags between slider moves, with an occasional longer pause to think
+        time.sleep(rng.uniform(0.05, 0.3) if rng.random() < 0.8 else rng.uniform(0.5, 2.0) * think_scale)
+    time.sleep(rng.uniform(0.2, 1.5) * think_scale)   # read the sliders back, then click
+    start = time.perf_counter()
+    text = prefetcher.take(tuple(scores))
+    if text is None:
+        prefetcher.compute(tuple(scores))
+    return time.perf_counter() - start
+
+
+def run(debounce, sessions, latency, think_scale, concurrency):
+    stats = PrefetchStats()
+    compute = make_compute(latency)
+
+    def one(seed):
+        return session(seed, SpeculativePrefetcher(compute, debounce=debounce, stats=stats), think_scale)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        waits = list(pool.map(one, range(sessions)))
+    time.sleep(latency)   # let cancelled in-flight work finish so its tokens are counted
+    return stats.snapshot(), waits
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark speculative rich-context prefetch")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=1.0, help="seconds per fake completion")
+    parser.add_argument("--think-scale", type=float, default=1.0, help="scales user pauses")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--debounce", type=float, action="append", help="debounce windows to compare (repeatable)")
+    args = parser.parse_args(argv)
+
+    print(f"baseline (no prefetch): every Generate waits {args.latency:.2f}s "
+          f"and costs {TOKENS_PER_CALL} tokens")
+    print(f"{'debounce':>8} {'hit ratio':>9} {'started':>8} {'cancelled':>9} {'used tok':>9} "
+          f"{'wasted tok':>10} {'waste':>6} {'p50 wait':>9}")
+    for debounce in args.debounce or [0.5, 1.0, 1.5, 3.0]:
+        stats, waits = run(debounce, args.sessions, args.latency, args.think_scale, args.concurrency)
+        print(f"{debounce:>7.1f}s {stats['hit_ratio']:>8.0%} {stats['started']:>8} {stats['cancelled']:>9} "
+              f"{stats['used_tokens']:>9,} {stats['wasted_tokens']:>10,} {stats['waste_ratio']:>5.0%} "
+              f"{statistics.median(waits):>8.2f}s")
+
+
+if __name__ == "__main__":
+    main()
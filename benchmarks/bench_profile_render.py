@@ -0,0 +1,58 @@
+# -------------------------------
+# Page 1 Profile Render Cost
+# -------------------------------
+# Clicks "Generate 5 Tool Employee" through Streamlit's AppTest and counts the
+# delta messages (elements) and serialized bytes the profile block sends.
+#
+#   python benchmarks/bench_profile_render.py
+import os
+import sys
+import json
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py")
+PROFILE_HEADER = "### 🧠 Your Custom 5 Tool Employee Profile"
+PROFILE_END = "📊 5-Tool Employee Profile Radar"
+
+
+def walk(node):
+    children = getattr(node, "children", None)
+    if children is None:
+        yield node
+        return
+    for child in children.values():
+        yield from walk(child)
+
+
+def element_text(node):
+    return str(getattr(node, "value", "") or getattr(node, "body", "") or "")
+
+
+def measure(scores):
+    # Point the model client at a closed port so the rich-context call fails fast
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.environ.setdefault("OPENAI_BASE_URL", "http://127.0.0.1:9/v1")
+    at = AppTest.from_file(APP_PATH, default_timeout=60).run()
+    at.text_area[0].input("Steady under pressure, quiet communicator")
+    for slider, score in zip(at.slider, scores):
+        slider.set_value(score)
+    at.button[1].click().run()
+
+    messages, size, inside = 0, 0, False
+    for node in walk(at.main):
+        text = element_text(node)
+        if PROFILE_HEADER in text:
+            inside = True
+        elif PROFILE_END in text:
+            break
+        if inside:
+            messages += 1
+            size += len(node.proto.SerializeToString())
+    return {"scores": scores, "messages": messages, "bytes": size}
+
+
+if __name__ == "__main__":
+    results = [measure(s) for s in ([2, 2, 2, 2, 2], [5, 5, 5, 5, 5], [2, 5, 8, 4, 9])]
+    json.dump(results, sys.stdout, indent=2)
+    print()
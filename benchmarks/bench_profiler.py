@@ -0,0 +1,84 @@
+# -------------------------------
+# Rerun Profiler Overhead Benchmark
+# -------------------------------
+# Runs a rerun-like workload (radar figures, JSON round-trips, an fpdf page)
+# bare, under the sampling profiler and under the deterministic profiler,
+# then reports the slowdown of a profiled rerun and the average cost per
+# rerun at a given production sample rate (PROFILE_SAMPLE_RATE).
+#
+#   python benchmarks/bench_profiler.py --runs 30 --rate 0.01
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+import plotly.express as px
+from fpdf import FPDF
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from profiler import DETERMINISTIC, SAMPLE, RerunProfiler  # noqa: E402
+
+TOOLS = ["Speed", "Power", "Fielding", "Hitting for Average", "Arm Strength"]
+TEXT = "Strong leadership trait; leverage as a core strength under pressure. " * 40
+
+
+def workload():
+    for scores in ([3, 4, 2, 5, 3], [1, 2, 3, 4, 5]):
+        fig = px.line_polar(r=scores, theta=TOOLS, line_close=True, title="Behavioral Tool Scoring Radar")
+        fig.update_traces(fill='toself')
+        fig.to_plotly_json()
+    usage = {f"user{i}@example.com": {"count": i % 5, "month": "2025-11"} for i in range(2000)}
+    json.loads(json.dumps(usage))
+    pdf = FPDF(orientation="L")
+    pdf.add_page()
+    pdf.set_font("helvetica", size=12)
+    pdf.multi_cell(270, 10, text=TEXT)
+    pdf.output()
+
+
+def timed_runs(runs, mode, interval, out):
+    samples, sample_counts = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        if mode is None:
+            workload()
+        else:
+            with RerunProfiler("bench", mode, interval) as profiler:
+                workload()
+        samples.append((time.perf_counter() - start) * 1000)
+        if mode is not None:
+            sample_counts.append(profiler.samples)
+    if mode is not None:
+        start = time.perf_counter()
+        profiler.save(out, "bench")
+        save_ms = (time.perf_counter() - start) * 1000
+    else:
+        save_ms = 0.0
+    return statistics.median(samples), (statistics.median(sample_counts) if sample_counts else 0), save_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-rerun profiler's overhead")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--interval-ms", type=float, default=1.0)
+    parser.add_argument("--rate", type=float, default=0.01, help="production PROFILE_SAMPLE_RATE")
+    args = parser.parse_args(argv)
+
+    workload()   # warm imports and plotly's validators
+    interval = args.interval_ms / 1000
+    with tempfile.TemporaryDirectory() as out:
+        bare, _, _ = timed_runs(args.runs, None, interval, out)
+        print(f"{'mode':<14} {'median':>9} {'slowdown':>9} {'samples':>8} {'save':>8} {'cost/rerun @ rate':>18}")
+        print(f"{'bare':<14} {bare:>7.1f}ms")
+        for mode in (SAMPLE, DETERMINISTIC):
+            median, samples, save_ms = timed_runs(args.runs, mode, interval, out)
+            extra = median - bare + save_ms
+            print(f"{mode:<14} {median:>7.1f}ms {median / bare - 1:>8.1%} {samples:>8.0f} {save_ms:>6.1f}ms "
+                  f"{extra * args.rate:>9.2f}ms ({extra * args.rate / bare:.2%})")
+
+
+if __name__ == "__main__":
+    main()
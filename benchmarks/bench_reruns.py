@@ -0,0 +1,263 @@
+# -------------------------------
+# Rerun Benchmark Suite
+# -------------------------------
+# Drives app.py through Streamlit's AppTest with local fakes for every
+# outbound service and measures, per scenario:
+#   - rerun latency (median / max over --repeat runs)
+#   - peak Python memory allocated during the rerun (tracemalloc)
+#   - outbound calls made during the rerun
+#
+#   python benchmarks/bench_reruns.py                 # compare against baseline
+#   python benchmarks/bench_reruns.py --update        # write a new baseline
+#   python benchmarks/bench_reruns.py --only "Generate PDF"
+#
+# Baselines are machine-specific; refresh them with --update on the machine
+# that runs the regression check.
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import fakes  # noqa: E402
+import entitlements  # noqa: E402
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+APP_PATH = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app.py"))
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "reruns.json")
+
+PAGE_1 = "Page 1: The 5 Tool Employee Framework"
+PAGE_2 = "Page 2: The 5 Tool Employee Framework: Deep Research Version"
+PAGE_3 = "Page 3: Behavior Under Pressure Grid"
+PAGE_4 = "Page 4: Behavioral Calibration Grid"
+PAGE_5 = "Page 5: Toxicity in the Workplace"
+PAGE_6 = "Page 6: Repository"
+PAGE_7 = "Page 7: Job Review Templates"
+PAGES = [PAGE_1, PAGE_2, PAGE_3, PAGE_4, PAGE_5, PAGE_6, PAGE_7]
+DEMO_USER = "demo_user@example.com"
+
+# Work a user would have saved from Pages 1/3/4/5 before visiting the repository
+SAVED_WORK = {
+    "saved_notes": "Strong planner, quiet in meetings, steady under deadline pressure.",
+    "saved_scores": [7, 6, 5, 4, 8],
+    "saved_review": "Your 5-Tool Employee Profile",
+    "saved_rich_text": fakes.CANNED_ANSWER * 8,
+    "saved_notes_p3": "Freezes when priorities change late in the sprint.",
+    "saved_rich_text_p3": fakes.CANNED_ANSWER * 4,
+    "saved_notes_p4": "Reliable closer, dismissive in retros.",
+    "saved_scores_p4": [3, 4, 2, 5, 3],
+    "saved_rich_text_p4": fakes.CANNED_ANSWER * 8,
+    "saved_notes_p5": "Charms leadership, dominates peers.",
+    "saved_scores_p5": [2, 3, 3, 4, 1],
+    "saved_rich_text_p5": fakes.CANNED_ANSWER * 8,
+}
+
+
+# -------------------------------
+# AppTest helpers
+# -------------------------------
+def open_page(page, saved_work=False):
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    if saved_work:
+        for key, value in SAVED_WORK.items():
+            at.session_state[key] = value
+    at.run()
+    if page != PAGE_1:
+        at.sidebar.selectbox[0].set_value(page)
+        at.run()
+    return at
+
+
+def button(at, label):
+    for b in at.button:
+        if b.label == label:
+            return b
+    raise LookupError(f"No button labelled {label!r}")
+
+
+def fail_on_exception(at, name):
+    if at.exception:
+        raise RuntimeError(f"{name}: {at.exception[0].value}")
+
+
+# -------------------------------
+# Scenarios
+# -------------------------------
+# Each scenario returns (app, action); only action() is measured.
+def scenario_page_load(page):
+    def setup():
+        at = AppTest.from_file(APP_PATH, default_timeout=60)
+
+        def action():
+            at.run()
+            if page != PAGE_1:
+                at.sidebar.selectbox[0].set_value(page)
+                at.run()
+        return at, action
+    return setup
+
+
+def setup_generate_profile():
+    at = open_page(PAGE_5)
+    for slider, value in zip(at.slider, [2, 3, 3, 4, 1]):
+        slider.set_value(value)
+    at.text_area[1].input("Charms leadership, dominates peers in standups.")
+    at.run()
+    return at, lambda: button(at, "Generate Profile").click().run()
+
+
+def setup_generate_scoring():
+    at = open_page(PAGE_4)
+    for slider, value in zip(at.slider, [3, 4, 2, 5, 3]):
+        slider.set_value(value)
+    at.text_area[1].input("Reliable closer, dismissive in retros.")
+    at.run()
+    return at, lambda: button(at, "Generate Scoring").click().run()
+
+
+def setup_save_work():
+    at = open_page(PAGE_6, saved_work=True)
+    return at, lambda: button(at, "Save Work").click().run()
+
+
+def setup_search_templates():
+    at = open_page(PAGE_7)
+    return at, lambda: at.text_input[0].input("deisel mechnic").run()
+
+
+def setup_generate_pdf():
+    at = open_page(PAGE_6, saved_work=True)
+    button(at, "Save Work").click().run()
+    return at, lambda: button(at, "Generate PDF").click().run()
+
+
+SCENARIOS = {f"Load {page.split(':')[0]}": scenario_page_load(page) for page in PAGES}
+SCENARIOS.update({
+    "Generate Profile": setup_generate_profile,
+    "Generate Scoring": setup_generate_scoring,
+    "Save Work": setup_save_work,
+    "Generate PDF": setup_generate_pdf,
+    "Search Templates": setup_search_templates,
+})
+
+
+# -------------------------------
+# Measurement
+# -------------------------------
+def measure(name, setup, repeat):
+    # Warm-up run so first-import and cache-fill costs don't land in the numbers
+    at, action = setup()
+    action()
+    fail_on_exception(at, name)
+
+    latencies, calls = [], []
+    for _ in range(repeat):
+        at, action = setup()
+        before = fakes.outbound_calls()
+        start = time.perf_counter()
+        action()
+        latencies.append((time.perf_counter() - start) * 1000)
+        calls.append(fakes.outbound_calls() - before)
+        fail_on_exception(at, name)
+
+    # Separate pass for memory so tracemalloc overhead doesn't skew latency
+    at, action = setup()
+    tracemalloc.start()
+    action()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "latency_ms_median": round(statistics.median(latencies), 2),
+        "latency_ms_max": round(max(latencies), 2),
+        "peak_memory_kb": round(peak / 1024, 1),
+        "outbound_calls": max(calls),
+    }
+
+
+def run_suite(names, repeat):
+    fakes.install()
+    os.environ.setdefault("OPENAI_API_KEY", "sk-bench")
+    os.environ.setdefault("REVIEW_WARMUP", "0")  # keep the background job-review warm-up out of the numbers
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        # app.py writes prompt_usage.json, repository/ and PDFs relative to cwd
+        os.chdir(workdir)
+        # The repository page is premium-only; grant it the way the Stripe webhook would
+        entitlements.service = entitlements.EntitlementService(entitlements.SQLiteEntitlementStore("entitlements.db"))
+        entitlements.service.set_premium(DEMO_USER, True, status="active")
+        try:
+            for name in names:
+                results[name] = measure(name, SCENARIOS[name], repeat)
+                print(f"{name:<20} {json.dumps(results[name])}", file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+# -------------------------------
+# Baseline comparison
+# -------------------------------
+def compare(results, baseline, threshold, slack_ms, slack_kb):
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        limit = base["latency_ms_median"] * (1 + threshold) + slack_ms
+        if current["latency_ms_median"] > limit:
+            regressions.append(f"{name}: latency {current['latency_ms_median']}ms > {limit:.1f}ms")
+        limit = base["peak_memory_kb"] * (1 + threshold) + slack_kb
+        if current["peak_memory_kb"] > limit:
+            regressions.append(f"{name}: peak memory {current['peak_memory_kb']}KB > {limit:.1f}KB")
+        if current["outbound_calls"] > base["outbound_calls"]:
+            regressions.append(f"{name}: outbound calls {current['outbound_calls']} > {base['outbound_calls']}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rerun benchmarks for app.py")
+    parser.add_argument("--only", action="append", choices=sorted(SCENARIOS), help="run a single scenario (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update", action="store_true", help="overwrite the baseline with these results")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression (0.25 = 25%%)")
+    parser.add_argument("--slack-ms", type=float, default=25.0, help="absolute latency noise allowance")
+    parser.add_argument("--slack-kb", type=float, default=256.0, help="absolute memory noise allowance")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.only or list(SCENARIOS), args.repeat)
+
+    if args.update or not os.path.exists(args.baseline):
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.slack_ms, args.slack_kb)
+    if regressions:
+        print("🚫 Regressions against baseline:")
+        for line in regressions:
+            print(f"  - {line}")
+        return 1
+    print("✅ No regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# -------------------------------
+# Incremental Rich-Context Benchmark
+# -------------------------------
+# Replays synthetic editing sessions (load a profile, then nudge one slider at
+# a time and regenerate after each edit) against RichContextBuilder and
+# compares them with regenerating the whole analysis on every edit. The fake
+# completion answers with a JSON instance of the requested schema (the same
+# generator the stub server uses) and its latency is modelled, not slept:
+#   latency = ttft + completion tokens / tokens-per-sec
+#
+# Also checks that a reply cut off at max_tokens is retried once with a
+# larger budget and raises TruncatedReply, never returns raw JSON, when the
+# retry is cut off too. Exits non-zero when that check fails.
+#
+#   python benchmarks/bench_rich_context.py --sessions 50 --edits 8
+import os
+import sys
+import json
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from rich_context import FULL_TOKENS, RichContextBuilder, TruncatedReply, section_budget  # noqa: E402
+from stub_openai_server import fill_schema, count_strings, count_tokens  # noqa: E402
+
+TOOLS = ["Speed", "Power", "Fielding", "Hitting for Average", "Arm Strength"]
+BAND_CUTOFFS = {10: (3, 6), 5: (2, 4)}   # mirrors app.score_band
+
+
+def score_band(score, scale):
+    low, mid = BAND_CUTOFFS[scale]
+    return "low" if score <= low else "mid" if score <= mid else "high"
+
+
+class FakeModel:
+    def __init__(self, ttft, tokens_per_sec):
+        self.ttft = ttft
+        self.tokens_per_sec = tokens_per_sec
+        self.latencies = []
+
+    def latency(self, completion_tokens):
+        return self.ttft + completion_tokens / self.tokens_per_sec
+
+    def complete(self, prompt, schema, max_tokens):
+        rng = random.Random(prompt)
+        text = json.dumps(fill_schema(schema, rng, max(3, int(max_tokens * 0.75) // count_strings(schema))))
+        completion = count_tokens(text)
+        self.latencies.append(self.latency(completion))
+        return text, count_tokens(prompt) + completion, "stop"
+
+
+class CutOffModel:
+    # Writes `natural` tokens of JSON whatever the budget and stops at max_tokens
+    def __init__(self, natural):
+        self.natural = natural
+        self.budgets = []
+
+    def complete(self, prompt, schema, max_tokens):
+        self.budgets.append(max_tokens)
+        words = json.dumps(fill_schema(schema, random.Random(prompt), self.natural // count_strings(schema))).split(" ")
+        if len(words) <= max_tokens:
+            return " ".join(words), len(words), "stop"
+        return " ".join(words[:max_tokens]), max_tokens, "length"
+
+
+def sessions(count, edits, scale, seed=0):
+    # One list of score vectors per session: the loaded profile, then single-slider nudges
+    rng = random.Random(seed)
+    for _ in range(count):
+        scores = [rng.randint(1, scale) for _ in TOOLS]
+        steps = [tuple(scores)]
+        for _ in range(edits):
+            i = rng.randrange(len(TOOLS))
+            scores[i] = min(scale, max(1, scores[i] + rng.choice((-1, 1))))
+            steps.append(tuple(scores))
+        yield steps
+
+
+def run(scale, count, edits, ttft, tokens_per_sec):
+    model = FakeModel(ttft, tokens_per_sec)
+    builder = RichContextBuilder(model.complete)
+    full_tokens = full_latency = 0.0
+    edit_latencies = []
+    for n, steps in enumerate(sessions(count, edits, scale, seed=scale)):
+        notes = f"session {n}"
+        for scores in steps:
+            calls_before = len(model.latencies)
+            builder.generate(list(scores), TOOLS, [score_band(s, scale) for s in scores], notes, "bench")
+            edit_latencies.append(model.latencies[-1] if len(model.latencies) > calls_before else 0.0)
+            full_tokens += 250 + FULL_TOKENS   # ~250 prompt tokens + a full-length completion
+            full_latency += model.latency(FULL_TOKENS)
+    stats = builder.stats()
+    requests = stats["requests"]
+    return {
+        "requests": requests,
+        "calls": stats["full_calls"] + stats["partial_calls"],
+        "skipped": stats["reused"],
+        "tokens": stats["tokens"],
+        "full_tokens": int(full_tokens),
+        "p50": statistics.median(edit_latencies),
+        "mean": sum(edit_latencies) / requests,
+        "full_mean": full_latency / requests,
+        "reuse": stats["section_reuse_rate"],
+    }
+
+
+def check_truncation():
+    # Number of failed checks: one retry that fits, and one that doesn't
+    budget = section_budget(len(TOOLS))
+    failed = 0
+    print("\ntruncated replies:")
+    for natural, expect_text in ((int(budget * 1.5), True), (budget * 3, False)):
+        model = CutOffModel(natural)
+        try:
+            text, _ = RichContextBuilder(model.complete).generate([5] * 5, TOOLS, ["mid"] * 5, "notes", "check")
+            outcome = "raw JSON" if text.lstrip().startswith("{") else "analysis"
+        except TruncatedReply:
+            outcome = "TruncatedReply"
+        ok = outcome == ("analysis" if expect_text else "TruncatedReply") and model.budgets == [budget, budget * 2]
+        failed += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {natural} tokens needed, budgets {model.budgets} -> {outcome}")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-tool rich-context regeneration")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=8, help="slider nudges per session")
+    parser.add_argument("--ttft", type=float, default=0.5)
+    parser.add_argument("--tokens-per-sec", type=float, default=60.0)
+    args = parser.parse_args(argv)
+
+    print(f"{'scale':>5} {'requests':>8} {'calls':>6} {'no call':>7} {'tokens':>9} {'full tok':>9} "
+          f"{'saved':>6} {'p50 lat':>8} {'mean lat':>8} {'full lat':>8} {'reuse':>6}")
+    for scale in (10, 5):
+        r = run(scale, args.sessions, args.edits, args.ttft, args.tokens_per_sec)
+        print(f"{scale:>5} {r['requests']:>8} {r['calls']:>6} {r['skipped']:>7} {r['tokens']:>9,} "
+              f"{r['full_tokens']:>9,} {1 - r['tokens'] / r['full_tokens']:>5.0%} {r['p50']:>7.2f}s "
+              f"{r['mean']:>7.2f}s {r['full_mean']:>7.2f}s {r['reuse']:>5.0%}")
+    failed = check_truncation()
+    if failed:
+        sys.exit(f"{failed} truncation check(s) failed")
+
+
+if __name__ == "__main__":
+    main()
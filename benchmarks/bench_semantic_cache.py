@@ -0,0 +1,156 @@
+# -------------------------------
+# Semantic Question Cache Benchmark
+# -------------------------------
+# Two parts:
+#   1. Matching quality on hand-written rewordings (should hit) and near
+#      misses (same words, different question; must not hit), per threshold.
+#      Exits non-zero if a near miss hits at the app's page thresholds.
+#   2. Scale: fills one page's index with synthetic questions drawn from a
+#      Zipf-distributed vocabulary (common words have long postings, the
+#      worst case for the inverted index), then reports lookup p50/p99,
+#      insert cost, memory, and insert/lookup cost once eviction kicks in.
+#
+#   python benchmarks/bench_semantic_cache.py --size 100000
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from semantic_cache import SemanticCache  # noqa: E402
+
+# (cached question, rewordings that should reuse it, near misses that must not)
+CASES = [
+    ("explain 360 feedback", ["what's 360-degree feedback?", "Tell me more about 360-degree feedback"],
+     ["explain toxic feedback", "how do I give feedback to my manager"]),
+    ("What is toxic leadership?", ["explain toxic leadership", "toxic leadership - what is it?"],
+     ["what is servant leadership", "what is transformational leadership"]),
+    ("How do I coach a low Arm Strength employee?", ["coaching someone with low arm strength"],
+     ["how do I coach a high Arm Strength employee"]),
+    ("Explain appreciative inquiry", ["what is appreciative inquiry?", "appreciative inquiry explained"],
+     ["explain emotional intelligence"]),
+    ("What does high Speed look like under pressure?", ["what does high speed look like when stressed"],
+     ["what does high power look like under pressure", "what does low speed look like under pressure"]),
+    ("Explain the dark triad", ["what is the dark triad?", "tell me about the dark triad"],
+     ["explain the toxic triangle"]),
+    ("How does Drucker's Effective Executive relate to Fielding?",
+     ["how does drucker's effective executive relate to fielding"],
+     ["how does deming relate to fielding"]),
+    ("What does a score of 2 in Power mean?", ["what does a score of 2 in power mean for my team"],
+     ["What does a score of 5 in Power mean?"]),
+    ("How do I coach high power and low speed?", ["coaching someone with high power and low speed"],
+     ["How do I coach low power and high speed?"]),
+    ("What does fielding look like for a manager?", ["what does fielding look like for managers"],
+     ["What does fielding look like for an intern?"]),
+]
+CHECK_THRESHOLD = 0.8   # lowest of app.py's SEMANTIC_CACHE_THRESHOLDS
+
+WORDS = 5000
+
+
+def filled_cache():
+    cache = SemanticCache(capacity=100)
+    for question, _, _ in CASES:
+        cache.put(question, "p", f"answer: {question}")
+    return cache
+
+
+def quality(thresholds):
+    print(f"{'threshold':>9} {'rewordings hit':>15} {'near misses hit':>16}")
+    for threshold in thresholds:
+        cache = filled_cache()
+        hits = sum(cache.lookup(q, "p", threshold) is not None for _, same, _ in CASES for q in same)
+        false = sum(cache.lookup(q, "p", threshold) is not None for _, _, other in CASES for q in other)
+        same_total = sum(len(same) for _, same, _ in CASES)
+        other_total = sum(len(other) for _, _, other in CASES)
+        print(f"{threshold:>9.2f} {hits:>9}/{same_total:<5} {false:>10}/{other_total:<5}")
+
+
+def check_near_misses():
+    # Number of near misses served a cached answer at CHECK_THRESHOLD
+    cache = filled_cache()
+    failed = 0
+    print(f"\nnear misses at {CHECK_THRESHOLD:.2f}:")
+    for question, _, others in CASES:
+        for other in others:
+            hit = cache.lookup(other, "p", CHECK_THRESHOLD)
+            failed += hit is not None
+            print(f"  {'FAIL' if hit else 'ok  '} {other!r}" + (f" -> {hit.question!r} ({hit.similarity:.2f})" if hit else ""))
+    return failed
+
+
+def synthetic_questions(count, seed):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"term{i}x" for i in range(WORDS)])
+    zipf = 1 / np.arange(1, WORDS + 1)
+    lengths = rng.integers(3, 9, size=count)
+    words = vocabulary[rng.choice(WORDS, size=int(lengths.sum()), p=zipf / zipf.sum())].tolist()
+    start = 0
+    for length in lengths.tolist():
+        yield "what about " + " ".join(words[start:start + length])
+        start += length
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def scale(size, lookups):
+    cache = SemanticCache(capacity=size)
+    questions = list(synthetic_questions(size, seed=1))
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i, question in enumerate(questions):
+        cache.put(question, "p", f"answer {i}")
+    fill_s = time.perf_counter() - start
+    memory_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    tracemalloc.stop()
+
+    def timed_lookups(questions):
+        samples, hits = [], 0
+        for question in questions:
+            start = time.perf_counter()
+            hits += cache.lookup(question, "p") is not None
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples, hits
+
+    fresh, fresh_hits = timed_lookups(synthetic_questions(lookups, seed=2))
+    repeat, repeat_hits = timed_lookups(questions[-lookups:])
+
+    # Past capacity: every new question evicts the least recently used entry
+    start = time.perf_counter()
+    for i, question in enumerate(synthetic_questions(lookups, seed=3)):
+        cache.put(question, "p", f"late answer {i}")
+    evict_ms = (time.perf_counter() - start) * 1000 / lookups
+    churn, _ = timed_lookups(synthetic_questions(lookups, seed=4))
+
+    print(f"{size:,} cached questions: filled in {fill_s:.1f}s ({fill_s / size * 1e6:.0f} µs/insert), "
+          f"~{memory_mb:.0f} MB incl. answers (fill timed under tracemalloc)")
+    print(f"  lookup, new questions      p50 {percentile(fresh, 0.5):.2f} ms  p99 {percentile(fresh, 0.99):.2f} ms  "
+          f"max {max(fresh):.2f} ms  ({fresh_hits} hits)")
+    print(f"  lookup, cached questions   p50 {percentile(repeat, 0.5):.2f} ms  p99 {percentile(repeat, 0.99):.2f} ms  "
+          f"({repeat_hits}/{lookups} hits)")
+    print(f"  insert with eviction       {evict_ms:.2f} ms/insert, lookup p99 after churn "
+          f"{percentile(churn, 0.99):.2f} ms  ({cache.stats()['pages']['p']['evictions']:,} evicted)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the semantic question cache")
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--threshold", type=float, action="append", help="thresholds to compare (repeatable)")
+    args = parser.parse_args(argv)
+    quality(args.threshold or [0.7, 0.75, 0.8, 0.85, 0.9])
+    failed = check_near_misses()
+    print()
+    scale(args.size, args.lookups)
+    if failed:
+        sys.exit(f"{failed} near miss(es) hit the cache")
+
+
+if __name__ == "__main__":
+    main()
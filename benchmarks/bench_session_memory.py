@@ -0,0 +1,199 @@
+# -------------------------------
+# Session Memory & Idle Eviction Benchmark
+# -------------------------------
+# Builds --sessions sessions shaped like app.py's (three radar figures, ~6 KB
+# rich text per page, a chat history of --turns turns), lets --idle of them go
+# idle, then measures:
+#   - the accounted footprint before and after one eviction sweep, and
+#     whether the process reuses the freed memory: CPython keeps freed arenas,
+#     so RSS does not shrink, but new sessions should fit without growing it
+#   - how long a sweep takes (first, with cold figure sizes, and repeated)
+#   - restore latency on the first run after eviction: spilled keys read back
+#     from the state store plus figures redrawn from their scores (the redraw
+#     is what the page paid to draw them in the first place)
+#   - that closed sessions (alive() false) leave no spill rows or entries
+#     behind; exits non-zero if they do
+#
+#   python benchmarks/bench_session_memory.py --sessions 200 --idle 0.8
+import os
+import sys
+import gc
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+import plotly.express as px
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from chat_history import ChatHistory  # noqa: E402
+from state_store import SQLiteStateStore  # noqa: E402
+from session_memory import SessionMemory  # noqa: E402
+
+TOOLS = ["Speed", "Power", "Fielding", "Hitting for Average", "Arm Strength"]
+RICH_TEXT = "**Speed:** Strong leadership trait; leverage as a core strength. " * 100   # ~6 KB
+FIGURES = {"saved_fig": "saved_scores", "fig_p4": "scores_p4", "saved_fig_p4": "saved_scores_p4"}
+SPILL_KEYS = ["saved_rich_text", "saved_rich_text_p4", "rich_text_p4", "analysis_p4", "chat_history"]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def radar(scores):
+    fig = px.line_polar(r=scores, theta=TOOLS, line_close=True, title="Behavioral Tool Scoring Radar")
+    fig.update_traces(fill='toself')
+    return fig
+
+
+REBUILD_MS = []
+
+
+def rebuild(state, keys):
+    start = time.perf_counter()
+    _rebuild(state, keys)
+    REBUILD_MS.append((time.perf_counter() - start) * 1000)
+
+
+def _rebuild(state, keys):
+    for fig_key in keys:
+        if fig_key in FIGURES and fig_key not in state:
+            state[fig_key] = radar(state[FIGURES[fig_key]])
+
+
+def session_state(rng, turns):
+    state = {"selected_page": "Page 4", "notes_p4": f"notes {rng.random()}"}
+    for fig_key, scores_key in FIGURES.items():
+        state[scores_key] = [rng.randint(1, 5) for _ in TOOLS]
+        state[fig_key] = radar(state[scores_key])
+    for key in SPILL_KEYS[:-1]:
+        state[key] = RICH_TEXT
+    history = ChatHistory(max_turns=50)
+    for turn in range(turns):
+        history.append(f"How do I coach tool {turn}?", RICH_TEXT[:1500])
+    state["chat_history"] = history
+    return state
+
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except OSError:
+        return float("nan")
+
+
+def check_closed_sessions(workdir, turns):
+    # List of failed checks: sessions closed after or before eviction are forgotten without a trace
+    clock, closed = Clock(), set()
+    store = SQLiteStateStore(os.path.join(workdir, "closed.db"))
+    memory = SessionMemory(store, idle_seconds=900, spill_keys=SPILL_KEYS, drop_keys=list(FIGURES),
+                           codecs={"chat_history": (ChatHistory.to_dict, ChatHistory.from_dict)},
+                           alive=lambda session_id: session_id not in closed, clock=clock)
+    rng = random.Random(1)
+    for session_id in ("evicted", "open", "never_evicted"):
+        memory.touch(session_id, session_state(rng, turns))
+    clock.now = 1000.0
+    memory.touch("never_evicted", memory.sessions["never_evicted"].state)
+    memory.sweep()                            # spills "evicted" and "open"
+    closed.update(["evicted", "never_evicted"])
+    clock.now = 2000.0
+    memory.sweep()
+    failed = []
+    for session_id in closed:
+        if store.get_json(memory.spill_key(session_id)) is not None:
+            failed.append(f"{session_id}: spill row left in the store")
+        if session_id in memory.evicted or session_id in memory.sessions:
+            failed.append(f"{session_id}: entry kept")
+    if store.get_json(memory.spill_key("open")) is None or "open" not in memory.evicted:
+        failed.append("open: lost its spilled keys")
+    if memory.stats()["forgotten"] != 2:
+        failed.append(f"forgotten {memory.stats()['forgotten']}, want 2")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-session memory accounting and idle eviction")
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--idle", type=float, default=0.8, help="fraction of sessions that go idle")
+    parser.add_argument("--turns", type=int, default=20, help="chat turns per session")
+    parser.add_argument("--sweeps", type=int, default=5, help="repeated sweeps to time once sizes are cached")
+    args = parser.parse_args(argv)
+
+    rng = random.Random(0)
+    clock = Clock()
+    with tempfile.TemporaryDirectory() as workdir:
+        memory = SessionMemory(
+            SQLiteStateStore(os.path.join(workdir, "state.db")), idle_seconds=900, spill_keys=SPILL_KEYS,
+            drop_keys=list(FIGURES), codecs={"chat_history": (ChatHistory.to_dict, ChatHistory.from_dict)},
+            rebuild=rebuild, clock=clock)
+        states = {}
+        rss_empty = rss_mb()
+        for i in range(args.sessions):
+            states[f"s{i}"] = session_state(rng, args.turns)
+            memory.touch(f"s{i}", states[f"s{i}"], f"user{i}")
+        gc.collect()
+        rss_full = rss_mb()
+
+        clock.now = 1000.0
+        active = list(states)[int(args.sessions * args.idle):]
+        for session_id in active:
+            memory.touch(session_id, states[session_id])
+
+        start = time.perf_counter()
+        memory.sweep()   # measures everything, evicts the idle sessions
+        first_sweep = (time.perf_counter() - start) * 1000
+        stats = memory.stats()
+        gc.collect()
+        rss_swept = rss_mb()
+        repeated = []
+        for _ in range(args.sweeps):
+            start = time.perf_counter()
+            memory.sweep()
+            repeated.append((time.perf_counter() - start) * 1000)
+
+        accounted_before = stats["bytes"] + stats["spilled_bytes"] + stats["dropped_bytes"]
+        print(f"{args.sessions} sessions, {len(states) - len(active)} idle, {args.turns} chat turns each")
+        print(f"Accounted footprint: {accounted_before / 1e6:.1f} MB before sweep -> {stats['bytes'] / 1e6:.1f} MB "
+              f"after ({stats['spilled_bytes'] / 1e6:.1f} MB spilled, {stats['dropped_bytes'] / 1e6:.1f} MB dropped)")
+        print(f"Per session: {accounted_before / args.sessions / 1024:.0f} KB, of which "
+              f"{(stats['spilled_bytes'] + stats['dropped_bytes']) / max(stats['evictions'], 1) / 1024:.0f} KB "
+              f"is freed by eviction")
+        idle_count = len(states) - len(active)
+        for i in range(idle_count):
+            states[f"new{i}"] = session_state(rng, args.turns)
+        gc.collect()
+        print(f"Process RSS: {rss_empty:.0f} MB empty, {rss_full:.0f} MB with sessions, {rss_swept:.0f} MB after sweep, "
+              f"{rss_mb():.0f} MB after {idle_count} new sessions replace the idle ones "
+              f"(without eviction: ~{rss_full + (rss_full - rss_empty) * idle_count / args.sessions:.0f} MB)")
+        print(f"Sweep: first {first_sweep:.1f} ms, repeated median {statistics.median(repeated):.1f} ms")
+
+        restores = []
+        for session_id in list(states)[:idle_count]:
+            start = time.perf_counter()
+            memory.touch(session_id, states[session_id])
+            memory.restore(session_id, states[session_id])
+            restores.append((time.perf_counter() - start) * 1000)
+        restores.sort()
+        print(f"Restore on the first run after eviction: p50 {restores[len(restores) // 2]:.2f} ms, "
+              f"p99 {restores[int(len(restores) * 0.99)]:.2f} ms, max {restores[-1]:.2f} ms "
+              f"(figure redraw median {statistics.median(REBUILD_MS):.1f} ms of it)")
+        start = time.perf_counter()
+        for session_id in active:
+            memory.touch(session_id, states[session_id])
+            memory.restore(session_id, states[session_id])
+        print(f"Touch + restore with nothing evicted: {(time.perf_counter() - start) * 1e6 / max(len(active), 1):.1f} µs")
+
+        failed = check_closed_sessions(workdir, args.turns)
+        print(f"Closed sessions: {'ok' if not failed else 'FAIL: ' + '; '.join(failed)}")
+        if failed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# -------------------------------
+# Session State Store Benchmark
+# -------------------------------
+# Fills the state store with the per-page work of --users users (Pages 1/3/4/5,
+# ~6 KB of rich text per page), then, for each backend, measures what a worker
+# that has never seen the user pays on their first rerun:
+#   - cold rehydration of one page's group (the first render of Pages 1–5)
+#   - cold rehydration of every group (the first render of Page 6)
+#   - sync after a change (one group written) and with nothing changed
+#   - usage-counter increments
+# Samples run in separate worker processes, each starting from an empty
+# session for a random user; the redis backend runs against the local
+# stand-in (state_server.py).
+#
+#   python benchmarks/bench_session_store.py --users 2000 --samples 500
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import state_server  # noqa: E402
+from state_store import RedisStateStore, SQLiteStateStore, SessionSync  # noqa: E402
+
+GROUPS = {
+    "p1": ["saved_notes", "saved_scores", "saved_review", "saved_rich_text"],
+    "p3": ["saved_notes_p3", "saved_review_p3", "saved_rich_text_p3", "ai_insights_p3"],
+    "p4": ["saved_notes_p4", "saved_scores_p4", "saved_rich_text_p4", "analysis_p4", "rich_text_p4", "scores_p4",
+           "notes_p4"],
+    "p5": ["saved_notes_p5", "saved_scores_p5", "saved_rich_text_p5", "rich_text_p5", "scores_p5", "notes_p5"],
+}
+RICH_TEXT = "**Speed:** Strong leadership trait; leverage as a core strength. " * 100   # ~6 KB
+
+
+def page_state(rng, group):
+    state = {}
+    for key in GROUPS[group]:
+        if "scores" in key:
+            state[key] = [rng.randint(1, 5) for _ in range(5)]
+        elif "rich_text" in key or "analysis" in key or "insights" in key:
+            state[key] = RICH_TEXT
+        else:
+            state[key] = f"notes {rng.random()}"
+    return state
+
+
+def make(backend, target):
+    return SQLiteStateStore(target) if backend == "sqlite" else RedisStateStore(target)
+
+
+def populate(store, users):
+    rng = random.Random(0)
+    for user in range(users):
+        for group in GROUPS:
+            store.put_json(f"session:user{user}:{group}", page_state(rng, group))
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def worker_samples(backend, target, users, samples, seed):
+    # Runs in a separate process: a worker with no cached connection or state
+    rng = random.Random(seed)
+    store = make(backend, target)
+    one, every, changed, unchanged, counter = [], [], [], [], []
+    for _ in range(samples):
+        user = f"user{rng.randrange(users)}"
+        sync = SessionSync(store, user, GROUPS)
+        state = {}
+        start = time.perf_counter()
+        sync.hydrate(state, [rng.choice(list(GROUPS))])
+        one.append((time.perf_counter() - start) * 1000)
+
+        state = {}
+        start = time.perf_counter()
+        sync.hydrate(state)
+        every.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        sync.sync(state)
+        unchanged.append((time.perf_counter() - start) * 1000)
+
+        state["notes_p4"] = f"edited {rng.random()}"
+        start = time.perf_counter()
+        sync.sync(state)
+        changed.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        store.incr(f"usage:{user}")
+        counter.append((time.perf_counter() - start) * 1000)
+    return one, every, unchanged, changed, counter
+
+
+def run(backend, target, args):
+    populate(make(backend, target), args.users)
+    per_worker = args.samples // args.workers
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        results = list(pool.map(worker_samples, [backend] * args.workers, [target] * args.workers,
+                                [args.users] * args.workers, [per_worker] * args.workers, range(args.workers)))
+    columns = [sum((r[i] for r in results), []) for i in range(5)]
+    labels = ["hydrate one page", "hydrate all (Page 6)", "sync, unchanged", "sync, one group", "usage incr"]
+    for label, samples in zip(labels, columns):
+        print(f"{backend:<8} {label:<22} p50 {percentile(samples, 0.5):6.2f} ms  p99 {percentile(samples, 0.99):6.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark session-state rehydration from the shared state store")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--samples", type=int, default=500, help="rehydrations per backend (split across workers)")
+    parser.add_argument("--workers", type=int, default=2, help="worker processes reading concurrently")
+    parser.add_argument("--backend", choices=["sqlite", "redis"], action="append")
+    args = parser.parse_args(argv)
+
+    for backend in args.backend or ["sqlite", "redis"]:
+        if backend == "sqlite":
+            with tempfile.TemporaryDirectory() as workdir:
+                run(backend, os.path.join(workdir, "session_state.db"), args)
+        else:
+            server, url = state_server.start_in_background()
+            try:
+                run(backend, url, args)
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -------------------------------
+# Similar Employees Index Benchmark
+# -------------------------------
+# Builds an index of synthetic saved assessments and measures build time,
+# incremental add latency and top-k query latency (text, scores, both).
+#
+#   python benchmarks/bench_similarity.py --records 100000
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from similarity import SimilarityIndex  # noqa: E402
+
+PHRASES = [
+    "froze under pressure when the deadline moved", "dominates meetings and talks over peers",
+    "steady and reliable on routine work", "skips documentation when rushed", "blames others after incidents",
+    "anticipates risks early and builds guardrails", "charms leadership but delivers little substance",
+    "learns new tools quickly", "avoids ambiguity and hides in routine", "communicates clearly across teams",
+    "makes decisive calls with humility", "rigid when plans change", "reactive firefighting under stress",
+    "quietly carries the team during crunch", "chases optics over outcomes", "integrates feedback without ego",
+]
+
+
+def synthetic_record(rng):
+    notes = ". ".join(rng.sample(PHRASES, 3))
+    vector = [rng.random() for _ in range(5)] if rng.random() < 0.8 else None
+    return notes, vector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the similar-employees index")
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    index = SimilarityIndex()
+    start = time.perf_counter()
+    for i in range(args.records):
+        notes, vector = synthetic_record(rng)
+        index.add(f"work_{i}#p1", vector=vector, text=notes, meta={"notes": notes})
+    build_s = time.perf_counter() - start
+
+    adds = []
+    for i in range(200):
+        notes, vector = synthetic_record(rng)
+        t = time.perf_counter()
+        index.add(f"extra_{i}#p4", vector=vector, text=notes)
+        adds.append((time.perf_counter() - t) * 1000)
+
+    def timed(**query):
+        samples = []
+        for _ in range(args.queries):
+            t = time.perf_counter()
+            index.query(k=args.k, **query)
+            samples.append((time.perf_counter() - t) * 1000)
+        samples.sort()
+        return f"p50 {statistics.median(samples):.2f} ms, p95 {samples[int(len(samples) * 0.95) - 1]:.2f} ms"
+
+    print(f"records: {len(index)}  build: {build_s:.1f}s  add p50: {statistics.median(adds):.3f} ms")
+    print(f"text query   : {timed(text='who else froze under pressure like this?')}")
+    print(f"vector query : {timed(vector=[0.2, 0.8, 0.5, 0.3, 0.9])}")
+    print(f"blended query: {timed(text='dominates meetings', vector=[0.2, 0.8, 0.5, 0.3, 0.9])}")
+    top = index.query(text="who else froze under pressure like this?", k=3)
+    print("sample match:", top[0][2].get("notes") if top else None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+# -------------------------------
+# Job Review Template Library Benchmark
+# -------------------------------
+# Load time of template_library.TemplateLibrary, per-call cost of suggest()
+# and match(), and a check that match() returns the expected title for the
+# queries Template Discovery is built around (exact, contained in a sentence,
+# misspelled, unknown). Exits non-zero when a check fails.
+#
+#   python benchmarks/bench_template_library.py
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from template_library import TemplateLibrary  # noqa: E402
+
+# query -> expected title (None: no match)
+MATCH_CHECKS = {
+    "steel machinist": "Steel Machinist",
+    "Steel-Machinist ": "Steel Machinist",
+    "review for a steel machinist": "Steel Machinist",
+    "I need a review for a senior steel machinist please": "Senior Steel Machinist",
+    "deisel mechnic": "Diesel Mechanic",
+    "I need help writing a review": None,
+}
+QUERIES = ["mach", "steel machinist", "review for a steel machinist", "deisel mechnic", "astronaut gardener"]
+
+
+def per_call_us(fn, calls=2000):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    start = time.perf_counter()
+    library = TemplateLibrary.load()
+    print(f"Loaded {len(library):,} titles in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    print(f"\n{'query':<32} {'suggest µs':>11} {'match µs':>9}")
+    for query in QUERIES:
+        print(f"{query:<32} {per_call_us(lambda: library.suggest(query)):>11.1f} "
+              f"{per_call_us(lambda: library.match(query), calls=200):>9.1f}")
+
+    failed = 0
+    print("\nmatch() checks:")
+    for query, expected in MATCH_CHECKS.items():
+        role, score = library.match(query)
+        title = role.title if role is not None else None
+        ok = title == expected
+        failed += not ok
+        print(f"  {'ok  ' if ok else 'FAIL'} {query!r} -> {title!r} ({score:.2f}), expected {expected!r}")
+    if failed:
+        sys.exit(f"{failed} match() check(s) failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# -------------------------------
+# Saved Work Storage Benchmark
+# -------------------------------
+# Replays a realistic "Save Work" history (most sections unchanged between
+# saves, an occasional regenerated multi-KB AI analysis) against:
+#   - legacy: one full text file per save
+#   - WorkStore: content-addressed, compressed chunks + small manifests
+# and reports disk usage and save latency for each.
+#
+#   python benchmarks/bench_work_store.py --saves 500
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from work_store import WorkStore  # noqa: E402
+
+TITLES = [
+    "Page 1 Notes", "Page 1 Scores", "Page 1 Review", "Page 1 Rich Context",
+    "Page 3 Notes", "Page 3 AI Insights",
+    "Page 4 Notes", "Page 4 Scores", "Page 4 Rich Context",
+    "Page 5 Notes", "Page 5 Scores", "Page 5 Rich Context",
+]
+WORDS = ("calibration pressure rhythm foresight clarity humility drive systems flexibility consistency "
+         "innovation coaching feedback trust cadence leadership ownership execution reliability").split()
+
+
+def ai_text(rng, words=700):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def history(rng, saves):
+    state = {title: "" for title in TITLES}
+    for title in TITLES:
+        if "Rich Context" in title or "Insights" in title:
+            state[title] = ai_text(rng)
+        elif "Scores" in title:
+            state[title] = str([rng.randint(1, 5) for _ in range(5)])
+        else:
+            state[title] = "Steady under pressure; " + ai_text(rng, 30)
+    for _ in range(saves):
+        # Typical edit between saves: tweak one note, sometimes regenerate one analysis
+        state[rng.choice([t for t in TITLES if "Notes" in t])] += " " + rng.choice(WORDS)
+        if rng.random() < 0.2:
+            page = rng.choice(["Page 1", "Page 4", "Page 5"])
+            state[f"{page} Rich Context"] = ai_text(rng)
+            state[f"{page} Scores"] = str([rng.randint(1, 5) for _ in range(5)])
+        yield [(title, state[title]) for title in TITLES]
+
+
+def disk_usage(root):
+    total = 0
+    for dirpath, _, files in os.walk(root):
+        total += sum(os.path.getsize(os.path.join(dirpath, f)) for f in files)
+    return total
+
+
+def summarize(label, latencies, root, saves):
+    latencies.sort()
+    size = disk_usage(root)
+    print(f"{label:<10} disk {size / 1024:9.1f} KB ({size / saves / 1024:6.2f} KB/save)  "
+          f"save p50 {statistics.median(latencies):6.3f} ms  p95 {latencies[int(len(latencies) * 0.95) - 1]:6.3f} ms")
+    return size
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark saved-work storage")
+    parser.add_argument("--saves", type=int, default=500)
+    parser.add_argument("--codec", choices=["gz", "zst"], default=None)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as legacy_root, tempfile.TemporaryDirectory() as cas_root:
+        legacy, cas = [], []
+        store = WorkStore(cas_root, codec=args.codec)
+        for i, sections in enumerate(history(random.Random(3), args.saves)):
+            name = f"saved_work_bench_{i:05d}.txt"
+            start = time.perf_counter()
+            with open(os.path.join(legacy_root, name), "w") as f:
+                for title, text in sections:
+                    f.write(f"{title}:\n{text}\n\n")
+            legacy.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            store.save(name, sections)
+            cas.append((time.perf_counter() - start) * 1000)
+
+        print(f"{args.saves} saves, codec={store.codec}")
+        legacy_size = summarize("legacy", legacy, legacy_root, args.saves)
+        cas_size = summarize("workstore", cas, cas_root, args.saves)
+        print(f"disk reduction: {legacy_size / max(cas_size, 1):.1f}x  {store.stats()}")
+
+        name = store.list()[-1]
+        start = time.perf_counter()
+        streamed = sum(len(block) for block in store.iter_bytes(name))
+        print(f"stream one save ({streamed / 1024:.1f} KB): {(time.perf_counter() - start) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
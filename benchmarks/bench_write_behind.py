@@ -0,0 +1,196 @@
+# -------------------------------
+# Write-Behind Buffer Benchmark
+# -------------------------------
+# --sessions threads each click --clicks times (a prompt use, or every
+# --save-every-th click a "Save Work" of twelve sections) against stores
+# that add --latency seconds per call, standing in for a remote backend
+# (Supabase, Snowflake, Redis across a network). Runs twice:
+#   - synchronous: each click waits for its store call (WRITE_BEHIND=0)
+#   - write-behind: clicks are queued and journaled, a worker applies them
+#     in batches
+# and reports per-click UI latency (p50/p95/p99), the read at the start of
+# the next rerun (load_prompt_count), store calls made, the flush batch-size
+# distribution, and a read-your-writes check: every session must read back
+# exactly the count it has written.
+#
+# Then checks dead-lettering: a save whose handler always fails is dropped
+# after max_attempts, lands in the dead-letter file, is not replayed by the
+# next process, and leaves an empty journal. Exits non-zero if that fails.
+#
+#   python benchmarks/bench_write_behind.py --sessions 20 --clicks 50 --latency 0.03
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import threading
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from state_store import SQLiteStateStore  # noqa: E402
+from work_store import WorkStore  # noqa: E402
+from write_behind import BufferedWorkStore, WriteBehind, dead_letter_path  # noqa: E402
+
+SECTIONS = [(f"Page {i // 4 + 1} Section {i}", "Strong planner, steady under deadline pressure. " * 20) for i in range(12)]
+
+
+class Slow:
+    # Adds `latency` seconds to the listed methods and counts the calls
+    def __init__(self, target, latency, methods):
+        self.target, self.latency, self.methods = target, latency, set(methods)
+        self.calls = Counter()
+        self.lock = threading.Lock()
+
+    def __getattr__(self, name):
+        attr = getattr(self.target, name)
+        if name not in self.methods:
+            return attr
+
+        def slow(*args, **kwargs):
+            with self.lock:
+                self.calls[name] += 1
+            time.sleep(self.latency)
+            return attr(*args, **kwargs)
+        return slow
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+
+def run(args, workdir, synchronous):
+    state = Slow(SQLiteStateStore(os.path.join(workdir, "state.db")), args.latency, ["incr_many", "get_int"])
+    repository = Slow(WorkStore(os.path.join(workdir, "repository")), args.latency, ["save"])
+
+    def apply_increments(ops):
+        totals = Counter()
+        for op in ops:
+            totals[op["key"]] += op["amount"]
+        values = state.incr_many(totals)
+        return [values[op["key"]] for op in ops]
+
+    def apply_saves(ops):
+        return [repository.save(op["key"], op["sections"], meta=op["meta"], exact=True)["name"] for op in ops]
+
+    buffer = WriteBehind({"incr": apply_increments, "save": apply_saves}, os.path.join(workdir, "journal.jsonl"),
+                         max_batch=args.max_batch, max_delay=args.max_delay, fsync=args.fsync,
+                         per_op=["save"], synchronous=synchronous).start()
+    store = BufferedWorkStore(repository, buffer)
+    clicks, reads, violations = [], [], []
+    lock = threading.Lock()
+
+    def session(i):
+        rng = random.Random(i)
+        key, count, saves = f"usage:user{i}", 0, []
+        for n in range(args.clicks):
+            time.sleep(rng.expovariate(1 / args.think))
+            start = time.perf_counter()
+            if n % args.save_every == args.save_every - 1:
+                saves.append(store.save(f"saved_work_user{i}_{n}.txt", SECTIONS, meta={"user_id": f"user{i}"})["name"])
+            else:
+                buffer.submit("incr", key, amount=1)
+                count += 1
+            clicked = time.perf_counter()
+            seen = buffer.read_int(key, state.get_int)   # the next rerun's load_prompt_count
+            listed = store.list() if saves else []
+            with lock:
+                clicks.append(clicked - start)
+                reads.append(time.perf_counter() - clicked)
+                if seen != count or (saves and saves[-1] not in listed):
+                    violations.append((key, count, seen))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    clicked = time.perf_counter() - started
+    buffer.stop(timeout=60)
+    drained = time.perf_counter() - started
+    correct = all(state.target.get_int(f"usage:user{i}") == args.clicks - args.clicks // args.save_every
+                  for i in range(args.sessions))
+    return {"clicks": clicks, "reads": reads, "violations": violations, "calls": dict(state.calls + repository.calls),
+            "stats": buffer.stats(), "clicked_s": clicked, "drained_s": drained, "correct": correct,
+            "records": len(repository.target.list())}
+
+
+def check_dead_letter(workdir):
+    # List of failed checks for a save that can never be written
+    repository = WorkStore(os.path.join(workdir, "repository"))
+    journal = os.path.join(workdir, "journal.jsonl")
+
+    def apply_saves(ops):
+        if ops[0]["key"] == "poison.txt":
+            raise OSError("disk full")
+        return [repository.save(op["key"], op["sections"], meta=op["meta"], exact=True)["name"] for op in ops]
+
+    handlers = {"incr": lambda ops: [0] * len(ops), "save": apply_saves}
+    buffer = WriteBehind(handlers, journal, retry_seconds=0.01, max_attempts=3, per_op=["save"]).start()
+    store = BufferedWorkStore(repository, buffer)
+    store.save("poison.txt", SECTIONS, meta={"user_id": "ann"})
+    store.save("fine.txt", SECTIONS, meta={"user_id": "ann"})
+    drained = buffer.flush(timeout=5)
+    buffer.stop()
+    stats = buffer.stats()
+    failed = []
+    if not drained or stats["pending"]:
+        failed.append("poison op still queued")
+    if stats["dead_lettered"] != 1 or stats["failures"] != 3:
+        failed.append(f"{stats['failures']} failures, {stats['dead_lettered']} dead-lettered (want 3, 1)")
+    if store.list() != ["fine.txt"] or [f["name"] for f in store.failed("ann")] != ["poison.txt"]:
+        failed.append(f"listed {store.list()}, failed {store.failed('ann')}")
+    if os.path.getsize(journal):
+        failed.append("journal not truncated")
+    with open(dead_letter_path(journal), encoding="utf-8") as f:
+        if len(f.readlines()) != 1:
+            failed.append("dead-letter file should hold one op")
+    buffer.journal.close()   # releases its lock, as the process exiting would
+    replayed = WriteBehind(handlers, journal, per_op=["save"])
+    if replayed.stats()["pending"] or replayed.dead_ops("save", "poison.txt") == []:
+        failed.append("dead op replayed, or not reloaded from the dead-letter file")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark write-behind usage increments and saves")
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--clicks", type=int, default=50, help="clicks per session")
+    parser.add_argument("--save-every", type=int, default=10, help="every n-th click is a Save Work")
+    parser.add_argument("--think", type=float, default=0.05, help="mean seconds between a session's clicks")
+    parser.add_argument("--latency", type=float, default=0.03, help="seconds added to every store call")
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--max-delay", type=float, default=0.5)
+    parser.add_argument("--fsync", action="store_true", help="fsync the journal on every write")
+    args = parser.parse_args(argv)
+
+    print(f"{args.sessions} sessions x {args.clicks} clicks, store latency {args.latency * 1000:.0f} ms, "
+          f"max batch {args.max_batch}, max delay {args.max_delay}s{', fsync' if args.fsync else ''}")
+    print(f"{'mode':<13} {'click p50':>9} {'p95':>7} {'p99':>7} {'read p50':>9} {'store calls':>12} "
+          f"{'drained s':>10} {'ryw viol.':>9} {'correct':>8}")
+    for synchronous in (True, False):
+        with tempfile.TemporaryDirectory() as workdir:
+            r = run(args, workdir, synchronous)
+        mode = "synchronous" if synchronous else "write-behind"
+        print(f"{mode:<13} {percentile(r['clicks'], 0.5):>7.2f}ms {percentile(r['clicks'], 0.95):>5.2f}ms "
+              f"{percentile(r['clicks'], 0.99):>5.2f}ms {percentile(r['reads'], 0.5):>7.2f}ms "
+              f"{sum(r['calls'].values()):>12} {r['drained_s']:>10.2f} {len(r['violations']):>9} {str(r['correct']):>8}")
+        if not synchronous:
+            stats = r["stats"]
+            sizes = {name[3:]: v["batches"] for name, v in stats["batch_sizes"].items() if v["batches"]}
+            print(f"\nWrite-behind: {stats['applied']} ops in {stats['batches']} batches (mean {stats['mean_batch']:.1f}), "
+                  f"store calls {r['calls']}, {r['records']} records saved")
+            print(f"Reads that waited for a flush of their key: {stats['read_waits']}, reloaded: {stats['read_retries']}")
+            print("Batch sizes (ops <= bucket: batches): " + ", ".join(f"<={k}: {v}" for k, v in sizes.items()))
+
+    with tempfile.TemporaryDirectory() as workdir:
+        failed = check_dead_letter(workdir)
+    print(f"\nDead-letter check: {'ok' if not failed else 'FAIL: ' + '; '.join(failed)}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
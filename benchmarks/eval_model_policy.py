@@ -0,0 +1,202 @@
+# -------------------------------
+# Model Policy Offline Evaluation
+# -------------------------------
+# Replays recorded prompts against the in-process stub server
+# (stub_openai_server.py) twice and compares the outcomes:
+#   - fixed: every call site's hard-coded model and max_tokens, as before
+#   - policy: model_policy.ModelPolicy picking model and max_tokens, learning
+#     online as the replay goes (answers cut short are continued, as in the app)
+#
+# --log is a MODEL_POLICY_RECORD log from the app (one completion per line,
+# prompt included). Without one, a synthetic log is generated: short and long
+# questions for every free-text call site, with answer lengths that grow with
+# the question and a long tail. The first --train share of the log only warms
+# the policy (as the app does when it reads its log on start); the rest is
+# replayed. The stub answers every prompt at its recorded length, so an answer
+# is only shorter when a max_tokens cut it.
+#
+# Reports per mode: latency p50/p95/p99 (a request includes its continuation),
+# completion tokens, tokens reserved against the rate limit (prompt +
+# max_tokens), cost at model_policy.PRICES, answers cut short, and per site
+# the budget and model the policy settled on.
+#
+#   python benchmarks/eval_model_policy.py --requests 600
+#   python benchmarks/eval_model_policy.py --log repository/model_policy.jsonl --policy-file policy.json
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from openai import OpenAI
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import stub_openai_server  # noqa: E402
+from model_policy import (CONTINUE_PROMPT, DEFAULT_MODEL, ModelPolicy, bucket_for, cost_usd,  # noqa: E402
+                          load_overrides, question_tokens, quantile)
+
+# site -> (call site max_tokens, system prompt, answer tokens at no question, answer tokens per question token)
+SITES = {
+    "p2_dive_further": (1000, "You are an advanced HR and leadership research assistant.", 300, 0.6),
+    "p3_insights": (400, "You are an organizational psychologist analyzing behavior under pressure.", 110, 0.25),
+    "p4_question": (700, "You are an expert on the 5-Tool Employee Framework.", 140, 0.4),
+    "p5_question": (700, "You are an expert in organizational psychology and leadership.", 170, 0.4),
+    "p5_contextual_insight": (500, "You are an expert in leadership assessment and organizational culture.", 160, 0.3),
+    "job_review": (800, "You write realistic, balanced job reviews.", 380, 0.3),
+    "job_review_notes": (350, "You write realistic, balanced job reviews.", 110, 0.2),
+}
+WORDS = ("pressure calibration feedback deadline ownership planning team client release trust coaching "
+         "meeting outage escalation roadmap hiring review delegation conflict priority").split()
+
+
+def synthetic_log(count, seed=0):
+    # Recorded-log lines for `count` requests over SITES; most questions are short
+    rng = random.Random(seed)
+    records = []
+    for _ in range(count):
+        site = rng.choice(list(SITES))
+        cap, system, base, per_token = SITES[site]
+        words = int(rng.choice([rng.uniform(4, 30), rng.uniform(4, 30), rng.uniform(30, 120), rng.uniform(120, 400)]))
+        question = " ".join(rng.choice(WORDS) for _ in range(words)) + "?"
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": question}]
+        natural = int((base + per_token * question_tokens(messages)) * rng.lognormvariate(0, 0.3))
+        if rng.random() < 0.01:
+            natural *= 3   # the occasional runaway answer
+        records.append({"site": site, "cap": cap, "model": DEFAULT_MODEL, "messages": messages,
+                        "completion_tokens": min(natural, cap), "natural": natural,
+                        "finish_reason": "length" if natural > cap else "stop", "seconds": None})
+    return records
+
+
+def read_log(path):
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("messages"):
+                # An answer that reached the cap is only known to run at least this long
+                records.append(dict(record, natural=record["completion_tokens"]))
+    return records
+
+
+def prompt_key(messages):
+    return hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def answer_tokens(natural):
+    # Stub answer length: the recorded length, less what a continued answer already has
+    def tokens(messages):
+        if messages[-1]["content"] == CONTINUE_PROMPT:
+            return max(1, tokens(messages[:-2]) - len(messages[-2]["content"].split()))
+        return natural.get(prompt_key(messages), 200)
+    return tokens
+
+
+def replay(client, records, policy, concurrency):
+    # One row per request: site, cap, seconds, calls, tokens, reserved tokens, cost, cut short, model and budget
+    def one(record):
+        calls = []
+
+        def create(**kwargs):
+            response = client.chat.completions.create(**kwargs)
+            usage = response.usage
+            calls.append((kwargs["model"], kwargs["max_tokens"], usage.prompt_tokens, usage.completion_tokens))
+            return response
+        start = time.perf_counter()
+        if policy is None:
+            create(model=DEFAULT_MODEL, messages=record["messages"], max_tokens=record["cap"], temperature=0.7)
+        else:
+            policy.complete(create, record["site"], record["messages"], record["cap"], temperature=0.7)
+        seconds = time.perf_counter() - start
+        completion = sum(c[3] for c in calls)
+        return {"site": record["site"], "cap": record["cap"], "seconds": seconds, "calls": len(calls),
+                "prompt": sum(c[2] for c in calls), "completion": completion,
+                "reserved": sum(c[1] + c[2] for c in calls), "cost": sum(cost_usd(c[0], c[2], c[3]) for c in calls),
+                "cut": completion < min(record["natural"], record["cap"]), "model": calls[0][0], "budget": calls[0][1]}
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        return list(pool.map(one, records))
+
+
+def summary(rows):
+    seconds = [row["seconds"] for row in rows]
+    return {"p50": quantile(seconds, 0.5) * 1000, "p95": quantile(seconds, 0.95) * 1000,
+            "p99": quantile(seconds, 0.99) * 1000, "calls": sum(row["calls"] for row in rows),
+            "completion": sum(row["completion"] for row in rows), "reserved": sum(row["reserved"] for row in rows),
+            "cost": sum(row["cost"] for row in rows), "cut": sum(row["cut"] for row in rows)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded prompts with fixed and adaptive model policies")
+    parser.add_argument("--log", help="MODEL_POLICY_RECORD log to replay (default: a synthetic one)")
+    parser.add_argument("--requests", type=int, default=600, help="synthetic log size")
+    parser.add_argument("--train", type=float, default=0.3, help="share of the log that only warms the policy")
+    parser.add_argument("--policy-file", help="ModelPolicy overrides (JSON), as MODEL_POLICY_FILE")
+    parser.add_argument("--ttft", type=float, default=0.04, help=f"stub seconds to first token for {DEFAULT_MODEL}")
+    parser.add_argument("--tokens-per-sec", type=float, default=800.0, help=f"stub speed of {DEFAULT_MODEL}")
+    parser.add_argument("--model-latency", action="append", default=["gpt-4.1-nano=0.03:1600"],
+                        metavar="MODEL=TTFT:TPS", help="stub latency of other models (repeatable)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    records = read_log(args.log) if args.log else synthetic_log(args.requests, args.seed)
+    split = int(len(records) * args.train)
+    warm, test = records[:split], records[split:]
+    natural = {prompt_key(record["messages"]): record["natural"] for record in records}
+    config = stub_openai_server.StubConfig(
+        ttft=args.ttft, tokens_per_sec=args.tokens_per_sec,
+        model_latency=stub_openai_server.parse_model_latency(args.model_latency),
+        answer_tokens=answer_tokens(natural))
+    server, base_url = stub_openai_server.start_in_background(config)
+    try:
+        client = OpenAI(api_key="stub", base_url=base_url, max_retries=0)
+        policy = ModelPolicy(mode="adaptive", **load_overrides(args.policy_file))
+        for record in warm:
+            policy.observe(record["site"], bucket_for(question_tokens(record["messages"])), record["model"],
+                           record["completion_tokens"], record.get("cut", False), record["seconds"])
+        results = {"fixed": replay(client, test, None, args.concurrency),
+                   "policy": replay(client, test, policy, args.concurrency)}
+    finally:
+        server.shutdown()
+
+    source = args.log or f"synthetic log of {len(records)}"
+    print(f"{source}: {len(warm)} warm the policy, {len(test)} replayed, concurrency {args.concurrency}")
+    print(f"{'mode':<7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'calls':>6} {'completion':>11} "
+          f"{'reserved':>9} {'cost $':>9} {'cut short':>9}")
+    totals = {mode: summary(rows) for mode, rows in results.items()}
+    for mode, r in totals.items():
+        print(f"{mode:<7} {r['p50']:>7.0f} {r['p95']:>7.0f} {r['p99']:>7.0f} {r['calls']:>6} {r['completion']:>11} "
+              f"{r['reserved']:>9} {r['cost']:>9.4f} {r['cut']:>9}")
+    fixed, tuned = totals["fixed"], totals["policy"]
+    print(f"\nPolicy vs fixed: p99 {(tuned['p99'] / fixed['p99'] - 1) * 100:+.0f}%, "
+          f"reserved tokens {(tuned['reserved'] / fixed['reserved'] - 1) * 100:+.0f}%, "
+          f"cost {(tuned['cost'] / fixed['cost'] - 1) * 100:+.0f}%, "
+          f"{tuned['calls'] - fixed['calls']} continuations")
+
+    print(f"\n{'site':<22} {'cap':>5} {'budget p50':>10} {'small tier':>10} {'p99 fixed':>10} {'p99 policy':>11}")
+    by_site = defaultdict(lambda: defaultdict(list))
+    for mode, rows in results.items():
+        for row in rows:
+            by_site[row["site"]][mode].append(row)
+    for site in sorted(by_site):
+        rows = by_site[site]
+        models = Counter(row["model"] for row in rows["policy"])
+        small = 1 - models[DEFAULT_MODEL] / len(rows["policy"])
+        print(f"{site:<22} {rows['fixed'][0]['cap']:>5} "
+              f"{quantile([row['budget'] for row in rows['policy']], 0.5):>10} {small:>10.0%} "
+              f"{summary(rows['fixed'])['p99']:>8.0f}ms {summary(rows['policy'])['p99']:>9.0f}ms")
+    stats = policy.stats()
+    print("\nPolicy choices: " + ", ".join(f"{k} {stats[k]}" for k in
+                                           ["learning", "adaptive", "tiered", "truncating", "continued"]))
+
+
+if __name__ == "__main__":
+    main()
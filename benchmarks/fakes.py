@@ -0,0 +1,96 @@
+# -------------------------------
+# Local Fakes for Outbound Services
+# -------------------------------
+# Stand-ins for OpenAI, YouTube, Stripe and Supabase so app.py can be driven
+# through AppTest without network access. Every fake records its calls in
+# CALLS so benchmarks can count outbound traffic per rerun.
+import sys
+import types
+from collections import Counter
+
+CALLS = Counter()
+
+CANNED_ANSWER = (
+    "**Behavioral Summary:** Steady operator with a strong execution rhythm.\n\n"
+    "**Leadership Readiness Signal:** Stretch-capable.\n\n"
+    "**Next 90-Day Interventions:** Scenario planning, feedback loops."
+)
+
+
+def _ns(**kwargs):
+    return types.SimpleNamespace(**kwargs)
+
+
+# ✅ OpenAI
+class FakeCompletions:
+    def create(self, model=None, messages=None, max_tokens=None, **kwargs):
+        CALLS["openai"] += 1
+        prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages or [])
+        return _ns(
+            choices=[_ns(message=_ns(content=CANNED_ANSWER, role="assistant"), finish_reason="stop")],
+            usage=_ns(prompt_tokens=prompt_tokens, completion_tokens=len(CANNED_ANSWER.split()),
+                      total_tokens=prompt_tokens + len(CANNED_ANSWER.split())),
+            model=model,
+        )
+
+
+class FakeOpenAI:
+    def __init__(self, *args, **kwargs):
+        self.chat = _ns(completions=FakeCompletions())
+
+
+# ✅ YouTube (googleapiclient.discovery.build)
+def fake_build(service, version, developerKey=None, **kwargs):
+    def execute():
+        CALLS["youtube"] += 1
+        return {"items": [
+            {"snippet": {"title": "Technical Competence Explained"}, "id": {"videoId": "abc123"}},
+            {"snippet": {"title": "Strategy and Decision Making"}, "id": {"videoId": "def456"}},
+        ]}
+    search = _ns(list=lambda **kw: _ns(execute=execute))
+    return _ns(search=lambda: search)
+
+
+# ✅ Stripe
+def fake_checkout_create(**kwargs):
+    CALLS["stripe"] += 1
+    return _ns(id="cs_test_fake", url="https://checkout.stripe.test/cs_test_fake")
+
+
+# ✅ Supabase
+class FakeSupabaseQuery:
+    def __init__(self, table):
+        self.table = table
+
+    def __getattr__(self, name):
+        # select/insert/upsert/eq/... all chain until execute()
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        CALLS["supabase"] += 1
+        return _ns(data=[])
+
+
+class FakeSupabaseClient:
+    def table(self, name):
+        return FakeSupabaseQuery(name)
+
+
+def install():
+    import openai
+    import stripe
+    from googleapiclient import discovery
+
+    openai.OpenAI = FakeOpenAI
+    discovery.build = fake_build
+    stripe.checkout.Session.create = staticmethod(fake_checkout_create)
+
+    supabase = types.ModuleType("supabase")
+    supabase.Client = FakeSupabaseClient
+    supabase.create_client = lambda url, key, *a, **kw: FakeSupabaseClient()
+    sys.modules["supabase"] = supabase
+    return CALLS
+
+
+def outbound_calls():
+    return sum(CALLS.values())
@@ -0,0 +1,364 @@
+# -------------------------------
+# Concurrent-Session Load Generator
+# -------------------------------
+# Starts one `streamlit run app.py` process with the model served by the local
+# stub server, then drives N simulated browser sessions against it over
+# Streamlit's websocket protocol. Reports throughput plus p50/p95/p99 rerun
+# latency and error rate for each level of a sweep over N.
+#
+# Each session loops over a realistic script: pick a page from PAGES, move
+# the sliders, type notes, click the page's generate button, save; on the
+# repository page save work, render a PDF and download it; on the template
+# page look up a role and generate its job review.
+#
+#   python benchmarks/load_test.py --sessions 1,2,4,8,16 --duration 20
+#   python benchmarks/load_test.py --sessions 8 --ttft 0.8 --tokens-per-sec 40 --json out.json
+#   python benchmarks/load_test.py --app-url http://127.0.0.1:8501   # existing deployment
+#
+# AppTest can't be used here: it swaps a global Runtime per run, so it only
+# supports one session per process at a time.
+#
+# Needs websockets, which the app itself doesn't use:
+#   pip install -r benchmarks/requirements.txt
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import subprocess
+import statistics
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, ".."))
+
+import entitlements  # noqa: E402
+import stub_openai_server  # noqa: E402
+from bench_reruns import (APP_PATH, PAGES, DEMO_USER, PAGE_1, PAGE_2, PAGE_3, PAGE_4, PAGE_5,  # noqa: E402
+                          PAGE_6, PAGE_7)
+
+# Rough traffic mix, by page; the repository page is premium-only so it gets
+# less traffic. A page without an entry gets DEFAULT_PAGE_WEIGHT.
+PAGE_WEIGHTS = {PAGE_1: 0.25, PAGE_2: 0.10, PAGE_3: 0.15, PAGE_4: 0.20, PAGE_5: 0.20, PAGE_6: 0.10, PAGE_7: 0.10}
+DEFAULT_PAGE_WEIGHT = 0.10
+ROLES = ["steel machinist", "diesel mechanic", "registered nurse", "software engineer", "warehouse associate"]
+WIDGET_TYPES = ("slider", "selectbox", "button", "text_area", "text_input", "download_button")
+
+NOTES = [
+    "Strong planner, quiet in meetings, steady under deadline pressure.",
+    "Freezes when priorities change late in the sprint.",
+    "Reliable closer, dismissive in retros.",
+    "Charms leadership, dominates peers in standups.",
+    "Learns fast, skips documentation when rushed.",
+]
+
+
+# -------------------------------
+# Websocket session
+# -------------------------------
+class Session:
+    def __init__(self, app_url, seed, record, timeout):
+        self.app_url = app_url.rstrip("/")
+        self.rng = random.Random(seed)
+        self.record = record
+        self.timeout = timeout
+        self.ws = None
+        self.widgets = {}   # label -> (widget type, proto, fragment id) from the last run
+        self.received = 0   # ForwardMsg bytes received on the last rerun
+        self.full_reruns = False
+        self.states = {}    # widget id -> WidgetState the browser would send back
+
+    async def connect(self):
+        ws_url = self.app_url.replace("http", "ws", 1) + "/_stcore/stream"
+        self.ws = await websockets.connect(ws_url, max_size=None)
+
+    async def close(self):
+        if self.ws:
+            await self.ws.close()
+
+    async def rerun(self, step, trigger_id=None, fragment_id=None):
+        # fragment_id set = the browser asks for a fragment-only rerun, as it does
+        # for widgets inside an @st.fragment
+        msg = BackMsg()
+        client_state = msg.rerun_script
+        client_state.query_string = ""
+        if fragment_id:
+            client_state.fragment_id = fragment_id
+        for widget_id, state in self.states.items():
+            client_state.widget_states.widgets.add().CopyFrom(state)
+        if trigger_id:
+            trigger = client_state.widget_states.widgets.add()
+            trigger.id = trigger_id
+            trigger.trigger_value = True
+
+        start = time.perf_counter()
+        error = None
+        self.received = 0
+        widgets = {}
+        if fragment_id:
+            # Widgets outside the fragment stay on screen untouched
+            widgets = {label: w for label, w in self.widgets.items() if w[2] != fragment_id}
+        try:
+            await self.ws.send(msg.SerializeToString())
+            while True:
+                raw = await asyncio.wait_for(self.ws.recv(), self.timeout)
+                self.received += len(raw)
+                fwd = ForwardMsg()
+                fwd.ParseFromString(raw)
+                kind = fwd.WhichOneof("type")
+                if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                    element = fwd.delta.new_element
+                    element_type = element.WhichOneof("type")
+                    if element_type == "exception":
+                        error = element.exception.message or element.exception.type
+                    elif element_type in WIDGET_TYPES:
+                        widget = getattr(element, element_type)
+                        widgets[widget.label] = (element_type, widget, fwd.delta.fragment_id)
+                elif kind == "session_event" and fwd.session_event.WhichOneof("type") == "script_compilation_exception":
+                    error = "script compilation exception"
+                elif kind == "script_finished":
+                    break
+        except Exception as e:  # timeouts and dropped sockets count as failed reruns
+            error = f"{type(e).__name__}: {e}"
+        self.record(step, (time.perf_counter() - start) * 1000, error)
+
+        live_ids = {w[1].id for w in widgets.values()}
+        self.states = {k: v for k, v in self.states.items() if k in live_ids}
+        self.widgets = widgets
+        return error is None
+
+    # ✅ Browser actions
+    def set_state(self, label, **value):
+        widget = self.widgets[label][1]
+        state = WidgetState(id=widget.id)
+        for field, v in value.items():
+            if field == "double_array_value":
+                state.double_array_value.data.extend(v)
+            else:
+                setattr(state, field, v)
+        self.states[widget.id] = state
+
+    def fragment_of(self, label):
+        # full_reruns replays interactions as whole-page reruns (pre-fragment behavior)
+        return None if self.full_reruns else (self.widgets[label][2] or None)
+
+    async def goto(self, page):
+        self.set_state("Choose a page", string_value=page)
+        return await self.rerun(f"goto {page.split(':')[0]}")
+
+    async def move_sliders(self):
+        fragment_id = None
+        for label, (element_type, widget, fragment) in list(self.widgets.items()):
+            if element_type == "slider":
+                self.set_state(label, double_array_value=[self.rng.randint(int(widget.min), int(widget.max))])
+                fragment_id = None if self.full_reruns else (fragment or None)
+        return await self.rerun("sliders", fragment_id=fragment_id)
+
+    async def type_text(self, label_prefix, text):
+        label = next((l for l in self.widgets if l.startswith(label_prefix)), None)
+        if label is None:
+            return False
+        self.set_state(label, string_value=text)
+        return await self.rerun("type", fragment_id=self.fragment_of(label))
+
+    async def click(self, label):
+        if label not in self.widgets:
+            return False
+        return await self.rerun(f"click {label}", trigger_id=self.widgets[label][1].id,
+                                fragment_id=self.fragment_of(label))
+
+    async def download(self, label):
+        if label not in self.widgets:
+            return False
+        url = self.widgets[label][1].url
+        start = time.perf_counter()
+        error = None
+        try:
+            await asyncio.to_thread(lambda: urllib.request.urlopen(self.app_url + url, timeout=self.timeout).read())
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.record(f"download {label}", (time.perf_counter() - start) * 1000, error)
+        return error is None
+
+    async def step(self):
+        page = self.rng.choices(PAGES, weights=[PAGE_WEIGHTS.get(p, DEFAULT_PAGE_WEIGHT) for p in PAGES])[0]
+        if not await self.goto(page):
+            return
+        number = page.split(":")[0]
+        if number == "Page 1":
+            await self.move_sliders() and await self.type_text("Enter notes about your ideal", self.rng.choice(NOTES)) \
+                and await self.click("Generate 5 Tool Employee") and await self.click("Save to Repository")
+        elif number == "Page 2":
+            await self.type_text("Ask a question about the framework", "How does Power interact with humility?") \
+                and await self.click("Dive Further")
+        elif number == "Page 3":
+            await self.type_text("Add your comments", self.rng.choice(NOTES)) \
+                and await self.click("Generate Insights") and await self.click("Save to Repository")
+        elif number == "Page 4":
+            await self.move_sliders() and await self.type_text("Enter notes about the employee", self.rng.choice(NOTES)) \
+                and await self.click("Generate Scoring") and await self.click("Save to Repository")
+        elif number == "Page 5":
+            await self.move_sliders() and await self.type_text("Additional Notes", self.rng.choice(NOTES)) \
+                and await self.click("Generate Profile") and await self.click("Save to Repository")
+        elif number == "Page 6":
+            # Only reachable for premium users; free users just see the paywall
+            await self.click("Save Work") and await self.click("Generate PDF") and await self.download("Download PDF")
+        elif number == "Page 7":
+            await self.type_text("Ask me anything about job reviews", self.rng.choice(ROLES)) \
+                and await self.click("Generate a Realistic Job Review")
+
+
+# -------------------------------
+# Runner
+# -------------------------------
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_level(app_url, sessions, duration, seed, timeout):
+    samples = []
+    stop_at = time.monotonic() + duration
+
+    def record(step, latency_ms, error):
+        samples.append((step, latency_ms, error))
+
+    async def worker(session_id):
+        session = Session(app_url, seed * 1000 + session_id, record, timeout)
+        try:
+            await session.connect()
+        except Exception as e:
+            record("connect", 0.0, f"{type(e).__name__}: {e}")
+            return
+        try:
+            if await session.rerun("load"):
+                while time.monotonic() < stop_at:
+                    await session.step()
+        finally:
+            await session.close()
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(i) for i in range(sessions)))
+    elapsed = time.monotonic() - started
+
+    latencies = [latency for step, latency, _ in samples if step != "connect"]
+    errors = [(step, error) for step, _, error in samples if error]
+    return {
+        "sessions": sessions,
+        "elapsed_s": round(elapsed, 2),
+        "reruns": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "mean_ms": round(statistics.mean(latencies), 1) if latencies else 0.0,
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "sample_errors": sorted({f"{step}: {error}"[:160] for step, error in errors})[:5],
+    }
+
+
+def print_table(results):
+    print(f"{'sessions':>8} {'reruns':>7} {'rps':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['sessions']:>8} {r['reruns']:>7} {r['throughput_rps']:>7} {r['p50_ms']:>8} "
+              f"{r['p95_ms']:>8} {r['p99_ms']:>8} {r['error_rate']:>7.2%}")
+    # Knee: first level where adding sessions no longer buys ≥10% more throughput
+    for prev, cur in zip(results, results[1:]):
+        if cur["throughput_rps"] < prev["throughput_rps"] * 1.10:
+            print(f"\nThroughput knee near {prev['sessions']} sessions "
+                  f"({prev['throughput_rps']} rps, p95 {prev['p95_ms']} ms).")
+            break
+
+
+# -------------------------------
+# App server
+# -------------------------------
+def start_app(port, base_url, workdir):
+    env = dict(os.environ, OPENAI_BASE_URL=base_url, OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "stub"),
+               REVIEW_WARMUP=os.getenv("REVIEW_WARMUP", "0"))
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP_PATH, "--server.port", str(port),
+         "--server.headless", "true", "--browser.gatherUsageStats", "false"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    app_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(app_url + "/_stcore/health", timeout=1).read()
+            return process, app_url
+        except Exception:
+            time.sleep(0.25)
+    process.terminate()
+    raise RuntimeError("app.py did not become healthy within 60s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load generator for app.py")
+    parser.add_argument("--sessions", default="1,2,4,8", help="comma-separated sweep of concurrent sessions")
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per sweep level")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-rerun timeout in seconds")
+    parser.add_argument("--app-url", help="drive an already running app instead of starting one")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--base-url", help="OpenAI-compatible endpoint for the started app (default: in-process stub)")
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens-per-sec", type=float, default=200.0)
+    parser.add_argument("--default-tokens", type=int, default=120)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args(argv)
+
+    stub = process = None
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            app_url = args.app_url
+            if not app_url:
+                base_url = args.base_url
+                if not base_url:
+                    config = stub_openai_server.StubConfig(
+                        ttft=args.ttft, tokens_per_sec=args.tokens_per_sec, default_tokens=args.default_tokens,
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed,
+                    )
+                    stub, base_url = stub_openai_server.start_in_background(config)
+                # The app writes prompt_usage.json, repository/ and PDFs relative to its cwd;
+                # grant the demo user premium the way the Stripe webhook would
+                store = entitlements.SQLiteEntitlementStore(os.path.join(workdir, "entitlements.db"))
+                store.upsert(DEMO_USER, premium=True, status="active")
+                process, app_url = start_app(args.port, base_url, workdir)
+
+            for sessions in [int(n) for n in args.sessions.split(",") if n.strip()]:
+                result = asyncio.run(run_level(app_url, sessions, args.duration, args.seed, args.timeout))
+                results.append(result)
+                print(f"… {sessions} sessions: {result['throughput_rps']} rps, "
+                      f"p95 {result['p95_ms']} ms, errors {result['error_rate']:.2%}", file=sys.stderr)
+        finally:
+            if process:
+                process.terminate()
+                process.wait(timeout=10)
+            if stub:
+                stub.shutdown()
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
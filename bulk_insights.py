@@ -0,0 +1,221 @@
+# -------------------------------
+# Bulk Pressure-Grid Insights
+# -------------------------------
+# Page 3's bulk mode: many observation comments are packed into each model
+# request under a prompt-token budget, and the model answers with a JSON
+# array of per-comment insights keyed by comment id:
+#
+#   {"insights": [{"id": "c1", "tool": "Speed", "state": "Under Duress", "insight": "..."}, ...]}
+#
+# Every item is validated on its own. Items that are missing, duplicated or
+# malformed, or whose whole request failed, are retried in a new, smaller
+# packing; items that already succeeded are never sent again. Packed requests
+# run concurrently up to `concurrency` at a time.
+#
+#   analyzer = BulkAnalyzer(complete)     # complete(prompt, schema, max_tokens) -> (text, tokens)
+#   outcome = analyzer.run(number_comments(["Froze when...", "Took over the..."]))
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from circuit_breaker import CircuitOpenError
+
+GRID_TOOLS = ["Power", "Speed", "Fielding", "Hitting Avg.", "Arm Strength"]
+GRID_STATES = ["Intentional Use", "Under Duress"]
+ITEM_TOKENS = 120       # max_tokens per comment in a packed request
+SINGLE_TOKENS = 400     # max_tokens of the one-comment request
+PROMPT_BUDGET = 3000    # estimated prompt tokens per packed request
+MAX_ITEMS = 25          # comments per packed request
+MAX_ATTEMPTS = 3
+CONCURRENCY = 4
+COMMENT_CHARS = 2000    # longer comments are cut to this many characters
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose; only used for packing
+    return len(text) // 4 + 1
+
+
+def number_comments(comments, ids=None):
+    # [(id, comment)] for the non-empty comments; ids default to c1, c2, ...
+    items, seen = [], set()
+    for i, comment in enumerate(comments):
+        comment = " ".join(str(comment).split())[:COMMENT_CHARS]
+        if not comment:
+            continue
+        item_id = str(ids[i]).strip() if ids is not None and str(ids[i]).strip() else f"c{i + 1}"
+        while item_id in seen:
+            item_id += "'"
+        seen.add(item_id)
+        items.append((item_id, comment))
+    return items
+
+
+def batch_prompt(items):
+    lines = "\n".join(f"[{item_id}] {comment}" for item_id, comment in items)
+    return f"""
+    Analyze each comment below in the context of the Behavior Under Pressure Grid.
+    Grid tools (intentional use / under duress):
+    - Power: drives results, owns outcomes / overreaches, avoids feedback
+    - Speed: reflects, adjusts, integrates / reacts, deflects, performs for show
+    - Fielding: foresees risks, protects systems / freezes, rigidifies, blocks learning
+    - Hitting Avg.: delivers consistently and reliably / checks out, avoids stretch or change
+    - Arm Strength: aligns and influences with clarity / charms without clarity, dominates without connection
+
+    Return JSON: an "insights" array with exactly one entry per comment id, each with
+    - id: the comment's id
+    - tool: the grid tool the comment is most about
+    - state: "Intentional Use" or "Under Duress"
+    - insight: 2-3 sentences on what the behavior signals and one coaching step
+
+    Comments:
+{lines}
+    """
+
+
+def batch_schema(ids):
+    string = {"type": "string"}
+    item = {
+        "type": "object",
+        "properties": {"id": {"type": "string", "enum": list(ids)},
+                       "tool": {"type": "string", "enum": GRID_TOOLS},
+                       "state": {"type": "string", "enum": GRID_STATES},
+                       "insight": string},
+        "required": ["id", "tool", "state", "insight"],
+        "additionalProperties": False,
+    }
+    return {"type": "object", "properties": {"insights": {"type": "array", "items": item}},
+            "required": ["insights"], "additionalProperties": False}
+
+
+def pack(items, prompt_budget=PROMPT_BUDGET, max_items=MAX_ITEMS):
+    # Greedy, in order: a batch closes when the next comment would exceed the budget
+    overhead = estimate_tokens(batch_prompt([]))
+    batches, batch, used = [], [], overhead
+    for item in items:
+        cost = estimate_tokens(f"[{item[0]}] {item[1]}\n")
+        if batch and (used + cost > prompt_budget or len(batch) >= max_items):
+            batches.append(batch)
+            batch, used = [], overhead
+        batch.append(item)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def validate(text, ids):
+    # ({id: insight dict}, {id: reason}) for one packed reply
+    try:
+        entries = json.loads(text)["insights"]
+        if not isinstance(entries, list):
+            raise TypeError("insights is not an array")
+    except (ValueError, KeyError, TypeError) as e:
+        return {}, {item_id: f"unreadable reply ({type(e).__name__})" for item_id in ids}
+    results, errors = {}, {}
+    for entry in entries:
+        if not isinstance(entry, dict) or entry.get("id") not in ids:
+            continue
+        item_id = entry["id"]
+        insight = str(entry.get("insight") or "").strip()
+        if item_id in results:
+            errors[item_id] = "answered twice"
+        elif entry.get("tool") not in GRID_TOOLS or entry.get("state") not in GRID_STATES or not insight:
+            errors[item_id] = "incomplete entry"
+        else:
+            results[item_id] = {"tool": entry["tool"], "state": entry["state"], "insight": insight}
+    for item_id in ids:
+        if item_id not in results:
+            errors.setdefault(item_id, "missing from reply")
+        elif item_id in errors:
+            del results[item_id]
+    return results, errors
+
+
+class BulkAnalyzer:
+    # complete(prompt, schema, max_tokens) -> (text, total tokens); called from worker threads
+    def __init__(self, complete, concurrency=CONCURRENCY, prompt_budget=PROMPT_BUDGET, max_items=MAX_ITEMS,
+                 item_tokens=ITEM_TOKENS, attempts=MAX_ATTEMPTS):
+        self.complete = complete
+        self.concurrency = concurrency
+        self.prompt_budget = prompt_budget
+        self.max_items = max_items
+        self.item_tokens = item_tokens
+        self.attempts = attempts
+        self.lock = threading.Lock()
+        self.counts = {"runs": 0, "calls": 0, "items": 0, "retried_items": 0, "failed_items": 0, "tokens": 0,
+                       "call_ms": 0.0}
+
+    def _count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.counts[name] += amount
+
+    def _call(self, batch):
+        # (results, errors, tokens, api error) for one packed request
+        ids = [item_id for item_id, _ in batch]
+        start = time.perf_counter()
+        try:
+            text, tokens = self.complete(batch_prompt(batch), batch_schema(ids), self.item_tokens * len(batch))
+        except CircuitOpenError as e:
+            return {}, {item_id: "AI service unavailable" for item_id in ids}, 0, e
+        except Exception as e:
+            return {}, {item_id: f"request failed ({type(e).__name__})" for item_id in ids}, 0, None
+        finally:
+            self._count(calls=1, call_ms=(time.perf_counter() - start) * 1000)
+        results, errors = validate(text, ids)
+        return results, errors, tokens, None
+
+    def run(self, items, on_progress=None):
+        # items: [(id, comment)]. on_progress(done, total) runs on the calling thread.
+        started = time.perf_counter()
+        results, attempts, errors = {}, {}, {}
+        tokens = calls = 0
+        batch_sizes = []
+        pending, max_items = list(items), self.max_items
+        for attempt in range(1, self.attempts + 1):
+            if not pending:
+                break
+            batches = pack(pending, self.prompt_budget, max_items)
+            batch_sizes += [len(batch) for batch in batches]
+            unavailable = False
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as pool:
+                futures = [pool.submit(self._call, batch) for batch in batches]
+                for future in as_completed(futures):
+                    batch_results, batch_errors, batch_tokens, api_error = future.result()
+                    calls += 1
+                    tokens += batch_tokens
+                    unavailable = unavailable or api_error is not None
+                    for item_id, result in batch_results.items():
+                        results[item_id] = result
+                        attempts[item_id] = attempt
+                        errors.pop(item_id, None)
+                    errors.update(batch_errors)
+                    if on_progress is not None:
+                        on_progress(len(results), len(items))
+            pending = [item for item in pending if item[0] not in results]
+            if unavailable:
+                break
+            if any(len(batch) > 1 and not any(item_id in results for item_id, _ in batch) for batch in batches):
+                max_items = max(1, max_items // 2)   # a whole reply failed, likely cut off: pack fewer
+            if pending and attempt < self.attempts:
+                self._count(retried_items=len(pending))
+        failed = {item_id: errors.get(item_id, "not attempted") for item_id, _ in items if item_id not in results}
+        self._count(runs=1, items=len(items), failed_items=len(failed), tokens=tokens)
+        return {
+            "results": [dict(results[item_id], id=item_id, comment=comment, attempts=attempts[item_id])
+                        for item_id, comment in items if item_id in results],
+            "failed": failed,
+            "calls": calls,
+            "tokens": tokens,
+            "batches": batch_sizes,
+            "seconds": time.perf_counter() - started,
+        }
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        counts["calls_per_item"] = counts["calls"] / counts["items"] if counts["items"] else 0.0
+        counts["tokens_per_item"] = counts["tokens"] / counts["items"] if counts["items"] else 0.0
+        return counts
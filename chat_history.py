@@ -0,0 +1,51 @@
+# -------------------------------
+# Bounded Chat History
+# -------------------------------
+# Ring buffer of (question, answer) turns with a constant-size view for
+# rendering:
+#   - at most max_turns are kept; the oldest turn is dropped to make room
+#   - page(visible) returns only the newest `visible` turns for rendering
+#
+# Persistence is optional: to_dict()/from_dict() round-trip through any store
+# with put_json/get_json (state_store.py).
+from collections import deque
+
+
+class ChatHistory:
+    def __init__(self, max_turns=50):
+        self.max_turns = max_turns
+        self.turns = deque(maxlen=max_turns)
+        self.total = 0      # turns ever added, including evicted ones
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __bool__(self):
+        return bool(self.turns)
+
+    def append(self, question, answer):
+        self.turns.append((question, answer))
+        self.total += 1
+
+    def clear(self):
+        self.turns.clear()
+        self.total = 0
+
+    # ✅ Rendering
+    def page(self, visible):
+        # Newest `visible` turns, oldest first, plus how many older turns are hidden
+        turns = list(self.turns)
+        visible = max(0, min(visible, len(turns)))
+        return turns[len(turns) - visible:], len(turns) - visible
+
+    # ✅ Persistence
+    def to_dict(self):
+        return {"turns": [list(t) for t in self.turns], "total": self.total}
+
+    @classmethod
+    def from_dict(cls, data, **kwargs):
+        history = cls(**kwargs)
+        for question, answer in (data or {}).get("turns", []):
+            history.append(question, answer)
+        history.total = max(history.total, (data or {}).get("total", 0))
+        return history
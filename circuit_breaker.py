@@ -0,0 +1,163 @@
+# -------------------------------
+# Model-API Circuit Breaker
+# -------------------------------
+# One breaker per process (shared by every session) sits in front of
+# chat.completions.create. While the API is healthy it only records outcomes;
+# once it looks unhealthy, calls fail immediately with CircuitOpenError
+# instead of each rerun waiting out the SDK timeout.
+#
+#   closed     calls pass; outcomes over the last `window` seconds are kept.
+#              Opens when, with at least `min_calls` outcomes, the failure
+#              rate or the slow-call rate (slower than `slow_call_ms`) reaches
+#              its threshold, or after `consecutive_failures` failures in a row
+#   open       calls are rejected for `open_seconds`
+#   half_open  up to `probes` trial calls pass; a fast success closes the
+#              circuit, a failure or slow call opens it again
+#
+# Exceptions in `ignore` (e.g. a 400 for a bad request) mean the API answered
+# and count as successes. snapshot() is the metrics view.
+import time
+import threading
+from collections import deque
+from types import SimpleNamespace
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} is temporarily unavailable (retrying in {retry_in:.0f}s)")
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, name="model API", failure_rate=0.5, slow_call_ms=20000, slow_call_rate=0.5, min_calls=5,
+                 consecutive_failures=3, window=60.0, open_seconds=30.0, probes=1, ignore=(), clock=time.monotonic):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.slow_call_ms = slow_call_ms
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.consecutive_failures = consecutive_failures
+        self.window = window
+        self.open_seconds = open_seconds
+        self.probes = probes
+        self.ignore = tuple(ignore)
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.changed_at = clock()
+        self.outcomes = deque()   # (time, failed, slow)
+        self.streak = 0           # consecutive failures
+        self.in_flight_probes = 0
+        self.counts = {"calls": 0, "successes": 0, "failures": 0, "slow": 0, "rejected": 0, "opened": 0}
+
+    # ✅ Calls
+    def call(self, fn, *args, **kwargs):
+        probe = self._acquire()
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except self.ignore:
+            self._record(probe, False, (time.perf_counter() - start) * 1000)
+            raise
+        except Exception:
+            self._record(probe, True, (time.perf_counter() - start) * 1000)
+            raise
+        except BaseException:
+            # KeyboardInterrupt, SystemExit, Streamlit's rerun/stop: not the
+            # service's outcome, but a probe must still give back its slot
+            if probe:
+                with self.lock:
+                    self.in_flight_probes -= 1
+            raise
+        self._record(probe, False, (time.perf_counter() - start) * 1000)
+        return result
+
+    def _acquire(self):
+        # True if this call is a half-open probe; raises CircuitOpenError if rejected
+        with self.lock:
+            now = self.clock()
+            if self.state == OPEN and now - self.changed_at >= self.open_seconds:
+                self._transition(HALF_OPEN, now)
+            if self.state == CLOSED:
+                self.counts["calls"] += 1
+                return False
+            if self.state == HALF_OPEN and self.in_flight_probes < self.probes:
+                self.in_flight_probes += 1
+                self.counts["calls"] += 1
+                return True
+            self.counts["rejected"] += 1
+            retry_in = max(0.0, self.open_seconds - (now - self.changed_at)) if self.state == OPEN else 1.0
+        raise CircuitOpenError(self.name, retry_in)
+
+    def _record(self, probe, failed, elapsed_ms):
+        slow = elapsed_ms >= self.slow_call_ms
+        with self.lock:
+            now = self.clock()
+            self.counts["failures" if failed else "successes"] += 1
+            self.counts["slow"] += slow
+            if probe:
+                self.in_flight_probes -= 1
+                self._transition(OPEN if failed or slow else CLOSED, now)
+                return
+            if self.state != CLOSED:
+                return   # a call admitted before the circuit opened
+            self.outcomes.append((now, failed, slow))
+            self.streak = self.streak + 1 if failed else 0
+            self._trim(now)
+            failure_rate, slow_rate = self._rates()
+            enough = len(self.outcomes) >= self.min_calls
+            if (self.streak >= self.consecutive_failures
+                    or enough and (failure_rate >= self.failure_rate or slow_rate >= self.slow_call_rate)):
+                self._transition(OPEN, now)
+
+    def _transition(self, state, now):
+        if state == OPEN and self.state != OPEN:
+            self.counts["opened"] += 1
+        if state == CLOSED:
+            self.outcomes.clear()
+            self.streak = 0
+        self.state = state
+        self.changed_at = now
+
+    def _trim(self, now):
+        while self.outcomes and now - self.outcomes[0][0] > self.window:
+            self.outcomes.popleft()
+
+    def _rates(self):
+        total = len(self.outcomes)
+        if not total:
+            return 0.0, 0.0
+        return (sum(failed for _, failed, _ in self.outcomes) / total,
+                sum(slow for _, _, slow in self.outcomes) / total)
+
+    # ✅ Reporting
+    def is_open(self):
+        with self.lock:
+            return self.state == OPEN and self.clock() - self.changed_at < self.open_seconds
+
+    def snapshot(self):
+        with self.lock:
+            now = self.clock()
+            self._trim(now)
+            failure_rate, slow_rate = self._rates()
+            return dict(
+                self.counts,
+                state=self.state,
+                state_seconds=now - self.changed_at,
+                retry_in=max(0.0, self.open_seconds - (now - self.changed_at)) if self.state == OPEN else 0.0,
+                window_calls=len(self.outcomes),
+                failure_rate=failure_rate,
+                slow_rate=slow_rate,
+                consecutive_failures=self.streak,
+            )
+
+
+def guard(client, breaker):
+    # Stand-in for an OpenAI client whose chat.completions.create runs through the breaker
+    def create(*args, **kwargs):
+        return breaker.call(client.chat.completions.create, *args, **kwargs)
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)), unguarded=client)
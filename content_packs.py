@@ -0,0 +1,227 @@
+# -------------------------------
+# Framework Content Packs
+# -------------------------------
+# The framework text behind Pages 2-5 lives in versioned JSON files under
+# data/content/ (CONTENT_DIR) instead of Python literals. A pack is compiled
+# once when it is loaded:
+#
+#   text    name -> markdown string (a JSON string or a list of lines)
+#   tables  name -> pandas DataFrame ({"columns": [...], "rows": [[...]]})
+#   arrow   name -> the same table as a pyarrow Table; st.table/st.dataframe
+#           serialize it as is instead of converting the DataFrame every rerun
+#   panels  name -> [(title, text)] (expanders)
+#   html    name -> pre-rendered HTML: {"table": <table name>, "style": ...}
+#           renders a table, {"markdown": <text name>, "style": ...} renders
+#           markdown into a styled <div> (e.g. a scroll box)
+#   sections  retrieval index built from each table or panel group's "index"
+#             template, e.g. {"id": "panel:{title}", "text": "**{title}**\n\n{text}"};
+#             table templates are filled from the row's column values
+#
+#   library = ContentLibrary()
+#   pack = library.get("p4_calibration")
+#   st.table(pack.arrow["Behavioral Calibration Grid"])
+#
+# Hot reload: get() stats the pack's file at most every `check_interval`
+# seconds and recompiles it when its mtime or size changed. A file that no
+# longer parses keeps the last good pack (the error is in stats()).
+# `digest` changes with the file contents; use it to key anything derived
+# from a pack.
+import os
+import re
+import json
+import html
+import time
+import hashlib
+import threading
+from collections import namedtuple
+
+import pandas as pd
+import pyarrow as pa
+
+CONTENT_DIR = os.getenv("CONTENT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "content"))
+CONTENT_CHECK_SECONDS = float(os.getenv("CONTENT_CHECK_SECONDS", "2"))
+
+Section = namedtuple("Section", "id title text aliases pages")
+
+HEADING_RE = re.compile(r"^(#{1,6})\s+(.*)$")
+BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+ITALIC_RE = re.compile(r"(?<!\w)_(.+?)_(?!\w)")
+
+
+def join_text(value):
+    return "\n".join(value) if isinstance(value, list) else str(value)
+
+
+def inline_html(text):
+    return ITALIC_RE.sub(r"<em>\1</em>", BOLD_RE.sub(r"<strong>\1</strong>", html.escape(text, quote=False)))
+
+
+def markdown_html(text):
+    # The markdown the packs use: headings, "-" bullets, **bold**, _italic_; one <p> per other line
+    out, in_list = [], False
+    for raw in text.split("\n"):
+        line = raw.strip()
+        bullet = line[:2] in ("- ", "* ")
+        if in_list and not bullet:
+            out.append("</ul>")
+            in_list = False
+        if not line:
+            continue
+        heading = HEADING_RE.match(line)
+        if heading:
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{inline_html(heading.group(2))}</h{level}>")
+        elif bullet:
+            if not in_list:
+                out.append("<ul>")
+                in_list = True
+            out.append(f"<li>{inline_html(line[2:])}</li>")
+        else:
+            out.append(f"<p>{inline_html(line)}</p>")
+    if in_list:
+        out.append("</ul>")
+    return "\n".join(out)
+
+
+def table_html(df, style=""):
+    head = "".join(f"<th>{html.escape(str(column))}</th>" for column in df.columns)
+    rows = "".join("<tr>" + "".join(f"<td>{html.escape(str(value))}</td>" for value in row) + "</tr>"
+                   for row in df.itertuples(index=False))
+    return f"<table style='{html.escape(style)}'><tr>{head}</tr>{rows}</table>"
+
+
+class ContentPack:
+    def __init__(self, name, raw, digest=None):
+        self.name = name
+        self.version = str(raw.get("version", "0"))
+        self.page = raw.get("page")
+        self.digest = digest or hashlib.sha1(json.dumps(raw, sort_keys=True).encode("utf-8")).hexdigest()
+        self.text = {key: join_text(value) for key, value in raw.get("text", {}).items()}
+        self.tables, self.arrow, self.panels, self.html, self.sections = {}, {}, {}, {}, []
+        for key, spec in raw.get("tables", {}).items():
+            df = pd.DataFrame(spec["rows"], columns=spec["columns"])
+            self.tables[key] = df
+            self.arrow[key] = pa.Table.from_pandas(df)
+            self._index(spec.get("index"), [dict(zip(df.columns, row)) for row in spec["rows"]])
+        for key, spec in raw.get("panels", {}).items():
+            items = [(title, join_text(text)) for title, text in spec["items"]]
+            self.panels[key] = items
+            self._index(spec.get("index"), [{"title": title, "text": text} for title, text in items])
+        for key, spec in raw.get("html", {}).items():
+            if "table" in spec:
+                self.html[key] = table_html(self.tables[spec["table"]], spec.get("style", ""))
+            else:
+                body = markdown_html(self.text[spec["markdown"]])
+                self.html[key] = f"<div style='{html.escape(spec.get('style', ''))}'>\n{body}\n</div>"
+        self.by_id = {section.id: section for section in self.sections}
+
+    def _index(self, template, records):
+        # One retrieval section per row / panel, from the block's "index" template
+        if not template:
+            return
+        for record in records:
+            self.sections.append(Section(
+                id=template["id"].format_map(record),
+                title=template.get("title", "{title}").format_map(record),
+                text=join_text(template.get("text", "{text}")).format_map(record),
+                aliases=tuple(template.get("aliases", ())),
+                pages=template.get("pages"),
+            ))
+
+    def __repr__(self):
+        return f"ContentPack({self.name!r}, version={self.version!r})"
+
+
+class _Entry:
+    __slots__ = ("pack", "signature", "checked")
+
+    def __init__(self, pack, signature, checked):
+        self.pack = pack
+        self.signature = signature
+        self.checked = checked
+
+
+class ContentLibrary:
+    def __init__(self, directory=CONTENT_DIR, check_interval=CONTENT_CHECK_SECONDS, clock=time.monotonic):
+        self.directory = directory
+        self.check_interval = check_interval
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = {}   # name -> _Entry
+        self.errors = {}    # name -> last load error, while the previous pack is served
+        self.counts = {"gets": 0, "checks": 0, "loads": 0, "reloads": 0, "load_errors": 0, "compile_ms": 0.0}
+
+    def _count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.counts[name] += amount
+
+    def path(self, name):
+        return os.path.join(self.directory, f"{name}.json")
+
+    def names(self):
+        return sorted(f[:-5] for f in os.listdir(self.directory) if f.endswith(".json"))
+
+    def _load(self, name, signature):
+        start = time.perf_counter()
+        with open(self.path(name), "rb") as f:
+            data = f.read()
+        pack = ContentPack(name, json.loads(data.decode("utf-8")), hashlib.sha1(data).hexdigest())
+        self._count(loads=1, compile_ms=(time.perf_counter() - start) * 1000)
+        return _Entry(pack, signature, self.clock())
+
+    def get(self, name):
+        # The compiled pack; stats its file at most every check_interval seconds
+        self._count(gets=1)
+        entry = self.entries.get(name)
+        now = self.clock()
+        if entry is not None and now - entry.checked < self.check_interval:
+            return entry.pack
+        with self.lock:
+            entry = self.entries.get(name)
+            if entry is not None and now - entry.checked < self.check_interval:
+                return entry.pack
+            self.counts["checks"] += 1
+        try:
+            stat = os.stat(self.path(name))
+        except FileNotFoundError:
+            if entry is None:
+                raise KeyError(f"No content pack {name!r} in {self.directory}")
+            entry.checked = now   # keep serving the last good pack
+            return entry.pack
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if entry is not None and entry.signature == signature:
+            entry.checked = now
+            return entry.pack
+        try:
+            fresh = self._load(name, signature)
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            if entry is None:
+                raise
+            with self.lock:
+                self.counts["load_errors"] += 1
+                self.errors[name] = f"{type(e).__name__}: {e}"
+            entry.signature, entry.checked = signature, now   # retried when the file changes again
+            return entry.pack
+        with self.lock:
+            if entry is not None:
+                self.counts["reloads"] += 1
+            self.entries[name] = fresh
+            self.errors.pop(name, None)
+        return fresh.pack
+
+    def sections(self, names):
+        # Retrieval sections of the given packs, in order
+        return [section for name in names for section in self.get(name).sections]
+
+    def digest(self, names):
+        # Changes whenever any of the packs is reloaded
+        return tuple(self.get(name).digest for name in names)
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            counts["packs"] = {name: {"load_error": int(name in self.errors)} for name in self.entries}
+            counts["versions"] = {name: entry.pack.version for name, entry in self.entries.items()}
+            counts["errors"] = dict(self.errors)
+        return counts
@@ -0,0 +1,380 @@
+# -------------------------------
+# Premium Entitlement Service
+# -------------------------------
+# Single source of truth for "is this user premium?".
+#
+# - Stripe webhooks (verified with STRIPE_WEBHOOK_SECRET) update an entitlement
+#   table: SQLite by default, Supabase when ENTITLEMENT_BACKEND=supabase.
+# - Per-request checks go through an in-process TTL cache, never to Stripe.
+#   The webhook receiver runs in its own process, so its writes reach the
+#   app's cache through the store: every ENTITLEMENT_VERSION_POLL seconds the
+#   app reads the table's latest updated_at and drops its cache when that
+#   moved. An upgrade shows within that poll interval, not the full TTL.
+# - Checkout sessions are memoized per user until shortly before they expire.
+#
+# Run the webhook receiver next to the Streamlit app:
+#   python entitlements.py --port 8502
+# and point the Stripe dashboard (or `stripe listen --forward-to`) at
+#   http://<host>:8502/stripe/webhook
+#
+# For local testing, STRIPE_API_BASE=http://localhost:12111 targets stripe-mock,
+# and sign_payload() builds a valid Stripe-Signature header for a fake event.
+import os
+import sys
+import hmac
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import stripe
+
+ENTITLEMENT_DB = os.getenv("ENTITLEMENT_DB", "entitlements.db")
+ENTITLEMENT_BACKEND = os.getenv("ENTITLEMENT_BACKEND", "sqlite")
+CACHE_TTL = float(os.getenv("ENTITLEMENT_CACHE_TTL", "60"))
+VERSION_POLL = float(os.getenv("ENTITLEMENT_VERSION_POLL", "2"))   # seconds between reads of the store's version
+CHECKOUT_PRICE_ID = os.getenv("STRIPE_PRICE_ID", "price_12345")  # Replace with your Stripe Price ID
+CHECKOUT_SUCCESS_URL = os.getenv("STRIPE_SUCCESS_URL", "https://yourapp.com/success?session_id={CHECKOUT_SESSION_ID}")
+CHECKOUT_CANCEL_URL = os.getenv("STRIPE_CANCEL_URL", "https://yourapp.com/cancel")
+CHECKOUT_VALIDITY = 24 * 60 * 60   # Stripe's default checkout session lifetime
+CHECKOUT_EXPIRY_MARGIN = 10 * 60   # stop handing out a session 10 minutes before it expires
+
+if os.getenv("STRIPE_API_BASE"):
+    stripe.api_base = os.getenv("STRIPE_API_BASE")
+
+ACTIVE_STATUSES = {"active", "trialing"}
+
+
+# -------------------------------
+# Stores
+# -------------------------------
+class SQLiteEntitlementStore:
+    def __init__(self, path=ENTITLEMENT_DB):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entitlements (
+                    user_id TEXT PRIMARY KEY,
+                    premium INTEGER NOT NULL DEFAULT 0,
+                    status TEXT,
+                    customer_id TEXT,
+                    subscription_id TEXT,
+                    current_period_end REAL,
+                    updated_at REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entitlements_customer ON entitlements (customer_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entitlements_subscription ON entitlements (subscription_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entitlements_updated ON entitlements (updated_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get(self, user_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM entitlements WHERE user_id = ?", (user_id,)).fetchone()
+        return dict(row) if row else None
+
+    def find_user(self, customer_id=None, subscription_id=None):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT user_id FROM entitlements WHERE subscription_id = ? OR customer_id = ? LIMIT 1",
+                (subscription_id, customer_id),
+            ).fetchone()
+        return row["user_id"] if row else None
+
+    def version(self):
+        # Latest updated_at in the table; changes whenever any entitlement is written
+        with self._connect() as conn:
+            row = conn.execute("SELECT MAX(updated_at) AS version FROM entitlements").fetchone()
+        return row["version"]
+
+    def upsert(self, user_id, **fields):
+        fields["updated_at"] = time.time()
+        if "premium" in fields:
+            fields["premium"] = int(bool(fields["premium"]))
+        columns = ", ".join(["user_id"] + list(fields))
+        placeholders = ", ".join("?" for _ in range(len(fields) + 1))
+        updates = ", ".join(f"{key} = excluded.{key}" for key in fields)
+        with self._connect() as conn:
+            conn.execute(
+                f"INSERT INTO entitlements ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT(user_id) DO UPDATE SET {updates}",
+                [user_id] + list(fields.values()),
+            )
+
+
+class SupabaseEntitlementStore:
+    # Same interface, backed by an `entitlements` table with the SQLite columns
+    def __init__(self, url=None, key=None):
+        from supabase import create_client
+        self.client = create_client(url or os.getenv("SUPABASE_URL"), key or os.getenv("SUPABASE_KEY"))
+
+    def get(self, user_id):
+        rows = self.client.table("entitlements").select("*").eq("user_id", user_id).limit(1).execute().data
+        return rows[0] if rows else None
+
+    def find_user(self, customer_id=None, subscription_id=None):
+        query = self.client.table("entitlements").select("user_id")
+        if subscription_id:
+            rows = query.eq("subscription_id", subscription_id).limit(1).execute().data
+            if rows:
+                return rows[0]["user_id"]
+        if customer_id:
+            rows = query.eq("customer_id", customer_id).limit(1).execute().data
+            if rows:
+                return rows[0]["user_id"]
+        return None
+
+    def version(self):
+        rows = (self.client.table("entitlements").select("updated_at")
+                .order("updated_at", desc=True).limit(1).execute().data)
+        return rows[0]["updated_at"] if rows else None
+
+    def upsert(self, user_id, **fields):
+        fields["updated_at"] = time.time()
+        if "premium" in fields:
+            fields["premium"] = bool(fields["premium"])
+        self.client.table("entitlements").upsert({"user_id": user_id, **fields}).execute()
+
+
+def make_store():
+    if ENTITLEMENT_BACKEND == "supabase":
+        return SupabaseEntitlementStore()
+    return SQLiteEntitlementStore()
+
+
+# -------------------------------
+# TTL Cache
+# -------------------------------
+class TTLCache:
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = {}
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                return entry[0]
+            self.entries.pop(key, None)
+            return None
+
+    def set(self, key, value, ttl=None):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+
+    def invalidate(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# -------------------------------
+# Entitlement Service
+# -------------------------------
+class EntitlementService:
+    def __init__(self, store=None, ttl=CACHE_TTL, version_poll=VERSION_POLL):
+        self._store = store
+        self.cache = TTLCache(ttl)
+        self.version_poll = version_poll
+        self.version_lock = threading.Lock()
+        self.version = None
+        self.version_checked = None   # monotonic time of the last version read
+        self.checkouts = {}  # user_id -> (url, expires_at)
+        self.checkout_lock = threading.Lock()
+
+    @property
+    def store(self):
+        # Opened lazily so importing the module never touches disk or network
+        if self._store is None:
+            self._store = make_store()
+        return self._store
+
+    def _check_version(self):
+        # Drops the cache when another process (the webhook receiver) wrote an
+        # entitlement. One store read per poll interval, by whichever request
+        # comes first; requests meanwhile go on with the cache
+        now = time.monotonic()
+        if self.version_checked is not None and now - self.version_checked < self.version_poll:
+            return
+        if not self.version_lock.acquire(blocking=False):
+            return
+        try:
+            self.version_checked = now
+            version = self.store.version()
+            if version != self.version:
+                self.version = version
+                self.cache.clear()
+        finally:
+            self.version_lock.release()
+
+    def is_premium(self, user_id):
+        self._check_version()
+        cached = self.cache.get(user_id)
+        if cached is not None:
+            return cached
+        record = self.store.get(user_id)
+        premium = bool(record and record["premium"])
+        if premium and record.get("current_period_end"):
+            premium = record["current_period_end"] > time.time()
+        self.cache.set(user_id, premium)
+        return premium
+
+    def set_premium(self, user_id, premium, **fields):
+        self.store.upsert(user_id, premium=premium, **fields)
+        self.cache.invalidate(user_id)
+        if premium:
+            with self.checkout_lock:
+                self.checkouts.pop(user_id, None)
+
+    # ✅ Checkout sessions, memoized per user for their validity window
+    def checkout_url(self, user_id):
+        now = time.time()
+        with self.checkout_lock:
+            cached = self.checkouts.get(user_id)
+            if cached and cached[1] - CHECKOUT_EXPIRY_MARGIN > now:
+                return cached[0]
+        session = stripe.checkout.Session.create(
+            payment_method_types=["card"],
+            mode="subscription",
+            line_items=[{"price": CHECKOUT_PRICE_ID, "quantity": 1}],
+            client_reference_id=user_id,
+            customer_email=user_id if "@" in user_id else None,
+            success_url=CHECKOUT_SUCCESS_URL,
+            cancel_url=CHECKOUT_CANCEL_URL,
+        )
+        expires_at = getattr(session, "expires_at", None) or now + CHECKOUT_VALIDITY
+        with self.checkout_lock:
+            self.checkouts[user_id] = (session.url, expires_at)
+        return session.url
+
+    # ✅ Webhook events
+    def handle_event(self, event):
+        event_type = event.get("type", "")
+        obj = event.get("data", {}).get("object", {})
+
+        if event_type == "checkout.session.completed":
+            user_id = obj.get("client_reference_id") or (obj.get("customer_details") or {}).get("email")
+            if not user_id:
+                return None
+            self.set_premium(user_id, True, status="active",
+                             customer_id=obj.get("customer"), subscription_id=obj.get("subscription"))
+            return user_id
+
+        if event_type.startswith("customer.subscription."):
+            user_id = self.store.find_user(customer_id=obj.get("customer"), subscription_id=obj.get("id"))
+            if not user_id:
+                return None
+            status = "canceled" if event_type == "customer.subscription.deleted" else obj.get("status")
+            self.set_premium(user_id, status in ACTIVE_STATUSES, status=status,
+                             customer_id=obj.get("customer"), subscription_id=obj.get("id"),
+                             current_period_end=obj.get("current_period_end"))
+            return user_id
+
+        if event_type == "invoice.payment_failed":
+            user_id = self.store.find_user(customer_id=obj.get("customer"), subscription_id=obj.get("subscription"))
+            if user_id:
+                self.set_premium(user_id, False, status="past_due")
+            return user_id
+
+        return None
+
+
+service = EntitlementService()
+
+
+def is_premium(user_id):
+    return service.is_premium(user_id)
+
+
+def checkout_url(user_id):
+    return service.checkout_url(user_id)
+
+
+# -------------------------------
+# Webhook Receiver
+# -------------------------------
+def verify_event(payload, sig_header, secret):
+    # Raises stripe.SignatureVerificationError on a bad or stale signature
+    stripe.Webhook.construct_event(payload, sig_header, secret)
+    return json.loads(payload)
+
+
+def sign_payload(payload, secret, timestamp=None):
+    # Stripe-Signature header for a payload, for local tests and stand-ins
+    timestamp = int(timestamp or time.time())
+    if isinstance(payload, bytes):
+        payload = payload.decode("utf-8")
+    signature = hmac.new(secret.encode("utf-8"), f"{timestamp}.{payload}".encode("utf-8"), hashlib.sha256).hexdigest()
+    return f"t={timestamp},v1={signature}"
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service = service
+    secret = os.getenv("STRIPE_WEBHOOK_SECRET")
+
+    def log_message(self, format, *args):
+        pass
+
+    def reply(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/stripe/webhook":
+            self.reply(404, {"error": "not found"})
+            return
+        payload = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            event = verify_event(payload, self.headers.get("Stripe-Signature"), self.secret)
+        except (ValueError, stripe.SignatureVerificationError) as e:
+            self.reply(400, {"error": str(e)})
+            return
+        user_id = self.service.handle_event(event)
+        self.reply(200, {"received": True, "user_id": user_id})
+
+
+def make_webhook_server(host="0.0.0.0", port=8502, secret=None, entitlement_service=None):
+    attrs = {"secret": secret or WebhookHandler.secret, "service": entitlement_service or service}
+    handler = type("ConfiguredWebhookHandler", (WebhookHandler,), attrs)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stripe webhook receiver for premium entitlements")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("STRIPE_WEBHOOK_PORT", "8502")))
+    args = parser.parse_args(argv)
+    if not WebhookHandler.secret:
+        print("🚫 STRIPE_WEBHOOK_SECRET is not set; refusing to accept unverified webhooks.", file=sys.stderr)
+        return 1
+    server = make_webhook_server(args.host, args.port)
+    print(f"✅ Stripe webhook receiver on http://{args.host}:{args.port}/stripe/webhook", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
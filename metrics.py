@@ -0,0 +1,385 @@
+# -------------------------------
+# Metrics Registry & Exposition Endpoint
+# -------------------------------
+# Counters, gauges and histograms kept in process memory and served in the
+# Prometheus text exposition format from a small HTTP server on its own port
+# (METRICS_PORT), separate from Streamlit's:
+#
+#   METRICS_PORT=9464 streamlit run app.py
+#   curl http://127.0.0.1:9464/metrics
+#
+# Recording is a dict lookup and a locked add, so it stays on the hot path;
+# everything else happens at scrape time. Components that already keep their
+# own stats (SemanticCache.stats(), CircuitBreaker.snapshot(), ...) are
+# exported through collectors that read those stats on each scrape.
+#
+# Each app process serves its own registry, so give every worker its own
+# METRICS_PORT and scrape them all.
+import re
+import sys
+import time
+import bisect
+import threading
+from collections import namedtuple
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# A collector returns Family tuples; samples are (labels dict, value)
+Family = namedtuple("Family", "name kind help samples")
+
+NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+class _CounterChild:
+    def __init__(self, lock):
+        self.lock = lock
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        with self.lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value):
+        with self.lock:
+            self.value = value
+
+    def dec(self, amount=1.0):
+        self.inc(-amount)
+
+
+class _Timer:
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.child.observe(time.perf_counter() - self.start)
+
+
+class _HistogramChild:
+    def __init__(self, lock, bounds):
+        self.lock = lock
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # per bucket, last is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self):
+        return _Timer(self)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.children = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}, got {values}")
+            with self.lock:
+                child = self.children.setdefault(tuple(str(v) for v in values), self._child())
+                self.children.setdefault(values, child)
+        return child
+
+    def _items(self):
+        with self.lock:
+            seen = {}
+            for values, child in self.children.items():
+                seen[id(child)] = (tuple(str(v) for v in values), child)
+        return sorted(seen.values(), key=lambda item: item[0])
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _child(self):
+        return _CounterChild(self.lock)
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def samples(self):
+        for values, child in self._items():
+            yield self.name, dict(zip(self.labelnames, values)), child.value
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def _child(self):
+        return _GaugeChild(self.lock)
+
+    def set(self, value):
+        self._default.set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=SECONDS_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _child(self):
+        return _HistogramChild(self.lock, self.bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def samples(self):
+        for values, child in self._items():
+            labels = dict(zip(self.labelnames, values))
+            with self.lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", dict(labels, le=_format_value(bound)), cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+# -------------------------------
+# Registry
+# -------------------------------
+class Registry:
+    # Metric constructors are idempotent, so app.py can declare its metrics on
+    # every rerun and get the same objects back
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.metrics = {}
+        self.collectors = {}
+
+    def _get(self, cls, name, *args, **kwargs):
+        name = self.prefix + name
+        metric = self.metrics.get(name)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.setdefault(name, cls(name, *args, **kwargs))
+        if not isinstance(metric, cls):
+            raise ValueError(f"{name} is already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=SECONDS_BUCKETS):
+        return self._get(Histogram, name, help, labelnames, buckets)
+
+    def register_collector(self, key, collect):
+        # collect() -> iterable of Family; registering the same key replaces it
+        with self.lock:
+            self.collectors[key] = collect
+
+    def render(self):
+        lines = []
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda m: m.name)
+            collectors = list(self.collectors.items())
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(_sample_line(name, labels, value) for name, labels, value in metric.samples())
+        for key, collect in collectors:
+            try:
+                families = list(collect())
+            except Exception as e:   # one broken collector must not take down the scrape
+                print(f"⚠️ metrics collector {key} failed: {e}", file=sys.stderr)
+                continue
+            for family in families:
+                name = self.prefix + family.name
+                lines.append(f"# HELP {name} {_escape_help(family.help)}")
+                lines.append(f"# TYPE {name} {family.kind}")
+                lines.extend(_sample_line(name, labels, value) for labels, value in family.samples)
+        return "\n".join(lines) + "\n"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape_help(text):
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _sample_line(name, labels, value):
+    if labels:
+        inner = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+        return f"{name}{{{inner}}} {_format_value(value)}"
+    return f"{name} {_format_value(value)}"
+
+
+REGISTRY = Registry(prefix="fivetool_")
+
+
+# -------------------------------
+# Collectors & Instrumentation
+# -------------------------------
+def stats_families(prefix, stats, help):
+    # Flattens a component's stats()/snapshot() dict into gauges:
+    #   {"hits": 3}                    -> <prefix>_hits 3
+    #   {"pages": {"p4": {"hits": 3}}} -> <prefix>_hits{page="p4"} 3
+    #   {"state": "open"}              -> <prefix>_state{state="open"} 1
+    samples = {}
+
+    def add(key, labels, value):
+        samples.setdefault(NAME_RE.sub("_", f"{prefix}_{key}"), []).append((labels, value))
+
+    for key, value in stats.items():
+        if isinstance(value, bool) or isinstance(value, (int, float)):
+            add(key, {}, float(value))
+        elif isinstance(value, str):
+            add(key, {key: value}, 1.0)
+        elif isinstance(value, dict):
+            label = key[:-1] if key.endswith("s") else key
+            for label_value, fields in value.items():
+                for field, number in (fields.items() if isinstance(fields, dict) else ()):
+                    if isinstance(number, (int, float)):
+                        add(field, {label: label_value}, float(number))
+    return [Family(name, "gauge", help, rows) for name, rows in samples.items()]
+
+
+class ActiveSessions:
+    # Sessions that reran within the last `window` seconds
+    def __init__(self, window=300.0, clock=time.monotonic):
+        self.window = window
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.last_seen = {}
+
+    def touch(self, session_id):
+        self.last_seen[session_id] = self.clock()
+
+    def count(self):
+        now = self.clock()
+        with self.lock:
+            for session_id, seen in list(self.last_seen.items()):
+                if now - seen > self.window:
+                    self.last_seen.pop(session_id, None)
+            return len(self.last_seen)
+
+
+class Timed:
+    # Proxy that records how long each method listed in `methods` takes in
+    # histogram.labels(label, method); everything else passes through
+    def __init__(self, target, histogram, label, methods):
+        self._target = target
+        self._histogram = histogram
+        self._label = label
+        self._methods = frozenset(methods)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in self._methods:
+            return attr
+        child = self._histogram.labels(self._label, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        setattr(self, name, timed)   # later lookups skip __getattr__
+        return timed
+
+
+def meter_completions(client, site, seconds, tokens):
+    # Stand-in for an OpenAI client that records latency (by outcome) and
+    # prompt/completion tokens for one call site
+    def create(*args, **kwargs):
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            response = client.chat.completions.create(*args, **kwargs)
+        except BaseException as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            seconds.labels(site, outcome).observe(time.perf_counter() - start)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            tokens.labels(site, "prompt").inc(getattr(usage, "prompt_tokens", 0) or 0)
+            tokens.labels(site, "completion").inc(getattr(usage, "completion_tokens", 0) or 0)
+        return response
+    return SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)),
+                           unguarded=getattr(client, "unguarded", client))
+
+
+# -------------------------------
+# HTTP Endpoint
+# -------------------------------
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry = None   # set per server by make_server
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(registry=REGISTRY, host="0.0.0.0", port=9464):
+    handler = type("ConfiguredMetricsHandler", (MetricsHandler,), {"registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(registry=REGISTRY, host="0.0.0.0", port=0):
+    # port=0 picks a free port; returns (server, url)
+    server = make_server(registry, host, port)
+    threading.Thread(target=server.serve_forever, name="metrics-endpoint", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/metrics"
@@ -0,0 +1,298 @@
+# -------------------------------
+# Adaptive Model / max_tokens Policy
+# -------------------------------
+# Every call site used to send gpt-4o-mini with a hard-coded max_tokens
+# (400 on Page 3, 700 on Pages 4/5, 1000 on Page 2, ...) whatever the
+# question. ModelPolicy records, per call site and question size, how long
+# the completions actually run and how long they take, and picks:
+#
+#   max_tokens  the `quantile` (p99) of observed completion tokens times
+#               `headroom`, never above the call site's own value (its cap);
+#               the cap itself when that saves less than `min_saving` of it
+#   model       the first tier in `tiers` (cheapest first) whose limits fit
+#               the question and that budget, and whose observed p95 and
+#               p99 request latency (continuations included) there are not
+#               worse than the default model's; otherwise `default_model`
+#
+#   policy = ModelPolicy()
+#   response = policy.complete(client.chat.completions.create, "p4_question", messages, 700, temperature=0.7)
+#
+# complete() is choose() -> create(model=..., max_tokens=...) -> observe().
+# An answer the tighter budget cut short ("length" below the site's cap) is
+# continued: one more request with the partial answer, for at most the
+# rest of the cap, so a cut costs one extra round trip rather than a second
+# full answer. The caller gets the joined text.
+#
+# Until a site/bucket has `min_samples` completions it gets the defaults
+# ("learning"), and while more than `max_truncation` of its recent answers
+# were cut short by a budget below the cap it gets the cap again
+# ("truncating"). Answers that reach the cap itself were cut before too and
+# only push the quantile up to the cap.
+#
+# Overrides (MODEL_POLICY_FILE, JSON) take the constructor's keywords, plus
+# per-site settings:
+#   {"quantile": 0.99, "tiers": [{"model": "gpt-4.1-nano", "max_tokens": 400, "max_prompt_tokens": 256}],
+#    "sites": {"p2_dive_further": {"adaptive": false}, "p3_insights": {"model": "gpt-4o", "max_tokens": 500},
+#              "job_review": {"tiers": false, "quantile": 0.995}}}
+# MODEL_POLICY=fixed turns the policy off (the call sites' values, or the
+# site overrides, as they are).
+#
+# Recording: with record_path (MODEL_POLICY_RECORD) every completion is
+# appended as one JSON line, prompt included, and the log is read back on
+# start so the distributions survive restarts. The same log is what
+# benchmarks/eval_model_policy.py replays against the stub server.
+import os
+import json
+import math
+import time
+import threading
+from collections import deque, namedtuple
+
+MODEL_POLICY = os.getenv("MODEL_POLICY", "adaptive")              # adaptive | fixed
+MODEL_POLICY_FILE = os.getenv("MODEL_POLICY_FILE")
+MODEL_POLICY_RECORD = os.getenv("MODEL_POLICY_RECORD")             # JSONL of completions, prompts included
+DEFAULT_MODEL = os.getenv("MODEL_DEFAULT", "gpt-4o-mini")
+SMALL_MODEL = os.getenv("MODEL_SMALL", "gpt-4.1-nano")             # "" = no cheaper tier
+TIERS = [{"model": SMALL_MODEL, "max_tokens": 400, "max_prompt_tokens": 256}] if SMALL_MODEL else []
+
+QUANTILE = 0.99
+HEADROOM = 1.15
+MIN_SAMPLES = 20
+WINDOW = 500              # recent completions kept per site and bucket
+MIN_TOKENS = 64
+MAX_TRUNCATION = 0.02     # share of recent answers that may hit their limit
+MIN_SAVING = 0.15         # share of the cap a budget must save to be worth a continuation
+PROMPT_BUCKETS = [64, 256, 1024]   # question tokens (the last user message)
+PRICES = {                # USD per 1M tokens: (prompt, completion)
+    "gpt-4.1-nano": (0.10, 0.40),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+CONTINUE_PROMPT = ("Your answer was cut off. Continue it exactly where it stopped, without repeating anything "
+                   "or adding a preamble; start with the characters that come next, including any leading space.")
+
+Choice = namedtuple("Choice", "site bucket question_tokens model max_tokens cap reason")
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English prose
+    return len(text) // 4 + 1
+
+
+def question_tokens(messages):
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            return estimate_tokens(str(message.get("content", "")))
+    return 0
+
+
+def bucket_for(tokens):
+    return next((f"le_{bound}" for bound in PROMPT_BUCKETS if tokens <= bound), "more")
+
+
+def quantile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(q * len(values))) - 1)] if values else 0
+
+
+def cost_usd(model, prompt_tokens, completion_tokens):
+    prompt_price, completion_price = PRICES.get(model, PRICES.get(DEFAULT_MODEL, (0.0, 0.0)))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+def outcome(response):
+    # (prompt tokens, completion tokens, finish_reason) of a chat completion
+    usage = getattr(response, "usage", None)
+    choices = getattr(response, "choices", None) or []
+    return (getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0,
+            getattr(choices[0], "finish_reason", None) if choices else None)
+
+
+def load_overrides(path=MODEL_POLICY_FILE):
+    # ModelPolicy keywords from a JSON file; {} when there is none
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _Samples:
+    __slots__ = ("tokens", "cut")
+
+    def __init__(self, window):
+        self.tokens = deque(maxlen=window)      # completion tokens
+        self.cut = deque(maxlen=window)         # cut short by a budget below the site's cap
+
+
+class ModelPolicy:
+    def __init__(self, default_model=DEFAULT_MODEL, tiers=None, sites=None, mode=MODEL_POLICY, quantile=QUANTILE,
+                 headroom=HEADROOM, min_samples=MIN_SAMPLES, window=WINDOW, min_tokens=MIN_TOKENS,
+                 max_truncation=MAX_TRUNCATION, min_saving=MIN_SAVING, record_path=None):
+        self.default_model = default_model
+        self.tiers = list(TIERS if tiers is None else tiers)
+        self.sites = sites or {}     # site -> overrides: model, max_tokens, adaptive, tiers, quantile
+        self.mode = mode
+        self.quantile = quantile
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.window = window
+        self.min_tokens = min_tokens
+        self.max_truncation = max_truncation
+        self.min_saving = min_saving
+        self.lock = threading.Lock()
+        self.samples = {}            # (site, bucket) -> _Samples; bucket "all" covers the site
+        self.latency = {}            # (site, bucket, model) -> deque of seconds
+        self.budgets = {}            # site -> {bucket: last max_tokens chosen}
+        self.models = {}             # model -> {"calls", "cost_usd"}
+        self.counts = {"choices": 0, "adaptive": 0, "learning": 0, "truncating": 0, "fixed": 0, "tiered": 0,
+                       "continued": 0, "cut_short": 0, "recorded": 0, "budget_tokens": 0, "cap_tokens": 0}
+        self.record_path = record_path
+        self.journal = None
+        if record_path:
+            self.load(record_path)
+            os.makedirs(os.path.dirname(record_path) or ".", exist_ok=True)
+            self.journal = open(record_path, "a", encoding="utf-8")
+
+    # ✅ Choosing
+    def choose(self, site, messages, max_tokens, adaptive=True):
+        # The model and max_tokens for one request; `max_tokens` is the call site's own value and the ceiling
+        config = self.sites.get(site, {})
+        cap = int(config.get("max_tokens", max_tokens))
+        model = config.get("model", self.default_model)
+        tokens = question_tokens(messages)
+        bucket = bucket_for(tokens)
+        if self.mode != "adaptive" or not adaptive or not config.get("adaptive", True):
+            return self._chose(Choice(site, bucket, tokens, model, cap, cap, "fixed"))
+        q = config.get("quantile", self.quantile)
+        budget, reason = self._budget(site, bucket, cap, q)
+        if reason == "adaptive" and "model" not in config and config.get("tiers", True):
+            for tier in self.tiers:
+                if (tokens <= tier.get("max_prompt_tokens", tokens) and budget <= tier.get("max_tokens", budget)
+                        and self._not_slower(site, bucket, tier["model"], model, q)):
+                    model, reason = tier["model"], "tiered"
+                    break
+        return self._chose(Choice(site, bucket, tokens, model, budget, cap, reason))
+
+    def _budget(self, site, bucket, cap, q):
+        with self.lock:
+            samples = self.samples.get((site, bucket))
+            if samples is None or len(samples.tokens) < self.min_samples:
+                samples = self.samples.get((site, "all"))
+            if samples is None or len(samples.tokens) < self.min_samples:
+                return cap, "learning"
+            tokens, cut = list(samples.tokens), sum(samples.cut)
+        if cut > self.max_truncation * len(tokens):
+            return cap, "truncating"
+        budget = int(math.ceil(quantile(tokens, q) * self.headroom / 8.0)) * 8
+        if cap - budget < self.min_saving * cap:
+            return cap, "adaptive"   # too little saved to risk a continuation round trip
+        return max(self.min_tokens, budget), "adaptive"
+
+    def _not_slower(self, site, bucket, model, default, q):
+        # A tier is only used where it has not been measured slower than the
+        # default model, at p95 and at the budget's own quantile: a sample is
+        # the whole request, continuation included, and those land in the tail
+        with self.lock:
+            mine = list(self.latency.get((site, bucket, model), ()))
+            theirs = list(self.latency.get((site, bucket, default), ()))
+        if len(mine) < self.min_samples or len(theirs) < self.min_samples:
+            return True
+        return all(quantile(mine, p) <= quantile(theirs, p) for p in (0.95, q))
+
+    def _chose(self, choice):
+        with self.lock:
+            self.counts["choices"] += 1
+            self.counts[choice.reason] += 1
+            self.counts["budget_tokens"] += choice.max_tokens
+            self.counts["cap_tokens"] += choice.cap
+            self.budgets.setdefault(choice.site, {})[choice.bucket] = choice.max_tokens
+        return choice
+
+    def complete(self, create, site, messages, max_tokens, adaptive=True, **kwargs):
+        # create(model=, messages=, max_tokens=, **kwargs) under the policy; returns the final response
+        choice = self.choose(site, messages, max_tokens, adaptive)
+        start = time.perf_counter()
+        response = create(model=choice.model, messages=messages, max_tokens=choice.max_tokens, **kwargs)
+        prompt_tokens, completion_tokens, finish_reason = outcome(response)
+        cut = finish_reason == "length" and choice.max_tokens < choice.cap
+        if cut:
+            # Cut short by the tighter budget: the same model picks up where it stopped, up to the cap
+            partial = response.choices[0].message.content or ""
+            response = create(model=choice.model, max_tokens=choice.cap - choice.max_tokens, **kwargs,
+                              messages=messages + [{"role": "assistant", "content": partial},
+                                                   {"role": "user", "content": CONTINUE_PROMPT}])
+            more_prompt, more_completion, finish_reason = outcome(response)
+            response.choices[0].message.content = partial + (response.choices[0].message.content or "")
+            prompt_tokens, completion_tokens = prompt_tokens + more_prompt, completion_tokens + more_completion
+            with self.lock:
+                self.counts["continued"] += 1
+        seconds = time.perf_counter() - start
+        self.observe(site, choice.bucket, choice.model, completion_tokens, cut, seconds, prompt_tokens)
+        if self.journal is not None:
+            line = json.dumps({"t": round(time.time(), 3), "site": site, "bucket": choice.bucket,
+                               "question_tokens": choice.question_tokens, "model": choice.model,
+                               "max_tokens": choice.max_tokens, "cap": choice.cap, "reason": choice.reason,
+                               "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                               "finish_reason": finish_reason, "cut": cut, "seconds": round(seconds, 4),
+                               "messages": messages})
+            with self.lock:
+                self.journal.write(line + "\n")
+                self.journal.flush()
+        return response
+
+    # ✅ Recording
+    def observe(self, site, bucket, model, completion_tokens, cut, seconds, prompt_tokens=0):
+        with self.lock:
+            for key in ((site, bucket), (site, "all")):
+                samples = self.samples.get(key)
+                if samples is None:
+                    samples = self.samples[key] = _Samples(self.window)
+                samples.tokens.append(completion_tokens)
+                samples.cut.append(cut)
+            if seconds is not None:   # None: a completion whose latency was not measured
+                latency = self.latency.get((site, bucket, model))
+                if latency is None:
+                    latency = self.latency[(site, bucket, model)] = deque(maxlen=self.window)
+                latency.append(seconds)
+            calls = self.models.setdefault(model, {"calls": 0, "cost_usd": 0.0})
+            calls["calls"] += 1
+            calls["cost_usd"] += cost_usd(model, prompt_tokens, completion_tokens)
+            self.counts["recorded"] += 1
+            self.counts["cut_short"] += int(cut)
+
+    def load(self, path):
+        # Warms the distributions from a recording log; returns the records read
+        if not os.path.exists(path):
+            return 0
+        read = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    r = json.loads(line)
+                    self.observe(r["site"], r["bucket"], r["model"], r["completion_tokens"], r.get("cut", False),
+                                 r["seconds"], r.get("prompt_tokens", 0))
+                except (ValueError, KeyError, TypeError):
+                    continue   # torn or foreign line
+                read += 1
+        return read
+
+    # ✅ Accounting
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+            counts["models"] = {model: dict(v) for model, v in self.models.items()}
+            sites = {}
+            for (site, bucket), samples in self.samples.items():
+                if bucket == "all":
+                    tokens = list(samples.tokens)
+                    sites[site] = {"samples": len(tokens), "p50_tokens": quantile(tokens, 0.5),
+                                   "p99_tokens": quantile(tokens, 0.99),
+                                   "cut_short": sum(samples.cut)}
+            for site, budgets in self.budgets.items():
+                for bucket, budget in budgets.items():
+                    sites.setdefault(site, {})[f"budget_{bucket}"] = budget
+        counts["sites"] = sites
+        counts["mode"] = self.mode
+        counts["saved_share"] = 1 - counts["budget_tokens"] / counts["cap_tokens"] if counts["cap_tokens"] else 0.0
+        return counts
@@ -0,0 +1,277 @@
+# -------------------------------
+# Streaming PDF Export
+# -------------------------------
+# Lays out a saved work record section by section (title -> heading, text ->
+# paragraphs) instead of one giant multi_cell string:
+#
+#   builder = PdfBuilder()
+#   for title, text in store.iter_sections(name):
+#       builder.section(title, text)
+#   builder.output("selected_work.pdf")
+#
+# Fonts: a Unicode TTF (PDF_FONT, else the first of FONT_CANDIDATES that
+# exists) is embedded once per document and subset by fpdf2 to the glyphs
+# used. Its character map is read once per process. Without a TTF the core
+# Helvetica font is used and text is mapped to Latin-1.
+#
+# Text goes through one str.translate pass per paragraph. The table decides
+# each character the first time it is seen in the process: kept if the font
+# has it, else mapped to a close equivalent (dashes, quotes, bullets, accented
+# letters) or dropped (emoji).
+#
+# Lines are wrapped here with cached word widths and placed with pdf.text();
+# fpdf2's multi_cell re-measures the whole line for every character, which
+# made long AI answers quadratic. Sections are consumed one at a time, so
+# memory is the finished pages (~8 KB each until output), not the input text.
+import os
+import functools
+import unicodedata
+
+from fpdf import FPDF
+
+PDF_FONT = os.getenv("PDF_FONT")
+PDF_FONT_BOLD = os.getenv("PDF_FONT_BOLD")
+FONT_CANDIDATES = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/dejavu/DejaVuSans.ttf",
+    "/usr/share/fonts/TTF/DejaVuSans.ttf",
+    "/Library/Fonts/Arial Unicode.ttf",
+    "C:\\Windows\\Fonts\\arial.ttf",
+]
+CORE_FONT = "helvetica"
+
+# Close equivalents for characters the font lacks
+FALLBACKS = {
+    "\u2014": "-", "\u2013": "-", "\u2012": "-", "\u2212": "-", "\u2010": "-", "\u2011": "-",
+    "\u2018": "'", "\u2019": "'", "\u201a": "'", "\u2032": "'",
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u2033": '"',
+    "\u2026": "...", "\u2022": "-", "\u25cf": "-", "\u25aa": "-", "\u2192": "->", "\u2190": "<-",
+    "\u21d2": "=>", "\u2264": "<=", "\u2265": ">=", "\u2260": "!=", "\u2248": "~", "\u00d7": "x",
+    "\u00a0": " ", "\u2009": " ", "\u202f": " ", "\u200b": "", "\u200d": "", "\ufe0f": "",
+    "\t": "    ", "\r": "",
+}
+
+PT = 25.4 / 72   # mm per point
+WIDTH_CACHE_LIMIT = 100000
+
+
+def find_font(path=None):
+    # The TTF to embed, or None for the core font
+    for candidate in [path, PDF_FONT] + FONT_CANDIDATES:
+        if candidate and os.path.exists(candidate):
+            return candidate
+    return None
+
+
+@functools.lru_cache(maxsize=8)
+def font_codepoints(path):
+    # Code points the font has glyphs for (read once per process)
+    from fontTools.ttLib import TTFont
+    font = TTFont(path, lazy=True)
+    try:
+        return frozenset(font.getBestCmap() or ())
+    finally:
+        font.close()
+
+
+class GlyphTable(dict):
+    # str.translate table filled on demand: code point -> replacement text
+    def __init__(self, supported):
+        super().__init__()
+        self.supported = supported
+
+    def __missing__(self, codepoint):
+        ch = chr(codepoint)
+        if ch in FALLBACKS:
+            value = FALLBACKS[ch]
+        elif self.supported(codepoint):
+            value = ch
+        else:
+            base = "".join(c for c in unicodedata.normalize("NFKD", ch) if not unicodedata.combining(c))
+            if base and base != ch and all(self.supported(ord(c)) for c in base):
+                value = base
+            elif unicodedata.category(ch) in ("So", "Sk", "Cn", "Co", "Cs", "Mn", "Cf"):
+                value = ""   # emoji and other symbols the font can't draw
+            else:
+                value = "?"
+        if value and not all(self.supported(ord(c)) for c in value):
+            value = "".join(c if self.supported(ord(c)) else "?" for c in value)
+        self[codepoint] = value
+        return value
+
+
+@functools.lru_cache(maxsize=8)
+def glyph_table(font_path):
+    # One table per font per process; None means the core font (Latin-1)
+    if font_path is None:
+        return GlyphTable(lambda codepoint: 32 <= codepoint < 256 and not 127 <= codepoint < 160)
+    codepoints = font_codepoints(font_path)
+    return GlyphTable(lambda codepoint: codepoint in codepoints and codepoint >= 32)
+
+
+_CHAR_WIDTHS = {}   # (font, style, size) -> {char: mm}
+_WORD_WIDTHS = {}   # (font, style, size) -> {word: mm}
+
+
+class _Document(FPDF):
+    footer_family = CORE_FONT
+
+    def footer(self):
+        self.set_font(self.footer_family, size=8)
+        self.text(self.w - self.r_margin - 10, self.h - 8, str(self.page_no()))
+
+
+class PdfBuilder:
+    def __init__(self, font_path=None, bold_font_path=None, orientation="L", body_size=11, heading_size=15,
+                 margin=15):
+        self.font_path = find_font(font_path)
+        self.pdf = _Document(orientation=orientation)
+        self.pdf.set_margins(margin, margin, margin)
+        self.pdf.set_auto_page_break(False)
+        if self.font_path is None:
+            self.family = CORE_FONT
+            self.bold = "B"
+        else:
+            self.family = "Body"
+            self.pdf.add_font(self.family, "", self.font_path)
+            bold_path = bold_font_path or PDF_FONT_BOLD
+            self.bold = ""
+            if bold_path and os.path.exists(bold_path):
+                self.pdf.add_font(self.family, "B", bold_path)
+                self.bold = "B"
+            self.pdf.footer_family = self.family
+        self.table = glyph_table(self.font_path)
+        self.bullet = "\u2022 " if self.table[0x2022] == "\u2022" else "- "
+        self.body_size = body_size
+        self.heading_size = heading_size
+        self.left = margin
+        self.width = self.pdf.w - 2 * margin
+        self.bottom = self.pdf.h - margin - 5   # room for the page number
+        self.font = None
+        self._new_page()
+
+    # ✅ Layout
+    def _new_page(self):
+        self.pdf.add_page()
+        self.font = None   # the footer changed it
+        self.y = self.pdf.t_margin
+
+    def _set_font(self, style, size):
+        if self.font != (style, size):
+            self.pdf.set_font(self.family, style, size)
+            self.font = (style, size)
+        key = (self.font_path, style, size)
+        if key not in _CHAR_WIDTHS:
+            _CHAR_WIDTHS[key], _WORD_WIDTHS[key] = {}, {}
+        return _CHAR_WIDTHS[key], _WORD_WIDTHS[key]
+
+    def _word_width(self, word, chars, words):
+        width = words.get(word)
+        if width is None:
+            width = 0.0
+            for ch in word:
+                w = chars.get(ch)
+                if w is None:
+                    w = chars[ch] = self.pdf.get_string_width(ch)
+                width += w
+            if len(words) > WIDTH_CACHE_LIMIT:
+                words.clear()
+            words[word] = width
+        return width
+
+    def _wrap(self, text, width, chars, words):
+        # Greedy word wrap; words wider than a line are split by character
+        space = self._word_width(" ", chars, words)
+        line, line_width = [], 0.0
+        for word in text.split(" "):
+            w = self._word_width(word, chars, words)
+            if line and line_width + space + w > width:
+                yield " ".join(line)
+                line, line_width = [], 0.0
+            while w > width:
+                cut, cut_width = 1, chars[word[0]]
+                while cut < len(word) and cut_width + chars[word[cut]] <= width:
+                    cut_width += chars[word[cut]]
+                    cut += 1
+                yield word[:cut]
+                word = word[cut:]
+                w = self._word_width(word, chars, words)
+            line_width += (space if line else 0.0) + w
+            line.append(word)
+        if line:
+            yield " ".join(line)
+
+    def _lines(self, text, style, size, indent=0.0, bullet=""):
+        chars, words = self._set_font(style, size)
+        height = size * PT * 1.35
+        x = self.left + indent
+        hang = self._word_width(bullet, chars, words) if bullet else 0.0
+        for i, line in enumerate(self._wrap(text, self.width - indent - hang, chars, words)):
+            if self.y + height > self.bottom:
+                self._new_page()
+                self._set_font(style, size)
+            self.y += height
+            if i == 0 and bullet:
+                self.pdf.text(x, self.y - height * 0.25, bullet)
+            self.pdf.text(x + hang, self.y - height * 0.25, line)
+
+    def heading(self, title, level=1):
+        size = self.heading_size if level == 1 else self.body_size + 1.5
+        height = size * PT * 1.35
+        # Keep a heading with at least two lines of what follows
+        if self.y + height + 2 * self.body_size * PT * 1.35 + 3 > self.bottom:
+            self._new_page()
+        elif self.y > self.pdf.t_margin:
+            self.y += 3 if level == 1 else 1.5
+        self._lines(self.clean(title), self.bold, size)
+        if level == 1:
+            self.pdf.line(self.left, self.y + 0.8, self.left + self.width, self.y + 0.8)
+            self.y += 2.5
+
+    def paragraph(self, text):
+        # Plain text with light markdown: "#" headings, "-"/"*" bullets, **bold** markers
+        for raw in self.clean(text).split("\n"):
+            line = raw.strip()
+            if not line:
+                self.y += self.body_size * PT * 0.6
+            elif line.startswith("#"):
+                self.heading(line.lstrip("#").strip().replace("**", ""), level=2)
+            elif line.strip("-_* ") == "":
+                self.y += 1.5   # markdown rule
+            elif line[:2] in ("- ", "* "):
+                self._lines(line[2:].replace("**", ""), "", self.body_size, indent=4, bullet=self.bullet)
+            else:
+                self._lines(line.replace("**", ""), "", self.body_size)
+
+    def section(self, title, text):
+        if title:
+            self.heading(title, level=2)
+        self.paragraph(text)
+
+    def clean(self, text):
+        return str(text).translate(self.table)
+
+    # ✅ Output
+    @property
+    def pages(self):
+        return self.pdf.page_no()
+
+    def output(self, path=None):
+        # Writes the PDF (or returns its bytes without a path); returns bytes written
+        data = self.pdf.output()
+        if path is None:
+            return bytes(data)
+        with open(path, "wb") as f:
+            f.write(data)
+        return len(data)
+
+
+def export_sections(path, sections, title=None, font_path=None):
+    # sections: iterable of (title, text), consumed lazily; returns (pages, bytes)
+    builder = PdfBuilder(font_path)
+    if title:
+        builder.heading(title)
+    for section_title, text in sections:
+        if section_title is None or str(text).strip():
+            builder.section(section_title, text)
+    return builder.pages, builder.output(path)
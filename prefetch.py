@@ -0,0 +1,129 @@
+# -------------------------------
+# Speculative Rich-Context Prefetch
+# -------------------------------
+# While a user settles the five sliders and notes, the analysis they are about
+# to request can already be running. One SpeculativePrefetcher lives in each
+# session's state:
+#
+#   observe(key, *args)  every rerun: (re)arms a debounce timer; once the
+#                        inputs have been stable for `debounce` seconds the
+#                        timer thread runs compute(*args) for that key
+#   take(key)            on Generate: returns the prefetched text if the key
+#                        still matches (waiting for an in-flight run), else None
+#
+# At most one prefetch is pending or in flight per session: a new key cancels
+# the previous timer, and an in-flight run for a stale key is marked cancelled
+# and its result discarded (completion calls can't be aborted mid-request).
+# PrefetchStats is shared across sessions and tracks the hit ratio and the
+# tokens spent on results nobody used.
+import threading
+
+DEFAULT_DEBOUNCE = 1.5
+TAKE_TIMEOUT = 60.0
+
+
+class PrefetchStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {"started": 0, "hits": 0, "waited": 0, "misses": 0, "cancelled": 0,
+                       "used_tokens": 0, "wasted_tokens": 0}
+
+    def add(self, name, amount=1):
+        with self.lock:
+            self.counts[name] += amount
+
+    def snapshot(self):
+        with self.lock:
+            counts = dict(self.counts)
+        taken = counts["hits"] + counts["misses"]
+        spent = counts["used_tokens"] + counts["wasted_tokens"]
+        counts["hit_ratio"] = counts["hits"] / taken if taken else 0.0
+        counts["waste_ratio"] = counts["wasted_tokens"] / spent if spent else 0.0
+        return counts
+
+
+class _Job:
+    def __init__(self, key):
+        self.key = key
+        self.done = threading.Event()
+        self.text = None
+        self.tokens = 0
+        self.cancelled = False
+        self.used = False
+
+
+class SpeculativePrefetcher:
+    # compute(*args) -> (text, tokens); runs on a timer thread, so no st.* calls
+    def __init__(self, compute, debounce=DEFAULT_DEBOUNCE, stats=None):
+        self.compute = compute
+        self.debounce = debounce
+        self.stats = stats or PrefetchStats()
+        self.lock = threading.Lock()
+        self.key = None
+        self.timer = None
+        self.job = None
+
+    def observe(self, key, *args):
+        with self.lock:
+            if self.job is not None and self.job.key == key:
+                return   # already prefetched or in flight
+            if self.timer is not None and self.key == key:
+                return   # still waiting out the debounce window
+            self._cancel_locked()
+            self.key = key
+            self.timer = threading.Timer(self.debounce, self._run, args=(key, args))
+            self.timer.daemon = True
+            self.timer.start()
+
+    def _run(self, key, args):
+        with self.lock:
+            if key != self.key or self.timer is None:
+                return
+            self.timer = None
+            job = self.job = _Job(key)
+        self.stats.add("started")
+        try:
+            job.text, job.tokens = self.compute(*args)
+        except Exception:
+            job.text, job.tokens = None, 0
+        with self.lock:
+            job.done.set()
+            if job.cancelled:
+                self.stats.add("wasted_tokens", job.tokens)
+
+    def _cancel_locked(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        job, self.job = self.job, None
+        if job is not None and not job.used:
+            job.cancelled = True
+            self.stats.add("cancelled")
+            if job.done.is_set():
+                self.stats.add("wasted_tokens", job.tokens)
+        self.key = None
+
+    def take(self, key, timeout=TAKE_TIMEOUT):
+        with self.lock:
+            job = self.job if self.job is not None and self.job.key == key else None
+            if job is None:
+                self._cancel_locked()
+        if job is None:
+            self.stats.add("misses")
+            return None
+        if not job.done.is_set():
+            self.stats.add("waited")
+        if not job.done.wait(timeout) or job.text is None:
+            self.stats.add("misses")
+            return None
+        with self.lock:
+            first_use = not job.used
+            job.used = True
+        self.stats.add("hits")
+        if first_use:
+            self.stats.add("used_tokens", job.tokens)
+        return job.text
+
+    def cancel(self):
+        with self.lock:
+            self._cancel_locked()
@@ -0,0 +1,231 @@
+# -------------------------------
+# Per-Rerun Profiler
+# -------------------------------
+# Profiles one rerun (or one fragment run) of a page and saves, per page:
+#
+#   <dir>/<page>/<timestamp>-<name>.svg        flame graph (open in a browser)
+#   <dir>/<page>/<timestamp>-<name>.folded     folded stacks, for flamegraph.pl / speedscope
+#   <dir>/<page>/<timestamp>-<name>.top.txt    top-N functions by self and total time
+#   <dir>/<page>/<timestamp>-<name>.prof       pstats dump (deterministic mode only)
+#
+# "sample" mode: a background thread reads the script thread's stack every
+# `interval` seconds via sys._current_frames(). The script itself runs
+# untouched, so the cost is the sampler's share of the GIL (~1-3% at 1 ms),
+# which makes it safe to leave on for a small fraction of production reruns.
+#
+# "deterministic" mode additionally runs cProfile for exact call counts and
+# per-function times; it slows the rerun down noticeably (often 2x), so it is
+# meant for on-demand use only.
+import io
+import os
+import sys
+import time
+import zlib
+import cProfile
+import pstats
+import threading
+from collections import Counter
+from xml.sax.saxutils import escape
+
+SAMPLE = "sample"
+DETERMINISTIC = "deterministic"
+
+_active = threading.local()
+_switch_lock = threading.Lock()
+_switch_users = 0
+_switch_saved = None
+
+
+def profiling_active():
+    # True while a profiler is running on the calling thread (nested runs are skipped)
+    return getattr(_active, "profiler", None) is not None
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RerunProfiler:
+    def __init__(self, name, mode=SAMPLE, interval=0.001):
+        self.name = name
+        self.mode = mode
+        self.interval = interval
+        self.stacks = Counter()   # (root, ..., leaf) -> samples
+        self.stats = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+
+    # ✅ Running
+    def __enter__(self):
+        self.thread_id = threading.get_ident()
+        # Frames live at entry (the caller and Streamlit's runner above it) are
+        # cut from every sample, so stacks start at the profiled code
+        self.outer = set()
+        frame = sys._getframe(1)
+        while frame is not None:
+            self.outer.add(id(frame))
+            frame = frame.f_back
+        _active.profiler = self
+        self._fast_switching(True)
+        self.sampler = threading.Thread(target=self._sample, name="rerun-profiler", daemon=True)
+        self.sampler.start()
+        self.cprofile = cProfile.Profile() if self.mode == DETERMINISTIC else None
+        self.started = time.perf_counter()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.stats = pstats.Stats(self.cprofile)
+        self.elapsed = time.perf_counter() - self.started
+        self.sampler.join()
+        self._fast_switching(False)
+        _active.profiler = None
+        return False
+
+    def _fast_switching(self, on):
+        # The sampler needs the GIL every `interval`; the default 5 ms switch
+        # interval would cap the sampling rate while the page runs pure Python
+        global _switch_users, _switch_saved
+        with _switch_lock:
+            if on:
+                if _switch_users == 0:
+                    _switch_saved = sys.getswitchinterval()
+                    sys.setswitchinterval(min(_switch_saved, self.interval))
+                _switch_users += 1
+            else:
+                _switch_users -= 1
+                if _switch_users == 0:
+                    sys.setswitchinterval(_switch_saved)
+
+    def _sample(self):
+        outer = self.outer
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None and id(frame) not in outer:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if frame is not None and stack and not self._stop.is_set():
+                stack.append(self.name)
+                self.stacks[tuple(reversed(stack))] += 1
+
+    # ✅ Reporting
+    @property
+    def samples(self):
+        return sum(self.stacks.values())
+
+    def folded(self):
+        return [f"{';'.join(stack)} {count}" for stack, count in sorted(self.stacks.items())]
+
+    def top(self, n=20):
+        # [(function, self samples, total samples)] ordered by self samples
+        own, total = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for function in set(stack[1:]):
+                total[function] += count
+        return [(function, own[function], total[function]) for function, _ in own.most_common(n)]
+
+    def report(self, n=20):
+        samples = self.samples or 1
+        lines = [f"{self.name}: {self.elapsed * 1000:.1f} ms, {self.samples} samples every "
+                 f"{self.interval * 1000:g} ms ({self.mode})", "",
+                 f"{'self %':>7} {'total %':>8}  function"]
+        for function, own, total in self.top(n):
+            lines.append(f"{own / samples:>7.1%} {total / samples:>8.1%}  {function}")
+        if self.stats is not None:
+            lines += ["", f"cProfile, top {n} by cumulative time:", ""]
+            lines.append(_pstats_text(self.stats, n))
+        return "\n".join(lines) + "\n"
+
+    def save(self, directory, page, n=20):
+        # Writes the files listed at the top of this module; returns their paths
+        folder = os.path.join(directory, _slug(page))
+        os.makedirs(folder, exist_ok=True)
+        stem = os.path.join(folder, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1e6) % 1000000:06d}-"
+                                    f"{_slug(self.name)}")
+        paths = {"svg": f"{stem}.svg", "folded": f"{stem}.folded", "top": f"{stem}.top.txt"}
+        with open(paths["svg"], "w") as f:
+            f.write(flame_graph_svg(self.stacks, f"{self.name} — {self.elapsed * 1000:.0f} ms", self.interval))
+        with open(paths["folded"], "w") as f:
+            f.write("\n".join(self.folded()) + "\n")
+        with open(paths["top"], "w") as f:
+            f.write(self.report(n))
+        if self.stats is not None:
+            paths["prof"] = f"{stem}.prof"
+            self.stats.dump_stats(paths["prof"])
+        return paths
+
+
+def _slug(text):
+    return "".join(c if c.isalnum() else "-" for c in text.lower()).strip("-") or "page"
+
+
+def _pstats_text(stats, n):
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(n)
+    return out.getvalue().strip()
+
+
+# -------------------------------
+# Flame Graph
+# -------------------------------
+FRAME_HEIGHT = 16
+WIDTH = 1200
+FONT_SIZE = 11
+CHAR_WIDTH = 6.5
+
+
+def _tree(stacks):
+    root = {"name": "", "count": 0, "children": {}}
+    for stack, count in stacks.items():
+        root["count"] += count
+        node = root
+        for name in stack:
+            node = node["children"].setdefault(name, {"name": name, "count": 0, "children": {}})
+            node["count"] += count
+    return root
+
+
+def _color(name):
+    # Stable warm colours per function, like flamegraph.pl's "hot" palette
+    h = zlib.crc32(name.encode("utf-8"))
+    return f"rgb({205 + h % 50},{(h >> 8) % 180 + 50},{(h >> 16) % 55})"
+
+
+def flame_graph_svg(stacks, title, interval=0.001):
+    tree = _tree(stacks)
+    total = tree["count"] or 1
+    depth = max((len(stack) for stack in stacks), default=0)
+    height = (depth + 2) * FRAME_HEIGHT + 10
+    scale = WIDTH / total
+    rects = []
+
+    def draw(node, x, level):
+        for child in sorted(node["children"].values(), key=lambda c: c["name"]):
+            width = child["count"] * scale
+            if width >= 0.5:
+                y = height - (level + 1) * FRAME_HEIGHT - 4
+                label = f"{child['name']} ({child['count']} samples, {child['count'] / total:.1%}, " \
+                        f"~{child['count'] * interval * 1000:.0f} ms)"
+                text = child["name"][:int((width - 4) / CHAR_WIDTH)] if width > 3 * CHAR_WIDTH else ""
+                rects.append(
+                    f'<g><title>{escape(label)}</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{max(width - 0.5, 0.1):.1f}" height="{FRAME_HEIGHT - 1}" '
+                    f'fill="{_color(child["name"])}" rx="1"/>'
+                    + (f'<text x="{x + 2:.1f}" y="{y + FRAME_HEIGHT - 5}">{escape(text)}</text>' if text else "")
+                    + "</g>")
+                draw(child, x, level + 1)
+            x += width
+
+    draw(tree, 0.0, 0)
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{WIDTH}" height="{height}" '
+            f'font-family="Verdana, sans-serif" font-size="{FONT_SIZE}">'
+            f'<rect width="100%" height="100%" fill="#fafafa"/>'
+            f'<text x="{WIDTH / 2}" y="{FRAME_HEIGHT}" text-anchor="middle" font-size="{FONT_SIZE + 3}">'
+            f'{escape(title)}</text>' + "".join(rects) + "</svg>\n")
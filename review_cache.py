@@ -0,0 +1,136 @@
+# -------------------------------
+# Pre-warmed Job Review Cache
+# -------------------------------
+# Job reviews for the same few hundred roles are requested over and over, so
+# generated reviews are stored per normalized role name ("Steel Machinist" and
+# "steel machinist " share one row) in SQLite:
+#
+#   - ReviewCache: get/put by role, with hit/miss counters and a freshness check
+#   - ReviewWarmer: background daemon thread that pre-generates reviews for a
+#     popular-roles list (data/popular_roles.txt, or REVIEW_POPULAR_ROLES_FILE),
+#     regenerates entries older than REVIEW_REFRESH_HOURS and then sleeps for
+#     REVIEW_WARM_INTERVAL seconds before the next pass
+#
+# Only generic reviews are cached; reviews tailored to user notes are not.
+import os
+import time
+import sqlite3
+import threading
+
+from template_library import normalize_role
+
+REVIEW_CACHE_DB = os.getenv("REVIEW_CACHE_DB", os.path.join("repository", "job_reviews.db"))
+POPULAR_ROLES_FILE = os.getenv(
+    "REVIEW_POPULAR_ROLES_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "popular_roles.txt"),
+)
+REFRESH_AFTER = float(os.getenv("REVIEW_REFRESH_HOURS", "168")) * 3600
+WARM_INTERVAL = float(os.getenv("REVIEW_WARM_INTERVAL", "3600"))
+WARM_PAUSE = 0.5   # seconds between warm-up requests, to stay clear of rate limits
+
+
+def load_popular_roles(path=POPULAR_ROLES_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+class ReviewCache:
+    def __init__(self, path=REVIEW_CACHE_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "stored": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_reviews (
+                    role_key TEXT PRIMARY KEY,
+                    role TEXT NOT NULL,
+                    review TEXT NOT NULL,
+                    source TEXT,
+                    generated_at REAL
+                )
+            """)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def get(self, role):
+        key = normalize_role(role)
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM job_reviews WHERE role_key = ?", (key,)).fetchone()
+        self._count("hits" if row else "misses")
+        return dict(row) if row else None
+
+    def __contains__(self, role):
+        return self.is_fresh(role, max_age=float("inf"))
+
+    def is_fresh(self, role, max_age=REFRESH_AFTER):
+        with self._connect() as conn:
+            row = conn.execute("SELECT generated_at FROM job_reviews WHERE role_key = ?",
+                               (normalize_role(role),)).fetchone()
+        return row is not None and time.time() - (row["generated_at"] or 0) < max_age
+
+    def put(self, role, review, source="on_demand"):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job_reviews (role_key, role, review, source, generated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(role_key) DO UPDATE SET role = excluded.role, review = excluded.review, "
+                "source = excluded.source, generated_at = excluded.generated_at",
+                (normalize_role(role), str(role).strip(), review, source, time.time()),
+            )
+        self._count("stored")
+
+    def __len__(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM job_reviews").fetchone()[0]
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        lookups = counts["hits"] + counts["misses"]
+        return dict(counts, entries=len(self), hit_rate=counts["hits"] / lookups if lookups else 0.0)
+
+
+class ReviewWarmer(threading.Thread):
+    # generate(role) -> review text; called from this thread only
+    def __init__(self, cache, generate, roles, refresh_after=REFRESH_AFTER, interval=WARM_INTERVAL, pause=WARM_PAUSE):
+        super().__init__(name="job-review-warmer", daemon=True)
+        self.cache = cache
+        self.generate = generate
+        self.roles = list(roles)
+        self.refresh_after = refresh_after
+        self.interval = interval
+        self.pause = pause
+        self.stopped = threading.Event()
+        self.passes = self.warmed = self.errors = 0
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.warm_once()
+            self.stopped.wait(self.interval)
+
+    def warm_once(self):
+        for role in self.roles:
+            if self.stopped.is_set():
+                return
+            if self.cache.is_fresh(role, self.refresh_after):
+                continue
+            try:
+                self.cache.put(role, self.generate(role), source="warmup")
+                self.warmed += 1
+            except Exception:
+                self.errors += 1
+            self.stopped.wait(self.pause)
+        self.passes += 1
+
+    def stop(self):
+        self.stopped.set()
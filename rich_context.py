@@ -0,0 +1,238 @@
+# -------------------------------
+# Sectioned Rich-Context Analysis
+# -------------------------------
+# The rich-context analysis is requested as structured output (JSON schema):
+# one section per tool plus the profile-level summary, tension themes,
+# readiness signal and 90-day interventions. Sections are stored separately:
+#
+#   tool section     keyed by (context, notes, tool, score band)
+#   profile sections keyed by (context, notes, every tool's band)
+#
+# so nudging a slider within its band costs nothing, and crossing a band
+# boundary regenerates only that tool plus the profile sections in one small
+# call. The stored sections are reassembled into the same markdown view.
+#
+# Budgets include the JSON keys and punctuation around each section. A reply
+# cut off at max_tokens (finish_reason "length", or JSON that doesn't parse)
+# is retried once with TRUNCATED_RETRY_FACTOR times the budget; if that is
+# cut off too, generate() raises TruncatedReply and the caller shows its
+# rule-based text. Raw JSON is never returned as the analysis.
+#
+# Models or servers that ignore response_format get the old behavior: a
+# plain-text reply is used as one markdown blob and nothing is stored.
+import json
+import time
+import threading
+from collections import OrderedDict
+
+TENSION_THEMES = [
+    "Motion vs. Processing",
+    "Drive vs. Humility",
+    "Systems vs. Flexibility",
+    "Consistency vs. Innovation",
+    "Clarity vs. Performance",
+]
+TOOL_FIELDS = [("expression", "Expression at this score"), ("under_pressure", "Under-pressure risk"),
+               ("calibration", "Calibration/Training")]
+TOOL_TOKENS = 150      # max_tokens per tool section: ~110 of text + ~25 of JSON keys, quotes and braces
+PROFILE_TOKENS = 420   # summary + tension themes + readiness + interventions, with their JSON
+JSON_TOKENS = 10       # the enclosing object and the "tools" key
+FULL_TOKENS = 900      # the monolithic request this replaces
+TRUNCATED_RETRY_FACTOR = 2
+STORE_CAPACITY = 4096
+
+
+class TruncatedReply(Exception):
+    # The structured reply was cut off at max_tokens, even after a retry with a larger budget
+    pass
+
+
+def section_budget(tool_count, profile=True):
+    return JSON_TOKENS + TOOL_TOKENS * tool_count + (PROFILE_TOKENS if profile else 0)
+
+
+def section_schema(tools, profile=True):
+    string = {"type": "string"}
+    tool_schema = {
+        "type": "object",
+        "properties": {field: string for field, _ in TOOL_FIELDS},
+        "required": [field for field, _ in TOOL_FIELDS],
+        "additionalProperties": False,
+    }
+    properties = {"tools": {
+        "type": "object",
+        "properties": {tool: tool_schema for tool in tools},
+        "required": list(tools),
+        "additionalProperties": False,
+    }}
+    if profile:
+        properties.update({
+            "summary": string,
+            "tension_themes": string,
+            "readiness": string,
+            "interventions": {"type": "array", "items": string},
+        })
+    return {"type": "object", "properties": properties, "required": list(properties),
+            "additionalProperties": False}
+
+
+def section_prompt(scores, tools, bands, notes, context_label, wanted_tools, profile=True):
+    profile_lines = "\n".join(f"    - {tool}: {score} ({band})" for tool, score, band in zip(tools, scores, bands))
+    wanted = ", ".join(wanted_tools) if wanted_tools else "none"
+    prompt = f"""
+    You are an organizational psychologist using the Five-Tool Employee Framework.
+    Interpret the following profile:
+
+    Context: {context_label}
+    Scores (band):
+{profile_lines}
+    Notes: {notes}
+
+    Return JSON with only the requested sections.
+    - tools: for each of [{wanted}] give
+      • expression: how it shows up day-to-day at this score
+      • under_pressure: how it distorts under stress
+      • calibration: specific interventions to sustain impact
+      Keep each of these to two or three sentences."""
+    if profile:
+        prompt += f"""
+    - summary: a Behavioral Summary that ties together patterns across all five tools
+    - tension_themes: explicitly weave in {', '.join(TENSION_THEMES)}
+    - readiness: a Leadership Readiness Signal
+    - interventions: the Next 90-Day Interventions, one per item"""
+    prompt += """
+    Tone: psychologically rich, diagnostic, and grounded in the model. Avoid generic corporate phrasing.
+    """
+    return prompt
+
+
+def assemble_markdown(scores, tools, tool_sections, profile):
+    parts = [f"**Behavioral Summary:** {profile['summary']}"]
+    for tool, score in zip(tools, scores):
+        section = tool_sections[tool]
+        lines = [f"#### {tool} — Score {score}"]
+        lines += [f"- **{label}:** {section[field]}" for field, label in TOOL_FIELDS]
+        parts.append("\n".join(lines))
+    parts.append(f"**Tension Themes:** {profile['tension_themes']}")
+    parts.append(f"**Leadership Readiness Signal:** {profile['readiness']}")
+    parts.append("**Next 90-Day Interventions:**\n" + "\n".join(f"- {item}" for item in profile["interventions"]))
+    return "\n\n".join(parts)
+
+
+class SectionStore:
+    # Thread-safe LRU of generated sections, shared by every session
+    def __init__(self, capacity=STORE_CAPACITY):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.items = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            value = self.items.get(key)
+            if value is not None:
+                self.items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.items[key] = value
+            self.items.move_to_end(key)
+            while len(self.items) > self.capacity:
+                self.items.popitem(last=False)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def parse_sections(text, tools, profile=True):
+    # (tool sections, profile or None) from a structured reply, or None if it isn't one
+    try:
+        data = json.loads(text)
+        tool_sections = {tool: {field: str(data["tools"][tool][field]) for field, _ in TOOL_FIELDS}
+                         for tool in tools}
+        if not profile:
+            return tool_sections, None
+        return tool_sections, {"summary": str(data["summary"]), "tension_themes": str(data["tension_themes"]),
+                               "readiness": str(data["readiness"]),
+                               "interventions": [str(i) for i in data["interventions"]]}
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def is_truncated(text, finish_reason):
+    # A cut-off reply, as opposed to plain text from a server that ignores response_format
+    return finish_reason == "length" or str(text or "").lstrip().startswith(("{", "["))
+
+
+class RichContextBuilder:
+    # complete(prompt, schema, max_tokens) -> (text, total tokens, finish_reason)
+    def __init__(self, complete, store=None):
+        self.complete = complete
+        self.store = store if store is not None else SectionStore()
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "full_calls": 0, "partial_calls": 0, "reused": 0, "unstructured": 0,
+                       "truncated": 0, "truncated_retries": 0, "sections_generated": 0, "sections_reused": 0,
+                       "tokens": 0, "call_ms": 0.0}
+
+    def _count(self, **amounts):
+        with self.lock:
+            for name, amount in amounts.items():
+                self.counts[name] += amount
+
+    def generate(self, scores, tools, bands, notes, context_label):
+        # (markdown, tokens spent by this request)
+        tool_keys = {tool: (context_label, notes, tool, band) for tool, band in zip(tools, bands)}
+        profile_key = (context_label, notes, tuple(zip(tools, bands)))
+        tool_sections = {tool: self.store.get(key) for tool, key in tool_keys.items()}
+        profile = self.store.get(profile_key)
+        missing = [tool for tool in tools if tool_sections[tool] is None]
+        reused = len(tools) - len(missing) + (profile is not None)
+
+        if not missing and profile is not None:
+            self._count(requests=1, reused=1, sections_reused=reused)
+            return assemble_markdown(scores, tools, tool_sections, profile), 0
+
+        need_profile = profile is None
+        prompt = section_prompt(scores, tools, bands, notes, context_label, missing, need_profile)
+        schema = section_schema(missing, need_profile)
+        budget = section_budget(len(missing), need_profile)
+        start = time.perf_counter()
+        text, tokens, finish_reason = self.complete(prompt, schema, budget)
+        sections = parse_sections(text, missing, need_profile)
+        if sections is None and is_truncated(text, finish_reason):
+            # Cut off at max_tokens: ask for the same sections again with more room
+            self._count(truncated_retries=1)
+            budget *= TRUNCATED_RETRY_FACTOR
+            text, retry_tokens, finish_reason = self.complete(prompt, schema, budget)
+            tokens += retry_tokens
+            sections = parse_sections(text, missing, need_profile)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if sections is None:
+            if is_truncated(text, finish_reason):
+                self._count(requests=1, truncated=1, tokens=tokens, call_ms=elapsed_ms)
+                raise TruncatedReply(f"structured reply cut off at {budget} tokens")
+            # No structured output: show the reply as before, store nothing
+            self._count(requests=1, unstructured=1, tokens=tokens, call_ms=elapsed_ms)
+            return text, tokens
+
+        full = len(missing) == len(tools)
+        generated, generated_profile = sections
+        tool_sections.update(generated)
+        if need_profile:
+            profile = generated_profile
+
+        for tool in missing:
+            self.store.put(tool_keys[tool], tool_sections[tool])
+        if need_profile:
+            self.store.put(profile_key, profile)
+        self._count(requests=1, tokens=tokens, call_ms=elapsed_ms, sections_reused=reused,
+                    sections_generated=len(missing) + need_profile,
+                    **{"full_calls" if full else "partial_calls": 1})
+        return assemble_markdown(scores, tools, tool_sections, profile), tokens
+
+    def stats(self):
+        with self.lock:
+            counts = dict(self.counts)
+        sections = counts["sections_generated"] + counts["sections_reused"]
+        counts["section_reuse_rate"] = counts["sections_reused"] / sections if sections else 0.0
+        return counts
@@ -0,0 +1,287 @@
+# -------------------------------
+# Semantic Question Cache
+# -------------------------------
+# Free-text framework questions repeat with different wording ("explain 360
+# feedback" vs "what's 360-degree feedback?"), so answers are cached by
+# meaning rather than by exact text. A question is normalized with the
+# answer bank's tokenizer (stopwords, filler, possessives and suffixes
+# removed; numbers kept) and embedded as a sparse hashed bag of words plus
+# ordered bigrams:
+#
+#   feature = crc32(term) mod FEATURE_BUCKETS, weight 1 per occurrence
+#                                              (SALIENT_WEIGHT for high/low/tool names and numbers)
+#   feature = crc32("^" + term[:4]),           weight PREFIX_WEIGHT
+#   feature = crc32(term + "_" + next term),   weight BIGRAM_WEIGHT
+#
+# The bigrams tie a qualifier to its tool and a role to what is asked about
+# it: "high power and low speed" and "low power and high speed" share every
+# word but no bigram (high_power vs low_power).
+#
+# L2-normalized, so a dot product is the cosine similarity. Each page keeps
+# its own index (answers depend on the page's system prompt) and threshold.
+#
+# Lookups go through an inverted index: every feature maps to growable NumPy
+# arrays of (slot, generation, weight) and scoring is one bincount over the
+# postings of the question's few features, so cost tracks how common its
+# words are rather than the cache size. Each page holds at most `capacity`
+# entries; when full, the least recently used slot is reused and its
+# generation bumped, which invalidates its old postings until they are
+# compacted away.
+import time
+import zlib
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from similarity import STOPWORDS, TOKEN_RE, stem, tokenize
+from answer_bank import FILLER, POSSESSIVE_RE, Answer
+
+DEFAULT_CAPACITY = 10000
+DEFAULT_THRESHOLD = 0.85
+FEATURE_BUCKETS = 1 << 20
+PREFIX_LENGTH = 4
+PREFIX_WEIGHT = 0.5
+SALIENT_WEIGHT = 2.0
+BIGRAM_WEIGHT = 1.25
+
+# Generic nouns that don't change what is being asked ("360-degree feedback")
+IGNORED = FILLER | set(tokenize("degree concept term idea topic"))
+# Words that change the question when swapped: score qualifiers and the five tools
+SALIENT = set(tokenize("""
+high low mid middle moderate never without less overused underused vs versus best worst strong weak
+speed power fielding hitting average arm strength
+"""))
+
+Hit = namedtuple("Hit", "question answer similarity")
+
+
+def _terms(question):
+    # tokenize(), but numbers are kept whatever their length ("a score of 2")
+    text = POSSESSIVE_RE.sub("", str(question or "")).lower()
+    return [token if token.isdigit() else stem(token) for token in TOKEN_RE.findall(text)
+            if token.isdigit() or (token not in STOPWORDS and len(token) > 1)]
+
+
+def _feature(text):
+    return zlib.crc32(text.encode("utf-8")) & (FEATURE_BUCKETS - 1)
+
+
+def embed(question):
+    # (feature ids, weights) with unit L2 norm; empty arrays if nothing is left
+    counts = {}
+    previous = None
+    for term in _terms(question):
+        if term in IGNORED:
+            continue
+        feature = _feature(term)
+        counts[feature] = counts.get(feature, 0.0) + (SALIENT_WEIGHT if term in SALIENT or term.isdigit() else 1.0)
+        if len(term) > PREFIX_LENGTH:
+            feature = _feature("^" + term[:PREFIX_LENGTH])
+            counts[feature] = counts.get(feature, 0.0) + PREFIX_WEIGHT
+        if previous is not None:
+            feature = _feature(previous + "_" + term)
+            counts[feature] = counts.get(feature, 0.0) + BIGRAM_WEIGHT
+        previous = term
+    ids = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    weights = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+    norm = float(np.sqrt((weights ** 2).sum()))
+    return ids, (weights / norm if norm else weights)
+
+
+class _Postings:
+    __slots__ = ("slots", "gens", "weights", "size", "stale")
+
+    def __init__(self):
+        self.slots = np.empty(4, dtype=np.int32)
+        self.gens = np.empty(4, dtype=np.int32)
+        self.weights = np.empty(4, dtype=np.float32)
+        self.size = 0
+        self.stale = 0
+
+    def append(self, slot, gen, weight):
+        if self.size == len(self.slots):
+            for name in ("slots", "gens", "weights"):
+                old = getattr(self, name)
+                new = np.empty(len(old) * 2, dtype=old.dtype)
+                new[:self.size] = old
+                setattr(self, name, new)
+        self.slots[self.size] = slot
+        self.gens[self.size] = gen
+        self.weights[self.size] = weight
+        self.size += 1
+
+    def compact(self, generations):
+        live = generations[self.slots[:self.size]] == self.gens[:self.size]
+        kept = int(live.sum())
+        for name in ("slots", "gens", "weights"):
+            values = getattr(self, name)
+            values[:kept] = values[:self.size][live]
+        self.size, self.stale = kept, 0
+
+
+class _PageIndex:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.postings = {}                                   # feature -> _Postings
+        self.generations = np.zeros(capacity, dtype=np.int32)
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.entries = [None] * capacity                     # slot -> (key, question, answer, feature ids)
+        self.exact = {}                                      # normalized key -> slot
+        self.size = 0
+        self.clock = 0
+        self.evictions = 0
+
+    def touch(self, slot):
+        self.clock += 1
+        self.last_used[slot] = self.clock
+
+    def search(self, ids, weights):
+        # (slot, cosine) of the closest entry, or (None, 0.0)
+        slots, gens, scores = [], [], []
+        for feature, weight in zip(ids.tolist(), weights.tolist()):
+            postings = self.postings.get(feature)
+            if postings is None or not postings.size:
+                continue
+            slots.append(postings.slots[:postings.size])
+            gens.append(postings.gens[:postings.size])
+            scores.append(postings.weights[:postings.size] * weight)
+        if not slots:
+            return None, 0.0
+        slots, gens, scores = np.concatenate(slots), np.concatenate(gens), np.concatenate(scores)
+        live = self.generations[slots] == gens
+        totals = np.bincount(slots[live], weights=scores[live])
+        if not len(totals):
+            return None, 0.0
+        slot = int(totals.argmax())
+        return slot, float(totals[slot])
+
+    def insert(self, key, question, answer, ids, weights):
+        slot = self.exact.get(key)
+        if slot is not None:
+            key, question, _, ids = self.entries[slot]
+            self.entries[slot] = (key, question, answer, ids)
+            self.touch(slot)
+            return
+        if self.size < self.capacity:
+            slot = self.size
+            self.size += 1
+        else:
+            slot = self._evict()
+        gen = int(self.generations[slot])
+        for feature, weight in zip(ids.tolist(), weights.tolist()):
+            postings = self.postings.get(feature)
+            if postings is None:
+                postings = self.postings[feature] = _Postings()
+            postings.append(slot, gen, weight)
+        self.entries[slot] = (key, question, answer, ids)
+        self.exact[key] = slot
+        self.touch(slot)
+
+    def _evict(self):
+        slot = int(self.last_used[:self.size].argmin())
+        key, _, _, ids = self.entries[slot]
+        del self.exact[key]
+        self.generations[slot] += 1
+        for feature in ids.tolist():
+            postings = self.postings[feature]
+            postings.stale += 1
+            if postings.stale * 2 > postings.size:
+                postings.compact(self.generations)
+                if not postings.size:
+                    del self.postings[feature]
+        self.evictions += 1
+        return slot
+
+
+class SemanticCache:
+    def __init__(self, capacity=DEFAULT_CAPACITY, thresholds=None, default_threshold=DEFAULT_THRESHOLD):
+        self.capacity = capacity
+        self.thresholds = dict(thresholds or {})
+        self.default_threshold = default_threshold
+        self.pages = {}
+        self.lock = threading.Lock()
+        self.counts = {}     # page -> {"hits": n, "misses": n}
+        self.lookup_ms = []
+
+    def __len__(self):
+        return sum(index.size for index in self.pages.values())
+
+    def threshold(self, page):
+        return self.thresholds.get(page, self.default_threshold)
+
+    def _index(self, page):
+        index = self.pages.get(page)
+        if index is None:
+            index = self.pages[page] = _PageIndex(self.capacity)
+        return index
+
+    @staticmethod
+    def _key(ids):
+        return np.sort(ids).tobytes()
+
+    def lookup(self, question, page, threshold=None):
+        # Hit for the most similar cached question at or above the threshold, else None
+        threshold = self.threshold(page) if threshold is None else threshold
+        start = time.perf_counter()
+        ids, weights = embed(question)
+        hit = None
+        with self.lock:
+            index = self.pages.get(page)
+            if index is not None and len(ids):
+                slot = index.exact.get(self._key(ids))
+                similarity = 1.0
+                if slot is None:
+                    slot, similarity = index.search(ids, weights)
+                if slot is not None and similarity >= threshold - 1e-6:
+                    index.touch(slot)
+                    _, cached_question, answer, _ = index.entries[slot]
+                    hit = Hit(cached_question, answer, min(similarity, 1.0))
+            counts = self.counts.setdefault(page, {"hits": 0, "misses": 0})
+            counts["hits" if hit else "misses"] += 1
+            self.lookup_ms.append((time.perf_counter() - start) * 1000)
+            del self.lookup_ms[:-1000]
+        return hit
+
+    def put(self, question, page, answer):
+        ids, weights = embed(question)
+        if not len(ids):
+            return False   # nothing to match on ("explain it")
+        with self.lock:
+            self._index(page).insert(self._key(ids), str(question).strip(), answer, ids, weights)
+        return True
+
+    # ✅ Router
+    def route(self, question, page, escalate, threshold=None):
+        # Serve a cached answer to a similar question, otherwise call escalate(question) and cache it
+        start = time.perf_counter()
+        hit = self.lookup(question, page, threshold)
+        if hit is not None:
+            return Answer(hit.answer, "cache", hit.question, hit.similarity, (time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        text = escalate(question)
+        if text:
+            self.put(question, page, text)
+        return Answer(text, "model", None, 0.0, (time.perf_counter() - start) * 1000)
+
+    # ✅ Reporting
+    def stats(self):
+        with self.lock:
+            pages = {}
+            for page, counts in self.counts.items():
+                asked = counts["hits"] + counts["misses"]
+                index = self.pages.get(page)
+                pages[page] = dict(counts, asked=asked, hit_rate=counts["hits"] / asked if asked else 0.0,
+                                   entries=index.size if index else 0,
+                                   evictions=index.evictions if index else 0,
+                                   threshold=self.threshold(page))
+            samples = sorted(self.lookup_ms)
+            hits = sum(c["hits"] for c in self.counts.values())
+            asked = hits + sum(c["misses"] for c in self.counts.values())
+        return {
+            "pages": pages,
+            "asked": asked,
+            "hit_rate": hits / asked if asked else 0.0,
+            "lookup_ms_p50": samples[len(samples) // 2] if samples else 0.0,
+            "lookup_ms_max": samples[-1] if samples else 0.0,
+        }
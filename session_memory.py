@@ -0,0 +1,273 @@
+# -------------------------------
+# Per-Session Memory Accounting & Idle Eviction
+# -------------------------------
+# SessionMemory tracks every session in the process and can:
+#   - estimate each session's footprint per session_state key (deep size of
+#     the object graph, so a Plotly figure counts its ~140 KB of validators
+#     and trace objects, not its 7 KB of JSON)
+#   - evict heavy values from sessions idle longer than `idle_seconds`:
+#       spill keys  are written to the state store and deleted from memory;
+#                   restore() puts them back on the session's next run
+#       drop keys   are deleted and rebuilt by the app on restore (figures
+#                   are redrawn from their score vectors)
+#   - report the top sessions by estimated memory
+#
+# A MemorySweeper thread runs sweep() periodically. touch() and restore()
+# run at the start of a session's rerun (or fragment run) and take the same
+# per-session lock as eviction, so a waking session never sees a half-evicted
+# state. Idle sessions for which alive(session_id) is false (the tab was
+# closed) are forgotten instead of evicted: nothing is spilled, keys spilled
+# by an earlier eviction are deleted from the store, and their entries are
+# dropped, so Streamlit frees the rest.
+import sys
+import time
+import types
+import weakref
+import threading
+from collections import deque
+
+SWEEP_INTERVAL = 60.0
+SIZE_LIMIT = 200000   # objects visited per value before the estimate is cut off
+
+_SKIP = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType, types.CodeType)
+_ATOMS = (str, bytes, int, float, bool, type(None))
+
+
+def deep_size(obj, seen=None, limit=SIZE_LIMIT):
+    # Bytes reachable from obj (containers, __dict__ and __slots__), each object counted once
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack and len(seen) < limit:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, _SKIP):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o)
+        if isinstance(o, _ATOMS):
+            continue
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset, deque)):
+            stack.extend(o)
+        else:
+            attributes = getattr(o, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for slot in getattr(type(o), "__slots__", ()):
+                if hasattr(o, slot):
+                    stack.append(getattr(o, slot))
+    return total
+
+
+class _Session:
+    def __init__(self, state, user, now):
+        self.state = state
+        self.user = user
+        self.last_seen = now
+        self.lock = threading.Lock()
+        self.footprint = {}         # key -> bytes, from the last measure()
+
+
+class SessionMemory:
+    # store: get_json/put_json/delete (state_store.py)
+    # codecs: {key: (encode, decode)} for spill keys whose values aren't plain JSON
+    # rebuild(state, keys): recreates the dropped keys after restore()
+    # alive(session_id): False once the session is gone for good
+    def __init__(self, store, idle_seconds=900.0, spill_keys=(), drop_keys=(), codecs=None, rebuild=None,
+                 alive=lambda session_id: True, frozen=lambda value: hasattr(value, "to_plotly_json"),
+                 clock=time.monotonic):
+        self.store = store
+        self.idle_seconds = idle_seconds
+        self.spill_keys = tuple(spill_keys)
+        self.drop_keys = tuple(drop_keys)
+        self.codecs = codecs or {}
+        self.rebuild = rebuild
+        self.alive = alive
+        self.frozen = frozen        # values never mutated once stored; their sizes are cached
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.evicted = {}           # session id -> dropped keys, while evicted keys wait to be restored
+        self.sizes = {}             # id(frozen value) -> (weakref, bytes)
+        self.counts = {"evictions": 0, "restores": 0, "forgotten": 0, "spilled_bytes": 0, "dropped_bytes": 0,
+                       "sweeps": 0, "measure_errors": 0, "evict_errors": 0}
+        self.totals = {"sessions": 0, "bytes": 0, "idle_sessions": 0}
+
+    def spill_key(self, session_id):
+        return f"spill:{session_id}"
+
+    # ✅ Called from the session's own script thread
+    def touch(self, session_id, state, user=None):
+        # `state` may be a new wrapper of the same session's state on each run
+        with self.lock:
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = _Session(state, user, self.clock())
+        with session.lock:
+            session.state, session.user = state, user
+            session.last_seen = self.clock()
+        return session
+
+    def restore(self, session_id, state):
+        # Puts spilled keys back and rebuilds dropped ones; returns the keys restored
+        session = self.sessions.get(session_id)
+        if session_id not in self.evicted or session is None:
+            return []
+        with session.lock:
+            if session_id not in self.evicted:
+                return []
+            spilled = self.store.get_json(self.spill_key(session_id)) or {}
+            for key, value in spilled.items():
+                if key not in state:
+                    state[key] = self.codecs[key][1](value) if key in self.codecs else value
+            dropped = self.evicted.pop(session_id)
+            if self.rebuild is not None and dropped:
+                self.rebuild(state, dropped)
+            self.store.delete(self.spill_key(session_id))
+        with self.lock:
+            self.counts["restores"] += 1
+        return list(spilled)
+
+    # ✅ Accounting
+    def size_of(self, value):
+        if self.frozen(value):
+            cached = self.sizes.get(id(value))
+            if cached is not None and cached[0]() is value:
+                return cached[1]
+            size = deep_size(value)
+            try:
+                self.sizes[id(value)] = (weakref.ref(value), size)
+            except TypeError:
+                pass
+            return size
+        return deep_size(value)
+
+    def measure(self, state):
+        # {key: estimated bytes} for one session's state
+        values = state.filtered_state if hasattr(state, "filtered_state") else dict(state)
+        return {key: self.size_of(value) for key, value in values.items()}
+
+    def _measure(self, session):
+        # measure() of a session whose script thread is running can fail (its
+        # state changes size mid-walk); the session keeps its last footprint
+        try:
+            session.footprint = self.measure(session.state)
+        except Exception:
+            with self.lock:
+                self.counts["measure_errors"] += 1
+
+    def report(self, top=10):
+        # Top sessions by estimated memory, measured now
+        rows = []
+        now = self.clock()
+        with self.lock:
+            sessions = list(self.sessions.items())
+        for session_id, session in sessions:
+            self._measure(session)
+            by_key = sorted(session.footprint.items(), key=lambda item: -item[1])
+            rows.append({
+                "session": session_id,
+                "user": session.user,
+                "idle_s": now - session.last_seen,
+                "bytes": sum(session.footprint.values()),
+                "evicted": session_id in self.evicted,
+                "top_keys": by_key[:5],
+            })
+        rows.sort(key=lambda row: -row["bytes"])
+        return rows[:top]
+
+    # ✅ Eviction (sweeper thread)
+    def sweep(self):
+        # Measures every session and evicts heavy keys from idle ones; returns sessions evicted
+        evicted = total = idle = 0
+        with self.lock:
+            sessions = list(self.sessions.items())
+        for session_id, session in sessions:
+            # Idle sessions are measured under their lock, in _evict(); active
+            # ones unlocked. One session failing does not stop the pass
+            if self.clock() - session.last_seen >= self.idle_seconds:
+                if not self.alive(session_id):
+                    try:
+                        self._forget(session_id, session)
+                    except Exception:
+                        with self.lock:
+                            self.counts["evict_errors"] += 1
+                    continue
+                idle += 1
+                try:
+                    evicted += self._evict(session_id, session, session.state)
+                except Exception:
+                    with self.lock:
+                        self.counts["evict_errors"] += 1
+            else:
+                self._measure(session)
+            total += sum(session.footprint.values())
+        with self.lock:
+            self.counts["sweeps"] += 1
+            self.totals = {"sessions": len(self.sessions), "bytes": total, "idle_sessions": idle}
+            self.sizes = {key: entry for key, entry in self.sizes.items() if entry[0]() is not None}
+        return evicted
+
+    def _evict(self, session_id, session, state):
+        with session.lock:
+            if self.clock() - session.last_seen < self.idle_seconds:
+                return 0   # the session woke up since the sweep saw it idle
+            self._measure(session)   # touch() waits on this lock, so the state holds still
+            spill = {}
+            for key in self.spill_keys:
+                if key in state:
+                    value = state[key]
+                    spill[key] = self.codecs[key][0](value) if key in self.codecs else value
+            if spill:
+                previous = (self.store.get_json(self.spill_key(session_id)) or {}) if session_id in self.evicted else {}
+                self.store.put_json(self.spill_key(session_id), dict(previous, **spill))
+            dropped = [key for key in self.drop_keys if key in state]
+            if not spill and not dropped:
+                return 0
+            freed_spill = sum(session.footprint.get(key, 0) for key in spill)
+            freed_drop = sum(session.footprint.get(key, 0) for key in dropped)
+            for key in list(spill) + dropped:
+                del state[key]
+                session.footprint.pop(key, None)
+            self.evicted[session_id] = self.evicted.get(session_id, []) + dropped
+        with self.lock:
+            self.counts["evictions"] += 1
+            self.counts["spilled_bytes"] += freed_spill
+            self.counts["dropped_bytes"] += freed_drop
+        return 1
+
+    def _forget(self, session_id, session):
+        # A closed session: nothing to spill or restore, so its spill key and entries go
+        with session.lock:
+            if session_id in self.evicted:
+                self.store.delete(self.spill_key(session_id))
+        with self.lock:
+            self.evicted.pop(session_id, None)
+            self.sessions.pop(session_id, None)
+            self.counts["forgotten"] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, **self.totals)
+
+
+class MemorySweeper(threading.Thread):
+    def __init__(self, memory, interval=SWEEP_INTERVAL):
+        super().__init__(name="session-memory-sweeper", daemon=True)
+        self.memory = memory
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.errors = 0
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.memory.sweep()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ session memory sweep failed: {e}", file=sys.stderr)
+
+    def stop(self):
+        self.stopped.set()
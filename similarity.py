@@ -0,0 +1,188 @@
+# -------------------------------
+# "Find Similar Employees" Index
+# -------------------------------
+# Local, incremental similarity search over saved work. Each entry is one
+# page of one saved assessment and carries:
+#   - an optional 5-tool score vector, already normalized to 0–1 in the
+#     canonical tool order (see CANONICAL_TOOLS in app.py)
+#   - free text (notes + AI text) indexed with BM25 over an inverted index
+#
+# Queries blend exact nearest-neighbour score similarity (NumPy) with text
+# relevance. Entries are appended to a JSONL log so the index survives
+# restarts and is updated incrementally on every save; nothing leaves the box.
+import os
+import re
+import json
+import math
+import threading
+
+import numpy as np
+
+DIMENSIONS = 5
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = set("""
+a about after all also am an and any are as at be been being but by can could did do does doing
+for from had has have he her here him his how i if in into is it its just like me more most my no
+not of on or our out over own she should so some than that the their them then there these they
+this those to too under up very was we were what when where which while who whom why will with
+would you your else who's what's
+""".split())
+
+# Irregular forms that suffix stripping can't fold ("froze" vs "freezes")
+LEMMAS = {
+    "froze": "freeze", "frozen": "freeze", "broke": "break", "broken": "break", "shook": "shake",
+    "fell": "fall", "fallen": "fall", "took": "take", "taken": "take", "ran": "run", "lost": "lose",
+    "blew": "blow", "blown": "blow", "hid": "hide", "hidden": "hide", "spoke": "speak", "led": "lead",
+    "thought": "think", "fought": "fight", "caught": "catch", "gave": "give", "given": "give",
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def stem(token):
+    token = LEMMAS.get(token, token)
+    for suffix in ("ingly", "edly", "ing", "ies", "ed", "es", "ly", "s"):
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            token = token[: -len(suffix)]
+            if suffix == "ies":
+                token += "y"
+            break
+    # Fold a trailing "e" so "freeze", "freezes" and "froze" meet at "freez"
+    if token.endswith("e") and len(token) > 4:
+        token = token[:-1]
+    return token
+
+
+def tokenize(text):
+    return [stem(t) for t in TOKEN_RE.findall(str(text or "").lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+class SimilarityIndex:
+    def __init__(self, path=None, capacity=1024):
+        self.path = path
+        self.lock = threading.Lock()
+        self.ids = []
+        self.meta = []
+        self.positions = {}
+        self.vectors = np.zeros((capacity, DIMENSIONS), dtype=np.float32)
+        self.has_vector = np.zeros(capacity, dtype=bool)
+        self.doc_len = np.zeros(capacity, dtype=np.float32)
+        self.total_len = 0.0
+        self.postings = {}   # term -> ([doc positions], [term frequencies])
+        self.arrays = {}     # term -> (positions array, tf array), rebuilt lazily after writes
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ✅ Loading / persistence
+    @classmethod
+    def load(cls, path):
+        index = cls(path)
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        index._add(record["id"], record.get("vector"), record.get("text", ""), record.get("meta", {}))
+        return index
+
+    def add(self, entry_id, vector=None, text="", meta=None):
+        meta = meta or {}
+        with self.lock:
+            if entry_id in self.positions:
+                return False
+            self._add(entry_id, vector, text, meta)
+            if self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps({"id": entry_id, "vector": vector, "text": text, "meta": meta}) + "\n")
+        return True
+
+    def _grow(self):
+        capacity = len(self.vectors) * 2
+        for name in ("vectors", "has_vector", "doc_len"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[: len(old)] = old
+            setattr(self, name, new)
+
+    def _add(self, entry_id, vector, text, meta):
+        position = len(self.ids)
+        if position >= len(self.vectors):
+            self._grow()
+        self.ids.append(entry_id)
+        self.meta.append(meta)
+        self.positions[entry_id] = position
+        if vector is not None:
+            self.vectors[position] = np.asarray(vector, dtype=np.float32)
+            self.has_vector[position] = True
+
+        counts = {}
+        for token in tokenize(text):
+            counts[token] = counts.get(token, 0) + 1
+        length = sum(counts.values())
+        self.doc_len[position] = length
+        self.total_len += length
+        for term, tf in counts.items():
+            docs, tfs = self.postings.setdefault(term, ([], []))
+            docs.append(position)
+            tfs.append(tf)
+            self.arrays.pop(term, None)
+
+    # ✅ Querying
+    def _posting_arrays(self, term):
+        arrays = self.arrays.get(term)
+        if arrays is None:
+            docs, tfs = self.postings[term]
+            arrays = (np.asarray(docs, dtype=np.int64), np.asarray(tfs, dtype=np.float32))
+            self.arrays[term] = arrays
+        return arrays
+
+    def _text_scores(self, text, n):
+        terms = [t for t in set(tokenize(text)) if t in self.postings]
+        if not terms:
+            return None
+        scores = np.zeros(n, dtype=np.float32)
+        avg_len = self.total_len / n if n else 1.0
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[:n] / max(avg_len, 1e-6))
+        for term in terms:
+            docs, tfs = self._posting_arrays(term)
+            df = len(docs)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + norm[docs])
+        top = scores.max()
+        return scores / top if top > 0 else None
+
+    def _vector_scores(self, vector, n):
+        query = np.asarray(vector, dtype=np.float32)
+        distances = np.sqrt(((self.vectors[:n] - query) ** 2).sum(axis=1))
+        scores = 1.0 - distances / math.sqrt(DIMENSIONS)
+        scores[~self.has_vector[:n]] = 0.0
+        return scores
+
+    def query(self, text="", vector=None, k=5, text_weight=0.5, exclude=()):
+        # Returns [(entry_id, score, meta), ...] best first; score is 0–1
+        with self.lock:
+            n = len(self.ids)
+            if n == 0:
+                return []
+            text_scores = self._text_scores(text, n) if text else None
+            vector_scores = self._vector_scores(vector, n) if vector is not None else None
+            if text_scores is None and vector_scores is None:
+                return []
+            if text_scores is None:
+                combined = vector_scores
+            elif vector_scores is None:
+                combined = text_scores
+            else:
+                combined = text_weight * text_scores + (1 - text_weight) * vector_scores
+
+            for entry_id in exclude:
+                if entry_id in self.positions:
+                    combined[self.positions[entry_id]] = -1.0
+            k = min(k, n)
+            top = np.argpartition(-combined, k - 1)[:k]
+            top = top[np.argsort(-combined[top])]
+            return [(self.ids[i], float(combined[i]), self.meta[i]) for i in top if combined[i] > 0]
@@ -0,0 +1,214 @@
+# -------------------------------
+# Local Redis-Protocol State Server
+# -------------------------------
+# A stand-in for Redis for development, load tests and small multi-worker
+# deployments: speaks RESP over TCP and keeps strings in memory, so
+# STATE_BACKEND=redis works without installing Redis.
+#
+#   python state_server.py --port 6380 --snapshot repository/state_snapshot.json
+#   STATE_BACKEND=redis STATE_REDIS_URL=redis://127.0.0.1:6380/0 streamlit run app.py
+#
+# Supports PING, ECHO, SELECT, GET, SET, MGET, MSET, DEL, EXISTS, INCR,
+# INCRBY, KEYS, DBSIZE, FLUSHDB and QUIT. With --snapshot, the data is loaded
+# at startup and written back every --snapshot-interval seconds when changed
+# and on shutdown.
+import os
+import sys
+import json
+import fnmatch
+import argparse
+import threading
+import socketserver
+
+
+class StateData:
+    def __init__(self, snapshot=None):
+        self.lock = threading.Lock()
+        self.dbs = {}
+        self.dirty = False
+        self.snapshot = snapshot
+        if snapshot and os.path.exists(snapshot):
+            with open(snapshot, "r") as f:
+                self.dbs = {int(db): {key: value.encode("utf-8") for key, value in data.items()}
+                            for db, data in json.load(f).items()}
+
+    def db(self, index):
+        return self.dbs.setdefault(index, {})
+
+    def save(self):
+        if not self.snapshot:
+            return
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {str(db): {key: value.decode("utf-8") for key, value in values.items()}
+                    for db, values in self.dbs.items()}
+            self.dirty = False
+        tmp = f"{self.snapshot}.tmp"
+        os.makedirs(os.path.dirname(self.snapshot) or ".", exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.snapshot)
+
+
+class CommandError(Exception):
+    pass
+
+
+# -------------------------------
+# Commands
+# -------------------------------
+def run_command(data, session, args):
+    if not args:
+        raise CommandError("ERR empty command")
+    name = args[0].decode("utf-8").upper()
+    args = args[1:]
+    with data.lock:
+        db = data.db(session["db"])
+        if name == "PING":
+            return args[0] if args else "PONG"
+        if name == "ECHO":
+            return args[0]
+        if name == "SELECT":
+            session["db"] = int(args[0])
+            return "OK"
+        if name == "GET":
+            return db.get(args[0].decode("utf-8"))
+        if name == "MGET":
+            return [db.get(key.decode("utf-8")) for key in args]
+        if name in ("SET", "MSET"):
+            pairs = args[:2] if name == "SET" else args
+            if len(pairs) < 2 or len(pairs) % 2:
+                raise CommandError(f"ERR wrong number of arguments for '{name.lower()}' command")
+            for i in range(0, len(pairs), 2):
+                db[pairs[i].decode("utf-8")] = pairs[i + 1]
+            data.dirty = True
+            return "OK"
+        if name == "DEL":
+            removed = sum(db.pop(key.decode("utf-8"), None) is not None for key in args)
+            data.dirty = data.dirty or bool(removed)
+            return removed
+        if name == "EXISTS":
+            return sum(key.decode("utf-8") in db for key in args)
+        if name in ("INCR", "INCRBY"):
+            key = args[0].decode("utf-8")
+            try:
+                value = int(db.get(key, b"0")) + (int(args[1]) if name == "INCRBY" else 1)
+            except ValueError:
+                raise CommandError("ERR value is not an integer or out of range")
+            db[key] = str(value).encode("utf-8")
+            data.dirty = True
+            return value
+        if name == "KEYS":
+            pattern = args[0].decode("utf-8")
+            return [key.encode("utf-8") for key in db if fnmatch.fnmatchcase(key, pattern)]
+        if name == "DBSIZE":
+            return len(db)
+        if name == "FLUSHDB":
+            db.clear()
+            data.dirty = True
+            return "OK"
+    raise CommandError(f"ERR unknown command '{name.lower()}'")
+
+
+def encode_reply(value):
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, CommandError):
+        return b"-%s\r\n" % str(value).encode("utf-8")
+    if isinstance(value, bool) or isinstance(value, int):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, str):
+        return b"+%s\r\n" % value.encode("utf-8")
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+
+
+# -------------------------------
+# Server
+# -------------------------------
+class StateHandler(socketserver.StreamRequestHandler):
+    data = None   # set per server by make_server
+
+    def read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()   # inline command, e.g. `PING` typed into telnet
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        session = {"db": 0}
+        while True:
+            try:
+                args = self.read_command()
+            except (OSError, ValueError):
+                return
+            if args is None:
+                return
+            if args and args[0].upper() == b"QUIT":
+                self.wfile.write(encode_reply("OK"))
+                return
+            try:
+                reply = run_command(self.data, session, args)
+            except (CommandError, IndexError, ValueError) as e:
+                reply = e if isinstance(e, CommandError) else CommandError(f"ERR {e}")
+            self.wfile.write(encode_reply(reply))
+            self.wfile.flush()
+
+
+class StateServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def make_server(data=None, host="127.0.0.1", port=6380):
+    handler = type("ConfiguredStateHandler", (StateHandler,), {"data": data or StateData()})
+    return StateServer((host, port), handler)
+
+
+def start_in_background(data=None, host="127.0.0.1", port=0):
+    # port=0 picks a free port; returns (server, url) for STATE_REDIS_URL
+    server = make_server(data, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"redis://{host}:{server.server_address[1]}/0"
+
+
+def main(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Local Redis-protocol state server")
+    parser.add_argument("--host", default=env("STATE_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("STATE_SERVER_PORT", "6380")))
+    parser.add_argument("--snapshot", default=env("STATE_SERVER_SNAPSHOT"), help="JSON file to load from and save to")
+    parser.add_argument("--snapshot-interval", type=float, default=5.0, help="seconds between snapshot saves")
+    args = parser.parse_args(argv)
+
+    data = StateData(args.snapshot)
+    server = make_server(data, args.host, args.port)
+    stop = threading.Event()
+
+    def snapshots():
+        while not stop.wait(args.snapshot_interval):
+            data.save()
+
+    if args.snapshot:
+        threading.Thread(target=snapshots, daemon=True).start()
+    print(f"✅ State server on redis://{args.host}:{args.port}/0", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        data.save()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
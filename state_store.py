@@ -0,0 +1,305 @@
+# -------------------------------
+# Shared Session / Work-State Store
+# -------------------------------
+# Per-user state that must survive a rerun landing on a different app
+# process: prompt-usage counters, chat history and (opt-in) the working state
+# of each page. Two interchangeable backends:
+#
+#   STATE_BACKEND=sqlite  one SQLite file (WAL) shared by every worker on a
+#                         host; the default, at STATE_DB
+#   STATE_BACKEND=redis   any Redis-protocol server at STATE_REDIS_URL, e.g.
+#                         Redis itself or the local stand-in:
+#                           python state_server.py --port 6380
+#
+# Both store JSON documents and integer counters under string keys.
+#
+# SessionSync maps groups of st.session_state keys ("p4" -> Page 4's saved
+# scores, notes and rich text) to one document each. A group is rehydrated
+# lazily, the first time a page that needs it renders in a session, and
+# written back only when its serialized value changes.
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+from urllib.parse import urlparse
+
+STATE_BACKEND = os.getenv("STATE_BACKEND", "sqlite")
+STATE_DB = os.getenv("STATE_DB", os.path.join("repository", "session_state.db"))
+STATE_REDIS_URL = os.getenv("STATE_REDIS_URL", "redis://127.0.0.1:6380/0")
+
+
+class StateStoreError(RuntimeError):
+    pass
+
+
+# -------------------------------
+# Stores
+# -------------------------------
+class SQLiteStateStore:
+    def __init__(self, path=STATE_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    updated_at REAL
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get_json(self, key, default=None):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_many_json(self, keys):
+        keys = list(keys)
+        if not keys:
+            return []
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT key, value FROM state WHERE key IN ({', '.join('?' for _ in keys)})",
+                                keys).fetchall()
+        found = dict(rows)
+        return [json.loads(found[key]) if key in found else None for key in keys]
+
+    def put_json(self, key, value):
+        self._put(key, json.dumps(value))
+
+    def _put(self, key, text):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, text, time.time()),
+            )
+
+    def delete(self, key):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM state WHERE key = ?", (key,))
+
+    def get_int(self, key, default=None):
+        value = self.get_json(key)
+        return default if value is None else int(value)
+
+    def incr(self, key, amount=1):
+        # Atomic across processes; returns the new value
+        with self._connect() as conn:
+            row = conn.execute(
+                "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value, "
+                "updated_at = excluded.updated_at RETURNING value",
+                (key, str(int(amount)), time.time()),
+            ).fetchone()
+        return int(row[0])
+
+    def incr_many(self, amounts):
+        # {key: amount} in one transaction; returns {key: new value}
+        now = time.time()
+        with self._connect() as conn:
+            return {key: int(conn.execute(
+                "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value, "
+                "updated_at = excluded.updated_at RETURNING value",
+                (key, str(int(amount)), now),
+            ).fetchone()[0]) for key, amount in amounts.items()}
+
+
+class RedisStateStore:
+    # Speaks RESP directly (GET/SET/MGET/DEL/INCRBY), so no client library is needed
+    def __init__(self, url=STATE_REDIS_URL, timeout=5.0):
+        parsed = urlparse(url)
+        self.address = (parsed.hostname or "127.0.0.1", parsed.port or 6379)
+        self.db = int((parsed.path or "/0").strip("/") or 0)
+        self.password = parsed.password
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.sock = None
+        self.reader = None
+
+    def _connect(self):
+        self.sock = socket.create_connection(self.address, timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.reader = self.sock.makefile("rb")
+        if self.password:
+            self._roundtrip(("AUTH", self.password))
+        if self.db:
+            self._roundtrip(("SELECT", self.db))
+
+    def close(self):
+        with self.lock:
+            self._close()
+
+    def _close(self):
+        if self.sock is not None:
+            try:
+                self.reader.close()
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = self.reader = None
+
+    def execute(self, *args):
+        with self.lock:
+            if self.sock is None:
+                self._connect()
+            try:
+                self.sock.sendall(_encode(args))
+            except OSError:
+                # Stale pooled connection: nothing was sent, so one resend is safe
+                self._close()
+                self._connect()
+                self.sock.sendall(_encode(args))
+            try:
+                return self._read()
+            except OSError:
+                self._close()
+                raise
+
+    def execute_many(self, commands):
+        # Pipelined: every command is sent in one write, then the replies are read in order
+        commands = list(commands)
+        if not commands:
+            return []
+        with self.lock:
+            if self.sock is None:
+                self._connect()
+            payload = b"".join(_encode(args) for args in commands)
+            try:
+                self.sock.sendall(payload)
+            except OSError:
+                self._close()
+                self._connect()
+                self.sock.sendall(payload)
+            try:
+                return [self._read() for _ in commands]
+            except OSError:
+                self._close()
+                raise
+
+    def _roundtrip(self, args):
+        self.sock.sendall(_encode(args))
+        return self._read()
+
+    def _read(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("state server closed the connection")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode("utf-8")
+        if kind == b"-":
+            raise StateStoreError(body.decode("utf-8"))
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            return None if length < 0 else self.reader.read(length + 2)[:-2]
+        if kind == b"*":
+            length = int(body)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise StateStoreError(f"Unexpected reply {line!r}")
+
+    def get_json(self, key, default=None):
+        value = self.execute("GET", key)
+        return json.loads(value) if value is not None else default
+
+    def get_many_json(self, keys):
+        keys = list(keys)
+        if not keys:
+            return []
+        return [json.loads(value) if value is not None else None for value in self.execute("MGET", *keys)]
+
+    def put_json(self, key, value):
+        self.execute("SET", key, json.dumps(value))
+
+    def delete(self, key):
+        self.execute("DEL", key)
+
+    def get_int(self, key, default=None):
+        value = self.execute("GET", key)
+        return default if value is None else int(value)
+
+    def incr(self, key, amount=1):
+        return self.execute("INCRBY", key, int(amount))
+
+    def incr_many(self, amounts):
+        # {key: amount} in one pipelined round trip; returns {key: new value}
+        keys = list(amounts)
+        return dict(zip(keys, self.execute_many(("INCRBY", key, int(amounts[key])) for key in keys)))
+
+
+def _encode(args):
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+def make_store():
+    if STATE_BACKEND == "redis":
+        return RedisStateStore()
+    return SQLiteStateStore()
+
+
+# -------------------------------
+# Session State Sync
+# -------------------------------
+class SessionSync:
+    # groups: {group: [session_state keys]}; rebuild(state, group) restores
+    # derived objects (figures) after a group is rehydrated
+    BOOKKEEPING = "_state_sync"
+
+    def __init__(self, store, user_id, groups, rebuild=None):
+        self.store = store
+        self.user_id = user_id
+        self.groups = groups
+        self.rebuild = rebuild
+
+    def document_key(self, group):
+        return f"session:{self.user_id}:{group}"
+
+    def _synced(self, state):
+        if self.BOOKKEEPING not in state:
+            state[self.BOOKKEEPING] = {}
+        return state[self.BOOKKEEPING]
+
+    def _serialize(self, state, group):
+        return json.dumps({key: state[key] for key in self.groups[group] if key in state},
+                          sort_keys=True, default=str)
+
+    def hydrate(self, state, groups=None):
+        # Load groups not yet seen in this session; returns (groups loaded, ms)
+        synced = self._synced(state)
+        wanted = [group for group in (groups or self.groups) if group not in synced]
+        if not wanted:
+            return [], 0.0
+        start = time.perf_counter()
+        documents = self.store.get_many_json([self.document_key(group) for group in wanted])
+        for group, document in zip(wanted, documents):
+            for key, value in (document or {}).items():
+                if key in self.groups[group] and key not in state:
+                    state[key] = value
+            if document and self.rebuild is not None:
+                self.rebuild(state, group)
+            synced[group] = self._serialize(state, group)
+        return wanted, (time.perf_counter() - start) * 1000
+
+    def sync(self, state):
+        # Write back hydrated groups whose keys changed; returns the groups written
+        synced = self._synced(state)
+        written = []
+        for group in list(synced):
+            serialized = self._serialize(state, group)
+            if serialized != synced[group]:
+                self.store.put_json(self.document_key(group), json.loads(serialized))
+                synced[group] = serialized
+                written.append(group)
+        return written
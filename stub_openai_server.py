@@ -0,0 +1,376 @@
+# -------------------------------
+# Local OpenAI-Compatible Stub Server
+# -------------------------------
+# A stand-in for the OpenAI API for load tests and benchmarks. Serves
+# POST /v1/chat/completions (streaming and non-streaming) with a configurable
+# latency model, injected 5xx / 429 errors and deterministic canned answers.
+#
+#   python stub_openai_server.py --port 8001 --ttft 0.4 --tokens-per-sec 60
+#   OPENAI_BASE_URL=http://127.0.0.1:8001/v1 OPENAI_API_KEY=stub streamlit run app.py
+#
+# Canned answers come from a JSON file ({"prompt substring": "answer", ...});
+# the first key found in the last user message wins. Anything else gets a
+# deterministic answer derived from a hash of the prompt; requests with a
+# json_schema response_format get a JSON instance of that schema instead
+# (arrays of objects keyed by an "id" enum get one item per id, in order).
+#
+# Answer length: by default an answer fills max_tokens (or --default-tokens).
+# --answer-tokens N gives free-text answers a natural length instead, about N
+# tokens with a per-prompt spread (a callable(messages) -> tokens in
+# process); answers longer than max_tokens are cut and finish with "length".
+# --model-latency gpt-4.1-nano=0.15:150 sets ttft:tokens-per-sec per model.
+#
+# GET /stats returns request/error counters, POST /stats/reset clears them.
+import os
+import sys
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VOCABULARY = (
+    "calibration pressure rhythm foresight clarity humility drive systems flexibility "
+    "consistency innovation motion processing coaching feedback trust cadence signal "
+    "leadership ownership execution reliability influence alignment discipline agility"
+).split()
+ARRAY_ITEMS = 3   # items generated for array fields of a json_schema response_format
+
+
+# -------------------------------
+# Config
+# -------------------------------
+class StubConfig:
+    def __init__(self, ttft=0.3, tokens_per_sec=50.0, error_rate=0.0, rate_limit_rate=0.0,
+                 retry_after=1, default_tokens=None, canned=None, seed=0, answer_tokens=None, model_latency=None):
+        self.ttft = ttft                        # seconds before the first token
+        self.tokens_per_sec = tokens_per_sec    # 0 = no generation delay
+        self.error_rate = error_rate            # share of requests answered with 500
+        self.rate_limit_rate = rate_limit_rate  # share of requests answered with 429
+        self.retry_after = retry_after
+        self.default_tokens = default_tokens    # None = use the request's max_tokens
+        self.answer_tokens = answer_tokens      # natural answer length: None, tokens, or callable(messages)
+        self.model_latency = model_latency or {}   # model -> (ttft, tokens_per_sec)
+        self.canned = canned or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors": 0, "rate_limited": 0,
+                      "prompt_tokens": 0, "completion_tokens": 0}
+
+    def roll(self):
+        # One draw per request keeps error injection reproducible for a given seed
+        with self.lock:
+            return self.rng.random()
+
+    def count(self, **deltas):
+        with self.lock:
+            for key, value in deltas.items():
+                self.stats[key] += value
+
+
+def load_canned(path):
+    if not path:
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+# -------------------------------
+# Responses
+# -------------------------------
+def count_tokens(text):
+    return len(str(text).split())
+
+
+def last_user_message(messages):
+    for message in reversed(messages or []):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+def natural_tokens(config, messages, rng):
+    # How long the answer would run without a max_tokens limit
+    if callable(config.answer_tokens):
+        return config.answer_tokens(messages)
+    return max(1, int(config.answer_tokens * rng.lognormvariate(0, 0.35)))
+
+
+def answer_for(config, messages, max_tokens, response_format=None):
+    # (text, finish_reason)
+    prompt = last_user_message(messages)
+    for key, answer in config.canned.items():
+        if key.lower() in prompt.lower():
+            return answer, "stop"
+    seed = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16], 16)
+    rng = random.Random(seed)
+    structured = (response_format or {}).get("type") == "json_schema"
+    if config.answer_tokens is not None and not structured:
+        natural = natural_tokens(config, messages, rng)
+    else:
+        natural = config.default_tokens or max_tokens or 200
+    length = min(natural, max_tokens or natural)
+    finish_reason = "length" if length < natural else "stop"
+    if structured:
+        schema = (response_format.get("json_schema") or {}).get("schema") or {}
+        words = max(3, length // max(1, count_strings(schema)))
+        return json.dumps(fill_schema(schema, rng, words)), finish_reason
+    return " ".join(rng.choice(VOCABULARY) for _ in range(length)), finish_reason
+
+
+def array_ids(schema):
+    # The "id" enum of an array's item objects, if it has one
+    items = schema.get("items") or {}
+    return ((items.get("properties") or {}).get("id") or {}).get("enum")
+
+
+def count_strings(schema):
+    # Free-text leaves in a JSON schema (arrays count as ARRAY_ITEMS items, or one per id)
+    kind = schema.get("type")
+    if kind == "object":
+        return sum(count_strings(sub) for sub in (schema.get("properties") or {}).values())
+    if kind == "array":
+        return len(array_ids(schema) or range(ARRAY_ITEMS)) * count_strings(schema.get("items") or {})
+    return 0 if "enum" in schema else 1
+
+
+def fill_schema(schema, rng, words):
+    # Deterministic instance of a (strict) JSON schema with vocabulary text
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: fill_schema(sub, rng, words) for name, sub in (schema.get("properties") or {}).items()}
+    if kind == "array":
+        ids = array_ids(schema)
+        if ids:
+            return [dict(fill_schema(schema["items"], rng, words), id=item_id) for item_id in ids]
+        return [fill_schema(schema.get("items") or {}, rng, words) for _ in range(ARRAY_ITEMS)]
+    if kind in ("integer", "number"):
+        return rng.randint(1, 10)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    if "enum" in schema:
+        return rng.choice(schema["enum"])
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def completion_id(messages):
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+    return f"chatcmpl-stub-{digest[:24]}"
+
+
+def usage_for(messages, text):
+    prompt_tokens = sum(count_tokens(m.get("content", "")) for m in messages or [])
+    completion_tokens = count_tokens(text)
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens}
+
+
+# -------------------------------
+# HTTP Handler
+# -------------------------------
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = StubConfig()
+
+    def log_message(self, format, *args):
+        pass  # keep load-test output readable
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_error_json(self, status, message, error_type, headers=None):
+        self.send_json(status, {"error": {"message": message, "type": error_type, "code": None}}, headers)
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/stats":
+            with self.config.lock:
+                self.send_json(200, dict(self.config.stats))
+        elif self.path.rstrip("/") == "/v1/models":
+            self.send_json(200, {"object": "list", "data": [
+                {"id": "gpt-4o-mini", "object": "model", "owned_by": "stub"},
+                {"id": "gpt-4o", "object": "model", "owned_by": "stub"},
+                {"id": "gpt-4.1-nano", "object": "model", "owned_by": "stub"},
+            ]})
+        else:
+            self.send_error_json(404, f"Unknown path {self.path}", "invalid_request_error")
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b"{}"
+
+        if self.path.rstrip("/") == "/stats/reset":
+            with self.config.lock:
+                for key in self.config.stats:
+                    self.config.stats[key] = 0
+            self.send_json(200, {"ok": True})
+            return
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self.send_error_json(404, f"Unknown path {self.path}", "invalid_request_error")
+            return
+
+        try:
+            request = json.loads(raw or b"{}")
+        except ValueError:
+            self.send_error_json(400, "Request body is not valid JSON", "invalid_request_error")
+            return
+
+        config = self.config
+        config.count(requests=1)
+        roll = config.roll()
+        if roll < config.rate_limit_rate:
+            config.count(rate_limited=1)
+            self.send_error_json(429, "Rate limit reached (stub)", "rate_limit_exceeded",
+                                 {"Retry-After": str(config.retry_after)})
+            return
+        if roll < config.rate_limit_rate + config.error_rate:
+            config.count(errors=1)
+            self.send_error_json(500, "Injected server error (stub)", "server_error")
+            return
+
+        messages = request.get("messages") or []
+        model = request.get("model", "gpt-4o-mini")
+        text, finish_reason = answer_for(config, messages, request.get("max_tokens"), request.get("response_format"))
+        usage = usage_for(messages, text)
+        config.count(prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
+
+        if request.get("stream"):
+            config.count(streamed=1)
+            include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+            self.stream(model, messages, text, usage if include_usage else None, finish_reason)
+        else:
+            ttft, _ = self.latency(model)
+            time.sleep(ttft + self.generation_time(usage["completion_tokens"], model))
+            self.send_json(200, {
+                "id": completion_id(messages),
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "finish_reason": finish_reason,
+                             "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+
+    def latency(self, model):
+        # (ttft, tokens_per_sec) for this model
+        return self.config.model_latency.get(model, (self.config.ttft, self.config.tokens_per_sec))
+
+    def generation_time(self, tokens, model=None):
+        _, tokens_per_sec = self.latency(model)
+        if not tokens_per_sec:
+            return 0.0
+        return tokens / tokens_per_sec
+
+    def stream(self, model, messages, text, usage, finish_reason="stop"):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        chunk_id = completion_id(messages)
+        created = int(time.time())
+
+        def send(delta, finish_reason=None, usage_block=None):
+            chunk = {"id": chunk_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [] if usage_block else [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            if usage_block:
+                chunk["usage"] = usage_block
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        ttft, tokens_per_sec = self.latency(model)
+        time.sleep(ttft)
+        send({"role": "assistant", "content": ""})
+        delay = 1.0 / tokens_per_sec if tokens_per_sec else 0.0
+        words = text.split(" ")
+        for i, word in enumerate(words):
+            send({"content": word if i == 0 else " " + word})
+            if delay:
+                time.sleep(delay)
+        send({}, finish_reason=finish_reason)
+        if usage:
+            send(None, usage_block=usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+# -------------------------------
+# Server
+# -------------------------------
+def make_server(config, host="127.0.0.1", port=8001):
+    handler = type("ConfiguredStubHandler", (StubHandler,), {"config": config})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(config=None, host="127.0.0.1", port=0):
+    # port=0 picks a free port; returns (server, base_url) for OPENAI_BASE_URL
+    server = make_server(config or StubConfig(), host, port)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def parse_model_latency(specs):
+    # ["gpt-4.1-nano=0.15:150", ...] -> {"gpt-4.1-nano": (0.15, 150.0)}
+    latency = {}
+    for spec in specs:
+        model, _, timing = spec.partition("=")
+        ttft, _, tokens_per_sec = timing.partition(":")
+        latency[model] = (float(ttft), float(tokens_per_sec))
+    return latency
+
+
+def main(argv=None):
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub server")
+    parser.add_argument("--host", default=env("STUB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(env("STUB_PORT", "8001")))
+    parser.add_argument("--ttft", type=float, default=float(env("STUB_TTFT", "0.3")), help="seconds to first token")
+    parser.add_argument("--tokens-per-sec", type=float, default=float(env("STUB_TOKENS_PER_SEC", "50")))
+    parser.add_argument("--error-rate", type=float, default=float(env("STUB_ERROR_RATE", "0")))
+    parser.add_argument("--rate-limit-rate", type=float, default=float(env("STUB_RATE_LIMIT_RATE", "0")))
+    parser.add_argument("--retry-after", type=int, default=int(env("STUB_RETRY_AFTER", "1")))
+    parser.add_argument("--default-tokens", type=int, default=None, help="answer length when no canned match")
+    parser.add_argument("--canned", default=env("STUB_CANNED"), help="JSON file of prompt substring -> answer")
+    parser.add_argument("--answer-tokens", type=int, default=None, help="natural free-text answer length (mean)")
+    parser.add_argument("--model-latency", action="append", default=[], metavar="MODEL=TTFT:TPS",
+                        help="per-model latency, e.g. gpt-4.1-nano=0.15:150 (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        ttft=args.ttft,
+        tokens_per_sec=args.tokens_per_sec,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after,
+        default_tokens=args.default_tokens,
+        canned=load_canned(args.canned),
+        seed=args.seed,
+        answer_tokens=args.answer_tokens,
+        model_latency=parse_model_latency(args.model_latency),
+    )
+    server = make_server(config, args.host, args.port)
+    print(f"✅ Stub OpenAI server on http://{args.host}:{args.port}/v1", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# -------------------------------
+# Job Review Template Library
+# -------------------------------
+# Local catalogue behind Template Discovery. data/job_catalogue.json lists
+# job families, each with base titles, qualifiers ("Senior", "Apprentice",
+# ...), review phrases and an occupational-outlook link; base titles are
+# expanded with their family's qualifiers at load time (~4,600 titles).
+#
+#   - suggest(prefix): as-you-type autocomplete from a prefix trie. Every word
+#     start of a title is indexed, so "mach" finds "Steel Machinist". Each
+#     node keeps its best `limit` titles, so a lookup walks len(prefix) nodes;
+#     the trie stops at TRIE_DEPTH and longer prefixes filter a short list.
+#   - match(query): exact normalized title, else the longest title contained
+#     in the query ("review for a steel machinist"), else a typo-tolerant
+#     fuzzy match (character-trigram candidates re-ranked by similarity).
+import os
+import re
+import json
+from collections import namedtuple
+from difflib import SequenceMatcher
+
+import numpy as np
+
+CATALOGUE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "job_catalogue.json")
+FUZZY_MIN_SCORE = 0.8
+FUZZY_CANDIDATES = 25
+MAX_TITLE_WORDS = 6
+TRIE_DEPTH = 8   # deeper prefixes filter the depth-8 node's entries instead of growing the trie
+
+NON_WORD_RE = re.compile(r"[^a-z0-9]+")
+
+Role = namedtuple("Role", "title base family")
+
+
+def normalize_role(text):
+    # "  Steel-Machinist " -> "steel machinist"; shared with the job-review cache
+    text = str(text or "").lower().replace("&", " and ")
+    return " ".join(NON_WORD_RE.sub(" ", text).split())
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _TrieNode:
+    __slots__ = ("children", "top", "rest")
+
+    def __init__(self):
+        self.children = {}
+        self.top = []
+        self.rest = None   # at TRIE_DEPTH: every (suffix, role id) below this node, best first
+
+
+class TemplateLibrary:
+    def __init__(self, catalogue, limit=8):
+        self.limit = limit
+        self.templates = [tuple(link) for link in catalogue.get("templates", [])]
+        self.phrase_libraries = [tuple(link) for link in catalogue.get("phrase_libraries", [])]
+        self.families = {}
+        self.roles = []       # role id -> Role
+        self.keys = []        # role id -> normalized title
+        self.by_key = {}      # normalized title -> role id
+        for family in catalogue.get("families", []):
+            self.families[family["name"]] = family
+            for base in family.get("roles", []):
+                self._add_role(base, base, family["name"])
+                for qualifier in family.get("qualifiers", []):
+                    self._add_role(f"{qualifier} {base}", base, family["name"])
+
+        self.root = _TrieNode()
+        self._build_trie()
+        postings = {}
+        for role_id, key in enumerate(self.keys):
+            for gram in _trigrams(key):
+                postings.setdefault(gram, []).append(role_id)
+        self.trigrams = {gram: np.asarray(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = np.asarray([len(_trigrams(key)) for key in self.keys], dtype=np.float32)
+
+    @classmethod
+    def load(cls, path=CATALOGUE_FILE, **kwargs):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), **kwargs)
+
+    def __len__(self):
+        return len(self.roles)
+
+    def _add_role(self, title, base, family):
+        key = normalize_role(title)
+        if key in self.by_key:
+            return
+        self.by_key[key] = len(self.roles)
+        self.roles.append(Role(title, base, family))
+        self.keys.append(key)
+
+    def _build_trie(self):
+        # Insert best-first (title starts, base titles, short titles) so each
+        # node's `top` list is already ranked when it fills up
+        entries = []
+        for role_id, key in enumerate(self.keys):
+            words = key.split()
+            qualified = self.roles[role_id].title != self.roles[role_id].base
+            # Word starts inside a qualified title are already covered by its base title
+            for position in range(1 if qualified else len(words)):
+                entries.append(((position > 0, qualified, len(key), key), " ".join(words[position:]), role_id))
+        entries.sort()
+        for _, suffix, role_id in entries:
+            node = self.root
+            for char in suffix[:TRIE_DEPTH]:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _TrieNode()
+                node = child
+                if len(node.top) < self.limit and role_id not in node.top:
+                    node.top.append(role_id)
+            if len(suffix) >= TRIE_DEPTH:
+                if node.rest is None:
+                    node.rest = []
+                node.rest.append((suffix, role_id))
+
+    def family(self, role):
+        return self.families[role.family]
+
+    # ✅ Autocomplete
+    def suggest(self, prefix, limit=None):
+        limit = limit or self.limit
+        prefix = normalize_role(prefix)
+        node = self.root
+        for char in prefix[:TRIE_DEPTH]:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        if len(prefix) <= TRIE_DEPTH:
+            return [self.roles[i] for i in node.top[:limit]]
+        found = []
+        for suffix, role_id in node.rest or ():
+            if suffix.startswith(prefix) and role_id not in found:
+                found.append(role_id)
+                if len(found) == limit:
+                    break
+        return [self.roles[i] for i in found]
+
+    # ✅ Matching
+    def match(self, query, min_score=FUZZY_MIN_SCORE):
+        # (Role, score) for the best catalogue title, or (None, best fuzzy score)
+        key = normalize_role(query)
+        if not key:
+            return None, 0.0
+        if key in self.by_key:
+            return self.roles[self.by_key[key]], 1.0
+        # Longest catalogue title contained in the query, word for word
+        words = key.split()
+        for size in range(min(MAX_TITLE_WORDS, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                role_id = self.by_key.get(" ".join(words[start:start + size]))
+                if role_id is not None:
+                    return self.roles[role_id], 1.0
+        role, score = self.fuzzy(key)
+        if score >= min_score:
+            return role, score
+        return None, score
+
+    def fuzzy(self, query, candidates=FUZZY_CANDIDATES):
+        key = normalize_role(query)
+        grams = _trigrams(key)
+        hits = [self.trigrams[gram] for gram in grams if gram in self.trigrams]
+        if not hits:
+            return None, 0.0
+        # Dice coefficient on trigrams picks candidates, edit similarity ranks them
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self.keys))
+        dice = 2 * overlap / (len(grams) + self.gram_counts)
+        count = min(candidates, int((overlap > 0).sum()))
+        shortlist = np.argpartition(-dice, count - 1)[:count]
+        best, best_score = None, 0.0
+        for role_id in shortlist:
+            score = SequenceMatcher(None, key, self.keys[role_id]).ratio()
+            if score > best_score:
+                best, best_score = self.roles[role_id], score
+        return best, best_score
@@ -0,0 +1,205 @@
+# -------------------------------
+# Content-Addressed Work Storage
+# -------------------------------
+# "Save Work" snapshots are split into sections (Page 1 Notes, Page 4 Rich
+# Context, ...). Each section is hashed (SHA-256) and stored once, compressed,
+# under chunks/; a save only writes a small JSON manifest listing the section
+# titles and hashes. Unchanged sections across saves cost nothing.
+#
+#   repository/
+#     manifests/saved_work_<user>_<timestamp>.txt.json
+#     chunks/ab/ab12…ef.zst   (or .gz without the optional zstandard package)
+#
+# Downloads stream the reassembled document section by section. Legacy
+# saved_work_*.txt files in the repository root are still listed and served.
+import io
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+import contextlib
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is always available
+    zstandard = None
+
+SECTION_SEPARATOR = "\n\n"
+
+
+# -------------------------------
+# Codecs
+# -------------------------------
+def _compress(data, codec):
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def _decompress(data, codec):
+    if codec == "zst":
+        return zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress(data)
+
+
+def default_codec():
+    return "zst" if zstandard is not None else "gz"
+
+
+class WorkStore:
+    def __init__(self, root="repository", codec=None):
+        self.root = root
+        self.codec = codec or default_codec()
+        self.manifest_dir = os.path.join(root, "manifests")
+        self.chunk_dir = os.path.join(root, "chunks")
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        os.makedirs(self.chunk_dir, exist_ok=True)
+
+    # ✅ Chunks
+    def _chunk_path(self, digest, codec):
+        return os.path.join(self.chunk_dir, digest[:2], f"{digest}.{codec}")
+
+    def _find_chunk(self, digest):
+        for codec in (self.codec, "zst", "gz"):
+            path = self._chunk_path(digest, codec)
+            if os.path.exists(path):
+                return path, codec
+        raise FileNotFoundError(f"Missing chunk {digest}")
+
+    def put_chunk(self, text):
+        data = str(text).encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        for codec in (self.codec, "zst", "gz"):
+            if os.path.exists(self._chunk_path(digest, codec)):
+                return digest, len(data), False
+        path = self._chunk_path(digest, self.codec)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _atomic_write(path, _compress(data, self.codec))
+        return digest, len(data), True
+
+    def get_chunk(self, digest):
+        path, codec = self._find_chunk(digest)
+        with open(path, "rb") as f:
+            return _decompress(f.read(), codec).decode("utf-8")
+
+    # ✅ Manifests
+    def _manifest_path(self, name):
+        return os.path.join(self.manifest_dir, f"{name}.json")
+
+    def save(self, name, sections, meta=None, exact=False):
+        # sections: [(title, text), ...] in document order. A taken name gets a
+        # _1, _2, ... suffix unless `exact` (a name reserved by the caller, e.g.
+        # BufferedWorkStore): then the manifest is written, or rewritten, as is
+        entries = []
+        new_chunks = 0
+        for title, text in sections:
+            digest, size, created = self.put_chunk(text)
+            new_chunks += created
+            entries.append({"title": title, "hash": digest, "size": size})
+        base, suffix = name, 1
+        while not exact and os.path.exists(self._manifest_path(name)):
+            stem, ext = os.path.splitext(base)
+            name = f"{stem}_{suffix}{ext}"
+            suffix += 1
+        manifest = {"name": name, "created": time.time(), "sections": entries,
+                    "new_chunks": new_chunks, "meta": meta or {}}
+        _atomic_write(self._manifest_path(name), json.dumps(manifest).encode("utf-8"))
+        return manifest
+
+    def manifest(self, name):
+        path = self._manifest_path(name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def list(self):
+        names = [f[:-len(".json")] for f in os.listdir(self.manifest_dir) if f.endswith(".json")]
+        legacy = [f for f in os.listdir(self.root)
+                  if f.startswith("saved_work_") and os.path.isfile(os.path.join(self.root, f))]
+        return sorted(set(names) | set(legacy))
+
+    # ✅ Reading
+    def iter_sections(self, name):
+        manifest = self.manifest(name)
+        if manifest is None:
+            # Legacy full-text save
+            with open(os.path.join(self.root, name), "r") as f:
+                yield None, f.read()
+            return
+        for entry in manifest["sections"]:
+            yield entry["title"], self.get_chunk(entry["hash"])
+
+    def iter_bytes(self, name):
+        manifest = self.manifest(name)
+        if manifest is None:
+            with open(os.path.join(self.root, name), "rb") as f:
+                while True:
+                    block = f.read(64 * 1024)
+                    if not block:
+                        return
+                    yield block
+        for title, text in self.iter_sections(name):
+            yield (f"{title}:\n{text}{SECTION_SEPARATOR}").encode("utf-8")
+
+    def open_stream(self, name):
+        return io.BufferedReader(_IterStream(self.iter_bytes(name)))
+
+    def read_text(self, name):
+        return b"".join(self.iter_bytes(name)).decode("utf-8")
+
+    # ✅ Accounting
+    def stats(self):
+        chunk_bytes = chunks = 0
+        for dirpath, _, files in os.walk(self.chunk_dir):
+            for f in files:
+                chunks += 1
+                chunk_bytes += os.path.getsize(os.path.join(dirpath, f))
+        manifest_bytes = logical_bytes = manifests = 0
+        for f in os.listdir(self.manifest_dir):
+            if f.endswith(".json"):
+                manifests += 1
+                path = os.path.join(self.manifest_dir, f)
+                manifest_bytes += os.path.getsize(path)
+                with open(path, "r") as fh:
+                    logical_bytes += sum(e["size"] for e in json.load(fh)["sections"])
+        return {"manifests": manifests, "chunks": chunks, "disk_bytes": chunk_bytes + manifest_bytes,
+                "logical_bytes": logical_bytes}
+
+
+class _IterStream(io.RawIOBase):
+    # Read-only file object over an iterator of byte blocks
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.pending = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = next(self.blocks)
+            except StopIteration:
+                return 0
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+def _atomic_write(path, data):
+    # A temp file of its own per call: threads of one process (sessions, the
+    # write-behind worker) may write the same chunk or manifest at once
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)   # mkstemp creates 0600
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
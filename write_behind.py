@@ -0,0 +1,452 @@
+# -------------------------------
+# Write-Behind Buffer
+# -------------------------------
+# Usage increments and repository saves are acknowledged as soon as they are
+# in memory and appended to a local journal; a background worker applies
+# them to the real stores in batches, when `max_batch` ops are waiting or the
+# oldest has waited `max_delay` seconds:
+#
+#   buffer = WriteBehind({"incr": apply_increments, "save": apply_saves}, "repository/write_behind.jsonl")
+#   buffer.submit("incr", "usage:ann@example.com", amount=1)
+#   buffer.read_int("usage:ann@example.com", store.get_int)   # store value + not-yet-applied increments
+#
+# A handler takes the batch's ops of its kind (dicts with "seq", "kind",
+# "key" and the submitted fields) and returns one result per op, or raises;
+# a failed group stays queued and is retried after `retry_seconds`, doubling
+# per attempt up to MAX_RETRY_SECONDS. Kinds in `per_op` (saves: one file
+# write each, nothing to batch) get one op per call, so only the op that
+# failed is retried.
+#
+# Dead letters: an op that has failed `max_attempts` times is dropped from
+# the queue (and from read_int's queued increments), marked done in the
+# journal, and appended with its last error to the dead-letter file next to
+# the journal (write_behind.dead.jsonl), where it can be inspected or
+# resubmitted by hand. The most recent ones are kept in `dead` for stats()
+# and dead_ops().
+#
+# Journal: one JSON line per op, then {"done": [seqs]} once a group is
+# applied; it is truncated whenever the queue drains. On start, ops without a
+# "done" mark are queued again, so delivery is at-least-once: a crash between
+# a handler's writes and its mark replays that group. Each process locks its
+# own journal file (write_behind.jsonl, write_behind.1.jsonl, ...) and a
+# restarted worker takes over any journal no live process holds.
+#
+# Reads: read_int() adds the increments still queued or being applied to
+# the store's value; a read that overlaps a flush of its key waits for that
+# flush (one round trip) and reloads, so a session always sees its own writes. BufferedWorkStore does the same
+# for repository saves (list and read pending records before they land).
+import io
+import os
+import json
+import time
+import threading
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows: journals are not locked between processes
+    fcntl = None
+
+from work_store import SECTION_SEPARATOR, _IterStream
+
+MAX_BATCH = 100
+MAX_DELAY = 0.5          # seconds the oldest queued op may wait
+RETRY_SECONDS = 1.0
+MAX_RETRY_SECONDS = 60.0
+MAX_ATTEMPTS = 8         # ~2 minutes of retries before an op is dead-lettered
+DEAD_KEPT = 100          # dead-lettered ops kept in memory for dead_ops()
+BATCH_BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500]
+
+
+def open_journal(path):
+    # (file, path) for the first journal in path, path.1, ... that no live process has locked
+    stem, ext = os.path.splitext(path)
+    for n in range(64):
+        candidate = path if n == 0 else f"{stem}.{n}{ext}"
+        f = open(candidate, "a+", encoding="utf-8")
+        if fcntl is None:
+            return f, candidate
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return f, candidate
+        except OSError:
+            f.close()
+    raise RuntimeError(f"No free write-behind journal next to {path}")
+
+
+def dead_letter_path(journal_path):
+    # write_behind.1.jsonl -> write_behind.1.dead.jsonl
+    stem, ext = os.path.splitext(journal_path)
+    return f"{stem}.dead{ext}"
+
+
+class WriteBehind:
+    def __init__(self, handlers, journal_path=None, max_batch=MAX_BATCH, max_delay=MAX_DELAY,
+                 retry_seconds=RETRY_SECONDS, max_attempts=MAX_ATTEMPTS, fsync=False, synchronous=False, per_op=(),
+                 clock=time.monotonic):
+        self.handlers = handlers
+        self.per_op = set(per_op)          # kinds applied (and marked done) one op at a time
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.retry_seconds = retry_seconds
+        self.max_attempts = max_attempts
+        self.fsync = fsync
+        self.synchronous = synchronous     # apply in the caller's thread (no queue, no journal)
+        self.clock = clock
+        self.cond = threading.Condition()
+        self.pending = OrderedDict()       # seq -> op, queued or being applied
+        self.queued_at = {}                # seq -> clock() when queued
+        self.inflight = set()              # seqs being applied
+        self.attempts = {}                 # seq -> failed attempts so far
+        self.retry_at = {}                 # seq -> clock() before which a failed op isn't retried
+        self.dead = []                     # the last DEAD_KEPT dead-lettered ops, with "error" and "attempts"
+        self.incr = {}                     # key -> amount queued or being applied
+        self.flushes = {}                  # key -> times a flush touching it completed
+        self.seq = 0
+        self.urgent = 0                    # ops up to this seq are flushed without waiting
+        self.stopped = False
+        self.errors = []
+        self.counts = {"submitted": 0, "applied": 0, "batches": 0, "failures": 0, "replayed": 0, "dead_lettered": 0,
+                       "read_waits": 0, "read_retries": 0, "flush_ms": 0.0, "journal_bytes": 0}
+        self.batch_sizes = {bucket: 0 for bucket in BATCH_BUCKETS + ["more"]}
+        self.journal = self.journal_path = self.dead_path = None
+        if journal_path and not synchronous:
+            self.journal, self.journal_path = open_journal(journal_path)
+            self.dead_path = dead_letter_path(self.journal_path)
+            self._load_dead()
+            self._replay()
+        self.thread = None
+
+    # ✅ Journal
+    def _replay(self):
+        self.journal.seek(0)
+        ops, done = OrderedDict(), set()
+        for line in self.journal:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break   # torn last line from a crash
+            if "done" in record:
+                done.update(record["done"])
+            else:
+                ops[record["seq"]] = record
+        self.journal.seek(0, io.SEEK_END)
+        now = self.clock()
+        for seq, op in ops.items():
+            self.seq = max(self.seq, seq)
+            if seq not in done:
+                self._queue(op, now)
+                self.counts["replayed"] += 1
+        self.counts["journal_bytes"] = self.journal.tell()
+
+    def _append(self, record):
+        data = json.dumps(record, separators=(",", ":")) + "\n"
+        self.journal.write(data)
+        self.journal.flush()
+        if self.fsync:
+            os.fsync(self.journal.fileno())
+        self.counts["journal_bytes"] += len(data.encode("utf-8"))
+
+    def _truncate(self):
+        self.journal.seek(0)
+        self.journal.truncate()
+        self.counts["journal_bytes"] = 0
+
+    def _load_dead(self):
+        if not os.path.exists(self.dead_path):
+            return
+        with open(self.dead_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    self.dead.append(json.loads(line))
+                except ValueError:
+                    continue
+        del self.dead[:-DEAD_KEPT]
+
+    # ✅ Writes
+    def _queue(self, op, now):
+        self.pending[op["seq"]] = op
+        self.queued_at[op["seq"]] = now
+        if op["kind"] == "incr":
+            self.incr[op["key"]] = self.incr.get(op["key"], 0) + op["amount"]
+
+    def submit(self, kind, key, **fields):
+        # Acknowledged once queued (and journaled); returns the op's seq
+        if kind not in self.handlers:
+            raise ValueError(f"No write-behind handler for {kind!r}")
+        with self.cond:
+            self.seq += 1
+            op = dict(fields, seq=self.seq, kind=kind, key=key)
+            self.counts["submitted"] += 1
+            if not self.synchronous:
+                if self.journal is not None:
+                    self._append(op)
+                self._queue(op, self.clock())
+                if len(self.pending) - len(self.inflight) >= self.max_batch:
+                    self.cond.notify_all()
+                return op["seq"]
+        # Synchronous: the caller waits for the store, and its errors, as before
+        start = time.perf_counter()
+        op["result"] = self.handlers[kind]([op])[0]
+        with self.cond:
+            self.counts["applied"] += 1
+            self.counts["batches"] += 1
+            self.counts["flush_ms"] += (time.perf_counter() - start) * 1000
+            self.batch_sizes[1] += 1
+        return op["seq"]
+
+    def _take(self):
+        # Next batch once it is full or its oldest op is due; None when stopped
+        with self.cond:
+            while not self.stopped:
+                now = self.clock()
+                waiting = [seq for seq in self.pending if seq not in self.inflight]
+                ready = [seq for seq in waiting if self.retry_at.get(seq, now) <= now]
+                backoff = [self.retry_at[seq] - now for seq in waiting if seq in self.retry_at and seq not in ready]
+                if ready:
+                    due = self.queued_at[ready[0]] + self.max_delay - now
+                    if len(ready) >= self.max_batch or due <= 0 or ready[0] <= self.urgent:
+                        batch = [self.pending[seq] for seq in ready[:self.max_batch]]
+                        self.inflight.update(op["seq"] for op in batch)
+                        return batch
+                    backoff.append(due)
+                self.cond.wait(min(backoff) if backoff else None)
+            return None
+
+    def _apply(self, batch):
+        # Applies one batch, kind by kind in handler order (cheap increments first); True if every group landed
+        start = time.perf_counter()
+        groups = OrderedDict((kind, []) for kind in self.handlers)
+        for op in batch:
+            groups[op["kind"]].append(op)
+        ok = True
+        for kind, ops in groups.items():
+            # Per-op kinds are applied and marked done one op at a time, so a
+            # failure only leaves that op queued, not the ones already written
+            for chunk in ([[op] for op in ops] if kind in self.per_op else [ops] if ops else []):
+                try:
+                    results = self.handlers[kind](chunk)
+                except Exception as e:
+                    with self.cond:
+                        self.counts["failures"] += 1
+                        self.errors = (self.errors + [f"{kind}: {type(e).__name__}: {e}"])[-10:]
+                        self._failed(chunk, f"{type(e).__name__}: {e}")
+                    ok = False
+                    continue
+                with self.cond:
+                    for op, result in zip(chunk, results):
+                        op["result"] = result
+                    self._done(chunk)
+        with self.cond:
+            self.counts["batches"] += 1
+            self.counts["flush_ms"] += (time.perf_counter() - start) * 1000
+            size = len(batch)
+            self.batch_sizes[next((b for b in BATCH_BUCKETS if size <= b), "more")] += 1
+        return ok
+
+    def _forget(self, ops):
+        # Caller holds self.cond. Removes ops from the queue and marks them done in the journal
+        for op in ops:
+            seq = op["seq"]
+            self.pending.pop(seq, None)
+            self.queued_at.pop(seq, None)
+            self.inflight.discard(seq)
+            self.attempts.pop(seq, None)
+            self.retry_at.pop(seq, None)
+            if op["kind"] == "incr":
+                left = self.incr[op["key"]] - op["amount"]
+                if left:
+                    self.incr[op["key"]] = left
+                else:
+                    del self.incr[op["key"]]
+            self.flushes[op["key"]] = self.flushes.get(op["key"], 0) + 1
+        if self.journal is not None:
+            if self.pending:
+                self._append({"done": [op["seq"] for op in ops]})
+            else:
+                self._truncate()
+        self.cond.notify_all()
+
+    def _done(self, ops):
+        # Caller holds self.cond
+        self.counts["applied"] += len(ops)
+        self._forget(ops)
+
+    def _failed(self, ops, error):
+        # Caller holds self.cond. Schedules a retry with backoff, or dead-letters ops out of attempts
+        now, dead = self.clock(), []
+        for op in ops:
+            seq = op["seq"]
+            self.inflight.discard(seq)
+            attempts = self.attempts[seq] = self.attempts.get(seq, 0) + 1
+            if attempts >= self.max_attempts:
+                dead.append(op)
+            else:
+                self.retry_at[seq] = now + min(self.retry_seconds * 2 ** (attempts - 1), MAX_RETRY_SECONDS)
+        if dead:
+            records = [dict(op, error=error, attempts=self.attempts[op["seq"]], failed_at=time.time()) for op in dead]
+            if self.dead_path is not None:
+                with open(self.dead_path, "a", encoding="utf-8") as f:
+                    f.writelines(json.dumps(record, separators=(",", ":")) + "\n" for record in records)
+            self.dead = (self.dead + records)[-DEAD_KEPT:]
+            self.counts["dead_lettered"] += len(dead)
+            self._forget(dead)
+        self.cond.notify_all()
+
+    def run(self):
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            self._apply(batch)
+
+    def start(self):
+        if self.thread is None and not self.synchronous:
+            self.thread = threading.Thread(target=self.run, name="write-behind", daemon=True)
+            self.thread.start()
+        return self
+
+    def flush(self, timeout=None):
+        # Waits until everything submitted so far has been applied; False on timeout
+        deadline = None if timeout is None else self.clock() + timeout
+        with self.cond:
+            if not self.pending:
+                return True
+            last = next(reversed(self.pending))
+            self.urgent = max(self.urgent, last)
+            self.cond.notify_all()
+            while any(seq <= last for seq in self.pending):
+                remaining = None if deadline is None else deadline - self.clock()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self.cond.wait(remaining if remaining is not None else 0.5)
+            return True
+
+    def stop(self, timeout=5.0):
+        # Flushes what it can, then stops the worker; anything left stays in the journal
+        if self.thread is not None:
+            self.flush(timeout)
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+
+    # ✅ Reads
+    def _flushing(self, key):
+        # Caller holds self.cond
+        return any(self.pending[seq]["key"] == key for seq in self.inflight)
+
+    def read_int(self, key, load, attempts=5):
+        # load(key) plus increments not yet applied. While a flush of `key` is
+        # being applied the store may or may not include it yet, so the read
+        # waits for that flush instead of guessing, and is retried if another
+        # one lands between the snapshot and the load.
+        deadline = self.clock() + self.retry_seconds * 5
+        for _ in range(attempts):
+            with self.cond:
+                while self._flushing(key) and self.clock() < deadline:
+                    self.counts["read_waits"] += 1
+                    self.cond.wait(max(0.0, deadline - self.clock()))
+                before = self.flushes.get(key, 0)
+                queued = self.incr.get(key, 0)
+            value = load(key) or 0
+            with self.cond:
+                if self.flushes.get(key, 0) == before and not self._flushing(key):
+                    return value + queued
+                self.counts["read_retries"] += 1
+        with self.cond:
+            return value + self.incr.get(key, 0)
+
+    def pending_ops(self, kind, key=None):
+        # Queued or in-flight ops of one kind (and key), oldest first
+        with self.cond:
+            return [op for op in self.pending.values() if op["kind"] == kind and (key is None or op["key"] == key)]
+
+    def dead_ops(self, kind, key=None):
+        # Recently dead-lettered ops of one kind (and key), oldest first
+        with self.cond:
+            return [op for op in self.dead if op["kind"] == kind and (key is None or op["key"] == key)]
+
+    # ✅ Accounting
+    def stats(self):
+        with self.cond:
+            counts = dict(self.counts)
+            counts["pending"] = len(self.pending)
+            counts["inflight"] = len(self.inflight)
+            counts["oldest_ms"] = (self.clock() - next(iter(self.queued_at.values()))) * 1000 if self.queued_at else 0.0
+            counts["batch_sizes"] = {f"le_{bucket}": {"batches": n} for bucket, n in self.batch_sizes.items()}
+            counts["errors"] = list(self.errors)
+            counts["retrying"] = len(self.attempts)
+            counts["dead_letter"] = [{"seq": op["seq"], "kind": op["kind"], "key": op["key"], "error": op["error"]}
+                                     for op in self.dead[-10:]]
+        counts["mean_batch"] = counts["applied"] / counts["batches"] if counts["batches"] else 0.0
+        return counts
+
+
+class BufferedWorkStore:
+    # A WorkStore whose saves go through a WriteBehind buffer ("save" ops);
+    # records still queued are listed and readable as if already written
+    def __init__(self, store, buffer):
+        self.store = store
+        self.buffer = buffer
+        self.reserved = set()   # names picked but not yet queued (guarded by buffer.cond)
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
+
+    def _pending(self):
+        return {op["key"]: op for op in self.buffer.pending_ops("save")}
+
+    def save(self, name, sections, meta=None):
+        # Reserves a free name the way WorkStore.save would, under the
+        # buffer's lock, and holds it until the op is queued (or, synchronous,
+        # written); the save handler must write exactly op["key"]
+        # (WorkStore.save(..., exact=True)). Pending ops are checked before
+        # manifests: an op that lands in between is then seen on disk.
+        sections = [(title, str(text)) for title, text in sections]
+        with self.buffer.cond:
+            taken = set(self._pending()) | self.reserved
+            base, suffix = name, 1
+            while name in taken or self.store.manifest(name) is not None:
+                stem, ext = os.path.splitext(base)
+                name = f"{stem}_{suffix}{ext}"
+                suffix += 1
+            self.reserved.add(name)
+        try:
+            self.buffer.submit("save", name, sections=sections, meta=meta or {})
+        finally:
+            with self.buffer.cond:
+                self.reserved.discard(name)
+        return {"name": name, "created": time.time(), "meta": meta or {}, "pending": True,
+                "sections": [{"title": title, "size": len(text.encode("utf-8"))} for title, text in sections]}
+
+    def list(self):
+        return sorted(set(self.store.list()) | set(self._pending()))
+
+    def failed(self, user_id=None):
+        # Saves dropped after max_attempts failures (optionally one user's), newest first
+        return [{"name": op["key"], "error": op["error"], "attempts": op["attempts"]}
+                for op in reversed(self.buffer.dead_ops("save"))
+                if user_id is None or op["meta"].get("user_id") == user_id]
+
+    def iter_sections(self, name):
+        op = self._pending().get(name)
+        if op is None:
+            yield from self.store.iter_sections(name)
+            return
+        for title, text in op["sections"]:
+            yield title, text
+
+    def iter_bytes(self, name):
+        if name not in self._pending():
+            yield from self.store.iter_bytes(name)
+            return
+        for title, text in self.iter_sections(name):
+            yield (f"{title}:\n{text}{SECTION_SEPARATOR}").encode("utf-8")
+
+    def open_stream(self, name):
+        return io.BufferedReader(_IterStream(self.iter_bytes(name)))
+
+    def read_text(self, name):
+        return b"".join(self.iter_bytes(name)).decode("utf-8")